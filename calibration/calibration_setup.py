@@ -240,6 +240,9 @@ class SetupCalibration:
             ["actual_net_abstr_surfacewater"] = False
         config_file['RuntimeOptions'][0]['SimulationOption']\
             ['Demand_satisfaction_opts']['neighbouring_cell'] = False
+        # Calibrate against unperturbed climate forcing
+        config_file['RuntimeOptions'][7]['ForcingTransforms']\
+            ['transforms'] = []
 
         config_file['OutputVariable'][1]["VerticalWaterBalanceStorages"]\
             ["maximum_soil_moisture"] = False
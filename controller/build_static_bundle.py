@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+
+"""Build static data bundle."""
+
+# =============================================================================
+# This module reads the static data required for the options of the
+# configuration file and writes it into a static bundle (see static_bundle
+# module) which is used by the static data handler at model start. Existing
+# bundles are verified and built again if they are corrupted.
+#
+# Build static bundle (run once per static data and options):
+#     python -m controller.build_static_bundle Config_ReWaterGAP.json
+# =============================================================================
+
+from controller import staticdata_handler as sd
+from controller import static_bundle as sb
+
+
+def build_static_bundle():
+    """
+    Build static bundle for the static files of the selected options.
+
+    Returns
+    -------
+    bundle_path : pathlib.Path
+        Path of static bundle.
+
+    """
+    static_file_paths = sd.get_static_file_paths()
+
+    static_bundle = sb.open_static_bundle(static_file_paths)
+    if static_bundle is not None:
+        corrupted = static_bundle.verify()
+        bundle_path = \
+            sb.get_bundle_path(static_bundle.manifest['bundle_key'])
+        if len(corrupted) == 0:
+            print(f'Static bundle already built: {bundle_path}')
+            return bundle_path
+        print(f'Static bundle is corrupted ({", ".join(corrupted)}). '
+              f'Building static bundle again.')
+        # Release memory map before the bundle file is written again
+        del static_bundle
+
+    static_data = sd.read_static_data(static_file_paths)
+    return sb.write_static_bundle(static_data, static_file_paths)
+
+
+if __name__ == "__main__":
+    build_static_bundle()
@@ -12,16 +12,23 @@
 """Climate forcing handler."""
 
 
+from abc import ABC, abstractmethod
 import logging
 import json
 from pathlib import Path
 import glob
 import os
 import sys
+import numpy as np
 import xarray as xr
 import watergap_logger as log
 import misc.cli_args as cli
 from controller import configuration_module as cm
+from controller import forcing_transforms as ft
+from controller import input_catalog as ic
+from controller import prepare_forcing as pf
+from controller import read_ahead as ra
+from model.utility import units_conveter_check_neg_precip as check_or_convert
 
 
 # ===============================================================
@@ -36,12 +43,309 @@ modname = modname.split('.')[0]
 # +++++++++++++++++++++++++++++++++++++++++++++++++
 args = cli.parse_cli()
 
+
+def compress_to_land(forcing):
+    """
+    Compress one year of climate forcing to the cells which have values.
+
+    Parameters
+    ----------
+    forcing : xarray.DataArray
+        Forcing of shape (time, lat, lon). Ocean cells are NaN.
+
+    Returns
+    -------
+    cells : tuple
+        Latitude and longitude index of cells with values on any day.
+    land_forcing : xarray.DataArray
+        Forcing of shape (time, cell) with attributes (units) of forcing.
+
+    """
+    forcing = forcing.load()
+    cells = np.nonzero(~np.isnan(forcing.values).all(axis=0))
+    land_forcing = forcing.isel(lat=xr.DataArray(cells[0], dims='cell'),
+                                lon=xr.DataArray(cells[1], dims='cell'))
+    return cells, land_forcing
+
+
+def to_float64(forcing):
+    """
+    Convert forcing which does not need unit conversion to float64.
+
+    Parameters
+    ----------
+    forcing : xarray.DataArray
+        Forcing, e.g. radiation, Unit: [Wm−2]
+
+    Returns
+    -------
+    forcing as float64 array.
+
+    """
+    return forcing.values.astype(np.float64)
+
+
+class ForcingYearBlocks(ABC):
+    """Year-block cache of climate forcing (base of forcing providers)."""
+
+    def __init__(self, grid_shape, run_calib):
+        """
+        Initialise year-block cache.
+
+        Parameters
+        ----------
+        grid_shape : tuple
+            Shape (lat, lon) of model grid.
+        run_calib : bool
+            Calibration run (no forcing transforms are applied).
+
+        """
+        # ==============================================================
+        # Year-block cache of converted climate forcing
+        # ==============================================================
+        # Forcings are materialised one calendar year at a time as
+        # contiguous float64 arrays (time, cell) of the cells which have
+        # forcing values (land cells, see compress_to_land). Only the year
+        # being simulated is kept. The first year is replayed during
+        # spin-up and hence stays resident until the simulation moves on to
+        # the next year. While a year is simulated, the next year is read
+        # ahead in a background thread (see read_ahead module).
+        self.forcing_block = None
+        self.forcing_block_year = None
+
+        # Index window (lat_start, lat_end, lon_start, lon_end) of the active
+        # basin. If set, only the window is read and converted.
+        self.spatial_window = None
+
+        # Daily forcing is scattered from the year block into these grids
+        # (NaN outside land cells).
+        self.daily_forcing = np.full((4,) + tuple(grid_shape), np.nan)
+
+        # Transforms (e.g. delta change for ensemble runs) are applied to
+        # the loaded year block (see forcing_transforms module). Calibration
+        # runs use unperturbed forcing.
+        self.transforms = ft.ForcingTransforms(cm.forcing_transforms,
+                                               run_calib)
+
+        self.read_ahead = ra.ReadAhead(self.load_forcing_block,
+                                       int(cm.end.split('-')[0]),
+                                       cm.read_ahead,
+                                       cm.read_ahead_memory_limit)
+
+    @abstractmethod
+    def read_land_forcing(self, var_name, year):
+        """
+        Read one calendar year of a climate forcing variable for land cells.
+
+        Implemented by forcing providers.
+
+        Parameters
+        ----------
+        var_name : str
+            Variable name (pr, tas, rsds or rlds).
+        year : int
+            Calendar year to read.
+
+        Returns
+        -------
+        cells : tuple
+            Latitude and longitude index of land cells on the model grid.
+        land_forcing : xarray.DataArray
+            Forcing of shape (time, cell) with units.
+
+        """
+
+    def get_land_forcing(self, forcing):
+        """
+        Compress forcing within the spatial window to land cells.
+
+        Parameters
+        ----------
+        forcing : xarray.DataArray
+            Forcing of one year of shape (time, lat, lon) on the model grid.
+
+        Returns
+        -------
+        cells : tuple
+            Latitude and longitude index of land cells on the model grid.
+        land_forcing : xarray.DataArray
+            Forcing of shape (time, cell) with units.
+
+        """
+        # Read only hyperslab of active basin
+        lat_start, lon_start = 0, 0
+        if self.spatial_window is not None:
+            lat_start, lat_end, lon_start, lon_end = self.spatial_window
+            forcing = forcing.isel(lat=slice(lat_start, lat_end),
+                                   lon=slice(lon_start, lon_end))
+
+        cells, land_forcing = compress_to_land(forcing)
+        return (cells[0] + lat_start, cells[1] + lon_start), land_forcing
+
+    def load_forcing_block(self, year):
+        """
+        Read and convert one calendar year of climate forcing.
+
+        Negative precipitation check, unit conversion and forcing transforms
+        are done once for the whole year instead of once per simulated day.
+        Variables are read one after another and only land cells are kept,
+        such that the whole grid of at most one variable is in memory.
+
+        Parameters
+        ----------
+        year : int
+            Calendar year to load.
+
+        Returns
+        -------
+        forcing_block : dict
+            Daily forcing of the year as arrays of shape (time, cell):
+            'precipitation' [mm/day], 'temperature' [K],
+            'down_shortwave_radiation' [Wm−2] and 'down_longwave_radiation'
+            [Wm−2]. 'time' (datetime64[D]) holds the days and 'cells' the
+            latitude and longitude index of the cells of each variable.
+
+        """
+        forcing_block = {'cells': {}}
+
+        for var, var_name, convert in \
+                (('precipitation', 'pr', check_or_convert.to_mm_per_day),
+                 ('temperature', 'tas', check_or_convert.to_kelvin),
+                 ('down_shortwave_radiation', 'rsds', to_float64),
+                 ('down_longwave_radiation', 'rlds', to_float64)):
+            cells, land_forcing = self.read_land_forcing(var_name, year)
+
+            if var == 'precipitation':
+                #  Checking negative precipitation
+                check_or_convert.check_neg_precipitation(land_forcing)
+                forcing_block['time'] = \
+                    land_forcing.time.values.astype('datetime64[D]')
+
+            # Covert precipitation units to mm/day and air tempeature from
+            # degree celcius to Kelvin
+            forcing_block[var] = np.ascontiguousarray(convert(land_forcing))
+            forcing_block['cells'][var] = cells
+            del land_forcing
+
+        return self.transforms.apply(forcing_block)
+
+    def get_forcing_block(self, year):
+        """
+        Get year block of climate forcing, loading it if not yet cached.
+
+        Parameters
+        ----------
+        year : int
+            Calendar year of simulation.
+
+        Returns
+        -------
+        forcing_block : dict
+            See load_forcing_block.
+
+        """
+        if self.forcing_block_year != year:
+            # Release block of previous year before taking over the next one
+            # to keep at most two years (current and read ahead) in memory.
+            self.forcing_block = None
+            self.forcing_block = self.read_ahead.get_block(year)
+            self.forcing_block_year = year
+
+            # Land cells may differ between years
+            self.daily_forcing.fill(np.nan)
+
+            # Start reading next year while current year is simulated
+            self.read_ahead.read_ahead(year + 1, self.forcing_block)
+
+        return self.forcing_block
+
+    def get_daily_forcing(self, date):
+        """
+        Get daily climate forcing from the year-block cache.
+
+        Parameters
+        ----------
+        date : numpy.datetime64
+            Timestamp or date of a daily simulation.
+
+        Returns
+        -------
+        precipitation : array
+            Daily precipitation, Unit: [mm/day]
+        temperature : array
+            Daily air temperature, Unit: [K]
+        down_shortwave_radiation : array
+            Daily downward shortwave radiation, Unit: [Wm−2]
+        down_longwave_radiation : array
+            Daily downward longwave radiation, Unit: [Wm−2]
+
+        Note!!! Arrays are grids which are reused every day and should not
+        be modified in place.
+
+        """
+        date = np.datetime64(date, 'D')
+        year = date.astype('datetime64[Y]').astype(int) + 1970
+        forcing_block = self.get_forcing_block(year)
+
+        day = np.searchsorted(forcing_block['time'], date)
+        if day == len(forcing_block['time']) or \
+                forcing_block['time'][day] != date:
+            log.config_logger(logging.ERROR, modname, f'Climate forcing for '
+                              f'{date} not found', args.debug)
+            sys.exit()  # don't run code if forcing does not exist
+
+        # Scatter land cells into grids
+        for i, var in enumerate(['precipitation', 'temperature',
+                                 'down_shortwave_radiation',
+                                 'down_longwave_radiation']):
+            lat_index, lon_index = forcing_block['cells'][var]
+            self.daily_forcing[i, lat_index, lon_index] = \
+                forcing_block[var][day]
+
+        return self.daily_forcing[0], self.daily_forcing[1], \
+            self.daily_forcing[2], self.daily_forcing[3]
+
+    # Climate forcing provider interface (see input_provider module)
+    get_day = get_daily_forcing
+
+    def set_spatial_window(self, basin):
+        """
+        Restrict reading of climate forcing to bounding window of basin.
+
+        Parameters
+        ----------
+        basin : array
+            Array which contains selected basin (0) and NaN elsewhere.
+
+        Returns
+        -------
+        None.
+
+        """
+        active_cells = ~np.isnan(basin)
+        lat_index = np.where(active_cells.any(axis=1))[0]
+        lon_index = np.where(active_cells.any(axis=0))[0]
+        if len(lat_index) == 0:
+            return
+
+        spatial_window = (int(lat_index[0]), int(lat_index[-1]) + 1,
+                          int(lon_index[0]), int(lon_index[-1]) + 1)
+
+        if spatial_window != self.spatial_window:
+            self.spatial_window = spatial_window
+
+            # Cached and read-ahead blocks belong to the previous window
+            self.forcing_block = None
+            self.forcing_block_year = None
+            self.read_ahead.discard()
+
+
 # ===============================================================
 # Read in filepath from configuration file and opens file
 # ===============================================================
 
 
-class ClimateForcing:
+class ClimateForcing(ForcingYearBlocks):
     """Handles climate forcing data."""
 
     def __init__(self, run_calib):
@@ -70,26 +374,32 @@ class ClimateForcing:
         # ==============================================================
         # Loading in climate forcing
         # ==============================================================
+        # Only files intersecting the simulation period are opened
+        # (see input_catalog module).
         try:
             #  Actual name: Precipitation, Unit:  kg m-2 s-1
             self.precipitation = \
-                xr.open_mfdataset(glob.glob(precipitation_path),
-                                  chunks={'time': 365})
+                xr.open_mfdataset(
+                    ic.select_files(glob.glob(precipitation_path)),
+                    chunks={'time': 365})
 
             #  Actual name: Downward longwave radiation  Unit: Wm−2
             self.down_longwave_radiation = \
-                xr.open_mfdataset(glob.glob(longwave_radiation_path),
-                                  chunks={'time': 365})
+                xr.open_mfdataset(
+                    ic.select_files(glob.glob(longwave_radiation_path)),
+                    chunks={'time': 365})
 
             #  Actual name: Downward shortwave radiation  Unit: Wm−2
             self.down_shortwave_radiation = \
-                xr.open_mfdataset(glob.glob(shortwave_radiation_path),
-                                  chunks={'time': 365})
+                xr.open_mfdataset(
+                    ic.select_files(glob.glob(shortwave_radiation_path)),
+                    chunks={'time': 365})
 
             #  Actual name: Air temperature, Unit: K
             self.temperature = \
-                xr.open_mfdataset(glob.glob(temperature_path),
-                                  chunks={'time': 365})
+                xr.open_mfdataset(
+                    ic.select_files(glob.glob(temperature_path)),
+                    chunks={'time': 365})
 
         except FileNotFoundError as error:
             log.config_logger(logging.ERROR, modname, f'Climate forcing'
@@ -116,6 +426,50 @@ class ClimateForcing:
 
                           self.temperature[self.var_name[3]].units]
 
+        # Use persistent land-only forcing store if it has been prepared for
+        # the current forcing files (see prepare_forcing module).
+        self.forcing_store = pf.open_forcing_store(cm.climate_forcing_path)
+        if self.forcing_store is not None and run_calib is False:
+            print('Climate forcing read from forcing store')
+
+        super().__init__((self.temperature.sizes['lat'],
+                          self.temperature.sizes['lon']), run_calib)
+
+    def read_land_forcing(self, var_name, year):
+        """
+        Read one calendar year of a climate forcing variable for land cells.
+
+        Parameters
+        ----------
+        var_name : str
+            Variable name (pr, tas, rsds or rlds).
+        year : int
+            Calendar year to read.
+
+        Returns
+        -------
+        cells : tuple
+            Latitude and longitude index of land cells on the model grid.
+        land_forcing : xarray.DataArray
+            Forcing of shape (time, cell) with units of the NetCDF files.
+
+        """
+        if self.forcing_store is not None:
+            return self.forcing_store.get_land_year(var_name, year,
+                                                    self.spatial_window)
+
+        forcing_dataset = {'pr': self.precipitation,
+                           'tas': self.temperature,
+                           'rsds': self.down_shortwave_radiation,
+                           'rlds': self.down_longwave_radiation}[var_name]
+        return self.get_land_forcing(
+            forcing_dataset[var_name].sel(time=str(year)))
+
+    @property
+    def coords(self):
+        """Coordinates (time, lat, lon) of climate forcing."""
+        return self.temperature.coords
+
     def check_unitandvarname(self):
         """
         Check data units and variable name.
@@ -185,3 +185,38 @@ calibration_options = config_file['RuntimeOptions'][5]["CalibrateWaterGAP"]
 run_calib = calibration_options["run_calib"]
 calib_forcing = calibration_options["calib_forcing"]
 observed_discharge_filepath = calibration_options["path_to_observed_discharge"]
+
+# =============================================================================
+# Performance options
+# =============================================================================
+performance_options = config_file['RuntimeOptions'][6]['PerformanceOptions']
+# Read climate forcing and water use of the next year in a background thread
+read_ahead = performance_options['read_ahead']
+# Memory budget for current and read-ahead year per input handler, units = GB
+read_ahead_memory_limit = performance_options['read_ahead_memory_limit_gb']
+# Number of threads for vertical water balance (0 = all available cores).
+# Command line option --threads overrides configuration file.
+num_threads = performance_options['num_threads']
+if args.threads is not None:
+    num_threads = args.threads
+if num_threads < 0:
+    log.config_logger(logging.ERROR, modname, 'Number of threads must be '
+                      'positive or 0 (all available cores)', args.debug)
+    sys.exit()
+# Parallel routing over independent basins ("basins") or over cells of the
+# same level of the flow network ("levels", see routing_basins module)
+routing_schedule = performance_options['routing_schedule']
+if routing_schedule not in ('basins', 'levels'):
+    log.config_logger(logging.ERROR, modname, 'Routing schedule must be '
+                      '"basins" or "levels"', args.debug)
+    sys.exit()
+# Number of elevation bands of equal area of the snow water balance. The 100
+# GTOPO30 elevation subgrids are aggregated if less than 100 bands are used
+# (see elevation_bands module).
+num_elevation_bands = performance_options['num_elevation_bands']
+
+# =============================================================================
+# Climate forcing transforms (see forcing_transforms module)
+# =============================================================================
+forcing_transforms = \
+    config_file['RuntimeOptions'][7]['ForcingTransforms']['transforms']
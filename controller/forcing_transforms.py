@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+
+"""Transforms of climate forcing."""
+
+# =============================================================================
+# This module applies transforms (e.g. for uncertainty or ensemble runs) to
+# the climate forcing year block after unit conversion and before the forcing
+# is used in the vertical water balance. Perturbed copies of the climate
+# forcing therefore do not have to be written to disk.
+#
+# Transforms are set in the configuration file as a list and are applied in
+# the given order. Each transform has a "variable" (precipitation,
+# temperature, down_shortwave_radiation or down_longwave_radiation) and a
+# "type":
+#     multiply: multiply forcing by "value".
+#     add: add "value" to forcing (units of converted forcing, e.g. K).
+#     monthly_multiply, monthly_add: delta change per calendar month given as
+#         12 values ("value") or as NetCDF file ("file") with 12 time steps on
+#         the model grid.
+#     stochastic_multiply: multiply forcing by daily lognormal multipliers
+#         with mean 1 and standard deviation "std" (of the logarithm). The
+#         multipliers are the same for all grid cells of a day and are drawn
+#         from a random generator seeded with "seed" and the year, such that
+#         runs are reproducible independent of read ahead and restarts.
+# Precipitation and radiation are set to zero where transforms lead to
+# negative values. Transforms are not applied in calibration runs.
+# =============================================================================
+
+import logging
+import os
+import sys
+import numpy as np
+import xarray as xr
+import watergap_logger as log
+import misc.cli_args as cli
+
+# ===============================================================
+# Get module name and remove the .py extension
+# Module name is passed to logger
+# ===============================================================
+modname = os.path.basename(__file__)
+modname = modname.split('.')[0]
+
+# ++++++++++++++++++++++++++++++++++++++++++++++++
+# Parsing  Arguments for CLI from cli_args module
+# +++++++++++++++++++++++++++++++++++++++++++++++++
+args = cli.parse_cli()
+
+# Forcing variables which can be transformed (keys of forcing block)
+FORCING_VARIABLES = ('precipitation', 'temperature',
+                     'down_shortwave_radiation', 'down_longwave_radiation')
+NON_NEGATIVE_VARIABLES = ('precipitation', 'down_shortwave_radiation',
+                          'down_longwave_radiation')
+# Transform types and their required options
+TRANSFORM_TYPES = {'multiply': ('value',), 'add': ('value',),
+                   'monthly_multiply': (), 'monthly_add': (),
+                   'stochastic_multiply': ('std', 'seed')}
+
+
+def get_monthly_field(transform):
+    """
+    Get monthly delta change of a transform.
+
+    Parameters
+    ----------
+    transform : dict
+        Monthly transform with 12 values ("value") or NetCDF file ("file").
+
+    Returns
+    -------
+    monthly_field : array
+        Delta change per calendar month of shape (12, 1, 1) for values or
+        (12, lat, lon) for files.
+
+    """
+    if 'file' in transform:
+        try:
+            with xr.open_dataset(transform['file'],
+                                 decode_times=False) as monthly_file:
+                var_name = list(monthly_file.data_vars)[0]
+                monthly_field = \
+                    monthly_file[var_name].values.astype(np.float64)
+        except (OSError, ValueError) as error:
+            log.config_logger(logging.ERROR, modname, f'Forcing transform '
+                              f'file could not be opened. \n{error}',
+                              args.debug)
+            sys.exit()
+    else:
+        monthly_field = \
+            np.reshape(np.array(transform.get('value', []), dtype=np.float64),
+                       (-1, 1, 1))
+
+    if monthly_field.ndim != 3 or monthly_field.shape[0] != 12:
+        log.config_logger(logging.ERROR, modname, 'Monthly forcing transform '
+                          'requires 12 values or 12 time steps',
+                          args.debug)
+        sys.exit()
+
+    return monthly_field
+
+
+class ForcingTransforms:
+    """Apply configured transforms to climate forcing year blocks."""
+
+    def __init__(self, transforms, run_calib=False):
+        """
+        Check transforms and read monthly delta change fields.
+
+        Parameters
+        ----------
+        transforms : list
+            Transforms from configuration file. No transform is applied if
+            the list is empty.
+        run_calib : bool, optional
+            Calibration run. Parameters are calibrated against unperturbed
+            forcing, hence transforms are not applied. The default is False.
+
+        """
+        self.transforms = []
+        if run_calib:
+            return
+
+        for transform in transforms:
+            if transform.get('variable') not in FORCING_VARIABLES or \
+                    transform.get('type') not in TRANSFORM_TYPES or \
+                    not all(option in transform for option
+                            in TRANSFORM_TYPES[transform['type']]):
+                log.config_logger(logging.ERROR, modname, f'Forcing '
+                                  f'transform {transform} is not valid. '
+                                  f'Variable must be one of '
+                                  f'{FORCING_VARIABLES}, type one of '
+                                  f'{tuple(TRANSFORM_TYPES)} with options '
+                                  f'{TRANSFORM_TYPES}', args.debug)
+                sys.exit()
+
+            transform = dict(transform)
+            if transform['type'].startswith('monthly'):
+                transform['monthly_field'] = get_monthly_field(transform)
+            self.transforms.append(transform)
+
+    def apply(self, forcing_block):
+        """
+        Apply transforms in place to a climate forcing year block.
+
+        Parameters
+        ----------
+        forcing_block : dict
+            Converted forcing of one year for land cells (see
+            ClimateForcing.load_forcing_block).
+
+        Returns
+        -------
+        forcing_block : dict
+            Transformed forcing block.
+
+        """
+        if len(self.transforms) == 0 or len(forcing_block['time']) == 0:
+            return forcing_block
+
+        months = forcing_block['time'].astype('datetime64[M]').astype(int) % 12
+        year = int(forcing_block['time'][0].astype('datetime64[Y]').
+                   astype(int)) + 1970
+
+        for transform in self.transforms:
+            forcing = forcing_block[transform['variable']]
+
+            if transform['type'] == 'multiply':
+                forcing *= transform['value']
+
+            elif transform['type'] == 'add':
+                forcing += transform['value']
+
+            elif transform['type'] == 'stochastic_multiply':
+                std = transform['std']
+                random_generator = \
+                    np.random.default_rng([transform['seed'], year])
+                # Mean of lognormal multipliers is 1
+                multipliers = random_generator.lognormal(-std**2 / 2, std,
+                                                         len(months))
+                forcing *= multipliers[:, np.newaxis]
+
+            else:
+                # Monthly delta change of the cells of the block
+                monthly_field = transform['monthly_field']
+                if monthly_field.shape[1:] == (1, 1):
+                    monthly_field = monthly_field[:, 0]
+                else:
+                    lat_index, lon_index = \
+                        forcing_block['cells'][transform['variable']]
+                    monthly_field = monthly_field[:, lat_index, lon_index]
+
+                # Day by day to avoid a temporary array of the whole year
+                for day, month in enumerate(months):
+                    if transform['type'] == 'monthly_multiply':
+                        forcing[day] *= monthly_field[month]
+                    else:
+                        forcing[day] += monthly_field[month]
+
+        transformed_variables = {transform['variable']
+                                 for transform in self.transforms}
+        for var in transformed_variables.intersection(NON_NEGATIVE_VARIABLES):
+            # NaN (cells without values) are kept
+            np.maximum(forcing_block[var], 0, out=forcing_block[var])
+
+        return forcing_block
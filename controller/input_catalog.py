@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+
+"""Catalog of input files."""
+
+# =============================================================================
+# This module keeps a catalog (JSON file) per input directory which records
+# the variables, time range and grid of every input file. Handlers use the
+# catalog to open only files which intersect the simulation period instead of
+# reading the metadata of the whole archive at every model start. Catalogs
+# are written to an "input_catalog" folder in the static data folder (as the
+# static bundle), keyed by a hash of the input directory, such that no files
+# are added to the input directories.
+#
+# An entry is valid as long as size and modification time of the file are
+# unchanged, otherwise the file is read again and the catalog is updated.
+# Files without time axis or which cannot be read are always selected such
+# that the handlers behave as without catalog.
+# =============================================================================
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import xarray as xr
+from controller import configuration_module as cm
+
+# Name of the folder of catalogs in the static data folder
+CATALOG_FOLDER = 'input_catalog'
+
+
+def get_simulation_period():
+    """
+    Get period for which input data is required.
+
+    Spin-up years replay the first simulation year and input is read in
+    calendar years. Hence, input is required from the start of the first to
+    the end of the last simulation year.
+
+    Returns
+    -------
+    period_start : numpy.datetime64
+        First required day.
+    period_end : numpy.datetime64
+        Last required day.
+
+    """
+    period_start = np.datetime64(cm.start.split('-')[0] + '-01-01')
+    period_end = np.datetime64(cm.end.split('-')[0] + '-12-31')
+    return period_start, period_end
+
+
+def get_time_range(time):
+    """
+    Get first and last date of a time coordinate which is not decoded.
+
+    Parameters
+    ----------
+    time : xarray.DataArray
+        Time coordinate (decode_times=False).
+
+    Returns
+    -------
+    time_range : list or None
+        First and last date as string (YYYY-MM-DD) or None if time can not be
+        decoded.
+
+    """
+    units = time.attrs.get('units', '')
+    values = np.atleast_1d(time.values)
+    if 'since' not in units or len(values) == 0:
+        return None
+
+    step, reference_date = units.split('since')
+    if step.strip() == 'months':
+        # Months are not supported by CF decoding (see wateruse_handler).
+        reference_date = pd.Timestamp(reference_date.strip())
+        dates = [reference_date + pd.DateOffset(months=int(value))
+                 for value in (values.min(), values.max())]
+    else:
+        dates = xr.coding.times.decode_cf_datetime(
+            np.array([values.min(), values.max()]), units,
+            time.attrs.get('calendar', 'standard'))
+    return [str(pd.Timestamp(date).date()) for date in dates]
+
+
+def get_file_entry(file_path):
+    """
+    Read catalog entry of an input file.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to input file.
+
+    Returns
+    -------
+    entry : dict
+        Size, modification time, variables, time range and grid of the file.
+
+    """
+    file_stat = os.stat(file_path)
+    entry = {'size': file_stat.st_size, 'mtime_ns': file_stat.st_mtime_ns,
+             'variables': None, 'time': None, 'grid': None}
+    try:
+        with xr.open_dataset(file_path, decode_times=False) as dataset:
+            entry['variables'] = list(dataset.data_vars)
+            entry['grid'] = {dim: int(size) for dim, size
+                             in dataset.sizes.items() if dim != 'time'}
+            if 'time' in dataset.coords:
+                entry['time'] = get_time_range(dataset.time)
+    except (OSError, ValueError):
+        # Not a NetCDF file. Handlers report such files when opening them.
+        pass
+    return entry
+
+
+def get_catalog_path(directory):
+    """
+    Get path of catalog of an input directory.
+
+    Parameters
+    ----------
+    directory : str
+        Input directory.
+
+    Returns
+    -------
+    catalog_path : pathlib.Path
+        Path of catalog file.
+
+    """
+    catalog_key = hashlib.sha256(
+        os.path.abspath(directory).encode()).hexdigest()[:16]
+    return Path(cm.static_land_data_path) / CATALOG_FOLDER / \
+        (catalog_key + '.json')
+
+
+def get_catalog(directory, file_names):
+    """
+    Get catalog of input directory and update entries of changed files.
+
+    Parameters
+    ----------
+    directory : str
+        Input directory.
+    file_names : list
+        Names of files in directory which should be in the catalog.
+
+    Returns
+    -------
+    catalog : dict
+        Catalog entries per file name.
+
+    """
+    catalog_path = get_catalog_path(directory)
+    try:
+        with open(catalog_path, encoding="utf-8") as catalog_file:
+            catalog = json.load(catalog_file)
+    except (OSError, ValueError):
+        catalog = {}
+
+    catalog_changed = False
+    for file_name in file_names:
+        file_stat = os.stat(os.path.join(directory, file_name))
+        entry = catalog.get(file_name)
+        if entry is None or entry['size'] != file_stat.st_size or \
+                entry['mtime_ns'] != file_stat.st_mtime_ns:
+            catalog[file_name] = \
+                get_file_entry(os.path.join(directory, file_name))
+            catalog_changed = True
+
+    if catalog_changed:
+        try:
+            catalog_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(catalog_path, 'w', encoding="utf-8") as catalog_file:
+                json.dump(catalog, catalog_file, indent=2)
+        except OSError:
+            # Read-only static data folder. Catalog is used without saving it.
+            pass
+
+    return catalog
+
+
+def select_files(file_paths, period=None):
+    """
+    Select input files which intersect the simulation period.
+
+    Parameters
+    ----------
+    file_paths : list
+        Paths to input files (e.g. from glob).
+    period : tuple, optional
+        First and last required day. The default is None (simulation period,
+        see get_simulation_period).
+
+    Returns
+    -------
+    selected_file_paths : list
+        Paths to files intersecting the period and files without time axis.
+        All files are returned if no file intersects the period such that
+        the handlers report the missing period as before.
+
+    """
+    if period is None:
+        period = get_simulation_period()
+    period_start, period_end = \
+        [np.datetime64(date, 'D') for date in period]
+
+    file_names = {}
+    for file_path in file_paths:
+        directory, file_name = os.path.split(file_path)
+        file_names.setdefault(directory, []).append(file_name)
+    catalogs = {directory: get_catalog(directory, names)
+                for directory, names in file_names.items()}
+
+    selected_file_paths = []
+    period_in_files = False
+    for file_path in file_paths:
+        directory, file_name = os.path.split(file_path)
+        time_range = catalogs[directory][file_name]['time']
+        if time_range is None:
+            selected_file_paths.append(file_path)
+        elif np.datetime64(time_range[0]) <= period_end and \
+                np.datetime64(time_range[1]) >= period_start:
+            selected_file_paths.append(file_path)
+            period_in_files = True
+
+    if period_in_files is False:
+        return list(file_paths)
+    return selected_file_paths
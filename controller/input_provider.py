@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+
+"""In-memory input providers for climate forcing and water use."""
+
+# =============================================================================
+# Climate forcing and water use are passed to the model through input
+# providers. A provider has the following methods and attributes:
+#
+# Climate forcing provider (default: climateforcing_handler.ClimateForcing)
+#     coords: xarray coordinates (time, lat, lon) of the forcing.
+#     get_day(date): daily precipitation [mm/day], temperature [K], downward
+#         shortwave and longwave radiation [Wm−2] on the model grid.
+#     set_spatial_window(basin): called for basin and calibration runs.
+#         Forcing may then be provided for the bounding window of the basin
+#         only (NaN elsewhere).
+#
+# Water use provider (default: wateruse_handler.Wateruse)
+#     get_month(year, month): potential (actual for calibration) net
+#         abstraction from groundwater and surface water and potential water
+#         withdrawal and consumptive use from surface water for irrigation on
+#         the model grid, Unit: [m3/month]
+#
+# The providers of this module hold arrays which are created by external
+# Python code (e.g. coupled models or ensemble drivers) such that the model
+# can be run without writing the input to NetCDF files first. Arrays are
+# converted to float64 once (float64 arrays are not copied). Climate forcing
+# is copied into the same year blocks as NetCDF forcing (land cells of the
+# spatial window, negative precipitation check and forcing transforms, see
+# climateforcing_handler). Monthly water use grids are views into the arrays.
+#
+# Example:
+#     forcing = ArrayForcingProvider(precipitation, temperature,
+#                                    down_shortwave_radiation,
+#                                    down_longwave_radiation, time, lat, lon,
+#                                    run_calib)
+#     wateruse = ArrayWateruseProvider(net_abstraction_gw, net_abstraction_sw,
+#                                      water_withdrawal_sw_irri,
+#                                      consumptive_use_sw_irri, months)
+#     run_watergap.run(forcing_provider=forcing, wateruse_provider=wateruse)
+# =============================================================================
+
+import logging
+import os
+import sys
+import numpy as np
+import xarray as xr
+import watergap_logger as log
+import misc.cli_args as cli
+from controller import climateforcing_handler as cf
+
+# ===============================================================
+# Get module name and remove the .py extension
+# Module name is passed to logger
+# ===============================================================
+modname = os.path.basename(__file__)
+modname = modname.split('.')[0]
+
+# ++++++++++++++++++++++++++++++++++++++++++++++++
+# Parsing  Arguments for CLI from cli_args module
+# +++++++++++++++++++++++++++++++++++++++++++++++++
+args = cli.parse_cli()
+
+# Units of climate forcing arrays (units of the model)
+FORCING_UNITS = {'pr': 'mm/day', 'tas': 'K', 'rsds': 'W m-2', 'rlds': 'W m-2'}
+
+
+def get_grids(arrays, names, num_of_steps, grid_shape):
+    """
+    Check shape of input arrays and convert them to float64.
+
+    Parameters
+    ----------
+    arrays : tuple
+        Input arrays of shape (time, lat, lon).
+    names : tuple
+        Names of input arrays (for error message).
+    num_of_steps : int
+        Number of time steps.
+    grid_shape : tuple
+        Shape (lat, lon) of model grid.
+
+    Returns
+    -------
+    grids : list
+        Input arrays as float64. Arrays are not copied if they are already
+        float64.
+
+    """
+    required_shape = (num_of_steps,) + tuple(grid_shape)
+    grids = []
+    for array, name in zip(arrays, names):
+        grid = np.asarray(array, dtype=np.float64)
+        if grid.shape != required_shape:
+            log.config_logger(logging.ERROR, modname, f'{name} has shape '
+                              f'{grid.shape} but {required_shape} (time, '
+                              f'lat, lon) is required', args.debug)
+            sys.exit()
+        grids.append(grid)
+    return grids
+
+
+class ArrayForcingProvider(cf.ForcingYearBlocks):
+    """Provide climate forcing from arrays in memory."""
+
+    def __init__(self, precipitation, temperature, down_shortwave_radiation,
+                 down_longwave_radiation, time, lat, lon, run_calib=False):
+        """
+        Initialise climate forcing provider.
+
+        Parameters
+        ----------
+        precipitation : array
+            Daily precipitation of shape (time, lat, lon), Unit: [mm/day]
+        temperature : array
+            Daily air temperature of shape (time, lat, lon), Unit: [K]
+        down_shortwave_radiation : array
+            Daily downward shortwave radiation of shape (time, lat, lon),
+            Unit: [Wm−2]
+        down_longwave_radiation : array
+            Daily downward longwave radiation of shape (time, lat, lon),
+            Unit: [Wm−2]
+        time : array
+            Days of forcing (sorted).
+        lat : array
+            Latitude of model grid.
+        lon : array
+            Longitude of model grid.
+        run_calib : bool, optional
+            Calibration run (no forcing transforms are applied). The default
+            is False.
+
+        """
+        self.time = np.asarray(time).astype('datetime64[D]')
+        self.coords = \
+            xr.Dataset(coords={'time': self.time.astype('datetime64[ns]'),
+                               'lat': lat, 'lon': lon}).coords
+
+        grids = get_grids((precipitation, temperature,
+                           down_shortwave_radiation, down_longwave_radiation),
+                          ('precipitation', 'temperature',
+                           'down_shortwave_radiation',
+                           'down_longwave_radiation'),
+                          len(self.time), (len(lat), len(lon)))
+        self.forcing = dict(zip(('pr', 'tas', 'rsds', 'rlds'), grids))
+
+        super().__init__((len(lat), len(lon)), run_calib)
+
+    def read_land_forcing(self, var_name, year):
+        """
+        Get one calendar year of a climate forcing variable for land cells.
+
+        Parameters
+        ----------
+        var_name : str
+            Variable name (pr, tas, rsds or rlds).
+        year : int
+            Calendar year.
+
+        Returns
+        -------
+        cells : tuple
+            Latitude and longitude index of land cells on the model grid.
+        land_forcing : xarray.DataArray
+            Forcing of shape (time, cell) with units of the model. Values
+            are copied, hence transforms do not change the arrays of the
+            provider.
+
+        """
+        year_start, year_end = \
+            np.searchsorted(self.time, [np.datetime64(str(year), 'D'),
+                                        np.datetime64(str(year + 1), 'D')])
+        forcing = xr.DataArray(self.forcing[var_name][year_start:year_end],
+                               dims=('time', 'lat', 'lon'),
+                               coords={'time':
+                                       self.time[year_start:year_end]},
+                               attrs={'units': FORCING_UNITS[var_name]})
+        return self.get_land_forcing(forcing)
+
+
+class ArrayWateruseProvider:
+    """Provide monthly water use from arrays in memory."""
+
+    def __init__(self, net_abstraction_gw, net_abstraction_sw,
+                 water_withdrawal_sw_irri, consumptive_use_sw_irri, time):
+        """
+        Initialise water use provider.
+
+        Parameters
+        ----------
+        net_abstraction_gw : array
+            Monthly potential (actual for calibration) net abstraction from
+            groundwater of shape (time, lat, lon), Unit: [m3/month]
+        net_abstraction_sw : array
+            Monthly potential (actual for calibration) net abstraction from
+            surface water of shape (time, lat, lon), Unit: [m3/month]
+        water_withdrawal_sw_irri : array
+            Monthly potential water withdrawal from surface water for
+            irrigation of shape (time, lat, lon), Unit: [m3/month]
+        consumptive_use_sw_irri : array
+            Monthly potential consumptive use from surface water for
+            irrigation of shape (time, lat, lon), Unit: [m3/month]
+        time : array
+            Months of water use (any date within the month).
+
+        """
+        self.time = np.asarray(time).astype('datetime64[M]')
+        grid_shape = np.shape(net_abstraction_gw)[1:]
+
+        # pylint: disable-next=unbalanced-tuple-unpacking
+        self.net_abstraction_gw, self.net_abstraction_sw, \
+            self.water_withdrawal_sw_irri, self.consumptive_use_sw_irri = \
+            get_grids((net_abstraction_gw, net_abstraction_sw,
+                       water_withdrawal_sw_irri, consumptive_use_sw_irri),
+                      ('net_abstraction_gw', 'net_abstraction_sw',
+                       'water_withdrawal_sw_irri', 'consumptive_use_sw_irri'),
+                      len(self.time), grid_shape)
+
+    def get_month(self, year, month):
+        """
+        Get monthly water use.
+
+        Parameters
+        ----------
+        year : int
+            Calendar year of simulation.
+        month : int
+            Month of simulation.
+
+        Returns
+        -------
+        net_abstraction_gw : array
+            Potential (actual for calibration) net abstraction from
+            groundwater, Unit: [m3/month]
+        net_abstraction_sw : array
+            Potential (actual for calibration) net abstraction from surface
+            water, Unit: [m3/month]
+        water_withdrawal_sw_irri : array
+            Potential water withdrawal from surface water for irrigation,
+            Unit: [m3/month]
+        consumptive_use_sw_irri : array
+            Potential consumptive use from surface water for irrigation,
+            Unit: [m3/month]
+
+        Note!!! Arrays are views into the arrays of the provider and should
+        not be modified in place.
+
+        """
+        month_index = \
+            np.where(self.time == np.datetime64(f'{year:04d}-{month:02d}'))[0]
+        if len(month_index) == 0:
+            log.config_logger(logging.ERROR, modname, f'Water use data for '
+                              f'{year}-{month} not found', args.debug)
+            sys.exit()  # dont run code if data does not exist
+
+        return self.net_abstraction_gw[month_index[0]], \
+            self.net_abstraction_sw[month_index[0]], \
+            self.water_withdrawal_sw_irri[month_index[0]], \
+            self.consumptive_use_sw_irri[month_index[0]]
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+
+"""Prepare persistent land-only climate forcing store."""
+
+# =============================================================================
+# This module converts the climate forcing NetCDF files (precipitation,
+# temperature, shortwave and longwave radiation) into a land-only,
+# time-major binary store which is memory-mapped by the climate forcing
+# handler. Ocean cells (NaN in the forcing) are dropped such that only
+# ~67k of the 259200 cells are stored. Values are stored in the data type and
+# units of the NetCDF files such that the model results are identical to
+# reading the NetCDF files directly.
+#
+# The store is keyed by a fingerprint of the forcing files (relative path,
+# size and modification time). Changing, adding or removing forcing files
+# therefore leads to a new key and the store has to be prepared again.
+#
+# Prepare forcing store (run once per climate forcing):
+#     python -m controller.prepare_forcing Config_ReWaterGAP.json
+# =============================================================================
+
+import hashlib
+import glob
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+import numpy as np
+import xarray as xr
+import watergap_logger as log
+import misc.cli_args as cli
+from controller import configuration_module as cm
+
+# ===============================================================
+# Get module name and remove the .py extension
+# Module name is passed to logger
+# ===============================================================
+modname = os.path.basename(__file__)
+modname = modname.split('.')[0]
+
+# ++++++++++++++++++++++++++++++++++++++++++++++++
+# Parsing  Arguments for CLI from cli_args module
+# +++++++++++++++++++++++++++++++++++++++++++++++++
+args = cli.parse_cli()
+
+# Climate forcing folders and respective variable names
+FORCING_VARIABLES = {'precipitation': 'pr',
+                     'temperature': 'tas',
+                     'rad_shortwave': 'rsds',
+                     'rad_longwave': 'rlds'}
+
+
+def get_forcing_files(forcing_path):
+    """
+    Get sorted climate forcing files per variable.
+
+    Parameters
+    ----------
+    forcing_path : str
+        Path to climate forcing folder.
+
+    Returns
+    -------
+    forcing_files : dict
+        Forcing files per forcing folder.
+
+    """
+    return {folder: sorted(glob.glob(str(Path(forcing_path + '/' + folder +
+                                              r'/*'))))
+            for folder in FORCING_VARIABLES}
+
+
+def get_store_key(forcing_files):
+    """
+    Get key of forcing store from fingerprint of the forcing files.
+
+    Parameters
+    ----------
+    forcing_files : dict
+        Forcing files per forcing folder.
+
+    Returns
+    -------
+    store_key : str
+        Hash of relative path, size and modification time of all files.
+
+    """
+    fingerprint = hashlib.sha256()
+    for folder, files in forcing_files.items():
+        for file in files:
+            file_stat = os.stat(file)
+            fingerprint.update(f'{folder}/{os.path.basename(file)}:'
+                               f'{file_stat.st_size}:'
+                               f'{file_stat.st_mtime_ns};'.encode())
+    return fingerprint.hexdigest()[:16]
+
+
+def get_store_path(forcing_path, store_key):
+    """
+    Get path of forcing store.
+
+    Parameters
+    ----------
+    forcing_path : str
+        Path to climate forcing folder.
+    store_key : str
+        Key of forcing store.
+
+    Returns
+    -------
+    store_path : pathlib.Path
+        Path of forcing store.
+
+    """
+    return Path(forcing_path) / 'forcing_store' / store_key
+
+
+class ForcingStore:
+    """Memory-mapped land-only climate forcing store."""
+
+    def __init__(self, store_path):
+        with open(store_path / 'manifest.json', encoding="utf-8") as manifest:
+            self.manifest = json.load(manifest)
+
+        # Latitude and longitude index of land cells, shape (land_cell, 2)
+        self.land_index = np.load(store_path / 'land_index.npy')
+        self.time = np.load(store_path / 'time.npy')
+
+        # Memory-mapped forcing, shape (time, land_cell)
+        self.forcing = {var_name: np.load(store_path / (var_name + '.npy'),
+                                          mmap_mode='r')
+                        for var_name in FORCING_VARIABLES.values()}
+
+    def get_land_year(self, var_name, year, spatial_window=None):
+        """
+        Get one calendar year of a climate forcing variable for land cells.
+
+        Parameters
+        ----------
+        var_name : str
+            Variable name (pr, tas, rsds or rlds).
+        year : int
+            Calendar year.
+        spatial_window : tuple, optional
+            Index window (lat_start, lat_end, lon_start, lon_end) to read.
+            The default is None (whole grid).
+
+        Returns
+        -------
+        cells : tuple
+            Latitude and longitude index of land cells (within window) on
+            the model grid.
+        forcing : xarray.DataArray
+            Forcing of shape (time, cell) with units of the NetCDF files.
+
+        """
+        year_start = np.searchsorted(self.time, np.datetime64(str(year), 'D'))
+        year_end = np.searchsorted(self.time,
+                                   np.datetime64(str(year + 1), 'D'))
+
+        if spatial_window is None:
+            spatial_window = (0, self.manifest['lat_length'],
+                              0, self.manifest['lon_length'])
+        lat_start, lat_end, lon_start, lon_end = spatial_window
+
+        # Land cells within window
+        in_window = np.where((self.land_index[:, 0] >= lat_start) &
+                             (self.land_index[:, 0] < lat_end) &
+                             (self.land_index[:, 1] >= lon_start) &
+                             (self.land_index[:, 1] < lon_end))[0]
+
+        # Read land cells of the year without decompression (slice of the
+        # memory map).
+        land_forcing = self.forcing[var_name][year_start:year_end]
+        if len(in_window) < len(self.land_index):
+            land_forcing = land_forcing[:, in_window]
+
+        cells = (self.land_index[in_window, 0], self.land_index[in_window, 1])
+        return cells, \
+            xr.DataArray(np.asarray(land_forcing), dims=('time', 'cell'),
+                         coords={'time': self.time[year_start:year_end]},
+                         attrs={'units': self.manifest['units'][var_name]})
+
+
+def open_forcing_store(forcing_path):
+    """
+    Open forcing store if it has been prepared for the current forcing files.
+
+    Parameters
+    ----------
+    forcing_path : str
+        Path to climate forcing folder.
+
+    Returns
+    -------
+    forcing_store : ForcingStore or None
+        Forcing store or None if not prepared.
+
+    """
+    store_key = get_store_key(get_forcing_files(forcing_path))
+    store_path = get_store_path(forcing_path, store_key)
+
+    # Manifest is written last and hence marks a complete store
+    if (store_path / 'manifest.json').exists():
+        return ForcingStore(store_path)
+    return None
+
+
+def prepare_forcing(forcing_path):
+    """
+    Convert climate forcing NetCDF files into land-only forcing store.
+
+    Parameters
+    ----------
+    forcing_path : str
+        Path to climate forcing folder.
+
+    Returns
+    -------
+    store_path : pathlib.Path
+        Path of forcing store.
+
+    """
+    forcing_files = get_forcing_files(forcing_path)
+    store_key = get_store_key(forcing_files)
+    store_path = get_store_path(forcing_path, store_key)
+
+    if (store_path / 'manifest.json').exists():
+        print(f'Forcing store already prepared: {store_path}')
+        return store_path
+
+    try:
+        forcing = {var_name: xr.open_mfdataset(forcing_files[folder],
+                                               chunks={'time': 365})[var_name]
+                   for folder, var_name in FORCING_VARIABLES.items()}
+    except (OSError, ValueError) as error:
+        log.config_logger(logging.ERROR, modname, f'Climate forcing could '
+                          f'not be opened. \n{error}', args.debug)
+        sys.exit()  # don't run code if file does not exist
+
+    # =========================================================================
+    # Time axis must be the same for all variables
+    # =========================================================================
+    time = forcing['pr'].time.values.astype('datetime64[D]')
+    for var_name, var in forcing.items():
+        if not np.array_equal(var.time.values.astype('datetime64[D]'), time):
+            log.config_logger(logging.ERROR, modname, f'Time axis of '
+                              f'{var_name} differs from pr', args.debug)
+            sys.exit()
+
+    # =========================================================================
+    # Land cells are cells with forcing values on the first day
+    # =========================================================================
+    land_mask = np.zeros(forcing['pr'].shape[1:], dtype=bool)
+    for var in forcing.values():
+        land_mask |= ~np.isnan(var[0].values)
+    land_index = np.argwhere(land_mask).astype(np.int32)
+
+    store_path.mkdir(parents=True, exist_ok=True)
+    np.save(store_path / 'land_index.npy', land_index)
+    np.save(store_path / 'time.npy', time)
+
+    # =========================================================================
+    # Write time-major land-only forcing year by year
+    # =========================================================================
+    years = np.unique(time.astype('datetime64[Y]').astype(int) + 1970)
+    for var_name, var in forcing.items():
+        print(f'Preparing {var_name} for {len(land_index)} land cells')
+        land_forcing = \
+            np.lib.format.open_memmap(store_path / (var_name + '.npy'),
+                                      mode='w+', dtype=var.dtype,
+                                      shape=(len(time), len(land_index)))
+        year_start = 0
+        for year in years:
+            grid_forcing = var.sel(time=str(year)).values
+            year_end = year_start + grid_forcing.shape[0]
+
+            # Ocean cells must not have values in any time step, else
+            # results would differ from reading the NetCDF files directly.
+            if not np.isnan(grid_forcing[:, ~land_mask]).all():
+                log.config_logger(logging.ERROR, modname, f'{var_name} has '
+                                  f'values outside land cells in {year}',
+                                  args.debug)
+                sys.exit()
+
+            land_forcing[year_start:year_end] = \
+                grid_forcing[:, land_index[:, 0], land_index[:, 1]]
+            year_start = year_end
+        land_forcing.flush()
+        del land_forcing
+
+    manifest = {'store_key': store_key,
+                'lat_length': int(land_mask.shape[0]),
+                'lon_length': int(land_mask.shape[1]),
+                'land_cells': int(len(land_index)),
+                'start': str(time[0]), 'end': str(time[-1]),
+                'units': {var_name: var.units
+                          for var_name, var in forcing.items()},
+                'files': {folder: [os.path.basename(file) for file in files]
+                          for folder, files in forcing_files.items()}}
+
+    with open(store_path / 'manifest.json', 'w', encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+
+    print(f'Forcing store prepared: {store_path}')
+    return store_path
+
+
+if __name__ == "__main__":
+    prepare_forcing(cm.climate_forcing_path)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+
+"""Read ahead of yearly input blocks."""
+
+# =============================================================================
+# This module reads the input block (climate forcing or water use) of the
+# next simulation year in a background thread while the current year is
+# being simulated (double buffering). The handoff to the main loop is
+# blocking: if the next year is requested before it has been read, the main
+# loop waits for the background thread instead of reading the data twice.
+# =============================================================================
+
+import concurrent.futures
+import logging
+import os
+import watergap_logger as log
+import misc.cli_args as cli
+
+# ===============================================================
+# Get module name and remove the .py extension
+# Module name is passed to logger
+# ===============================================================
+modname = os.path.basename(__file__)
+modname = modname.split('.')[0]
+
+# ++++++++++++++++++++++++++++++++++++++++++++++++
+# Parsing  Arguments for CLI from cli_args module
+# +++++++++++++++++++++++++++++++++++++++++++++++++
+args = cli.parse_cli()
+
+
+def get_block_size(block):
+    """
+    Get memory size of an input block.
+
+    Parameters
+    ----------
+    block : dict
+        Input block with arrays as values.
+
+    Returns
+    -------
+    block_size : int
+        Size of all arrays in block, Unit: [bytes]
+
+    """
+    return sum(value.nbytes for value in block.values()
+               if hasattr(value, 'nbytes'))
+
+
+class ReadAhead:
+    """Read yearly input blocks one year ahead in a background thread."""
+
+    def __init__(self, load_block, last_year, enabled, memory_limit):
+        """
+        Initialise read ahead.
+
+        Parameters
+        ----------
+        load_block : function
+            Function which takes a year and returns the input block.
+        last_year : int
+            Last year of simulation. No block is read ahead beyond this year.
+        enabled : bool
+            Read ahead in background thread if True else read synchronously.
+        memory_limit : float
+            Memory budget for current and read-ahead block, Unit: [GB].
+            If both blocks do not fit into the budget, the next block is read
+            synchronously when needed. A warning is given if a single block
+            does not fit into the budget.
+
+        """
+        self.load_block = load_block
+        self.last_year = last_year
+        self.enabled = enabled
+        self.memory_limit = memory_limit * 1e9  # units = bytes
+
+        self.pending_year = None
+        self.pending_block = None
+
+    def read_ahead(self, year, current_block):
+        """
+        Start reading block of the given year in a background thread.
+
+        Parameters
+        ----------
+        year : int
+            Year to read ahead.
+        current_block : dict
+            Block which is currently in use (required for memory budget).
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.enabled is False or year > self.last_year or \
+                year == self.pending_year:
+            return
+
+        # Only read ahead if current and next block fit into the budget.
+        if 2 * get_block_size(current_block) > self.memory_limit:
+            return
+
+        # Note!!! executor is shut down without waiting. The submitted read
+        # is still completed and the worker thread exits afterwards.
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.pending_block = executor.submit(self.load_block, year)
+        self.pending_year = year
+        executor.shutdown(wait=False)
+
+    def get_block(self, year):
+        """
+        Get block of the given year.
+
+        Waits for the background thread if the year is being read ahead,
+        otherwise the block is read synchronously.
+
+        Parameters
+        ----------
+        year : int
+            Year of block.
+
+        Returns
+        -------
+        block : dict
+            Input block of the given year.
+
+        """
+        if self.pending_year == year:
+            # Blocking handoff. Errors of the background read are raised here.
+            block = self.pending_block.result()
+        else:
+            if self.pending_block is not None:
+                # Block read ahead for a different year is not needed anymore
+                self.pending_block.cancel()
+            block = self.load_block(year)
+
+        self.pending_year = None
+        self.pending_block = None
+
+        block_size = get_block_size(block)
+        if block_size > self.memory_limit:
+            log.config_logger(logging.WARNING, modname, f'Input block of '
+                              f'{year} needs {block_size / 1e9:.1f} GB which '
+                              f'exceeds read_ahead_memory_limit_gb '
+                              f'({self.memory_limit / 1e9:g} GB)', args.debug)
+
+        return block
+
+    def discard(self):
+        """
+        Discard block which is being read ahead (e.g. if input has changed).
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.pending_block is not None:
+            self.pending_block.cancel()
+        self.pending_year = None
+        self.pending_block = None
@@ -18,25 +18,32 @@
 
 
 import numpy as np
+import xarray as xr
 from termcolor import colored
 from controller import climateforcing_handler as cf
 from controller import staticdata_handler as sd
 from controller import configuration_module as cm
+from controller import simulation_calendar as sc
 
 
 
 class InitializeForcingsandStaticdata:
     """Reads in climate forcings and static data."""
 
-    def __init__(self, run_calib):
+    def __init__(self, run_calib, forcing_provider=None):
         # =====================================================================
         # Get static data and climate forcing
         # Please see staticdata and climateforcing handlers for varibale units
+        # Climate forcing is read from NetCDF files unless an input provider
+        # is passed (see input_provider module).
         # =====================================================================
         self.static_data = sd.StaticData(run_calib)
-        self.climate_forcing = cf.ClimateForcing(run_calib)
-        if run_calib is False:
-            self.climate_forcing.check_unitandvarname()
+        if forcing_provider is None:
+            self.climate_forcing = cf.ClimateForcing(run_calib)
+            if run_calib is False:
+                self.climate_forcing.check_unitandvarname()
+        else:
+            self.climate_forcing = forcing_provider
 
         # =====================================================================
         # Get grid to create ouput variable
@@ -44,11 +51,12 @@ class InitializeForcingsandStaticdata:
         # Note!!! grid_coord contains latitiude, longitude and time (based on
         # simulation period ).
         # I am only selecting the coordinates(lat, lon and time) of the
-        # temperature variable. the actual temperature forcing is not used here
+        # climate forcing. the actual climate forcing is not used here
+        forcing_grid = xr.Dataset(coords=self.climate_forcing.coords)
 
         # Make sure user date is in valid within the data date
-        data_start_date = self.climate_forcing.temperature.time[0].values.astype('datetime64[D]')
-        data_end_date = self.climate_forcing.temperature.time[-1].values.astype('datetime64[D]')
+        data_start_date = forcing_grid.time[0].values.astype('datetime64[D]')
+        data_end_date = forcing_grid.time[-1].values.astype('datetime64[D]')
 
         user_start_date = np.datetime64(cm.start)
         user_end_date = np.datetime64(cm.end)
@@ -62,12 +70,10 @@ class InitializeForcingsandStaticdata:
             if cm.start.split("-")[0] == cm.end.split("-")[0]:
                 year_end = cm.end.split('-')[0]+'-12-31'
                 self.grid_coords = \
-                    self.climate_forcing.temperature.\
-                    sel(time=slice(cm.start, year_end)).coords
+                    forcing_grid.sel(time=slice(cm.start, year_end)).coords
             else:
                 self.grid_coords = \
-                    self.climate_forcing.temperature.sel(time=slice(cm.start,
-                                                                    cm.end)).coords
+                    forcing_grid.sel(time=slice(cm.start, cm.end)).coords
         else:
             raise ValueError(colored('Start or end date of simulation period '
                                      'is not included in the data. '
@@ -77,3 +83,12 @@ class InitializeForcingsandStaticdata:
         # to create temporary data.
         self.lat_length = len(self.grid_coords['lat'].values)
         self.lon_length = len(self.grid_coords['lon'].values)
+
+        # =====================================================================
+        # Get calendar of simulation days
+        # =====================================================================
+        # Model components take the index of the simulated day and look up
+        # year, month, day and flags in the calendar.
+        self.calendar = \
+            sc.SimulationCalendar(self.grid_coords['time'].values,
+                                  cm.RESERVOIR_OPT_YEARS)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+
+"""Simulation calendar."""
+
+# =============================================================================
+# This module computes the calendar of all simulation days (time coordinate of
+# grid_coords) once at model start. Model components take the index of the
+# simulated day (day index) and look up year, month, day and flags (e.g. first
+# day of month) in the calendar instead of parsing dates every time step.
+# =============================================================================
+
+import numpy as np
+
+# Number of days per month used to convert monthly water use to daily values
+# and for reservoir release. Note!!! February has 28 days also in leap years.
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31],
+                         dtype=np.int64)
+
+
+class SimulationCalendar:
+    """Calendar of simulation days."""
+
+    def __init__(self, time, reservoir_opt_years):
+        """
+        Compute calendar of simulation days.
+
+        Parameters
+        ----------
+        time : array
+            Dates of simulation (sorted), e.g. grid_coords['time'].
+        reservoir_opt_years : array or int
+            First days of years in which reservoirs are activated (see
+            configuration_module). 0 if reservoirs are not considered.
+
+        """
+        self.dates = np.asarray(time).astype('datetime64[D]')
+        years = self.dates.astype('datetime64[Y]')
+        months = self.dates.astype('datetime64[M]')
+
+        # Calendar year, month (1-12), day of month (1-31) and day of year
+        # (1-366) of every simulation day
+        self.year = years.astype(np.int64) + 1970
+        self.month = months.astype(np.int64) % 12 + 1
+        self.day = (self.dates - months).astype(np.int64) + 1
+        self.day_of_year = (self.dates - years).astype(np.int64) + 1
+        self.days_in_month = DAYS_IN_MONTH[self.month - 1]
+
+        # First available day of each month (e.g. simulation start of a
+        # restart run in the middle of a month). Water use is read on these
+        # days.
+        self.is_first_of_month = np.ones(len(self.dates), dtype=bool)
+        self.is_first_of_month[1:] = months[1:] != months[:-1]
+
+        self.is_year_end = (self.month == 12) & (self.day == 31)
+
+        # First day of years in which reservoirs are activated
+        if isinstance(reservoir_opt_years, np.ndarray):
+            self.is_reservoir_year = \
+                np.isin(self.dates,
+                        reservoir_opt_years.astype('datetime64[D]'))
+        else:
+            self.is_reservoir_year = np.zeros(len(self.dates), dtype=bool)
+
+    def get_day_index(self, date):
+        """
+        Get day index of a date.
+
+        Parameters
+        ----------
+        date : numpy.datetime64
+            Date of simulation.
+
+        Returns
+        -------
+        day_index : int
+            Index of date in calendar.
+
+        """
+        return int(np.searchsorted(self.dates, np.datetime64(date, 'D')))
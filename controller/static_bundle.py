@@ -0,0 +1,459 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+
+"""Memory-mapped static data bundle."""
+
+# =============================================================================
+# This module writes all static data (NetCDF and CSV files read by the static
+# data handler) into a single binary file together with a manifest (JSON)
+# and reads it back at model start. Arrays are stored in the data type of the
+# static files as read by the handler such that the model results are
+# identical to reading the static files directly.
+#
+# Grids are land-compressed: only values of the land cells (cells in routing
+# order) are stored if all other cells have the same value (e.g. NaN). Yearly
+# reservoir fractions are stored on the whole grid and memory-mapped such that
+# only the simulated years are read.
+#
+# The bundle is keyed by a fingerprint of the static files (name, size and
+# modification time) which are required for the selected options. The
+# manifest contains a hash of every stored array to verify the bundle.
+#
+# Build static bundle (see build_static_bundle module):
+#     python -m controller.build_static_bundle Config_ReWaterGAP.json
+# =============================================================================
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import xarray as xr
+from controller import configuration_module as cm
+
+# Version of bundle layout (part of the bundle key)
+BUNDLE_VERSION = 1
+
+# Alignment of arrays in bundle file, Unit: [bytes]
+ALIGNMENT = 64
+
+# Static data which is memory-mapped instead of read at model start
+MEMORY_MAPPED_DATA = ('resyear_frac',)
+
+
+def get_bundle_key(static_file_paths):
+    """
+    Get key of static bundle from fingerprint of the static files.
+
+    Parameters
+    ----------
+    static_file_paths : dict
+        Path (or list of paths) per static data name, see
+        staticdata_handler.get_static_file_paths.
+
+    Returns
+    -------
+    bundle_key : str
+        Hash of name, size and modification time of all files.
+
+    """
+    fingerprint = hashlib.sha256(f'version:{BUNDLE_VERSION};'.encode())
+    for name in sorted(static_file_paths):
+        file_paths = static_file_paths[name]
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]
+        for file_path in file_paths:
+            file_stat = os.stat(file_path)
+            fingerprint.update(f'{name}/{os.path.basename(file_path)}:'
+                               f'{file_stat.st_size}:'
+                               f'{file_stat.st_mtime_ns};'.encode())
+    return fingerprint.hexdigest()[:16]
+
+
+def get_bundle_path(bundle_key):
+    """
+    Get path of static bundle.
+
+    Parameters
+    ----------
+    bundle_key : str
+        Key of static bundle.
+
+    Returns
+    -------
+    bundle_path : pathlib.Path
+        Path of static bundle.
+
+    """
+    return Path(cm.static_land_data_path) / 'static_bundle' / bundle_key
+
+
+def get_attrs(attrs):
+    """
+    Get attributes which can be written to the manifest.
+
+    Parameters
+    ----------
+    attrs : dict
+        Attributes of xarray dataset or variable.
+
+    Returns
+    -------
+    json_attrs : dict
+        Attributes with numpy values converted to python values. Attributes
+        which can not be converted are dropped.
+
+    """
+    json_attrs = {}
+    for key, value in attrs.items():
+        if isinstance(value, (np.generic, np.ndarray)):
+            value = value.tolist()
+        try:
+            json.dumps(value)
+        except TypeError:
+            continue
+        json_attrs[key] = value
+    return json_attrs
+
+
+def get_fill_bits(outside_values):
+    """
+    Get common value of cells outside land as bit pattern.
+
+    Parameters
+    ----------
+    outside_values : array
+        Values of cells outside land.
+
+    Returns
+    -------
+    fill_bits : int or None
+        Bit pattern of the value if all cells have the same value (NaN
+        included), else None.
+
+    """
+    if outside_values.dtype.kind not in 'biuf' or \
+            outside_values.dtype.itemsize not in (1, 2, 4, 8):
+        return None
+
+    bits = np.ascontiguousarray(outside_values).\
+        view(f'u{outside_values.dtype.itemsize}')
+    if bits.size == 0:
+        return 0
+    if np.all(bits == bits.flat[0]):
+        return int(bits.flat[0])
+    return None
+
+
+class BundleWriter:
+    """Write arrays into static bundle file."""
+
+    def __init__(self, bundle_file, land_mask):
+        self.bundle_file = bundle_file
+        self.land_mask = land_mask
+        self.land_index = np.argwhere(land_mask).astype(np.int32)
+
+    def write_array(self, array, land_compress=False):
+        """
+        Write array and get its manifest entry.
+
+        Parameters
+        ----------
+        array : array
+            Array to write.
+        land_compress : bool, optional
+            Store only land cells of a grid (last two dimensions) if all
+            other cells have the same value. The default is False.
+
+        Returns
+        -------
+        entry : dict
+            Data type, shape, position and hash of the array in the bundle.
+
+        """
+        array = np.asarray(array)
+        entry = {'dtype': array.dtype.str, 'shape': list(array.shape),
+                 'fill_bits': None}
+
+        if land_compress and array.shape[-2:] == self.land_mask.shape:
+            entry['fill_bits'] = get_fill_bits(array[..., ~self.land_mask])
+        if entry['fill_bits'] is not None:
+            array = array[..., self.land_index[:, 0], self.land_index[:, 1]]
+
+        data = np.ascontiguousarray(array).tobytes()
+
+        # Align arrays in bundle file
+        offset = self.bundle_file.tell()
+        padding = -offset % ALIGNMENT
+        self.bundle_file.write(b'\0' * padding)
+
+        entry['offset'] = offset + padding
+        entry['nbytes'] = len(data)
+        entry['sha256'] = hashlib.sha256(data).hexdigest()
+        self.bundle_file.write(data)
+
+        return entry
+
+
+class StaticBundle:
+    """Memory-mapped static data bundle."""
+
+    def __init__(self, bundle_path):
+        with open(bundle_path / 'manifest.json', encoding="utf-8") as manifest:
+            self.manifest = json.load(manifest)
+
+        # Copy-on-write memory map such that static data can be modified in
+        # memory without changing the bundle.
+        self.bundle_data = np.memmap(bundle_path / 'static_bundle.bin',
+                                     dtype=np.uint8, mode='c')
+
+        land_index = self.get_array(self.manifest['land_index'])
+        self.land_index = (land_index[:, 0], land_index[:, 1])
+
+    def get_array(self, entry, memory_mapped=False):
+        """
+        Get array of a manifest entry.
+
+        Parameters
+        ----------
+        entry : dict
+            Manifest entry of array.
+        memory_mapped : bool, optional
+            Return memory-mapped array instead of reading it. Only for arrays
+            which are not land-compressed. The default is False.
+
+        Returns
+        -------
+        array : array
+            Array with data type and shape as written to the bundle.
+
+        """
+        dtype = np.dtype(entry['dtype'])
+        data = self.bundle_data[entry['offset']:
+                                entry['offset'] + entry['nbytes']].view(dtype)
+
+        if entry['fill_bits'] is None:
+            array = data.reshape(entry['shape'])
+            if memory_mapped:
+                return array
+            return np.array(array)
+
+        # Scatter land cells into grid
+        fill_value = np.array(entry['fill_bits'],
+                              dtype=f'u{dtype.itemsize}').view(dtype)
+        array = np.full(entry['shape'], fill_value, dtype=dtype)
+        array[..., self.land_index[0], self.land_index[1]] = \
+            data.reshape(entry['shape'][:-2] + [-1])
+        return array
+
+    def get_dataset(self, dataset_entry, memory_mapped=False):
+        """
+        Get xarray dataset of a manifest entry.
+
+        Parameters
+        ----------
+        dataset_entry : dict
+            Manifest entry of dataset.
+        memory_mapped : bool, optional
+            Memory-map variables instead of reading them. The default is
+            False.
+
+        Returns
+        -------
+        dataset : xarray.Dataset
+            Dataset with variables and coordinates as read from static files.
+
+        """
+        data_vars = {}
+        coords = {}
+        for var_name, var in dataset_entry['variables'].items():
+            variable = (var['dims'],
+                        self.get_array(var['array'], memory_mapped),
+                        var['attrs'])
+            if var['coord']:
+                coords[var_name] = variable
+            else:
+                data_vars[var_name] = variable
+
+        return xr.Dataset(data_vars, coords, dataset_entry['attrs'])
+
+    def get_static_data(self):
+        """
+        Get static data of bundle.
+
+        Returns
+        -------
+        static_data : dict
+            Static data per name as array, xarray dataset or pandas dataframe
+            (see staticdata_handler.read_static_data).
+
+        """
+        static_data = {}
+        for name, data_entry in self.manifest['static_data'].items():
+            memory_mapped = name in MEMORY_MAPPED_DATA
+            if data_entry['kind'] == 'array':
+                static_data[name] = self.get_array(data_entry['array'])
+            elif data_entry['kind'] == 'dataset':
+                static_data[name] = self.get_dataset(data_entry, memory_mapped)
+            elif data_entry['kind'] == 'dataarray':
+                static_data[name] = \
+                    self.get_dataset(data_entry)[data_entry['name']]
+            else:
+                static_data[name] = \
+                    pd.DataFrame({column['name']:
+                                  self.get_array(column['array'])
+                                  for column in data_entry['columns']})
+        return static_data
+
+    def verify(self):
+        """
+        Verify arrays of bundle against hashes in manifest.
+
+        Returns
+        -------
+        corrupted : list
+            Names of static data with arrays which do not match their hash.
+
+        """
+        def get_array_entries(data_entry):
+            if data_entry['kind'] == 'array':
+                return [data_entry['array']]
+            if data_entry['kind'] == 'table':
+                return [column['array'] for column in data_entry['columns']]
+            return [var['array'] for var in data_entry['variables'].values()]
+
+        corrupted = []
+        for name, data_entry in self.manifest['static_data'].items():
+            for entry in get_array_entries(data_entry):
+                data = self.bundle_data[entry['offset']:
+                                        entry['offset'] + entry['nbytes']]
+                if hashlib.sha256(data).hexdigest() != entry['sha256']:
+                    corrupted.append(name)
+                    break
+        return corrupted
+
+
+def open_static_bundle(static_file_paths):
+    """
+    Open static bundle if it has been built for the current static files.
+
+    Parameters
+    ----------
+    static_file_paths : dict
+        Path (or list of paths) per static data name, see
+        staticdata_handler.get_static_file_paths.
+
+    Returns
+    -------
+    static_bundle : StaticBundle or None
+        Static bundle or None if not built.
+
+    """
+    bundle_path = get_bundle_path(get_bundle_key(static_file_paths))
+
+    # Manifest is written last and hence marks a complete bundle
+    if (bundle_path / 'manifest.json').exists():
+        return StaticBundle(bundle_path)
+    return None
+
+
+def write_static_bundle(static_data, static_file_paths):
+    """
+    Write static data into static bundle.
+
+    Parameters
+    ----------
+    static_data : dict
+        Static data per name (see staticdata_handler.read_static_data).
+    static_file_paths : dict
+        Path (or list of paths) per static data name, see
+        staticdata_handler.get_static_file_paths.
+
+    Returns
+    -------
+    bundle_path : pathlib.Path
+        Path of static bundle.
+
+    """
+    bundle_key = get_bundle_key(static_file_paths)
+    bundle_path = get_bundle_path(bundle_key)
+    bundle_path.mkdir(parents=True, exist_ok=True)
+
+    # Remove manifest of an incomplete or corrupted bundle
+    (bundle_path / 'manifest.json').unlink(missing_ok=True)
+
+    # Land cells are cells in routing order
+    grid_shape = static_data['land_cover'].shape
+    land_index = static_data['rout_order'][['Lat_index_routorder',
+                                            'Lon_index_routorder']].to_numpy()
+    land_mask = np.zeros(grid_shape, dtype=bool)
+    land_mask[land_index[:, 0], land_index[:, 1]] = True
+
+    manifest = {'bundle_key': bundle_key,
+                'lat_length': int(grid_shape[0]),
+                'lon_length': int(grid_shape[1]),
+                'land_cells': int(land_mask.sum()),
+                'files': {name: [os.path.basename(file_path) for file_path in
+                                 ([file_paths] if isinstance(file_paths, str)
+                                  else file_paths)]
+                          for name, file_paths in static_file_paths.items()},
+                'static_data': {}}
+
+    with open(bundle_path / 'static_bundle.bin', 'wb') as bundle_file:
+        writer = BundleWriter(bundle_file, land_mask)
+        manifest['land_index'] = writer.write_array(writer.land_index)
+
+        for name, data in static_data.items():
+            print(f'Writing {name}')
+            land_compress = name not in MEMORY_MAPPED_DATA
+
+            if isinstance(data, np.ndarray):
+                data_entry = {'kind': 'array',
+                              'array': writer.write_array(data,
+                                                          land_compress)}
+
+            elif isinstance(data, pd.DataFrame):
+                columns = []
+                for column_name in data.columns:
+                    values = data[column_name].to_numpy()
+                    if values.dtype == object:
+                        values = values.astype(str)
+                    columns.append({'name': column_name,
+                                    'array': writer.write_array(values)})
+                data_entry = {'kind': 'table', 'columns': columns}
+
+            else:
+                if isinstance(data, xr.DataArray):
+                    data_entry = {'kind': 'dataarray', 'name': data.name}
+                    data = data.to_dataset()
+                else:
+                    data_entry = {'kind': 'dataset'}
+
+                data_entry['attrs'] = get_attrs(data.attrs)
+                data_entry['variables'] = {}
+                for var_name, var in data.variables.items():
+                    grid_var = var.dims[-2:] == ('lat', 'lon')
+                    data_entry['variables'][var_name] = {
+                        'dims': list(var.dims),
+                        'coord': var_name in data.coords,
+                        'attrs': get_attrs(var.attrs),
+                        'array': writer.write_array(var.values,
+                                                    land_compress and
+                                                    grid_var)}
+
+            manifest['static_data'][name] = data_entry
+
+    with open(bundle_path / 'manifest.json', 'w', encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+
+    print(f'Static bundle built: {bundle_path}')
+    return bundle_path
@@ -21,6 +21,8 @@ import pandas as pd
 import watergap_logger as log
 import misc.cli_args as cli
 from controller import configuration_module as cm
+from controller import input_catalog as ic
+from controller import static_bundle as sb
 import glob
 
 # ===============================================================
@@ -40,6 +42,248 @@ args = cli.parse_cli()
 # ===============================================================
 
 
+def get_static_file_paths():
+    """
+    Get paths of static data files.
+
+    Files which are not required for the selected options are not included
+    (neighbouring cells if neighbouring cell water supply is not selected,
+    yearly reservoir fractions if reservoirs are not considered).
+
+    Returns
+    -------
+    static_file_paths : dict
+        Path (or list of paths for multiple files) per static data name.
+
+    """
+    # ==============================================================
+    # path to climate forcing netcdf data
+    # ==============================================================
+    land_cover_path = str(Path(cm.static_land_data_path +
+                               r'/watergap_22e_landcover.nc4'))
+
+    humid_arid_path = str(Path(cm.static_land_data_path +
+                               r'/watergap_22e_aridhumid.nc4'))
+
+    canopy_snow_soil_parameters_path = \
+        str(Path(cm.static_land_data_path +
+                 r'/canopy_snow_parameters.csv'))
+
+    land_surface_waterfraction_path = \
+        str(Path(cm.static_land_data_path + r'/land_water_fractions/*'))
+
+    soil_static_files_path = \
+        str(Path(cm.static_land_data_path + r'/soil_storage/*'))
+
+    gtopo30_elevation_path = \
+        str(Path(cm.static_land_data_path +
+                 r'/watergap_22e_elevrange.nc4'))
+
+    cell_area_path = str(Path(cm.static_land_data_path +
+                              r'/watergap_22e_continentalarea.nc'))
+
+    river_static_file_path = \
+        str(Path(cm.static_land_data_path + r'/river_static_data/*'))
+
+    # =============================================================================
+    # resevoir routing  (resevoir start month and demand are  dependent on forcing)
+    # =============================================================================
+    forcing = cm.global_parameter_path.split("_")[-1].split(".")[0]
+    res_routing_dir = f"reservoir_regulated_lake/reservoir_routing_{forcing}"
+    res_routing_dir = Path(cm.static_land_data_path + res_routing_dir)
+
+    if forcing == "run-calib" or cm.run_calib ==True: # calibration is ongoing
+        forcing = cm.calib_forcing.split("-")[-1]
+        res_routing_dir = f"reservoir_regulated_lake/reservoir_routing_{forcing}"
+        res_routing_dir = Path(cm.static_land_data_path + res_routing_dir)
+
+    if not res_routing_dir.exists():
+        print(
+            f"Error: Reservoir routing folder does not exist:\n"
+            f"  {res_routing_dir}\n\n"
+            f"Please make sure this folder before exist running the program."
+        )
+        sys.exit(1)
+
+
+    res_routing_files = list(res_routing_dir.glob("*.nc")) + list(res_routing_dir.glob("*.nc4"))
+    ignore_file = f"watergap_22e_{forcing}_monthly_mean_inflow"
+
+    reservoir_reglake_file_path = [
+        str(f) for f in res_routing_files
+        if ignore_file not in f.name
+    ]
+
+    # =============================================================================
+
+    reservoir_frac_file_path = \
+        str(Path(cm.static_land_data_path +
+                 r'/watergap_22e_gloresfrac_*.nc'))
+
+    rout_order_path = str(Path(cm.static_land_data_path +
+                               r'/routing_order.csv'))
+
+    alloc_coeff_path = str(Path(cm.static_land_data_path +
+                                r'/alloc_coeff_by_routorder.csv'))
+    neighbourcells_path = str(Path(cm.static_land_data_path +
+                                   r'/neigbouringcells_latlon.csv'))
+
+    neighbourcells_outflowcell_path = \
+        str(Path(cm.static_land_data_path +
+                 r'/neigbouringcells_outflow_latlon.csv'))
+
+    lat_lon_arcid_path = \
+        str(Path(cm.static_land_data_path +
+            r'/ArcID_GCRC_Lon_Lat.txt'))
+
+    upstream_cells_path = \
+        str(Path(cm.static_land_data_path +
+            r'/upstream_cells_for_grid_arcid.csv'))
+
+    arc_id_path = \
+        str(Path(cm.static_land_data_path + r'/watergap_22e_arc_id.nc'))
+
+    station_path = str(Path(cm.path_to_stations_file +
+                            r'/stations.csv'))
+
+    # Multiple files (glob) are sorted as in xarray.open_mfdataset
+    static_file_paths = {
+        'land_cover': land_cover_path,
+        'humid_arid': humid_arid_path,
+        'gtopo30_elevation': gtopo30_elevation_path,
+        'canopy_snow_soil_parameters': canopy_snow_soil_parameters_path,
+        'land_surface_water_fraction':
+            sorted(glob.glob(land_surface_waterfraction_path)),
+        'soil_static_files': sorted(glob.glob(soil_static_files_path)),
+        'cell_area': cell_area_path,
+        'river_static_files': sorted(glob.glob(river_static_file_path)),
+        'res_reg_files': reservoir_reglake_file_path,
+        'rout_order': rout_order_path,
+        'alloc_coeff': alloc_coeff_path,
+        'arc_id': arc_id_path,
+        'upstream_cells': upstream_cells_path,
+        'lat_lon_arcid': lat_lon_arcid_path,
+        'stations': station_path}
+
+    # Yearly Reserviour fractions (only files intersecting the simulation
+    # period, see input_catalog module)
+    if cm.RESERVOIR_OPT:
+        static_file_paths['resyear_frac'] = \
+            ic.select_files(glob.glob(reservoir_frac_file_path))
+
+    if cm.NEIGHBOURING_CELL:
+        static_file_paths['neighbourcells'] = neighbourcells_path
+        static_file_paths['neighbourcells_outflowcell'] = \
+            neighbourcells_outflowcell_path
+
+    return static_file_paths
+
+
+def read_static_data(static_file_paths):
+    """
+    Read static data from NetCDF and CSV files.
+
+    Parameters
+    ----------
+    static_file_paths : dict
+        Path (or list of paths) per static data name, see
+        get_static_file_paths.
+
+    Returns
+    -------
+    static_data : dict
+        Static data per name as array, xarray dataset or pandas dataframe.
+
+    """
+    static_data = {}
+    try:
+        # Actual name: Land cover , Unit: (-)
+        land_cover = xr.open_dataset(static_file_paths['land_cover'],
+                                     decode_times=False)
+        static_data['land_cover'] = land_cover.landcover[0].values
+
+        # Humid-arid calssification based on Müller Schmied et al. 2021
+        humid_arid = xr.open_dataset(static_file_paths['humid_arid'],
+                                     decode_times=False)
+        static_data['humid_arid'] = humid_arid.aridhumid[0].values
+
+        # Elevations(m) according to GTOPO30 (U.S. Geological Survey, 1996)
+        gtopo30_elevation = \
+            xr.open_dataset(static_file_paths['gtopo30_elevation'],
+                            decode_times=False)
+        static_data['gtopo30_elevation'] = gtopo30_elevation.elevrange.values
+
+        # Canopy model paramters (Table)
+        static_data['canopy_snow_soil_parameters'] = \
+            pd.read_csv(static_file_paths['canopy_snow_soil_parameters'])
+
+        # Land and surface water fractions
+        static_data['land_surface_water_fraction'] = \
+            xr.open_mfdataset(static_file_paths['land_surface_water_fraction'],
+                              decode_times=False)
+        # Soil static files
+        static_data['soil_static_files'] = \
+            xr.open_mfdataset(static_file_paths['soil_static_files'],
+                              decode_times=False)
+        # Cell Area
+        cell_area = xr.open_dataset(static_file_paths['cell_area'],
+                                    decode_times=False)
+        static_data['cell_area'] = cell_area.continentalarea.values
+
+        # River static files
+        static_data['river_static_files'] = \
+            xr.open_mfdataset(static_file_paths['river_static_files'],
+                              decode_times=False)
+
+        # Reserviour and regulated lakes (data for computing waterbalance)
+        static_data['res_reg_files'] = \
+            xr.open_mfdataset(static_file_paths['res_reg_files'],
+                              decode_times=False)
+
+        # Yearly Reserviour fractions (only if reservoirs are considered)
+        if 'resyear_frac' in static_file_paths:
+            static_data['resyear_frac'] = \
+                xr.open_mfdataset(static_file_paths['resyear_frac'])
+
+        # routing order data
+        static_data['rout_order'] = \
+            pd.read_csv(static_file_paths['rout_order'])
+
+        # Allocation coeffiencient according to routing order
+        # Required for computing reselease from Hanasaki algorithm
+        # see Hanasaki et al 2006
+        static_data['alloc_coeff'] = \
+            pd.read_csv(static_file_paths['alloc_coeff'])
+
+        # Neighbouuring cells from which wateruse from demand cells could
+        # be satified (only for neighbouring cell water supply option).
+        if 'neighbourcells' in static_file_paths:
+            static_data['neighbourcells'] = \
+                pd.read_csv(static_file_paths['neighbourcells'])
+            static_data['neighbourcells_outflowcell'] = \
+                pd.read_csv(static_file_paths['neighbourcells_outflowcell'])
+
+        # To select region or basin.
+        static_data['arc_id'] = \
+            xr.open_dataarray(static_file_paths['arc_id'], decode_times=False)
+        static_data['upstream_cells'] = \
+            pd.read_csv(static_file_paths['upstream_cells'])
+        static_data['lat_lon_arcid'] = \
+            pd.read_csv(static_file_paths['lat_lon_arcid'])
+        static_data['stations'] = pd.read_csv(static_file_paths['stations'])
+
+    except FileNotFoundError as error:
+        log.config_logger(logging.ERROR, modname, error, args.debug)
+        sys.exit()  # dont run code if file does not exist
+    except ValueError:
+        log.config_logger(logging.ERROR, modname, 'File(s) extension '
+                          'should be NETCDF(.nc or .nc4) or CSV for canopy model'
+                          'parameters', args.debug)
+        sys.exit()  # dont run code if file does not exist
+
+    return static_data
+
+
 class StaticData:
     """Handles static data."""
 
@@ -47,179 +291,51 @@ class StaticData:
         """
         Get file path.
 
+        Static data is read from the static bundle if it has been built for
+        the current static files (see static_bundle module), otherwise from
+        the NetCDF and CSV files.
+
         Return
         ------
         Static data
 
         """
-        # ==============================================================
-        # path to climate forcing netcdf data
-        # ==============================================================
-        land_cover_path = str(Path(cm.static_land_data_path +
-                                   r'/watergap_22e_landcover.nc4'))
-
-        humid_arid_path = str(Path(cm.static_land_data_path +
-                                   r'/watergap_22e_aridhumid.nc4'))
-
-        canopy_snow_soil_parameters_path = \
-            str(Path(cm.static_land_data_path +
-                     r'/canopy_snow_parameters.csv'))
-
-        land_surface_waterfraction_path = \
-            str(Path(cm.static_land_data_path + r'/land_water_fractions/*'))
-
-        soil_static_files_path = \
-            str(Path(cm.static_land_data_path + r'/soil_storage/*'))
-
-        gtopo30_elevation_path = \
-            str(Path(cm.static_land_data_path +
-                     r'/watergap_22e_elevrange.nc4'))
-
-        cell_area_path = str(Path(cm.static_land_data_path +
-                                  r'/watergap_22e_continentalarea.nc'))
-
-        river_static_file_path = \
-            str(Path(cm.static_land_data_path + r'/river_static_data/*'))
-        
-        # =============================================================================
-        # resevoir routing  (resevoir start month and demand are  dependent on forcing)
-        # =============================================================================
-        forcing = cm.global_parameter_path.split("_")[-1].split(".")[0]
-        res_routing_dir = f"reservoir_regulated_lake/reservoir_routing_{forcing}"
-        res_routing_dir = Path(cm.static_land_data_path + res_routing_dir)
+        static_file_paths = get_static_file_paths()
 
-        if forcing == "run-calib" or cm.run_calib ==True: # calibration is ongoing
-            forcing = cm.calib_forcing.split("-")[-1]
-            res_routing_dir = f"reservoir_regulated_lake/reservoir_routing_{forcing}"
-            res_routing_dir = Path(cm.static_land_data_path + res_routing_dir)
- 
-        if not res_routing_dir.exists():
-            print(
-                f"Error: Reservoir routing folder does not exist:\n"
-                f"  {res_routing_dir}\n\n"
-                f"Please make sure this folder before exist running the program."
-            )
-            sys.exit(1)
-    
-        
-        res_routing_files = list(res_routing_dir.glob("*.nc")) + list(res_routing_dir.glob("*.nc4"))
-        ignore_file = f"watergap_22e_{forcing}_monthly_mean_inflow"
-
-        reservoir_reglake_file_path = [
-            str(f) for f in res_routing_files
-            if ignore_file not in f.name
-        ]
-
-        # =============================================================================
-
-        reservoir_frac_file_path = \
-            str(Path(cm.static_land_data_path +
-                     r'/watergap_22e_gloresfrac_*.nc'))
-        
-        rout_order_path = str(Path(cm.static_land_data_path +
-                                   r'/routing_order.csv'))
-
-        alloc_coeff_path = str(Path(cm.static_land_data_path +
-                                    r'/alloc_coeff_by_routorder.csv'))
-        neighbourcells_path = str(Path(cm.static_land_data_path +
-                                       r'/neigbouringcells_latlon.csv'))
-
-        neighbourcells_outflowcell_path = \
-            str(Path(cm.static_land_data_path +
-                     r'/neigbouringcells_outflow_latlon.csv'))
-
-        lat_lon_arcid_path = \
-            str(Path(cm.static_land_data_path +
-                r'/ArcID_GCRC_Lon_Lat.txt'))
-
-        upstream_cells_path = \
-            str(Path(cm.static_land_data_path +
-                r'/upstream_cells_for_grid_arcid.csv'))
-
-        arc_id_path = \
-            str(Path(cm.static_land_data_path + r'/watergap_22e_arc_id.nc'))
-
-        station_path = str(Path(cm.path_to_stations_file +
-                                r'/stations.csv'))
-        # ==============================================================
-        # Loading in climate forcing
-        # ==============================================================
-        try:
-            # Actual name: Land cover , Unit: (-)
-            land_cover = xr.open_dataset(land_cover_path,
-                                         decode_times=False)
-            self.land_cover = land_cover.landcover[0].values
-
-            # Humid-arid calssification based on Müller Schmied et al. 2021
-            humid_arid = xr.open_dataset(humid_arid_path,
-                                         decode_times=False)
-            self.humid_arid = humid_arid.aridhumid[0].values
-
-            # Elevations(m) according to GTOPO30 (U.S. Geological Survey, 1996)
-            gtopo30_elevation = xr.open_dataset(gtopo30_elevation_path,
-                                                decode_times=False)
-            self.gtopo30_elevation = gtopo30_elevation.elevrange.values
-
-            # Canopy model paramters (Table)
-            self.canopy_snow_soil_parameters = \
-                pd.read_csv(canopy_snow_soil_parameters_path)
-
-            # Land and surface water fractions
-            self.land_surface_water_fraction = \
-                xr.open_mfdataset(land_surface_waterfraction_path,
-                                  decode_times=False)
-            # Soil static files
-            self.soil_static_files = \
-                xr.open_mfdataset(soil_static_files_path,
-                                  decode_times=False)
-            # Cell Area
-            cell_area = xr.open_dataset(cell_area_path, decode_times=False)
-            self.cell_area = cell_area.continentalarea.values
-
-            # River static files
-            self.river_static_files = \
-                xr.open_mfdataset(river_static_file_path, decode_times=False)
-
-            # Reserviour and regulated lakes (data for computing waterbalance)
-            self.res_reg_files = \
-                xr.open_mfdataset(reservoir_reglake_file_path,
-                                  decode_times=False)
-
-            # Yearly Reserviour fractions
-            self.resyear_frac = \
-                xr.open_mfdataset(reservoir_frac_file_path)
-
-            # routing order data
-            self.rout_order = pd.read_csv(rout_order_path)
-
-            # Allocation coeffiencient according to routing order
-            # Required for computing reselease from Hanasaki algorithm
-            # see Hanasaki et al 2006
-            self.alloc_coeff = pd.read_csv(alloc_coeff_path)
-
-            # Neighbouuring cells from which wateruse from demand cells could
-            # be satified.
-            self.neighbourcells = pd.read_csv(neighbourcells_path)
-            self.neighbourcells_outflowcell = \
-                pd.read_csv(neighbourcells_outflowcell_path)
-
-            # To select region or basin.
-            self.arc_id = xr.open_dataarray(arc_id_path, decode_times=False)
-            self.upstream_cells = pd.read_csv(upstream_cells_path)
-            self.lat_lon_arcid = pd.read_csv(lat_lon_arcid_path)
-            self.stations = pd.read_csv(station_path)
-
-        except FileNotFoundError as error:
-            log.config_logger(logging.ERROR, modname, error, args.debug)
-            sys.exit()  # dont run code if file does not exist
-        except ValueError:
-            log.config_logger(logging.ERROR, modname, 'File(s) extension '
-                              'should be NETCDF(.nc or .nc4) or CSV for canopy model'
-                              'parameters', args.debug)
-            sys.exit()  # dont run code if file does not exist
+        static_bundle = sb.open_static_bundle(static_file_paths)
+        if static_bundle is None:
+            static_data = read_static_data(static_file_paths)
         else:
-            if run_calib is False:
-                print('\n'+'Static data loaded successfully')
+            static_data = static_bundle.get_static_data()
+
+        self.land_cover = static_data['land_cover']
+        self.humid_arid = static_data['humid_arid']
+        self.gtopo30_elevation = static_data['gtopo30_elevation']
+        self.canopy_snow_soil_parameters = \
+            static_data['canopy_snow_soil_parameters']
+        self.land_surface_water_fraction = \
+            static_data['land_surface_water_fraction']
+        self.soil_static_files = static_data['soil_static_files']
+        self.cell_area = static_data['cell_area']
+        self.river_static_files = static_data['river_static_files']
+        self.res_reg_files = static_data['res_reg_files']
+        self.rout_order = static_data['rout_order']
+        self.alloc_coeff = static_data['alloc_coeff']
+        self.arc_id = static_data['arc_id']
+        self.upstream_cells = static_data['upstream_cells']
+        self.lat_lon_arcid = static_data['lat_lon_arcid']
+        self.stations = static_data['stations']
+
+        # Static data which is not required for the selected options
+        self.resyear_frac = static_data.get('resyear_frac')
+        self.neighbourcells = static_data.get('neighbourcells')
+        self.neighbourcells_outflowcell = \
+            static_data.get('neighbourcells_outflowcell')
+
+        if run_calib is False:
+            if static_bundle is not None:
+                print('\n'+'Static data read from static bundle')
+            print('\n'+'Static data loaded successfully')
 
     def soil_static_data(self):
         """
@@ -22,7 +22,10 @@ import xarray as xr
 import watergap_logger as log
 import misc.cli_args as cli
 from controller import configuration_module as cm
+from controller import input_catalog as ic
+from controller import read_ahead as ra
 from model.lateralwaterbalance import aggregate_net_abstraction as aggr
+from model.utility import riparian_cells
 
 # ===============================================================
 # Get module name and remove the .py extension
@@ -44,12 +47,16 @@ args = cli.parse_cli()
 class Wateruse:
     """Handles water use and relevant static data."""
 
-    def __init__(self,  subtract_use, grid_coords, run_calib):
+    def __init__(self,  subtract_use, grid_coords, run_calib, provider=None):
         """
         Get file path and read in water use data.
 
         ant: boolean
             Read in water use data when simulation is an anthropogenic run.
+        provider: object, optional
+            Water use provider with get_month(year, month) (see
+            input_provider module). Monthly water use is then taken from the
+            provider instead of the NetCDF files. The default is None.
 
         Return
         ------
@@ -82,32 +89,14 @@ class Wateruse:
             # ==============================================================
             # Loading in Wateruse
             # ==============================================================
+            # Monthly water use files are not opened if water use is taken
+            # from an input provider.
             try:
-                filtered_abstraction_path = [fpath for fpath in
-                                             glob.glob(potential_net_abstraction_path)
-                                             if 'atotuse' not in os.path.basename(fpath)]
-
-                self.potential_net_abstraction = \
-                    xr.open_mfdataset(filtered_abstraction_path, decode_times=False)
-
-                # Fix date issues.
-                _, reference_date = \
-                    self.potential_net_abstraction.time.attrs["units"].split("since")
-
-                self.potential_net_abstraction["time"] = \
-                    pd.date_range(start=reference_date,
-                                  periods=self.potential_net_abstraction.sizes["time"],
-                                  freq="MS")
-
-                # only for calibration run
+                self.potential_net_abstraction = None
                 self.actual_net_abstraction = None
-                if run_calib:
-                    actual_use_path = [fpath for fpath in
-                                       glob.glob(potential_net_abstraction_path)
-                                       if 'atotuse' in os.path.basename(fpath)]
-
-                    self.actual_net_abstraction =  \
-                        xr.open_mfdataset(actual_use_path, chunks={'time': 365})
+                if provider is None:
+                    self.open_wateruse(potential_net_abstraction_path,
+                                       run_calib)
 
                 # Fraction of return flow from irrigation to groundwater
                 # See Döll et al 2012, eqn 1
@@ -133,6 +122,261 @@ class Wateruse:
                 if run_calib is False:
                     print('\nWater-use input files loaded successfully')
 
+        # ==============================================================
+        # Year-block cache of monthly water use
+        # ==============================================================
+        # Monthly water use of the simulated year is read at once. While a
+        # year is simulated, the next year is read ahead in a background
+        # thread (see read_ahead module).
+        self.run_calib = run_calib
+        self.wateruse_block = None
+        self.wateruse_block_year = None
+
+        # Cells of global lakes and wetlands units (without 0 and fill value)
+        # required to aggregate riparian potential net abstraction and to
+        # redistribute unsatisfied demand to riparian cells.
+        self.unit_start, self.unit_cells, self.cell_unit = \
+            riparian_cells.get_unit_index(self.glwdunits)
+
+        # Daily water use (converted and aggregated) per month of the
+        # simulated year. Spin-up replays the first year and hence reuses
+        # the cached months instead of converting and aggregating again.
+        self.daily_wateruse = {}
+        self.daily_wateruse_year = None
+        self.read_ahead = ra.ReadAhead(self.load_wateruse_block,
+                                       int(cm.end.split('-')[0]),
+                                       cm.read_ahead,
+                                       cm.read_ahead_memory_limit)
+
+        # Monthly water use is taken from the provider (by default from the
+        # year-block cache of the NetCDF files)
+        self.provider = self if provider is None else provider
+
+    def open_wateruse(self, potential_net_abstraction_path, run_calib):
+        """
+        Open water use NetCDF files which intersect the simulation period.
+
+        Parameters
+        ----------
+        potential_net_abstraction_path : str
+            Glob of water use files.
+        run_calib : bool
+            Open actual net abstraction for calibration run.
+
+        Returns
+        -------
+        None.
+
+        """
+        # Only files intersecting the simulation period are opened
+        # (see input_catalog module).
+        filtered_abstraction_path = [fpath for fpath in
+                                     glob.glob(potential_net_abstraction_path)
+                                     if 'atotuse' not in os.path.basename(fpath)]
+        filtered_abstraction_path = \
+            ic.select_files(filtered_abstraction_path)
+
+        self.potential_net_abstraction = \
+            xr.open_mfdataset(filtered_abstraction_path, decode_times=False)
+
+        # Fix date issues. Time starts at the first month of the opened files
+        # which is not the reference date if files before the simulation
+        # period are skipped.
+        _, reference_date = \
+            self.potential_net_abstraction.time.attrs["units"].split("since")
+        first_month = pd.Timestamp(reference_date.strip()) + \
+            pd.DateOffset(months=int(
+                self.potential_net_abstraction.time.values[0]))
+
+        self.potential_net_abstraction["time"] = \
+            pd.date_range(start=first_month,
+                          periods=self.potential_net_abstraction.sizes["time"],
+                          freq="MS")
+
+        # only for calibration run
+        if run_calib:
+            actual_use_path = [fpath for fpath in
+                               glob.glob(potential_net_abstraction_path)
+                               if 'atotuse' in os.path.basename(fpath)]
+            actual_use_path = ic.select_files(actual_use_path)
+
+            self.actual_net_abstraction =  \
+                xr.open_mfdataset(actual_use_path, chunks={'time': 365})
+
+    def load_wateruse_block(self, year):
+        """
+        Read monthly water use of one calendar year.
+
+        Parameters
+        ----------
+        year : int
+            Calendar year to load.
+
+        Returns
+        -------
+        wateruse_block : dict
+            Monthly water use of the year as arrays of shape (month, lat, lon)
+            together with the respective months, Unit: [m3/month]
+
+        """
+        potential_net_abstraction = \
+            self.potential_net_abstraction.sel(time=str(year))
+
+        if self.run_calib is False:
+            net_abstraction_gw = potential_net_abstraction.pnag
+            net_abstraction_sw = potential_net_abstraction.pnas
+        else:
+            actual_net_abstraction = \
+                self.actual_net_abstraction.sel(time=str(year))
+            net_abstraction_gw = actual_net_abstraction.atotusegw
+            net_abstraction_sw = actual_net_abstraction.atotusesw
+
+        wateruse_block = {
+            'month_net_abstraction': net_abstraction_gw.time.dt.month.values,
+            'net_abstraction_gw': np.ascontiguousarray(
+                net_abstraction_gw.values, dtype=np.float64),
+            'net_abstraction_sw': np.ascontiguousarray(
+                net_abstraction_sw.values, dtype=np.float64),
+            'month_irri': potential_net_abstraction.time.dt.month.values,
+            'water_withdrawal_sw_irri': np.ascontiguousarray(
+                potential_net_abstraction.pirrwwsw.values, dtype=np.float64),
+            'consumptive_use_sw_irri': np.ascontiguousarray(
+                potential_net_abstraction.pirrusesw.values, dtype=np.float64)}
+
+        return wateruse_block
+
+    def get_monthly_wateruse(self, year, month):
+        """
+        Get monthly water use from the year-block cache.
+
+        Parameters
+        ----------
+        year : int
+            Calendar year of simulation.
+        month : int
+            Month of simulation.
+
+        Returns
+        -------
+        net_abstraction_gw : array
+            Potential (actual for calibration) net abstraction from
+            groundwater, Unit: [m3/month]
+        net_abstraction_sw : array
+            Potential (actual for calibration) net abstraction from surface
+            water, Unit: [m3/month]
+        water_withdrawal_sw_irri : array
+            Potential water withdrawal from surface water for irrigation,
+            Unit: [m3/month]
+        consumptive_use_sw_irri : array
+            Potential consumptive use from surface water for irrigation,
+            Unit: [m3/month]
+
+        Note!!! Arrays are views into the cached year block and should not
+        be modified in place.
+
+        """
+        if self.wateruse_block_year != year:
+            # Release block of previous year before taking over the next one
+            # to keep at most two years (current and read ahead) in memory.
+            self.wateruse_block = None
+            self.wateruse_block = self.read_ahead.get_block(year)
+            self.wateruse_block_year = year
+
+            # Start reading next year while current year is simulated
+            self.read_ahead.read_ahead(year + 1, self.wateruse_block)
+
+        month_netabs = \
+            np.where(self.wateruse_block['month_net_abstraction'] == month)[0]
+        month_irri = np.where(self.wateruse_block['month_irri'] == month)[0]
+        if len(month_netabs) == 0 or len(month_irri) == 0:
+            log.config_logger(logging.ERROR, modname, f'Water use data for '
+                              f'{year}-{month} not found', args.debug)
+            sys.exit()  # dont run code if data does not exist
+
+        return self.wateruse_block['net_abstraction_gw'][month_netabs[0]], \
+            self.wateruse_block['net_abstraction_sw'][month_netabs[0]], \
+            self.wateruse_block['water_withdrawal_sw_irri'][month_irri[0]], \
+            self.wateruse_block['consumptive_use_sw_irri'][month_irri[0]]
+
+    # Water use provider interface (see input_provider module)
+    get_month = get_monthly_wateruse
+
+    def get_daily_wateruse(self, year, month, num_of_days, lake_area,
+                           res_area):
+        """
+        Get daily water use of a month, converted and aggregated once.
+
+        Parameters
+        ----------
+        year : int
+            Calendar year of simulation.
+        month : int
+            Month of simulation.
+        num_of_days : int
+            Number of days in month.
+        lake_area : array
+           Lake area, Unit: [km^2]
+        res_area : array
+            Regulated lake and resevoir area, Unit: [km^2]
+
+        Returns
+        -------
+        daily_wateruse : dict
+            'net_abstraction_gw': potential net abstraction from groundwater,
+            Unit: [km3/day]
+            'monthly_net_abstraction_sw': potential net abstraction from
+            surface water (for reservoir release), Unit: [km3/month]
+            'unaggregated_net_abstraction_sw': potential net abstraction from
+            surface water, Unit: [km3/day]
+            'net_abstraction_sw': potential net abstraction from surface water
+            aggregated to outflow cells of lakes and reservoirs,
+            Unit: [km3/day]
+            'water_withdrawal_sw_irri' and 'consumptive_use_sw_irri':
+            potential water withdrawal and consumptive use from surface water
+            for irrigation, Unit: [km3/day]
+
+        Note!!! Arrays are shared between calls and should not be modified
+        in place.
+
+        """
+        if self.daily_wateruse_year != year:
+            self.daily_wateruse = {}
+            self.daily_wateruse_year = year
+
+        # Aggregation depends on lake and reservoir area, hence cached months
+        # are only reused for unchanged areas.
+        daily_wateruse = self.daily_wateruse.get(month)
+        if daily_wateruse is not None and \
+                np.array_equal(daily_wateruse['lake_area'], lake_area,
+                               equal_nan=True) and \
+                np.array_equal(daily_wateruse['res_area'], res_area,
+                               equal_nan=True):
+            return daily_wateruse
+
+        m3_to_km3 = 1e9
+        net_abstraction_gw, net_abstraction_sw, water_withdrawal_sw_irri, \
+            consumptive_use_sw_irri = self.provider.get_month(year, month)
+
+        daily_wateruse = {
+            'net_abstraction_gw':
+                net_abstraction_gw / (num_of_days * m3_to_km3),
+            'monthly_net_abstraction_sw': net_abstraction_sw / m3_to_km3,
+            'unaggregated_net_abstraction_sw':
+                net_abstraction_sw / (num_of_days * m3_to_km3),
+            'net_abstraction_sw':
+                self.aggregate_riparian_netpotabs(lake_area, res_area,
+                                                  net_abstraction_sw) /
+                (num_of_days * m3_to_km3),
+            'water_withdrawal_sw_irri':
+                water_withdrawal_sw_irri / (num_of_days * m3_to_km3),
+            'consumptive_use_sw_irri':
+                consumptive_use_sw_irri / (num_of_days * m3_to_km3),
+            'lake_area': lake_area.copy(),
+            'res_area': res_area.copy()}
+
+        self.daily_wateruse[month] = daily_wateruse
+        return daily_wateruse
+
     def aggregate_riparian_netpotabs(self, lake_area, res_area, netabs):
         """
         Aggregate riparian potential net abstractiion to outflowcell of lake or reservoir.
@@ -154,9 +398,7 @@ class Wateruse:
             Unit: [m^3/month]
 
         """
-        unique_glwdunits = np.unique(self.glwdunits)[1:-1]
-
         aggreagted_potnet_abstraction = \
-            aggr.aggregate_potnetabs(self.glwdunits, lake_area, res_area,
-                                     netabs, unique_glwdunits)
+            aggr.aggregate_potnetabs(self.unit_start, self.unit_cells,
+                                     lake_area, res_area, netabs)
         return aggreagted_potnet_abstraction
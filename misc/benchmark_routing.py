@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Benchmark of parallel routing schedules."""
+
+# =============================================================================
+# This script measures the time of the river routing of one day on the global
+# grid with an increasing number of threads, in parallel over independent
+# basins (river_routing_parallel) and over the cells of a level
+# (river_routing_levels, see routing_basins module). Routing inputs are the
+# ones of the first simulation day of the configuration file (static data,
+# climate forcing and water use as in a WaterGAP run). For every schedule and
+# number of threads, the report gives the time per day, the speedup against
+# the serial routing (river_routing) and whether results are identical.
+
+# Run from the WaterGAP directory:
+#     python -m misc.benchmark_routing Config_ReWaterGAP.json --threads 1 2 4
+# The number of threads is limited by NUMBA_NUM_THREADS (default: number of
+# cores).
+# =============================================================================
+
+import argparse
+import copy
+import sys
+import time
+import numba
+import numpy as np
+from model.lateralwaterbalance import routing as rt
+from model.lateralwaterbalance import routing_basins
+
+
+def record_routing_inputs():
+    """
+    Compute first simulation day and record inputs of river routing.
+
+    Returns
+    -------
+    routing_inputs : tuple
+        Arguments of river_routing (copied before routing).
+    routing_network : tuple
+        Arguments of get_routing_basins and get_routing_levels.
+
+    """
+    # The configuration module reads the configuration file given on the
+    # command line (see main), hence modules of WaterGAP are imported here.
+    # pylint: disable=import-outside-toplevel
+    from controller import configuration_module as cm
+    from controller import read_forcings_and_static as rd
+    from controller import wateruse_handler as wateruse
+    from model import parameters as pm
+    from model import land_surfacewater_fraction_init as lwf
+    from model.lateralwaterbalance import waterbalance_lateral as lb
+    from model.utility import get_upstream_basin as get_basin
+    from model.verticalwaterbalance import waterbalance_vertical_init as vb
+
+    forcings_static = rd.InitializeForcingsandStaticdata(False)
+    potential_net_abstraction = \
+        wateruse.Wateruse(cm.SUBTRACT_USE, forcings_static.grid_coords, False)
+    parameters = pm.Parameters(False, None)
+    land_water_frac = \
+        lwf.LandsurfacewaterFraction(forcings_static.static_data,
+                                     cm.RESERVOIR_OPT,
+                                     forcings_static.calendar)
+    vertical_waterbalance = \
+        vb.VerticalWaterBalance(forcings_static, parameters)
+    lateral_waterbalance = \
+        lb.LateralWaterBalance(forcings_static, potential_net_abstraction,
+                               parameters, land_water_frac.global_lake_area,
+                               land_water_frac.glolake_frac,
+                               land_water_frac.loclake_frac)
+
+    static_data = forcings_static.static_data
+    basin = get_basin.SelectUpstreamBasin(cm.run_basin, static_data.arc_id,
+                                          static_data.stations,
+                                          static_data.lat_lon_arcid,
+                                          static_data.upstream_cells).\
+        upstream_basin
+    if cm.run_basin:
+        forcings_static.climate_forcing.set_spatial_window(basin)
+
+    # First simulation day (see run_watergap)
+    day = np.where(forcings_static.calendar.dates ==
+                   np.datetime64(cm.start))[0].item()
+    lateral_waterbalance.activate_res_area_storage_capacity(day, False)
+    land_water_frac.landareafrac_with_reservior(day)
+    land_water_frac.get_land_and_water_freq(day)
+    lateral_waterbalance.glores_storage = land_water_frac.\
+        adapt_glores_storage(vertical_waterbalance.canopy_storage,
+                             vertical_waterbalance.snow_water_storage,
+                             vertical_waterbalance.soil_water_content,
+                             lateral_waterbalance.glores_area,
+                             lateral_waterbalance.glores_storage)
+    vertical_waterbalance.calculate(day, land_water_frac.current_landareafrac,
+                                    land_water_frac.landareafrac_ratio,
+                                    basin, land_water_frac.water_freq,
+                                    land_water_frac.land_freq)
+
+    recorded = []
+    river_routing = rt.river_routing
+
+    def record(*routing_inputs):
+        recorded.append(copy.deepcopy(routing_inputs))
+        return river_routing(*routing_inputs)
+
+    fluxes = vertical_waterbalance.fluxes
+    rt.river_routing = record
+    try:
+        lateral_waterbalance.\
+            calculate(fluxes['groundwater_recharge'],
+                      fluxes['openwater_PET'], fluxes['daily_precipitation'],
+                      fluxes['surface_runoff'],
+                      fluxes['daily_storage_transfer'],
+                      fluxes['land_aet_corr'],
+                      land_water_frac.current_landareafrac,
+                      land_water_frac.previous_landareafrac,
+                      land_water_frac.landwaterfrac_excl_glolake_res,
+                      day, basin,
+                      fluxes['sum_canopy_snow_soil_storage'])
+    finally:
+        rt.river_routing = river_routing
+
+    return recorded[0], lateral_waterbalance.get_routing_network()
+
+
+def time_routing(routing, schedule, routing_inputs, repeats):
+    """
+    Route one day several times.
+
+    Parameters
+    ----------
+    routing : function
+        river_routing, river_routing_parallel or river_routing_levels.
+    schedule : tuple
+        Leading arguments of routing function (cells and their chunks).
+    routing_inputs : tuple
+        Arguments of river_routing (not changed).
+    repeats : int
+        Number of measured days (after one day which is not measured).
+
+    Returns
+    -------
+    seconds : float
+        Median time per day, Unit: [s]
+    results : tuple
+        Outputs of routing of last day.
+
+    """
+    seconds = []
+    for _ in range(repeats + 1):
+        inputs = copy.deepcopy(routing_inputs)
+        start = time.perf_counter()
+        results = routing(*schedule, *inputs)
+        seconds.append(time.perf_counter() - start)
+    # First day compiles the numba functions or starts threads.
+    return np.median(seconds[1:]), results
+
+
+def is_identical(results, reference):
+    """Check if all outputs of the routing are identical to reference."""
+    # Outputs of options which are not selected are None.
+    return all(result is expected or
+               np.array_equal(np.asarray(result), np.asarray(expected),
+                              equal_nan=True)
+               for result, expected in zip(results, reference))
+
+
+def main():
+    """Run benchmark and print time and speedup of routing per day."""
+    max_threads = numba.config.NUMBA_NUM_THREADS  # pylint: disable=no-member
+    parser = argparse.ArgumentParser(
+        description='Benchmark of parallel routing schedules.')
+    parser.add_argument('name', help='name of configuration file')
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=sorted({1, 2, 4, 8, 16, 32, max_threads} &
+                                       set(range(1, max_threads + 1))),
+                        help='numbers of threads')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='number of measured days per schedule')
+    args = parser.parse_args()
+    if not all(0 < threads <= max_threads for threads in args.threads):
+        parser.error(f'numbers of threads must be between 1 and '
+                     f'{max_threads} (NUMBA_NUM_THREADS)')
+
+    # Setup runs serially, threads are set for every schedule.
+    sys.argv = [sys.argv[0], args.name, '--threads', '1']
+    routing_inputs, routing_network = record_routing_inputs()
+
+    basin_cells, basin_start = \
+        routing_basins.get_routing_basins(*routing_network)
+    level_cells, level_start = \
+        routing_basins.get_routing_levels(*routing_network)
+    basin_size = np.diff(basin_start)
+    level_size = np.diff(level_start)
+    print(f'{len(basin_cells)} cells, {len(basin_size)} basins (largest '
+          f'{basin_size.max()} cells), {len(level_size)} levels (mean '
+          f'{level_size.mean():.0f}, median {np.median(level_size):.0f} '
+          'cells)')
+
+    serial_seconds, reference = \
+        time_routing(rt.river_routing, (), routing_inputs, args.repeats)
+    print(f'{"schedule":10} {"threads":>7} {"ms/day":>8} {"speedup":>8} '
+          f'{"identical":>9}')
+    print(f'{"serial":10} {1:7d} {serial_seconds * 1e3:8.1f} {1:8.2f} '
+          f'{"yes":>9}')
+    for threads in args.threads:
+        numba.set_num_threads(threads)
+        schedules = (
+            ('basins', rt.river_routing_parallel,
+             routing_basins.get_thread_cells(basin_cells, basin_start,
+                                             threads)),
+            ('levels', rt.river_routing_levels,
+             (level_cells,) + routing_basins.get_level_chunks(level_start,
+                                                              threads)))
+        for name, routing, schedule in schedules:
+            seconds, results = time_routing(routing, schedule,
+                                            routing_inputs, args.repeats)
+            identical = 'yes' if is_identical(results, reference) else 'no'
+            print(f'{name:10} {threads:7d} {seconds * 1e3:8.1f} '
+                  f'{serial_seconds / seconds:8.2f} {identical:>9}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Benchmark of preallocated outputs of the water balance."""
+
+# =============================================================================
+# This script compares outputs of the vertical and lateral water balance which
+# are allocated every day (as before the workspace module) with outputs which
+# are preallocated once and reused (Workspace). Only the creation of outputs
+# is measured (no water balance is computed), on a synthetic global grid
+# (0.5 degree) with elevation subgrids for the snow water balance.
+
+# Run from the WaterGAP directory:
+#     python -m misc.benchmark_workspace --days 30
+# =============================================================================
+
+import argparse
+import time
+import numpy as np
+from model.utility import workspace as ws
+from model.verticalwaterbalance import waterbalance_vertical as vb
+from model.lateralwaterbalance import routing as rt
+
+# Number of storages (groundwater, lakes, wetlands, reservoirs, release
+# coefficient and river) and other outputs of river_routing.
+NUM_LATERAL_STATES = 8
+NUM_LATERAL_FLUXES = 39
+
+
+def create_grid(num_subgrid, seed=0):
+    """
+    Create synthetic basin and storages.
+
+    Parameters
+    ----------
+    num_subgrid : int
+        Number of elevation subgrids of snow water balance.
+    seed : int
+        Seed of random numbers.
+
+    Returns
+    -------
+    basin : array
+        Basin with 0 for land cells and nan for ocean (about 2/3 of grid).
+    vertical_states : tuple
+        Canopy, snow, snow subgrid and soil storages.
+    lateral_states : tuple
+        Storages of lateral water balance.
+
+    """
+    rng = np.random.default_rng(seed)
+    shape = (360, 720)
+    basin = np.where(rng.random(shape) < 0.35, 0.0, np.nan)
+    # Snow water storage of subgrids is cell-major (land_cell, subgrid)
+    num_land_cells = np.count_nonzero(~np.isnan(basin))
+    vertical_states = (rng.random(shape), rng.random(shape),
+                       rng.random((num_land_cells, num_subgrid)),
+                       rng.random(shape))
+    lateral_states = tuple(rng.random(shape)
+                           for _ in range(NUM_LATERAL_STATES))
+    return basin, vertical_states, lateral_states
+
+
+def vertical_allocate(workspace, states, basin):  # pylint: disable=unused-argument
+    """Create new outputs of vertical water balance."""
+    return vb.create_outputs(*states, basin)
+
+
+def vertical_workspace(workspace, states, basin):
+    """Get preallocated outputs of vertical water balance."""
+    canopy_storage, snow_water_storage, snow_water_storage_subgrid, \
+        soil_water_content = states
+    # Storages at index 5, 10, 11 and 18 of create_outputs
+    state_outputs = \
+        {5: workspace.get_state('canopy', canopy_storage, basin),
+         10: workspace.get_state('snow', snow_water_storage, basin),
+         11: workspace.get_state('snow_subgrid', snow_water_storage_subgrid),
+         18: workspace.get_state('soil', soil_water_content, basin)}
+    return tuple(state_outputs[i] if i in state_outputs else
+                 workspace.get('flux' + str(i), basin) for i in range(23))
+
+
+def vertical_next_states(outputs):
+    """Get storages of next day (canopy, snow, snow subgrid and soil)."""
+    return outputs[5], outputs[10], outputs[11], outputs[18]
+
+
+def lateral_allocate(workspace, states, basin):  # pylint: disable=unused-argument
+    """Create new outputs of river routing (as basin.copy())."""
+    return tuple(basin.copy() + state.copy() for state in states) + \
+        tuple(basin.copy() for _ in range(NUM_LATERAL_FLUXES))
+
+
+def lateral_workspace(workspace, states, basin):
+    """Get and reset preallocated outputs of river routing."""
+    outputs = []
+    for i, state in enumerate(states):
+        state_out = workspace.get_state('state' + str(i), state)
+        rt.add_to_output(state_out, basin, state)
+        outputs.append(state_out)
+    for i in range(NUM_LATERAL_FLUXES):
+        flux = workspace.get('flux' + str(i), basin)
+        flux[:] = basin
+        outputs.append(flux)
+    return tuple(outputs)
+
+
+def lateral_next_states(outputs):
+    """Get storages of next day."""
+    return outputs[:NUM_LATERAL_STATES]
+
+
+def run_days(get_outputs, next_states, states, basin, days):
+    """
+    Get outputs for a number of days.
+
+    Returns
+    -------
+    seconds : float
+        Time per day, Unit: [s]
+    allocated : float
+        Newly allocated output arrays per day, Unit: [MB]
+    workspace_size : float
+        Size of workspace, Unit: [MB]
+
+    """
+    workspace = ws.Workspace()
+    # First day creates the workspace (and compiles numba functions).
+    states = next_states(get_outputs(workspace, states, basin))
+
+    allocated = 0
+    start = time.perf_counter()
+    for _ in range(days):
+        outputs = get_outputs(workspace, states, basin)
+        # Outputs which are not arrays of the workspace are newly allocated
+        buffers = {id(array) for array in workspace.buffers.values()} | \
+            {id(array) for arrays in workspace.states.values()
+             for array in arrays}
+        allocated += sum(array.nbytes for array in outputs
+                         if id(array) not in buffers)
+        states = next_states(outputs)
+    seconds = (time.perf_counter() - start) / days
+
+    return seconds, allocated / days / 1e6, workspace.nbytes() / 1e6
+
+
+def main():
+    """Run benchmark and print time and allocation per day."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark of preallocated water balance outputs.')
+    parser.add_argument('--days', type=int, default=30,
+                        help='number of simulated days')
+    parser.add_argument('--subgrid', type=int, default=100,
+                        help='number of elevation subgrids (snow)')
+    args = parser.parse_args()
+
+    basin, vertical_states, lateral_states = create_grid(args.subgrid)
+
+    print(f'{"balance":10} {"outputs":10} {"ms/day":>8} '
+          f'{"MB alloc/day":>13} {"MB workspace":>13}')
+    for balance, states, next_states, versions in (
+            ('vertical', vertical_states, vertical_next_states,
+             (('allocate', vertical_allocate),
+              ('workspace', vertical_workspace))),
+            ('lateral', lateral_states, lateral_next_states,
+             (('allocate', lateral_allocate),
+              ('workspace', lateral_workspace)))):
+        for version, get_outputs in versions:
+            seconds, allocated, workspace_size = \
+                run_days(get_outputs, next_states, states, basin, args.days)
+            print(f'{balance:10} {version:10} {seconds * 1e3:8.1f} '
+                  f'{allocated:13.1f} {workspace_size:13.1f}')
+
+
+if __name__ == "__main__":
+    main()
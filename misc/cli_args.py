@@ -33,5 +33,8 @@ def parse_cli():
     parser.add_argument('--debug', action="store_true",
                         help='Enable or disable TraceBack for '
                         'debugging by setting True or False ')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Number of threads for vertical water balance '
+                        '(overrides num_threads of configuration file)')
     args = parser.parse_args()
     return args
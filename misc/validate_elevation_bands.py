@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Validation of snow outputs with fewer elevation bands."""
+
+# =============================================================================
+# This script compares snow outputs of a run with fewer elevation bands
+# (num_elevation_bands in configuration file) against a reference run with all
+# 100 elevation subgrids. Both runs must write the compared variables (e.g.
+# snow_water_equiv and snow_melt in configuration file) for the same period.
+# For every variable, the report gives the mean of both runs, bias, mean
+# absolute and root mean square difference, the largest difference of a cell
+# and the correlation of the daily global mean. Means are area weighted
+# (cosine of latitude) over all land cells and days.
+
+# Run from the WaterGAP directory:
+#     python -m misc.validate_elevation_bands reference_output/ output/
+# =============================================================================
+
+import argparse
+import glob
+import os
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+
+def open_variable(output_dir, var_name):
+    """
+    Open daily output of a variable (all output files in directory).
+
+    Parameters
+    ----------
+    output_dir : str
+        Output directory of WaterGAP run.
+    var_name : str
+        Output variable name, e.g. swe or snm.
+
+    Returns
+    -------
+    xarray.DataArray
+        Daily output of variable.
+
+    """
+    paths = sorted(glob.glob(os.path.join(output_dir, var_name + '_*.nc')))
+    if not paths:
+        raise FileNotFoundError(f'No output of {var_name} in {output_dir}')
+    data = [xr.open_dataset(path, decode_times=True)[var_name]
+            for path in paths]
+    return xr.concat(data, dim='time') if len(data) > 1 else data[0]
+
+
+def compare_variable(reference, output, days_per_block=31):
+    """
+    Compare output of a variable against reference.
+
+    Days are read in blocks, such that long runs fit into memory.
+
+    Parameters
+    ----------
+    reference : xarray.DataArray
+        Daily output of reference run (time, lat, lon).
+    output : xarray.DataArray
+        Daily output of run to validate (time, lat, lon).
+    days_per_block : int
+        Number of days read at once.
+
+    Returns
+    -------
+    dict
+        Validation statistics of variable.
+
+    """
+    reference, output = xr.align(reference, output, join='inner')
+    lat_weights = np.cos(np.deg2rad(reference['lat'].values))[:, np.newaxis]
+
+    sum_weights = 0.0
+    sum_reference = 0.0
+    sum_output = 0.0
+    sum_abs_diff = 0.0
+    sum_squared_diff = 0.0
+    max_abs_diff = 0.0
+    num_days = 0
+    daily_reference = []
+    daily_output = []
+    for start in range(0, reference.sizes['time'], days_per_block):
+        days = slice(start, start + days_per_block)
+        reference_values = reference.isel(time=days).values.astype(np.float64)
+        output_values = output.isel(time=days).values.astype(np.float64)
+
+        land = ~np.isnan(reference_values) & ~np.isnan(output_values)
+        weights = np.where(land, lat_weights, 0.0)
+        reference_values = np.where(land, reference_values, 0.0)
+        output_values = np.where(land, output_values, 0.0)
+        diff = output_values - reference_values
+
+        # Days without output (e.g. not simulated days of output year) are
+        # skipped.
+        day_weights = weights.sum(axis=(1, 2))
+        simulated = day_weights > 0
+        num_days += simulated.sum()
+        daily_reference.append(
+            (weights * reference_values).sum(axis=(1, 2))[simulated] /
+            day_weights[simulated])
+        daily_output.append(
+            (weights * output_values).sum(axis=(1, 2))[simulated] /
+            day_weights[simulated])
+
+        sum_weights += weights.sum()
+        sum_reference += (weights * reference_values).sum()
+        sum_output += (weights * output_values).sum()
+        sum_abs_diff += (weights * np.abs(diff)).sum()
+        sum_squared_diff += (weights * diff**2).sum()
+        max_abs_diff = max(max_abs_diff, np.abs(diff).max())
+
+    reference_mean = sum_reference / sum_weights
+    output_mean = sum_output / sum_weights
+    daily_reference = np.concatenate(daily_reference)
+    daily_output = np.concatenate(daily_output)
+    if num_days > 1 and np.std(daily_reference) > 0 and \
+            np.std(daily_output) > 0:
+        correlation = np.corrcoef(daily_reference, daily_output)[0, 1]
+    else:
+        correlation = np.nan
+
+    return {'days': num_days,
+            'unit': reference.attrs.get('units', ''),
+            'reference_mean': reference_mean,
+            'mean': output_mean,
+            'bias': output_mean - reference_mean,
+            'bias_percent': (100 * (output_mean - reference_mean) /
+                             reference_mean if reference_mean != 0
+                             else np.nan),
+            'mae': sum_abs_diff / sum_weights,
+            'rmse': np.sqrt(sum_squared_diff / sum_weights),
+            'max_abs_diff': max_abs_diff,
+            'daily_mean_correlation': correlation}
+
+
+def main():
+    """Print validation report of snow outputs."""
+    parser = argparse.ArgumentParser(
+        description='Compare snow outputs of a run with fewer elevation '
+                    'bands against a 100-band reference run.')
+    parser.add_argument('reference_dir',
+                        help='output directory of reference run (100 bands)')
+    parser.add_argument('output_dir',
+                        help='output directory of run with fewer bands')
+    parser.add_argument('--variables', nargs='+', default=['swe', 'snm'],
+                        help='output variables to compare')
+    parser.add_argument('--csv', help='write report to csv file')
+    args = parser.parse_args()
+
+    report = {}
+    for var_name in args.variables:
+        report[var_name] = \
+            compare_variable(open_variable(args.reference_dir, var_name),
+                             open_variable(args.output_dir, var_name))
+    report = pd.DataFrame(report).T
+
+    with pd.option_context('display.width', 200,
+                           'display.max_columns', None,
+                           'display.float_format', lambda value: f'{value:.6g}'):
+        print(report)
+    if args.csv:
+        report.to_csv(args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,7 @@ reservoir_operation = cm.RESERVOIR_OPT
 def compute_landareafrac(landwater_frac, land_area_frac,
                          resyear_frac=None, res_year=None,
                          glores_frac_prevyear=None,
-                         init_landfrac_res_flag=None):
+                         init_landfrac_res_flag=None, glores_frac=None):
     """
     Compute land area fraction.
 
@@ -39,6 +39,9 @@ def compute_landareafrac(landwater_frac, land_area_frac,
     init_landfrac_res_flag: boolean
         This Flag compute land area fraction at  start day of simulation  
         when reservoirs are active.
+    glores_frac : array
+        Global reservoir fraction of active reservoir year (read from
+        resyear_frac if None), Unit: [-]
 
     Returns
     -------
@@ -86,10 +89,11 @@ def compute_landareafrac(landwater_frac, land_area_frac,
             # fraction contains accumulated values per year, specifically
             # when a grid cell has more than one reservoir fraction (e.g.,
             # a new dam is built) but with diferernt outflow cells.
-            glores_frac = resyear_frac.gloresfrac.sel(time=res_year).\
-                values.astype(np.float64)
-            # changing data dimension from (1,360,720) to (360,720)
-            glores_frac = glores_frac[0]
+            if glores_frac is None:
+                glores_frac = resyear_frac.gloresfrac.sel(time=res_year).\
+                    values.astype(np.float64)
+                # changing data dimension from (1,360,720) to (360,720)
+                glores_frac = glores_frac[0]
 
             # ================================================================
             # Compute land area fraction at model start and subsequent years
@@ -190,3 +194,45 @@ def get_glolake_area(landwater_frac):
                                  reservior_and_regulated_lake_area,
                                  global_lake_area)
     return glo_lake_area
+
+
+def add_storage_to_outflowcell(assignment_start, assignment_cells, glores_area,
+                               storage_change_km3, glores_storage):
+    """
+    Add storage of cells assigned to a global reservoir to its outflow cell.
+
+    Parameters
+    ----------
+    assignment_start : array
+        Start of cells of each global reservoir in assignment_cells
+        (see riparian_cells module)
+    assignment_cells : array
+        Latitude and longitude index of cells assigned to outflow cell of
+        global reservoirs.
+    glores_area : array
+        Global reservoir area, Unit: [km^2]
+    storage_change_km3 : array
+        Storage of reduced land area fraction, Unit: [km^3]
+    glores_storage : array
+        Global reservoir storage, Unit: [km^3]
+
+    Returns
+    -------
+    glores_storage : array
+        Global reservoir storage, Unit: [km^3]
+
+    """
+    # Storage is summed over the assigned cells only (sequentially in grid
+    # order), not pairwise over the whole grid, so the sum can differ in the
+    # last bits from a sum over the whole grid (see test).
+    for i in range(len(assignment_start) - 1):
+        cells = assignment_cells[assignment_start[i]:assignment_start[i + 1]]
+        lat, lon = cells[:, 0], cells[:, 1]
+        assinged_outflowcell_index = np.flatnonzero(glores_area[lat, lon] > 0)
+
+        if assinged_outflowcell_index.shape[0] != 0:
+            lat_x = lat[assinged_outflowcell_index[0]]
+            lon_y = lon[assinged_outflowcell_index[0]]
+
+            glores_storage[lat_x, lon_y] += storage_change_km3[lat, lon].sum()
+    return glores_storage
@@ -11,16 +11,18 @@
 """Land surfacewater fraction."""
 
 import numpy as np
-import pandas as pd
 from model import land_surfacewater_fraction as lsf
+from model.utility import riparian_cells
 
 
 class LandsurfacewaterFraction:
     """Compute and update land and surfacewater fractions."""
 
-    def __init__(self, static_data, reservior_opt):
+    def __init__(self, static_data, reservior_opt, calendar):
         self.static_data = static_data
         self.reservior_opt = reservior_opt
+        self.calendar = calendar
+        self.day = 0
         self.init_landfrac_res_flag = True
 
         # =====================================================================
@@ -47,6 +49,10 @@ class LandsurfacewaterFraction:
         # Initialize fraction variables for reservoir
         # =====================================================================
         self.glores_frac_prevyear = np.zeros_like(self.cont_frac)
+        # Global reservoir fraction of current year is read once per year
+        # (see get_glores_frac)
+        self.glores_frac_currentyear = None
+        self.glores_frac_year = None
         self.gloresfrac_change = np.zeros_like(self.cont_frac)
         self.current_swb_frac = np.zeros_like(self.cont_frac)
 
@@ -120,23 +126,20 @@ class LandsurfacewaterFraction:
         # ---------------------------------------------------------------------
         # Variables needed to adapt global reservoir storage due to  net change
         # in land fraction. see  "adapt_glores_storage" function
-        self.outflow_cell_assignment = self.static_data.res_reg_files.\
-            outflowcell_assignment_glores.values
-        self.unique_outflow_cell_assignment = \
-            np.unique(self.outflow_cell_assignment)[1:-1]
+        # Cells assigned to the outflow cell of each global reservoir.
+        self.assignment_start, self.assignment_cells, _ = \
+            riparian_cells.get_unit_index(self.static_data.res_reg_files.
+                                          outflowcell_assignment_glores.values)
         # ---------------------------------------------------------------------
 
-    def landareafrac_with_reservior(self, date, reservoir_opt_year):
+    def landareafrac_with_reservior(self, day):
         """
         Get land area fraction.
 
         Parameters
         ----------
-        date : datetime
-            Simulation date
-        reservoir_opt_year : integer
-            List of years for all operational reservoir from start year to
-            end year.
+        day : int
+            Index of simulation day (see simulation_calendar).
 
         Returns
         -------
@@ -148,13 +151,12 @@ class LandsurfacewaterFraction:
         # Note!!! that land area fraction is also updated daily after yearly
         # calulation. (see update_landareafrac function)
         if self.reservior_opt:
-            self.date = date.astype('datetime64[D]')
-            self.reservoir_opt_year = reservoir_opt_year
+            self.day = day
 
-            if self.date in self.reservoir_opt_year or \
+            if self.calendar.is_reservoir_year[day] or \
                     self.init_landfrac_res_flag is True:
 
-                self.resyear = str(pd.to_datetime(self.date).year)
+                self.resyear = str(self.calendar.year[day])
                 # =============================================================
                 # Get land area fracion
                 # =============================================================
@@ -167,7 +169,8 @@ class LandsurfacewaterFraction:
                                              self.static_data.resyear_frac,
                                              self.resyear,
                                              self.glores_frac_prevyear,
-                                             self.init_landfrac_res_flag)
+                                             self.init_landfrac_res_flag,
+                                             self.get_glores_frac(self.resyear))
 
                 self.current_landareafrac = lsf_out[0]
                 self.current_landareafrac[self.current_landareafrac<0]=0
@@ -190,12 +193,10 @@ class LandsurfacewaterFraction:
                 # Get land water fracion without  global lakes and
                 # reservoirs/regulated lakes.
                 # =============================================================
-                res_year_lakewet_frac = str(pd.to_datetime(self.date).year)
-                glores_frac_currentyear = self.static_data.resyear_frac.gloresfrac.\
-                    sel(time=res_year_lakewet_frac).values.astype(np.float64)
+                glores_frac_currentyear = self.get_glores_frac(self.resyear)
 
                 self.landwaterfrac_excl_glolake_res = \
-                    (self.cont_frac - self.glolake_frac - glores_frac_currentyear[0])/100
+                    (self.cont_frac - self.glolake_frac - glores_frac_currentyear)/100
                 self.landwaterfrac_excl_glolake_res[self.landwaterfrac_excl_glolake_res < 0] = 0
     # =========================================================================
     # Adjusting Reservoir Storage Based on Changes in Land Fraction
@@ -232,7 +233,7 @@ class LandsurfacewaterFraction:
 
         """
         if self.reservior_opt:
-            if self.date in self.reservoir_opt_year:
+            if self.calendar.is_reservoir_year[self.day]:
 
                 landareafrac_change = \
                     self.current_landareafrac - self.previous_landareafrac
@@ -281,42 +282,29 @@ class LandsurfacewaterFraction:
                 # located in assinged outflow cell according to the
                 # glwdunits
                 # ---------------------------------------------------------
-                for i in range(len(self.unique_outflow_cell_assignment)):
-                    assinged_outflowcell_index = \
-                        np.where((self.outflow_cell_assignment ==
-                                  self.unique_outflow_cell_assignment[i]) &
-                                 (glores_area > 0))
-
-                    if assinged_outflowcell_index[0].shape[0] != 0:
-                        lat_x, lon_y = assinged_outflowcell_index[0][0],\
-                            assinged_outflowcell_index[1][0]
-
-                        all_storage = \
-                            np.where(self.outflow_cell_assignment ==
-                                     self.unique_outflow_cell_assignment[i],
-                                     canopy_watercontent_change_km3 +
-                                     soil_watercontent_change_km3 +
-                                     snow_watercontent_change_km3, 0)
-
-                        glores_storage[lat_x, lon_y] += all_storage.sum()
+                storage_change_km3 = canopy_watercontent_change_km3 + \
+                    soil_watercontent_change_km3 + snow_watercontent_change_km3
+
+                glores_storage = \
+                    lsf.add_storage_to_outflowcell(self.assignment_start,
+                                                   self.assignment_cells,
+                                                   glores_area,
+                                                   storage_change_km3,
+                                                   glores_storage)
                 # ---------------------------------------------------------
                 # Assigning current reservoir year to previous year.
-                glores_frac_currentyear = self.static_data.resyear_frac.\
-                    gloresfrac.sel(time=self.resyear).values.\
-                    astype(np.float64)
-                glores_frac_currentyear = glores_frac_currentyear[0]
-                self.glores_frac_prevyear = glores_frac_currentyear
+                self.glores_frac_prevyear = self.get_glores_frac(self.resyear)
 
         return glores_storage
 
-    def get_land_and_water_freq(self, date):
+    def get_land_and_water_freq(self, day):
         """
         Land and water fractions (used to calculate total PET).
 
         Parameters
         ----------
-        date : datetime
-            Simulation date
+        day : int
+            Index of simulation day (see simulation_calendar).
         update_loclake_frac : array
             updated local lake fraction
 
@@ -327,13 +315,12 @@ class LandsurfacewaterFraction:
         """
         if self.land_and_water_freq_flag:  # start of simulation
             if self.reservior_opt:
-                res_year_lakewet_frac = str(pd.to_datetime(date).year)
-                glores_frac_currentyear = self.static_data.resyear_frac.gloresfrac.\
-                    sel(time=res_year_lakewet_frac).values.astype(np.float64)
+                glores_frac_currentyear = \
+                    self.get_glores_frac(str(self.calendar.year[day]))
             else:
                 glores_frac_currentyear = np.zeros_like(self.cont_frac)
 
-            self.water_freq = self.glolake_frac + self.loclake_frac + glores_frac_currentyear[0]
+            self.water_freq = self.glolake_frac + self.loclake_frac + glores_frac_currentyear
             self.land_freq = self.cont_frac - self.water_freq
             self.land_and_water_freq_flag = False
 
@@ -345,18 +332,44 @@ class LandsurfacewaterFraction:
             # fraction. Additionally, the reservoir volume is adjusted to
             # maintain consistency by incorporating storage changes  from
             # canopy, soil, and snow storage (see adapt_glores_storage).
-            if (pd.to_datetime(date).month == 1) and (pd.to_datetime(date).day == 1):
+            if self.calendar.day_of_year[day] == 1:
                 if self.reservior_opt:
-                    res_year_lakewet_frac = str(pd.to_datetime(date).year)
-                    glores_frac_currentyear = self.static_data.resyear_frac.gloresfrac.\
-                        sel(time=res_year_lakewet_frac).values.astype(np.float64)
+                    glores_frac_currentyear = \
+                        self.get_glores_frac(str(self.calendar.year[day]))
                 else:
                     glores_frac_currentyear = np.zeros_like(self.cont_frac)
 
                 self.water_freq = self.glolake_frac + \
-                    (self.updated_loclake_frac*100) +  glores_frac_currentyear[0]
+                    (self.updated_loclake_frac*100) +  glores_frac_currentyear
                 self.land_freq = self.cont_frac - self.water_freq
 
+    def get_glores_frac(self, year):
+        """
+        Get global reservoir fraction of a year.
+
+        The fraction is read once per year and shared between the yearly
+        updates of land area fraction, reservoir storage and land and water
+        fractions.
+
+        Parameters
+        ----------
+        year : str
+            Year of simulation.
+
+        Returns
+        -------
+        glores_frac : array
+            Global reservoir fraction of year, Unit: [%]
+
+        """
+        if self.glores_frac_year != year:
+            glores_frac = self.static_data.resyear_frac.gloresfrac.\
+                sel(time=year).values.astype(np.float64)
+            self.glores_frac_currentyear = glores_frac[0]
+            self.glores_frac_year = year
+
+        return self.glores_frac_currentyear
+
     def update_landareafrac(self, land_swb_fraction):
         """
         Update land area fraction.
@@ -16,28 +16,27 @@
 # =============================================================================
 
 from numba import njit
-import numpy as np
 
 
 @njit(cache=True)
-def aggregate_potnetabs(glwdunits, lake_area, res_area, netabs,
-                        unique_glwdunits):
+def aggregate_potnetabs(unit_start, unit_cells, lake_area, res_area, netabs):
     """
     Aggregate riparian potential net abstractiion to outflowcell.
 
     Parameters
     ----------
-    glwdunits : array
-       Global Lakes and Wetlands units(outflow cell and riparian cell)
-    lake_area : TYPE
+    unit_start : array
+        Start of cells of each global Lakes and Wetlands unit in unit_cells
+        (see riparian_cells module)
+    unit_cells : array
+        Latitude and longitude index of cells (outflow cell and riparian
+        cells) of global Lakes and Wetlands units
+    lake_area : array
         Maximum area of global lake, Unit: [km2]
-    res_area : TYPE
+    res_area : array
         Maximum area of reservoir and regulated lake, Unit: [km2]
-    netabs : TYPE
+    netabs : array
         Daily potential net abstraction from surface water
-    unique_glwdunits : array
-        Unique values of global Lakes and Wetlands units(outflow cell and
-        riparian cell)
 
     Returns
     -------
@@ -47,35 +46,33 @@ def aggregate_potnetabs(glwdunits, lake_area, res_area, netabs,
         values of 0. The rest of cells have respective daily potential net
         abstraction  values
     """
-    aggregate = netabs  # create a copy of net abstraction for aggregation
+    # create a copy of net abstraction for aggregation
+    aggregate = netabs.copy()
 
-    for i in range(len(unique_glwdunits)):
+    for unit in range(len(unit_start) - 1):
 
         # get outflow  cell of riprian cells of lakes or reservoir
-        outflowcell_index = \
-            np.where((glwdunits == unique_glwdunits[i]) & (lake_area > 0) |
-                     (glwdunits == unique_glwdunits[i]) & (res_area > 0))
-
-        # get index of lakes and reservior with values in index array
         # If there are multiple outflow cells (reservoir or lakes), select the
         # cell with the highest index (or last reservoir or lake).
         # This avoids double counting of demand.
-        if outflowcell_index[0].shape[0] != 0:
-            x, y = outflowcell_index[0][-1], outflowcell_index[1][-1]
+        outflowcell_index = -1
+        for i in range(unit_start[unit], unit_start[unit + 1]):
+            x, y = unit_cells[i]
+            if lake_area[x, y] > 0 or res_area[x, y] > 0:
+                outflowcell_index = i
 
+        if outflowcell_index >= 0:
             # get positive net abstraction values of lake or reservior riparian
-            # cells
-            pot_net_abs =\
-                np.where((glwdunits == unique_glwdunits[i]) & (netabs > 0),
-                         netabs, 0)
-
-            # set positive abstraction values of riparain cell of lake or
-            # reservior  to zero
-            aggregate =\
-                np.where((glwdunits == unique_glwdunits[i]) & (netabs > 0),
-                         np.zeros_like(aggregate), aggregate)
+            # cells and set them to zero
+            pot_net_abs = 0.0
+            for i in range(unit_start[unit], unit_start[unit + 1]):
+                x, y = unit_cells[i]
+                if netabs[x, y] > 0:
+                    pot_net_abs += netabs[x, y]
+                    aggregate[x, y] = 0
 
             # add all ripriarian cells  net abstraction to out flow cell
-            aggregate[x, y] += pot_net_abs.sum()
+            x, y = unit_cells[outflowcell_index]
+            aggregate[x, y] += pot_net_abs
 
     return aggregate
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Integer types of groundwater cells and surface water bodies."""
+
+# =============================================================================
+# Numba kernels of the lateral water balance select groundwater cells
+# (humid, arid, inland sink) and surface water bodies with integer enums
+# instead of strings, such that no strings are compared in the cell loop.
+# Names (strings) are only converted for the functions which still accept
+# names (e.g. lake_wetland_water_balance).
+# =============================================================================
+
+from enum import IntEnum
+from numba import njit
+
+
+class GroundwaterCell(IntEnum):
+    """Groundwater cell type (humid and arid as in humid-arid data)."""
+
+    HUMID = 0
+    ARID = 1
+    INLAND_SINK = 2
+
+
+class SurfaceWaterBody(IntEnum):
+    """Surface water body type."""
+
+    LOCAL_LAKE = 0
+    LOCAL_WETLAND = 1
+    GLOBAL_LAKE = 2
+    GLOBAL_WETLAND = 3
+    RESERVOIR = 4
+
+
+@njit(cache=True)
+def get_groundwater_cell(name):
+    """
+    Get groundwater cell type from name.
+
+    Parameters
+    ----------
+    name : string
+        "humid", "arid" or "inland sink"
+
+    Returns
+    -------
+    groundwater_cell : GroundwaterCell
+        Groundwater cell type.
+
+    """
+    if name == "humid":
+        return GroundwaterCell.HUMID
+    if name == "arid":
+        return GroundwaterCell.ARID
+    if name == "inland sink":
+        return GroundwaterCell.INLAND_SINK
+    raise ValueError("Unknown groundwater cell type")
+
+
+@njit(cache=True)
+def get_surface_water_body(name):
+    """
+    Get surface water body type from name.
+
+    Parameters
+    ----------
+    name : string
+        "local lake", "local wetland", "global lake", "global wetland" or
+        "reservoir"
+
+    Returns
+    -------
+    surface_water_body : SurfaceWaterBody
+        Surface water body type.
+
+    """
+    if name == "local lake":
+        return SurfaceWaterBody.LOCAL_LAKE
+    if name == "local wetland":
+        return SurfaceWaterBody.LOCAL_WETLAND
+    if name == "global lake":
+        return SurfaceWaterBody.GLOBAL_LAKE
+    if name == "global wetland":
+        return SurfaceWaterBody.GLOBAL_WETLAND
+    if name == "reservoir":
+        return SurfaceWaterBody.RESERVOIR
+    raise ValueError("Unknown surface water body type")
@@ -25,7 +25,8 @@ def redistritute_to_riparian(prev_accumulated_unsatisfied_potential_netabs_sw,
                              unsat_potnetabs_sw_to_supplycell,
                              accumulated_unsatisfied_potential_netabs_sw,
                              unagregrgated_potential_netabs_sw,
-                             potential_netabs_sw, glwdunits, rout_order,
+                             potential_netabs_sw, unit_start, unit_cells,
+                             unit_rout_position, unit,
                              unsatisfied_potnetabs_riparian,
                              prev_returned_demand_from_supply_cell,
                              x, y):
@@ -47,10 +48,16 @@ def redistritute_to_riparian(prev_accumulated_unsatisfied_potential_netabs_sw,
     potential_netabs_sw : float
         potential net abstraction from surface water (outflow cells of global
         lake and reservoir are aggregated),  Unit: [km^3/day]
-    glwdunits : array
-        Global Lakes and Wetlands units (outflow cell and riparian cell)
-    rout_order : array
-        routing order
+    unit_start : array
+        Start of cells of each global Lakes and Wetlands unit in unit_cells
+        (see riparian_cells module)
+    unit_cells : array
+        Latitude and longitude index of cells (outflow cell and riparian
+        cells) of global Lakes and Wetlands units
+    unit_rout_position : array
+        Position of cells of unit_cells in routing order (-1 if not routed)
+    unit : int
+        Global Lakes and Wetlands unit of global lake or reservoir
     unsatisfied_potnetabs_riparian : array
         Unsatisfied potential net abstraction from global lake or reservoir
         outflow cell to riparian cell, Unit: [km^3/day]
@@ -120,10 +127,10 @@ def redistritute_to_riparian(prev_accumulated_unsatisfied_potential_netabs_sw,
     # ------------------------------------------------------------------
 
     # Note! x,y is index of outflow cell of a global lake or reservoir
-    for i in range(len(rout_order)):
+    for i in range(unit_start[unit], unit_start[unit + 1]):
         # Get invidividual riparian cells of global lakes or reservoir.
-        r_x, r_y = rout_order[i]
-        if glwdunits[x, y] == glwdunits[r_x, r_y] and (x, y) != (r_x, r_y):
+        r_x, r_y = unit_cells[i]
+        if unit_rout_position[i] >= 0 and (x, y) != (r_x, r_y):
 
             if accumulated_unsatisfied_potential_netabs_sw - \
                     prev_accu_supplycell_demad > 0:
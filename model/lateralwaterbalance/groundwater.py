@@ -25,6 +25,26 @@ import numpy as np
 from numba import njit
 from model.lateralwaterbalance import groundwater_adapt_net_abstraction as \
     gw_adapt_netabstr
+from model.lateralwaterbalance import cell_types as ct
+
+
+@njit(cache=True)
+def get_exp_gw_dis_coeff(gw_dis_coeff):
+    """
+    Compute exponential term of groundwater balance once per run.
+
+    Parameters
+    ----------
+    gw_dis_coeff : array
+        Groundwater discharge coefficient, Unit: [1/day]
+
+    Returns
+    -------
+    exp_gw_dis_coeff : array
+        Exponential of negative groundwater discharge coefficient, Unit: [-]
+
+    """
+    return np.exp(-1 * gw_dis_coeff)
 
 
 @njit(cache=True)
@@ -40,14 +60,48 @@ def groundwater_balance(x, y,
     """
     Compute daily groundwater balance including storages and related fluxes.
 
+    See groundwater_balance_from_coeff for parameters and returns. Here,
+    aridity_or_inlandsink is given as name ("humid", "arid" or "inland sink").
+
+    """
+    return groundwater_balance_from_coeff(x, y,
+                                          ct.get_groundwater_cell(
+                                              aridity_or_inlandsink),
+                                          groundwater_storage,
+                                          diffuse_gw_recharge,
+                                          potential_net_abstraction_gw,
+                                          daily_unsatisfied_pot_nas,
+                                          gw_dis_coeff,
+                                          np.exp(-1 * gw_dis_coeff),
+                                          prev_potential_water_withdrawal_sw_irri,
+                                          prev_potential_consumptive_use_sw_irri,
+                                          frac_irri_returnflow_to_gw,
+                                          point_source_recharge)
+
+
+@njit(cache=True)
+def groundwater_balance_from_coeff(x, y,
+                                   groundwater_cell, groundwater_storage,
+                                   diffuse_gw_recharge,
+                                   potential_net_abstraction_gw,
+                                   daily_unsatisfied_pot_nas, gw_dis_coeff,
+                                   exp_gw_dis_coeff,
+                                   prev_potential_water_withdrawal_sw_irri,
+                                   prev_potential_consumptive_use_sw_irri,
+                                   frac_irri_returnflow_to_gw,
+                                   point_source_recharge=None):
+    """
+    Compute daily groundwater balance with exponential term computed per run.
+
     Parameters
     ----------
     x : int
         Latitude index of cell
     y : int
         Longitude index of cell
-    aridiity : string
-        Compute groundwater for "Humid" or "Arid" region
+    groundwater_cell : GroundwaterCell
+        Compute groundwater for humid, arid or inland sink cell
+        (see cell_types)
     groundwater_storage : float
         Daily groundwater storage, Unit: [km^3]
     diffuse_gw_recharge : float
@@ -58,6 +112,9 @@ def groundwater_balance(x, y,
         Daily unsatisfied water use, Unit: [km^3/day]
     gw_dis_coeff : float
         Groundwater discharge coefficient (=0.01),Eqn 21 Müller Schmied et al. (2021), Unit: [1/day]
+    exp_gw_dis_coeff : float
+        Exponential of negative groundwater discharge coefficient (see
+        get_exp_gw_dis_coeff), Unit: [-]
     prev_potential_water_withdrawal_sw_irri : float
         Previous potential water withdrawal from surface water for irrigation, Unit: [km^3/day]   
     prev_potential_consumptive_use_sw_irri: float
@@ -92,24 +149,24 @@ def groundwater_balance(x, y,
     # =========================================================================
     # Point_source_recharge is only computed for (semi)arid surafce water
     #  bodies but not for  inlank sink or humid regions
-    if aridity_or_inlandsink == "humid" or \
-            aridity_or_inlandsink == "inland sink":
+    if groundwater_cell == ct.GroundwaterCell.HUMID or \
+            groundwater_cell == ct.GroundwaterCell.INLAND_SINK:
         point_source_recharge = 0
 
     netgw_in = diffuse_gw_recharge + point_source_recharge
 
     # Update net abstraction from groundwater if there is unsatisfied water use
     # from previous time step.
-    actual_net_abstraction_gw = \
-        np.where(daily_unsatisfied_pot_nas != 0,
-                 gw_adapt_netabstr.
-                 update_netabs_gw(potential_net_abstraction_gw,
-                                  prev_potential_water_withdrawal_sw_irri,
-                                  prev_potential_consumptive_use_sw_irri,
-                                  daily_unsatisfied_pot_nas,
-                                  frac_irri_returnflow_to_gw,
-                                  x, y),
-                 potential_net_abstraction_gw)
+    if daily_unsatisfied_pot_nas != 0:
+        actual_net_abstraction_gw = gw_adapt_netabstr.\
+            update_netabs_gw(potential_net_abstraction_gw,
+                             prev_potential_water_withdrawal_sw_irri,
+                             prev_potential_consumptive_use_sw_irri,
+                             daily_unsatisfied_pot_nas,
+                             frac_irri_returnflow_to_gw,
+                             x, y)
+    else:
+        actual_net_abstraction_gw = potential_net_abstraction_gw
 
     # Updating net groundwater recharge (netgw_in [km3])
     netgw_in = netgw_in - actual_net_abstraction_gw
@@ -121,19 +178,16 @@ def groundwater_balance(x, y,
     # for each time step of 1 day to prevent numerical inaccuracies.
     # See in Equation 20 of Müller Schmied et al. (2021)
 
-    current_gw_storage = prev_gw_storage * np.exp(-1 * gw_dis_coeff) +\
-        (netgw_in/gw_dis_coeff)*(1-np.exp(-1 * gw_dis_coeff))
+    current_gw_storage = prev_gw_storage * exp_gw_dis_coeff +\
+        (netgw_in/gw_dis_coeff)*(1-exp_gw_dis_coeff)
 
     groundwater_discharge = prev_gw_storage - current_gw_storage + netgw_in
 
     # Recalculate groundwater storage when groundwater discharge=0
     # dS/dt = netgw_in - NAg (without k*S) -> S(t) = S(t-1) + netgw_in
 
-    current_gw_storage = np.where(groundwater_discharge <= 0,
-                                  prev_gw_storage + netgw_in,
-                                  current_gw_storage)
-
-    groundwater_discharge = np.where(groundwater_discharge <= 0, 0,
-                                     groundwater_discharge)
+    if groundwater_discharge <= 0:
+        current_gw_storage = prev_gw_storage + netgw_in
+        groundwater_discharge = 0.0
 
     return current_gw_storage, groundwater_discharge, actual_net_abstraction_gw
@@ -20,6 +20,7 @@
 import numpy as np
 from numba import njit
 from model.lateralwaterbalance import storage_reduction_factor as rf
+from model.lateralwaterbalance import cell_types as ct
 
 
 @njit(cache=True)
@@ -37,14 +38,41 @@ def lake_wetland_water_balance(x, y,
     Compute water balance for global and local lakes and wetlands including
     storage and related fluxes.
 
+    See lake_wetland_water_balance_from_type for parameters and returns.
+    Here, choose_swb is given as name ("local lake", "local wetland",
+    "global lake" or "global wetland").
+
+    """
+    return lake_wetland_water_balance_from_type(
+        x, y, ct.get_surface_water_body(choose_swb), storage, precipitation,
+        openwater_pot_evap, aridity, drainage_direction, inflow_to_swb,
+        swb_outflow_coeff, groundwater_recharge_constant,
+        reduction_exponent_lakewet, areal_corr_factor, max_storage, max_area,
+        lakewet_frac, lake_outflow_exp, wetland_outflow_exp, reservoir_area,
+        accumulated_unsatisfied_potential_netabs_sw)
+
+
+@njit(cache=True)
+def lake_wetland_water_balance_from_type(
+        x, y, swb_type, storage, precipitation, openwater_pot_evap, aridity,
+        drainage_direction, inflow_to_swb, swb_outflow_coeff,
+        groundwater_recharge_constant, reduction_exponent_lakewet,
+        areal_corr_factor, max_storage=None, max_area=None, lakewet_frac=0,
+        lake_outflow_exp=None, wetland_outflow_exp=None, reservoir_area=0,
+        accumulated_unsatisfied_potential_netabs_sw=0):
+    """
+    Compute water balance for global and local lakes and wetlands including
+    storage and related fluxes.
+
     Parameters
     ----------
      x : int
          Latitude index of cell
      y : int
          Longitude index of cell
-    choose_swb : string
-        Select surface waterbody (global and local lakes and wetlands)
+    swb_type : SurfaceWaterBody
+        Select surface waterbody (global and local lakes and wetlands, see
+        cell_types)
     storage : float
         Daily surface waterbody storage, Unit: [km3]
     lakewet_frac : float
@@ -122,7 +150,8 @@ def lake_wetland_water_balance(x, y,
     # =========================================================================
     #     Parameters for respective surface waterbody.
     # =========================================================================
-    if choose_swb == "local lake" or choose_swb == "global lake":
+    if swb_type == ct.SurfaceWaterBody.LOCAL_LAKE or \
+            swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         exp_factor = lake_outflow_exp
     else:
         exp_factor = wetland_outflow_exp
@@ -144,13 +173,13 @@ def lake_wetland_water_balance(x, y,
     # =========================================================================
     redfactor = \
         rf.swb_redfactor(storage_prevstep, max_storage,
-                         reduction_exponent_lakewet, choose_swb)
+                         reduction_exponent_lakewet, swb_type)
 
     # For global lake, reduction factor is only used for reducing evaporation
     # and not area since global lake area is assumed not to be dynamic.
     # This would prevent continuous decline of global lake levels in some cases
     # i.e. ((semi)arid regions)
-    if choose_swb == "global lake":
+    if swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         evapo_redfactor = redfactor
         lake_wet_area = max_area
     else:
@@ -192,7 +221,7 @@ def lake_wetland_water_balance(x, y,
     #
     # /////////////////////////////////////////////////////////////////////////
 
-    if choose_swb == "global lake":
+    if swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         # Reducing potential evaporation for global lake using reduction factor
         openwater_pet = openwater_pot_evap * evapo_redfactor
     else:  # local lakes and global and local wetlands
@@ -201,8 +230,8 @@ def lake_wetland_water_balance(x, y,
     openwater_evapo_cor = (1 - areal_corr_factor) * precipitation + \
         (areal_corr_factor * openwater_pet)
 
-    openwater_evapo_cor = np.where(openwater_evapo_cor < 0, 0,
-                                   openwater_evapo_cor)  # km/day
+    if openwater_evapo_cor < 0:
+        openwater_evapo_cor = 0.0  # km/day
 
     # =========================================================================
     # Calculating lake or wetland  groundwater recharge[gwr_lakewet (km3/day)]
@@ -212,17 +241,21 @@ def lake_wetland_water_balance(x, y,
     # bodies but not for  inlank sink or humid regions
     # convert m to km
     m_to_km = 0.001
-    if choose_swb == "global lake":
+    if swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         # Since global lake area is assumed not be dynamic, recharge needs to
         # be reduced else more water will recharge the ground
-        gwr_lakewet = np.where((aridity == 1) & (drainage_direction >= 0),
-                               groundwater_recharge_constant * m_to_km *
-                               lake_wet_area * evapo_redfactor, 0)
+        if (aridity == 1) & (drainage_direction >= 0):
+            gwr_lakewet = groundwater_recharge_constant * m_to_km * \
+                lake_wet_area * evapo_redfactor
+        else:
+            gwr_lakewet = 0.0
 
     else:  # local lakes and global and local wetlands
-        gwr_lakewet = np.where((aridity == 1) & (drainage_direction >= 0),
-                               groundwater_recharge_constant * m_to_km *
-                               lake_wet_area, 0)
+        if (aridity == 1) & (drainage_direction >= 0):
+            gwr_lakewet = groundwater_recharge_constant * m_to_km * \
+                lake_wet_area
+        else:
+            gwr_lakewet = 0.0
 
     # =========================================================================
     # Combine inflow and open water precipitation total_inflow (km3/day)
@@ -236,7 +269,7 @@ def lake_wetland_water_balance(x, y,
     # Incase of global lake, If reservoirs are found in the same outflow cell.
     # The potential net abstraction is shared equally(50%) between.
 
-    if choose_swb == "global lake":
+    if swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         if reservoir_area > 0:
             accumulated_unsatisfied_potential_netabs_glolake = \
                 accumulated_unsatisfied_potential_netabs_sw * 0.5
@@ -261,7 +294,8 @@ def lake_wetland_water_balance(x, y,
     # that lake (wetland) storage does not fall below  -max_storage (0):.
     # Note!! lake (wetland) storage goes from -max_storage (0) to max_storage
 
-    if choose_swb == "local lake" or choose_swb == "global lake":
+    if swb_type == ct.SurfaceWaterBody.LOCAL_LAKE or \
+            swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         petgwr_netabs_sw_max = storage_prevstep + max_storage + total_inflow
     else:  # local and global wetlands
         petgwr_netabs_sw_max = storage_prevstep + total_inflow
@@ -273,7 +307,8 @@ def lake_wetland_water_balance(x, y,
     # analytically for global lake and wetland  but numerically for local lake
     # and wetlands
 
-    if choose_swb == 'global lake' or choose_swb == 'global wetland':
+    if swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE or \
+            swb_type == ct.SurfaceWaterBody.GLOBAL_WETLAND:
         # Global lake and wetland balance:
         # dS/dt = total_inflow - petgwr - NAl - k*S is solved analytically for
         # each time step of 1 day
@@ -297,12 +332,13 @@ def lake_wetland_water_balance(x, y,
     # net abstraction from surface water and open water evaporation as well
     # when petgwr_netabs_sw > petgwr_netabs_sw_max.
 
-    if choose_swb == "local lake" or choose_swb == "global lake":
+    if swb_type == ct.SurfaceWaterBody.LOCAL_LAKE or \
+            swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         storage_limit = -1 * max_storage
     else:
         storage_limit = 0
 
-    if choose_swb == 'global lake':
+    if swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         if petgwr_netabs_sw > petgwr_netabs_sw_max:
             outflow = 0
             storage = storage_limit
@@ -335,7 +371,7 @@ def lake_wetland_water_balance(x, y,
 
             accumulated_unsatisfied_potential_netabs_glolake = 0
 
-    elif choose_swb == 'global wetland':
+    elif swb_type == ct.SurfaceWaterBody.GLOBAL_WETLAND:
         if petgwr_netabs_sw > petgwr_netabs_sw_max:
             outflow = 0
             storage = storage_limit
@@ -357,7 +393,7 @@ def lake_wetland_water_balance(x, y,
 
         # choose storage type to calculate outflow (current or previous)
         # but all should be previous.
-        if choose_swb == 'local lake':  # previous storage
+        if swb_type == ct.SurfaceWaterBody.LOCAL_LAKE:  # previous storage
             which_storge = storage_prevstep
         else:
             which_storge = storage  # current storage
@@ -390,12 +426,12 @@ def lake_wetland_water_balance(x, y,
 
     new_redfactor = \
         rf.swb_redfactor(storage, max_storage,
-                         reduction_exponent_lakewet, choose_swb)
+                         reduction_exponent_lakewet, swb_type)
 
     # Computing new  local lake and global and local wetland area fractions for
     # next day. see eqn. 23 in Müller Schmied et al. (2021)
 
-    if choose_swb == 'global lake':
+    if swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         lake_wet_newfraction = 0
     else:
         lake_wet_newfraction = new_redfactor * lakewet_frac
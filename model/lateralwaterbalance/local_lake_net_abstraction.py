@@ -7,6 +7,7 @@ Created on Sat Aug 19 14:20:24 2023.
 
 from numba import njit
 from model.lateralwaterbalance import storage_reduction_factor as rf
+from model.lateralwaterbalance import cell_types as ct
 
 
 @njit(cache=True)
@@ -48,7 +49,6 @@ def abstract_from_local_lake(storage, max_storage, lake_frac,
     actual_use_sw:float
         Accumulated actual net abstraction from surface water, Unit: [km^3/day]
     """
-    choose_swb = 'local lake'
     # Abtsract from local lake if there is accumulated unstaisfied use
     # after river abstraction.
 
@@ -68,7 +68,8 @@ def abstract_from_local_lake(storage, max_storage, lake_frac,
     # updating  local lake area fractions for next day after abstraction.
     update_redfactor = \
         rf.swb_redfactor(updated_storage, max_storage,
-                         reduction_exponent_lakewet, choose_swb)
+                         reduction_exponent_lakewet,
+                         ct.SurfaceWaterBody.LOCAL_LAKE)
 
     lake_newfraction = update_redfactor * lake_frac
 
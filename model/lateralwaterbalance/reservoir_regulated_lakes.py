@@ -21,10 +21,11 @@ import numpy as np
 from numba import njit
 from model.lateralwaterbalance import storage_reduction_factor as rf
 from model.lateralwaterbalance import reservoir_release_hanasaki as hanaski
+from model.lateralwaterbalance import cell_types as ct
 
 
 @njit(cache=True)
-def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_cell,
+def reservoir_regulated_lake_water_balance(rout_order, routflow_looper,
                                            storage, stor_capacity, precipitation,
                                            openwater_pot_evap, aridity, drainage_direction,
                                            inflow_to_swb,
@@ -32,13 +33,13 @@ def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_
                                            reduction_exponent_res, areal_corr_factor,
                                            res_start_month, simulation_momth_day,
                                            k_release, reservoir_type,
-                                           allocation_coeff, monthly_demand,
-                                           mean_annual_demand, mean_annual_inflow,
+                                           monthly_downstream_demand,
+                                           mean_annual_downstream_demand,
+                                           mean_annual_inflow,
                                            glolake_area,
                                            accumulated_unsatisfied_potential_netabs_sw,
                                            accumulated_unsatisfied_potential_netabs_glolake,
                                            num_days_in_month,
-                                           all_reservoir_and_regulated_lake_area,
                                            reg_lake_redfactor_firstday, minstorage_volume):
     """
     Compute water balance for reservoirs and regulated lakes.
@@ -49,8 +50,6 @@ def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_
         Routing order for the grid cells.
     routflow_looper : int
         Routing flow looper.
-    outflow_cell : array
-        Outflow cells (downstream cell) for respective grid cells.
     storage : float
         Current storage in the reservoir, Unit: [km^3].
     stor_capacity : float
@@ -83,12 +82,12 @@ def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_
         Release coefficient for Hanasaki algorithm Eqn 29 [1]_, Units: [-]
     reservoir_type : int
         Type of reservoir (irrigation or non irrigation).
-    allocation_coeff : float
-        Allocation coefficient for water release Eqn 6 [2]_.
-    monthly_demand : array
-        Monthly demand for each grid cell, Unit: [km^3/day].
-    mean_annual_demand : array
-        Mean annual demand for each grid cell, Unit: [km^3/day].
+    monthly_downstream_demand : float
+        Monthly demand of reservoir and downstream cells (see
+        get_downstream_demand in reservoir_release_hanasaki module), Unit:
+        [km^3/month].
+    mean_annual_downstream_demand : float
+        Mean annual demand of reservoir and downstream cells, Unit: [m^3/yr].
     mean_annual_inflow : array
         Mean annual inflow for each grid cell, Unit: [km^3/day].
     glolake_area : float
@@ -99,8 +98,6 @@ def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_
         Accumulated unsatisfied potential net abstraction from global lake, Unit: [km^3/day].
     num_days_in_month : int
         Number of days in the current month.
-    all_reservoir_and_regulated_lake_area : array
-        all reservoirs and regulated lakes areas in simulation, Unit: [km^2].
     reg_lake_redfactor_firstday : int
         Indicator for the first day to compute regulated lake reduction factor.
     minstorage_volume : float
@@ -140,9 +137,9 @@ def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_
 
     """
     # ************************************************************************
-    # Note: To estimate the water demand of 5 cells downstream from a
-    # reservoir, the reservoir area for all grid cells is read in and the
-    # relevant 5 downstream cells are selected for water demand calculation.
+    # Note: The water demand of 5 cells downstream from a reservoir is
+    # computed once per month (see get_downstream_demand in
+    # reservoir_release_hanasaki module).
     # ************************************************************************
 
     # Index to  print out varibales of interest
@@ -173,7 +170,9 @@ def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_
         evapo_redfactor = 0
     else:
         evapo_redfactor = \
-            rf.swb_redfactor(storage_prevstep, max_storage, reduction_exponent_res)
+            rf.swb_redfactor(storage_prevstep, max_storage,
+                             reduction_exponent_res,
+                             ct.SurfaceWaterBody.RESERVOIR)
 
     # =========================================================================
     # Computing reservior or regulated lake corrected evaporation
@@ -217,8 +216,8 @@ def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_
     openwater_evapo_cor = (1 - areal_corr_factor) * precipitation + \
         (areal_corr_factor * openwater_pet)
 
-    openwater_evapo_cor = np.where(openwater_evapo_cor < 0, 0,
-                                   openwater_evapo_cor)
+    if openwater_evapo_cor < 0:
+        openwater_evapo_cor = 0.0
 
     # =========================================================================
     # Calculating groundwater recharge[gwr_reservior (km3/day)] for reservior
@@ -227,9 +226,11 @@ def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_
 
     # Point source recharge is calculated for arid regions only. Except in arid
     # inland sinks.
-    gwr_reservior = np.where((aridity == 1) & (drainage_direction >= 0),
-                             groundwater_recharge_constant * m_to_km *
-                             reservior_area[x, y] * evapo_redfactor, 0)
+    if (aridity == 1) & (drainage_direction >= 0):
+        gwr_reservior = groundwater_recharge_constant * m_to_km * \
+            reservior_area[x, y] * evapo_redfactor
+    else:
+        gwr_reservior = 0.0
 
     # =========================================================================
     # Total inflow is the sum of inflow and open water precipitation into the
@@ -306,11 +307,10 @@ def reservoir_regulated_lake_water_balance(rout_order, routflow_looper, outflow_
     release, k_release_new = hanaski.\
         hanasaki_res_reslease(storage, stor_capacity, res_start_month,
                               simulation_momth_day, k_release, reservoir_type,
-                              rout_order, outflow_cell, routflow_looper,
-                              reservior_area, allocation_coeff, monthly_demand,
-                              mean_annual_demand, mean_annual_inflow,
-                              inflow_to_swb, num_days_in_month,
-                              all_reservoir_and_regulated_lake_area)
+                              monthly_downstream_demand,
+                              mean_annual_downstream_demand,
+                              mean_annual_inflow, inflow_to_swb,
+                              num_days_in_month)
 
     # Reservoirs release (outflow) water based on their current level [S(t)]
     # convert release from m3/s to km3/day since temporal resultion is daily
@@ -19,14 +19,148 @@ import numpy as np
 from numba import njit
 
 
+# Number of downstream cells of a reservoir whose demand is considered for
+# the release of irrigation reservoirs (Hanasaki et al 2006).
+NUM_DOWNSTREAM_CELLS = 5
+
+
+def get_downstream_cells(rout_order, outflow_cell, reservoir_area):
+    """
+    Get downstream cells of reservoirs and regulated lakes.
+
+    Downstream cells are followed until 5 cells or the ocean or an inland
+    sink (outflow cell with latitude or longitude index 0) is reached.
+
+    Parameters
+    ----------
+    rout_order : array
+        Routing order for the grid cells.
+    outflow_cell : array
+        Outflow cells (downstream cell) for respective grid cells.
+    reservoir_area : array
+        all reservoirs and regulated lakes areas in simulation, Unit: [km^2].
+
+    Returns
+    -------
+    reservoir_cells : array
+        Index of reservoir cells in routing order.
+    downstream_cells : array
+        Index of downstream cells of reservoirs in routing order, -1 after
+        last downstream cell, shape (reservoir, 5).
+
+    """
+    cell_index = np.full(reservoir_area.shape, -1, dtype=np.int64)
+    cell_index[rout_order[:, 0], rout_order[:, 1]] = np.arange(len(rout_order))
+
+    reservoir_cells = np.flatnonzero(
+        reservoir_area[rout_order[:, 0], rout_order[:, 1]] > 0)
+    downstream_cells = np.full((len(reservoir_cells), NUM_DOWNSTREAM_CELLS),
+                               -1, dtype=np.int64)
+    for reservoir, cell in enumerate(reservoir_cells):
+        m, n = outflow_cell[cell]
+        for dsc in range(NUM_DOWNSTREAM_CELLS):
+            if m <= 0 or n <= 0:
+                break
+            downstream_cells[reservoir, dsc] = cell_index[m, n]
+            m, n = outflow_cell[cell_index[m, n]]
+
+    return reservoir_cells, downstream_cells
+
+
+@njit(cache=True)
+def get_downstream_demand(rout_order, reservoir_cells, downstream_cells,
+                          reservior_area, allocation_coeff, monthly_demand,
+                          mean_annual_demand,
+                          all_reservoir_and_regulated_lake_area,
+                          monthly_downstream_demand,
+                          mean_annual_downstream_demand):
+    """
+    Compute demand of reservoirs and their downstream cells.
+
+    Demand of downstream cells is considered up to the next active
+    reservoir (mean annual demand up to the next reservoir of all years).
+    Monthly demand changes once per month and reservoirs are activated on
+    the first day of a year, hence this is computed on the first day of
+    each month.
+
+    Parameters
+    ----------
+    rout_order : array
+        Routing order for the grid cells.
+    reservoir_cells : array
+        Index of reservoir cells in routing order.
+    downstream_cells : array
+        Index of downstream cells of reservoirs in routing order (see
+        get_downstream_cells).
+    reservior_area : array
+        Reservoir area for each grid cell, Unit: [km^2].
+    allocation_coeff : array
+        Allocation coefficient for water release Eqn 6 [1]_.
+    monthly_demand : array
+        Monthly demand for each grid cell, Unit: [km^3/month].
+    mean_annual_demand : array
+        Mean annual demand for each grid cell, Unit: [m^3/yr].
+    all_reservoir_and_regulated_lake_area : array
+        all reservoirs and regulated lakes areas in simulation, Unit: [km^2].
+    monthly_downstream_demand : array
+        Monthly demand of reservoir and downstream cells, written at
+        reservoir cells, Unit: [km^3/month].
+    mean_annual_downstream_demand : array
+        Mean annual demand of reservoir and downstream cells, written at
+        reservoir cells, Unit: [m^3/yr].
+
+    References.
+
+    .. [1] Naota Hanasaki, Shinjiro Kanae, Taikan Oki, A reservoir operation
+            scheme for global river routing models, Journal of Hydrology,
+            Volume 327, Issues 1–2, 2006,
+            Pages 22-41, ISSN 0022-1694,
+            https://doi.org/10.1016/j.jhydrol.2005.11.011.
+
+    Returns
+    -------
+    None.
+
+    """
+    for reservoir, routflow_looper in enumerate(reservoir_cells):
+        x, y = rout_order[routflow_looper]
+
+        monthly_demand_sum = monthly_demand[x, y]  # km3/month
+        mean_annual_demand_sum = mean_annual_demand[x, y]  # m3/yr
+
+        # *********************************************************************
+        stop_mean_annual_calculation = False  # Flag to stop mean annual demand
+        # calulation if the next downstream cell has a reservoir
+        # *********************************************************************
+        for dsc in range(downstream_cells.shape[1]):
+            if downstream_cells[reservoir, dsc] < 0:
+                break
+            m, n = rout_order[downstream_cells[reservoir, dsc]]
+            if reservior_area[m, n] > 0:
+                break
+
+            monthly_demand_sum += monthly_demand[m, n] * \
+                allocation_coeff[routflow_looper][dsc]
+
+            # Mean annual demand is computed considering all reservior area
+            # in simulation
+            if not stop_mean_annual_calculation:
+                if all_reservoir_and_regulated_lake_area[m, n] <= 0:
+                    mean_annual_demand_sum += mean_annual_demand[m, n] * \
+                        allocation_coeff[routflow_looper][dsc]
+                else:
+                    stop_mean_annual_calculation = True
+
+        monthly_downstream_demand[x, y] = monthly_demand_sum
+        mean_annual_downstream_demand[x, y] = mean_annual_demand_sum
+
+
 @njit(cache=True)
 def hanasaki_res_reslease(storage, stor_capacity, res_start_month,
                           simulation_momth_day, k_release, reservoir_type,
-                          rout_order, outflow_cell, routflow_looper,
-                          reservior_area, allocation_coeff, monthly_demand,
-                          mean_annual_demand, mean_annual_inflow,
-                          inflow_to_swb, num_days_in_month,
-                          all_reservoir_and_regulated_lake_area):
+                          monthly_downstream_demand,
+                          mean_annual_downstream_demand, mean_annual_inflow,
+                          inflow_to_swb, num_days_in_month):
     """
     Compute reservoir release based on Hanasaki et al 2006.
 
@@ -44,28 +178,17 @@ def hanasaki_res_reslease(storage, stor_capacity, res_start_month,
         Release coefficient for reservoir, Hanasaki algorithm Eqn 29 [1]_, Units: [-]
     reservoir_type : int
         Type of reservoir (irrigation or non irrigation).
-    rout_order : array
-        Routing order for the grid cells.
-    outflow_cell : array
-        Outflow cells (downstream cell) for respective grid cells.
-    routflow_looper : int
-        Routing flow looper.
-    reservior_area : array
-        Reservoir area for each grid cell, Unit: [km^2].
-    allocation_coeff : float
-        Allocation coefficient for water release Eqn 6 [2]_.
-    monthly_demand : array
-        Monthly demand for each grid cell, Unit: [km^3/day].
-    mean_annual_demand : array
-        Mean annual demand for each grid cell, Unit: [km^3/day].
+    monthly_downstream_demand : float
+        Monthly demand of reservoir and downstream cells (see
+        get_downstream_demand), Unit: [km^3/month].
+    mean_annual_downstream_demand : float
+        Mean annual demand of reservoir and downstream cells, Unit: [m^3/yr].
     mean_annual_inflow : array
         Mean annual inflow for each grid cell, Unit: [km^3/day].
     inflow_to_swb : float
         Inflow to surface water bodies, Unit: [km^3/day].
     num_days_in_month : int
         Number of days in the current month.
-    all_reservoir_and_regulated_lake_area : array
-        all reservoirs and regulated lakes areas in simulation, Unit: [km^2].
 
     Returns
     -------
@@ -75,10 +198,6 @@ def hanasaki_res_reslease(storage, stor_capacity, res_start_month,
         Updated release coefficient, Units: [-]
 
     """
-    # Index to  print out varibales of interest
-    # e.g  if x==65 and y==137: print(prev_gw_storage)
-    x, y = rout_order[routflow_looper]
-
     # =========================================================================
     # Reserviors operation algorithm is based on Hanasaki et al 2006.
     # New operations should cited and implemented here.
@@ -103,43 +222,9 @@ def hanasaki_res_reslease(storage, stor_capacity, res_start_month,
         # for irrigation reservior monthly release is computed using eqn 5 & 6
         # Hanasaki et al 2006.
 
-        # 1st calulate downstream demand considering 5 downstreanm cells for
-        # each reservoir if any else calculate demand to the next reserviour
-        # for the available downstream cells.
-
-        monthly_downstream_demand = monthly_demand[x, y]  # km3/month
-        mean_annual_downstream_demand = mean_annual_demand[x, y]  # m3/yr
-
-        # downstream cell looper (dsc)
-        dsc = 0
-        # corresponing outflow cell for current cell[x, y]
-        m, n = outflow_cell[routflow_looper]
-
-        # *********************************************************************
-        stop_mean_annual_calculation = False  # Flag to stop mean annual demand
-        # calulation if the next downstream cell has a reservoir
-        # *********************************************************************
-        while dsc < 5 and reservior_area[m, n] <= 0 and m > 0 and n > 0:
-
-            monthly_downstream_demand += monthly_demand[m, n] * \
-                 allocation_coeff[routflow_looper][dsc]
-
-            # Mean annual demand is computed considering all reservior area
-            # in simulation
-            if not stop_mean_annual_calculation:
-                if all_reservoir_and_regulated_lake_area[m, n] <= 0:
-                    mean_annual_downstream_demand += mean_annual_demand[m, n] * \
-                        allocation_coeff[routflow_looper][dsc]
-                else:
-                    stop_mean_annual_calculation = True
-
-            prev_ds_cell = np.array([m, n])
-            # getting the next downstream cell.
-            next_ds_cell = np.where(np.sum(rout_order == prev_ds_cell, axis=1)
-                                    == rout_order.shape[1])[0]
-            m, n = outflow_cell[next_ds_cell[0]]
-            # update downstream cell looper
-            dsc += 1
+        # Downstream demand considering 5 downstreanm cells for each
+        # reservoir if any else demand to the next reserviour for the
+        # available downstream cells (see get_downstream_demand).
 
         # =====================================================================
         #         # compute provisional monthly release [m3/s]
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Reservoir activation schedule."""
+
+# =============================================================================
+# This module builds the schedule of reservoirs and regulated lakes which
+# become active (start year of operation) once at model start. Activation
+# events are sorted by start year, such that the area and capacity of
+# reservoirs are only updated for cells which become active in the current
+# year (see activate_res_area_storage_capacity in waterbalance_lateral.py).
+# Once reservoirs are active, they stay active (also if a year is simulated
+# again e.g. in spin up).
+# =============================================================================
+
+import numpy as np
+
+
+class ReservoirSchedule:
+    """Schedule of reservoir and regulated lake activation."""
+
+    def __init__(self, glores_startyear, regulated_lake_status,
+                 mean_annual_inflow_res):
+        """
+        Sort reservoir and regulated lake cells by start year.
+
+        Parameters
+        ----------
+        glores_startyear : array
+            Start year of reservoir operation, Unit: [year]
+        regulated_lake_status : array
+            Regulated lake status (1 for regulated lakes)
+        mean_annual_inflow_res : array
+            Mean annual inflow into reservoir, Unit: [m3/s]
+
+        """
+        # Events (grid cells) sorted by start year. Order of cells with the
+        # same start year follows the grid.
+        startyear = glores_startyear.ravel()
+        event_cell = np.argsort(startyear, kind='stable')
+        self.event_year = startyear[event_cell]
+        self.event_index = np.unravel_index(event_cell,
+                                            glores_startyear.shape)
+
+        # Reservoirs without inflow are added to global lakes once they are
+        # active (see activate_res_area_storage_capacity)
+        self.event_no_inflow = \
+            mean_annual_inflow_res.ravel()[event_cell] == 0
+
+        # Regulated lakes are active from simulation start
+        self.regulated_lake_index = np.nonzero(regulated_lake_status == 1)
+
+        # Latest year for which reservoirs were activated (None before
+        # simulation start or restart)
+        self.activated_year = None
+
+    def get_events(self, year):
+        """
+        Get reservoirs and regulated lakes which become active.
+
+        Parameters
+        ----------
+        year : int
+            Year of simulation.
+
+        Returns
+        -------
+        event_index : tuple
+            Index (lat, lon) of cells which become active in year. At
+            simulation start all cells with start year before or in year.
+        event_no_inflow : array
+            Flag for reservoirs without mean annual inflow.
+
+        """
+        start = 0 if self.activated_year is None else \
+            np.searchsorted(self.event_year, self.activated_year,
+                            side='right')
+        end = np.searchsorted(self.event_year, year, side='right')
+
+        if self.activated_year is None or year > self.activated_year:
+            self.activated_year = year
+        else:
+            end = start
+
+        return (self.event_index[0][start:end],
+                self.event_index[1][start:end]), \
+            self.event_no_inflow[start:end]
@@ -20,6 +20,93 @@ import numpy as np
 from numba import njit
 
 
+@njit(cache=True)
+def get_velocity_terms(river_bottom_width, roughness, roughness_multiplier,
+                       river_slope):
+    """
+    Compute terms of river velocity which do not change during a run.
+
+    Parameters
+    ----------
+    river_bottom_width : float
+       River bottom width, Unit: [km]
+    roughness : float
+        Roughness of river bed, Unit: [-]
+    roughness_multiplier : float
+        Roughness of river bed multiplier, Unit: [-]
+    river_slope : float
+        River slope, Unit: [-]
+
+    Returns
+    -------
+    river_bottom_width_m : float
+       River bottom width, Unit: [m]
+    bottom_width_term : float
+        Squared river bottom width divided by 16, Unit: [m2]
+    manning_coeff : float
+        Inverse of (multiplied) roughness, Unit: [-]
+    sqrt_river_slope : float
+        Square root of river slope, Unit: [-]
+
+    """
+    km_to_m = 1000
+    river_bottom_width_m = river_bottom_width * km_to_m
+    bottom_width_term = (river_bottom_width_m**2)/16
+    manning_coeff = 1/(roughness_multiplier * roughness)
+    sqrt_river_slope = np.sqrt(river_slope)
+    return river_bottom_width_m, bottom_width_term, manning_coeff, \
+        sqrt_river_slope
+
+
+@njit(cache=True)
+def get_velocity_invariants(river_bottom_width, roughness,
+                            roughness_multiplier, river_slope):
+    """
+    Compute terms of river velocity which do not change during a run for grid.
+
+    Terms are computed once per run and passed to river routing (see
+    river_velocity_from_invariants).
+
+    Parameters
+    ----------
+    river_bottom_width : array
+       River bottom width, Unit: [km]
+    roughness : array
+        Roughness of river bed, Unit: [-]
+    roughness_multiplier : array
+        Roughness of river bed multiplier, Unit: [-]
+    river_slope : array
+        River slope, Unit: [-]
+
+    Returns
+    -------
+    river_bottom_width_m : array
+       River bottom width, Unit: [m]
+    bottom_width_term : array
+        Squared river bottom width divided by 16, Unit: [m2]
+    manning_coeff : array
+        Inverse of (multiplied) roughness, Unit: [-]
+    sqrt_river_slope : array
+        Square root of river slope, Unit: [-]
+
+    """
+    river_bottom_width_m = np.full(river_bottom_width.shape, np.nan)
+    bottom_width_term = np.full(river_bottom_width.shape, np.nan)
+    manning_coeff = np.full(river_bottom_width.shape, np.nan)
+    sqrt_river_slope = np.full(river_bottom_width.shape, np.nan)
+
+    for x in range(river_bottom_width.shape[0]):
+        for y in range(river_bottom_width.shape[1]):
+            river_bottom_width_m[x, y], bottom_width_term[x, y], \
+                manning_coeff[x, y], sqrt_river_slope[x, y] = \
+                get_velocity_terms(river_bottom_width[x, y], roughness[x, y],
+                                   roughness_multiplier[x, y],
+                                   river_slope[x, y])
+
+    return river_bottom_width_m, bottom_width_term, manning_coeff, \
+        sqrt_river_slope
+
+
 @njit(cache=True)
 def river_velocity(x, y,
                    river_storage, river_length, river_bottom_width,
@@ -53,6 +140,51 @@ def river_velocity(x, y,
     outflow_constant : float
         River outflow constant (river_velocity / river_length), Unit: [1/day]
 
+    """
+    river_bottom_width_m, bottom_width_term, manning_coeff, \
+        sqrt_river_slope = get_velocity_terms(river_bottom_width, roughness,
+                                              roughness_multiplier,
+                                              river_slope)
+
+    return river_velocity_from_invariants(x, y, river_storage, river_length,
+                                          river_bottom_width_m,
+                                          bottom_width_term, manning_coeff,
+                                          sqrt_river_slope)
+
+
+@njit(cache=True)
+def river_velocity_from_invariants(x, y, river_storage, river_length,
+                                   river_bottom_width_m, bottom_width_term,
+                                   manning_coeff, sqrt_river_slope):
+    """
+    Compute river velocity for grid cells from terms computed once per run.
+
+    Parameters
+    ----------
+    x : int
+        Latitude index of cell
+    y : int
+        Longitude index of cell
+    river_storage : float
+        Daily river storage, Unit: [km^3]
+    river_length : float
+        River length, Unit: [km]
+    river_bottom_width_m : float
+       River bottom width, Unit: [m]
+    bottom_width_term : float
+        Squared river bottom width divided by 16, Unit: [m2]
+    manning_coeff : float
+        Inverse of (multiplied) roughness, Unit: [-]
+    sqrt_river_slope : float
+        Square root of river slope, Unit: [-]
+
+    Returns
+    -------
+    river_velocity : float
+        River velocity, Unit: [km/day]
+    outflow_constant : float
+        River outflow constant (river_velocity / river_length), Unit: [1/day]
+
     """
     # Index(x, y) to  print out varibales of interest
     # e.g  if x==65 and y==137: print(prev_gw_storage)
@@ -70,29 +202,26 @@ def river_velocity(x, y,
 
     # River depth dependence on river storage is based on section 4.7.3
     # (Eq.34) of (Müller Schmied et al. (2021). Units: m
-    km_to_m = 1000
-    river_bottom_width = river_bottom_width * km_to_m
-
-    river_depth = (-1/4) * river_bottom_width + \
-        np.sqrt(((river_bottom_width**2)/16) + (0.5 * cross_sectional_area))
+    river_depth = (-1/4) * river_bottom_width_m + \
+        np.sqrt(bottom_width_term + (0.5 * cross_sectional_area))
 
     # Wetted perimetter and hydraulic radius are calulated assuming a
     # trapezoidal channel with slope of 0.5 at both sides.
     # Both have Units: m
-    wetted_perimeter = river_bottom_width + (2.0*river_depth*np.sqrt(5.0))
+    wetted_perimeter = river_bottom_width_m + (2.0*river_depth*np.sqrt(5.0))
     hydraulic_radius = cross_sectional_area / wetted_perimeter
 
     # River velocity (using  Manning–Strickler equation) is based on
     # section 4.7.3 (Eq.32) of (Müller Schmied et al. (2021). Units: m/s
-    river_velocity = (1/(roughness_multiplier * roughness)) * np.power(hydraulic_radius, (2/3)) * \
-        np.sqrt(river_slope)
+    river_velocity = manning_coeff * np.power(hydraulic_radius, (2/3)) * \
+        sqrt_river_slope
 
     # River velocity is now converted,  Units: km/day
     m_ps_to_km_ps = 86.4
     river_velocity = river_velocity * m_ps_to_km_ps
 
     # limit  velocity values below  0.00001 to  0.00001
-    river_velocity = np.where(river_velocity < 0.00001, 0.00001, river_velocity)
+    river_velocity = np.maximum(river_velocity, 0.00001)
 
     # Now river velocity is divided by river length to be consitent with
     # the outflow constant of the other surface waterbodies
@@ -22,10 +22,27 @@
 # groudwater(only humidcells)->local lakes->local wetland->...
 # global lakes->reservior & regulated lakes->global wetalnds->river
 
-# This module also makes use of numba to optimize speed.
+# This module also makes use of numba to optimize speed. Outputs are
+# preallocated once and reset here every day (see workspace module).
+# Cells are computed by route_cells, either serially in routing order
+# (river_routing), in parallel over independent basins
+# (river_routing_parallel) or in parallel over the cells of a level, level by
+# level (river_routing_levels, see routing_basins module) with identical
+# results.
+
+# Options are selected at compile time. Arrays of reservoirs are None if
+# reservoirs are not operated, arrays of water use are None in naturalised
+# runs (water use is not subtracted) and arrays of the neighbouring cell water
+# supply option are None if the option is not selected. numba compiles (and
+# caches) routing for every combination of argument types, branches of
+# options which are not selected are removed when compiling (dead branch
+# pruning of arguments which are None). The delayed use option is a literal
+# (compile time constant) of routing.
 # =============================================================================
+# Serial and parallel routing share route_cells and are kept in this module.
+# pylint: disable=too-many-lines
 import numpy as np
-from numba import njit
+from numba import njit, prange, literally
 from model.lateralwaterbalance import groundwater as gw
 from model.lateralwaterbalance import lakes_wetlands as lw
 from model.lateralwaterbalance import routing_to_surface_water_bodies as rt_surf
@@ -34,192 +51,307 @@ from model.lateralwaterbalance import reservoir_regulated_lakes as res_reg
 from model.lateralwaterbalance import distribute_net_abstraction as dist_netabstr
 from model.lateralwaterbalance import neighbouring_cell as nbcell
 from model.lateralwaterbalance import local_lake_net_abstraction as lake_netabstr
+from model.lateralwaterbalance import cell_types as ct
 
 
 @njit(cache=True)
-def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
-                  precipitation, openwater_pot_evap, surface_runoff,
-                  diffuse_gw_recharge, groundwater_storage, loclake_storage,
-                  locwet_storage, glolake_storage, glores_storage, glowet_storage,
-                  river_storage, max_loclake_storage, max_locwet_storage,
-                  max_glolake_storage, max_glowet_storage, glores_capacity,
-                  max_loclake_area, max_locwet_area, glolake_area, glores_area,
-                  max_glowet_area, loclake_frac, locwet_frac, glowet_frac, glolake_frac,
-                  reglake_frac, headwatercell, gw_dis_coeff, swb_drainage_area_factor,
-                  swb_outflow_coeff, gw_recharge_constant, reduction_exponent_lakewet,
-                  reduction_exponent_res, lake_out_exp, wetland_out_exp,
-                  areal_corr_factor, stat_corr_fact,
-                  river_length, river_bottom_width, roughness, roughness_multiplier,
-                  river_slope, glwdunits, glores_startmonth, current_mon_day, k_release,
-                  glores_type, allocation_coeff, mean_annual_demand_res,
-                  mean_annual_inflow_res, potential_net_abstraction_gw,
-                  potential_net_abstraction_sw,  unagregrgated_potential_netabs_sw,
-                  accumulated_unsatisfied_potential_netabs_sw,
-                  prev_accumulated_unsatisfied_potential_netabs_sw,
-                  daily_unsatisfied_pot_nas, monthly_potential_net_abstraction_sw,
-                  prev_potential_water_withdrawal_sw_irri,
-                  prev_potential_consumptive_use_sw_irri, frac_irri_returnflow_to_gw,
-                  unsatisfied_potential_netabs_riparian, neigbourcells,
-                  neighbourcells_outflowcell, unsat_potnetabs_sw_from_demandcell,
-                  unsat_potnetabs_sw_to_supplycell, neighbouring_cells_map,
-                  subtract_use_option, neighbouringcell_option, reservoir_operation,
-                  num_days_in_month, all_reservoir_and_regulated_lake_area,
-                  reg_lake_redfactor_firstday, basin, delayed_use_option,
-                  landwaterfrac_excl_glolake_res, cell_area, land_aet_corr,
-                  sum_canopy_snow_soil_storage):
+def add_to_output(output, first_array, second_array):
+    """
+    Write sum of two arrays to output array without temporary array.
 
-    """Route flow to river. """
+    Parameters
+    ----------
+    output : array
+        Preallocated output array.
+    first_array : array
+        First summand.
+    second_array : array
+        Second summand.
 
-    # Volume at which storage is set to zero, units: [km3]
-    minstorage_volume = 1e-15
+    Returns
+    -------
+    None.
+
+    """
+    for x in range(output.shape[0]):
+        for y in range(output.shape[1]):
+            output[x, y] = first_array[x, y] + second_array[x, y]
+
+
+@njit(cache=True)
+def reset_routing_outputs(basin, groundwater_storage, loclake_storage,
+                          locwet_storage, glolake_storage, glores_storage,
+                          glowet_storage, river_storage, k_release, outputs):
+    """
+    Reset outputs of routing to initial values.
+
+    Outputs (storages of next time step, fluxes and factors) are preallocated
+    arrays in order of get_routing_outputs (see waterbalance_lateral.py).
+    They are reset to initial values here, such that arrays can be reused
+    every day. Output storages must not be the arrays of the current storages.
+
+    Returns
+    -------
+    None.
+
+    """
+    consistent_precip, total_water_storage, groundwater_storage_out, \
+        groundwater_discharge, point_source_recharge, loclake_storage_out, \
+        loclake_outflow, gwr_loclake, dyn_loclake_frac, locwet_storage_out, \
+        locwet_outflow, gwr_locwet, dyn_locwet_frac, glolake_storage_out, \
+        glolake_outflow, gwr_glolake, glolake_precip, glores_storage_out, \
+        glores_outflow, gwr_glores, k_release_out, glores_precip, \
+        glowet_storage_out, glowet_outflow, gwr_glowet, dyn_glowet_frac, \
+        river_storage_out, river_streamflow, river_inflow, cellrunoff, \
+        inflow_from_upstream, river_velocity, actual_net_abstraction_gw, \
+        actual_daily_netabstraction_sw, cell_aet_consuse, daily_total_aet, \
+        total_open_water_aet, loclake_evapo, locwet_evapo, glolake_evapo, \
+        glores_evapo, glowet_evapo = outputs
     # =========================================================================
-    #   Creating outputs for storages, fluxes and factors(eg. reduction factor)
+    #   Resetting outputs for storages, fluxes and factors(eg. reduction
+    #   factor). Outputs are preallocated and reused every day (see
+    #   get_routing_outputs in waterbalance_lateral.py).
     # =========================================================================
-    cell_calculated = np.zeros(groundwater_storage.shape)
-
     # consistent precipitation, Unit : km3/day
-    consistent_precip = basin.copy()
+    consistent_precip[:] = basin
     # total water_ storage, Unit : km3/day
-    total_water_storage = basin.copy()
+    total_water_storage[:] = basin
 
     #                  =================================
     #                  ||           Groundwater       ||
     #                  =================================
     # Groundwater storage, Unit : km3
-    groundwater_storage_out = basin.copy() + groundwater_storage.copy()
+    add_to_output(groundwater_storage_out, basin, groundwater_storage)
     # Groundwater discharge, Unit : km3/day
-    groundwater_discharge = basin.copy()
+    groundwater_discharge[:] = basin
     # Groundwater recharge from surface waterbodies, Unit : km3/day
-    point_source_recharge = basin.copy()
+    point_source_recharge[:] = basin
 
     #                  =================================
     #                  ||           Local lake        ||
     #                  =================================
     # Local lake storage, Unit : km3
-    loclake_storage_out = basin.copy() + loclake_storage.copy()
+    add_to_output(loclake_storage_out, basin, loclake_storage)
     # Local lake outflow, Unit : km3/day
-    loclake_outflow = basin.copy()
+    loclake_outflow[:] = basin
     # Local lake groundwater recharge, Unit : km3/day
-    gwr_loclake = basin.copy()
+    gwr_loclake[:] = basin
     # Dynamic local lake fraction, Unit : (-)
-    dyn_loclake_frac = basin.copy()
+    dyn_loclake_frac[:] = basin
 
     #                  =================================
     #                  ||        Local wetland        ||
     #                  =================================
     # Local wetland storage, Unit : km3
-    locwet_storage_out = basin.copy() + locwet_storage.copy()
+    add_to_output(locwet_storage_out, basin, locwet_storage)
     # Local wetland outflow, Unit : km3/day
-    locwet_outflow = basin.copy()
+    locwet_outflow[:] = basin
     # Local wetland groundwater recharge, Unit : km3/day
-    gwr_locwet = basin.copy()
+    gwr_locwet[:] = basin
     # Dynamic local wetland fraction, Unit : (-)
-    dyn_locwet_frac = basin.copy()
+    dyn_locwet_frac[:] = basin
 
     #                  =================================
     #                  ||           Global lake       ||
     #                  =================================
     # Global lake storage, Unit : km3
-    glolake_storage_out = basin.copy() + glolake_storage.copy()
+    add_to_output(glolake_storage_out, basin, glolake_storage)
     # Global lake outflow, Unit : km3/day
-    glolake_outflow = basin.copy()
+    glolake_outflow[:] = basin
     # Global lake groundwater recharge, Unit : km3/day
-    gwr_glolake = basin.copy()
+    gwr_glolake[:] = basin
 
     # Global lake precipitation, Unit : km3/day
     # (to compute consistent precipitation)
-    glolake_precip = basin.copy()
+    glolake_precip[:] = basin
 
     #                  ==============================================
     #                  ||   Global reservior and regulated lake    ||
     #                  ==============================================
     # Global reservior and regulated lake  storage, Unit : km3
-    glores_storage_out = basin.copy() + glores_storage.copy()
+    add_to_output(glores_storage_out, basin, glores_storage)
     # Global reservior and regulated lake  outflow, Unit : km3/day
-    glores_outflow = basin.copy()
+    glores_outflow[:] = basin
     # Global reservior and regulated lake  groundwater recharge, Unit : km3/day
-    gwr_glores = basin.copy()
+    gwr_glores[:] = basin
     # Reservoir reselease coefficient. Unit: (-)
-    k_release_out = k_release.copy() + basin.copy()
+    add_to_output(k_release_out, k_release, basin)
 
     # Global reservior and regulated lake precipitation, Unit : km3/day
     # (to compute consistent precipitation)
-    glores_precip = basin.copy()
+    glores_precip[:] = basin
 
     #                  =================================
     #                  ||        Global wetland       ||
     #                  =================================
     # Global wetland storage, Unit : km3
-    glowet_storage_out = basin.copy() + glowet_storage.copy()
+    add_to_output(glowet_storage_out, basin, glowet_storage)
     # Global wetland outflow, Unit : km3/day
-    glowet_outflow = basin.copy()
+    glowet_outflow[:] = basin
     # Global wetland groundwater recharge, Unit : km3/day
-    gwr_glowet = basin.copy()
+    gwr_glowet[:] = basin
     # Dynamic global wetland fraction, Unit : (-)
-    dyn_glowet_frac = basin.copy()
+    dyn_glowet_frac[:] = basin
 
     #                  =================================
     #                  ||           River             ||
     #                  =================================
     # River storage, Unit : km3
-    river_storage_out = basin.copy() + river_storage.copy()
+    add_to_output(river_storage_out, basin, river_storage)
     # River streamflow, Unit : km3/day
-    river_streamflow = basin.copy()
+    river_streamflow[:] = basin
     # River inflow, Unit : km3/day
-    river_inflow = basin.copy()
+    river_inflow[:] = basin
     # Cell runoff, Unit : km3/day
-    cellrunoff = basin.copy()
+    cellrunoff[:] = basin
     # Inflow from upstream cell, Unit : km3/day
-    inflow_from_upstream = basin.copy()
+    inflow_from_upstream[:] = basin
     # River velocity, Unit : km/day
-    river_velocity = basin.copy()
+    river_velocity[:] = basin
 
     #                  =================================
     #                  ||           WaterUSe         ||
     #                  =================================
-    actual_net_abstraction_gw = basin.copy()
-    actual_daily_netabstraction_sw = basin.copy()
+    actual_net_abstraction_gw[:] = basin
+    actual_daily_netabstraction_sw[:] = basin
 
     # ++ All evaporation stuff are here (we add them to water use anyways) ++
 
-    cell_aet_consuse = basin.copy()  # Unit : km3/day
+    cell_aet_consuse[:] = basin  # Unit : km3/day
     # Total actual evaporation from land (open water, canopy, snow and soil
     # evaporation)
-    daily_total_aet = basin.copy()  # Unit : km3/day
-    total_open_water_aet = basin.copy()  # Unit : km3/day
+    daily_total_aet[:] = basin  # Unit : km3/day
+    total_open_water_aet[:] = basin  # Unit : km3/day
 
-    loclake_evapo = basin.copy()  # Unit : km3/day
-    locwet_evapo = basin.copy()  # Unit : km3/day
-    glolake_evapo = basin.copy()  # Unit : km3/day
-    glores_evapo = basin.copy()  # Unit : km3/day
-    glowet_evapo = basin.copy()  # Unit : km3/da
+    loclake_evapo[:] = basin  # Unit : km3/day
+    locwet_evapo[:] = basin  # Unit : km3/day
+    glolake_evapo[:] = basin  # Unit : km3/day
+    glores_evapo[:] = basin  # Unit : km3/day
+    glowet_evapo[:] = basin  # Unit : km3/da
 
-    #                  =================================
-    #                  ||          Neigbouring cell    ||
-    #                  =================================
-    total_demand_sw_noallocation = basin.copy()
-    total_unsatisfied_demand_ripariancell = basin.copy()
 
-    returned_demand_from_supplycell = basin.copy() * np.nan
+@njit(cache=True)
+def reset_neighbouring_cell_outputs(basin, cell_calculated,
+                                    total_demand_sw_noallocation,
+                                    total_unsatisfied_demand_ripariancell,
+                                    returned_demand_from_supplycell,
+                                    returned_demand_from_supplycell_nextday):
+    """
+    Reset outputs of neighbouring cell water supply option.
 
-    returned_demand_from_supplycell_nextday = basin.copy() * np.nan
+    Outputs are preallocated arrays which are only passed to routing if the
+    option is selected (see reset_routing_outputs and route_cells).
 
-    # =========================================================================
-    # Routing is calulated according to the routing order for individual cells
-    # =========================================================================
-    for routflow_looper in range(len(rout_order)):
+    Returns
+    -------
+    None.
+
+    """
+    cell_calculated[:] = 0
+
+    total_demand_sw_noallocation[:] = basin
+    total_unsatisfied_demand_ripariancell[:] = basin
+
+    returned_demand_from_supplycell[:] = np.nan
+
+    returned_demand_from_supplycell_nextday[:] = np.nan
+
+
+@njit(cache=True)
+def route_cells(cell_order, start, end, rout_order, outflow_cell,
+                drainage_direction, aridhumid, precipitation,
+                openwater_pot_evap, surface_runoff, diffuse_gw_recharge,
+                groundwater_storage, loclake_storage, locwet_storage,
+                glolake_storage, glores_storage, glowet_storage, river_storage,
+                max_loclake_storage, max_locwet_storage, max_glolake_storage,
+                max_glowet_storage, glores_capacity, max_loclake_area,
+                max_locwet_area, glolake_area, glores_area, max_glowet_area,
+                loclake_frac, locwet_frac, glowet_frac, glolake_frac,
+                reglake_frac, headwatercell, gw_dis_coeff, exp_gw_dis_coeff,
+                swb_drainage_area_factor, swb_outflow_coeff,
+                gw_recharge_constant, reduction_exponent_lakewet,
+                reduction_exponent_res, lake_out_exp, wetland_out_exp,
+                areal_corr_factor, stat_corr_fact, river_length,
+                river_bottom_width_m, bottom_width_term, manning_coeff,
+                sqrt_river_slope, glores_startmonth, current_mon_day,
+                k_release, glores_type, monthly_downstream_demand,
+                mean_annual_downstream_demand, mean_annual_inflow_res,
+                accumulated_unsatisfied_potential_netabs_sw, num_days_in_month,
+                reg_lake_redfactor_firstday, basin,
+                landwaterfrac_excl_glolake_res, cell_area, land_aet_corr,
+                sum_canopy_snow_soil_storage, delayed_use_option,
+                cell_unit, unit_start, unit_cells,
+                unit_rout_position, potential_net_abstraction_gw,
+                potential_net_abstraction_sw,
+                unagregrgated_potential_netabs_sw,
+                prev_accumulated_unsatisfied_potential_netabs_sw,
+                daily_unsatisfied_pot_nas,
+                prev_potential_water_withdrawal_sw_irri,
+                prev_potential_consumptive_use_sw_irri,
+                frac_irri_returnflow_to_gw,
+                unsatisfied_potential_netabs_riparian, neigbourcells,
+                neighbourcells_outflowcell, unsat_potnetabs_sw_from_demandcell,
+                unsat_potnetabs_sw_to_supplycell, neighbouring_cells_map,
+                cell_calculated, total_demand_sw_noallocation,
+                total_unsatisfied_demand_ripariancell,
+                returned_demand_from_supplycell,
+                returned_demand_from_supplycell_nextday, outputs):
+    """
+    Route flow of a range of cells.
+
+    Cells cell_order[start:end] (index in routing order) are computed one
+    after the other. Storages and fluxes of a cell are written to the outputs
+    at index (x, y) (see reset_routing_outputs). Besides its own outputs, a
+    cell adds its streamflow to the river inflow of its outflow cell,
+    distributes unsatisfied potential net abstraction of a global lake or
+    reservoir to its riparian cells and allocates unsatisfied demand to a
+    neighbouring cell (see routing_basins module). Cells which depend on
+    each other must therefore be computed in routing order.
+
+    Parameters
+    ----------
+    cell_order : array
+        Index of cells in routing order.
+    start : int
+        Index of first cell in cell_order.
+    end : int
+        Index after last cell in cell_order.
+
+    Other parameters are the ones of river_routing. Reservoirs are only
+    computed if glores_capacity is given, water use only if potential net
+    abstraction is given and neighbouring cell water supply only if
+    neighbouring_cells_map is given (not None).
+
+    Returns
+    -------
+    None.
+
+    """
+    # Volume at which storage is set to zero, units: [km3]
+    minstorage_volume = 1e-15
+
+    consistent_precip, total_water_storage, groundwater_storage_out, \
+        groundwater_discharge, point_source_recharge, loclake_storage_out, \
+        loclake_outflow, gwr_loclake, dyn_loclake_frac, locwet_storage_out, \
+        locwet_outflow, gwr_locwet, dyn_locwet_frac, glolake_storage_out, \
+        glolake_outflow, gwr_glolake, glolake_precip, glores_storage_out, \
+        glores_outflow, gwr_glores, k_release_out, glores_precip, \
+        glowet_storage_out, glowet_outflow, gwr_glowet, dyn_glowet_frac, \
+        river_storage_out, river_streamflow, river_inflow, cellrunoff, \
+        inflow_from_upstream, river_velocity, actual_net_abstraction_gw, \
+        actual_daily_netabstraction_sw, cell_aet_consuse, daily_total_aet, \
+        total_open_water_aet, loclake_evapo, locwet_evapo, glolake_evapo, \
+        glores_evapo, glowet_evapo = outputs
+
+    for cell in range(start, end):
         # Get invidividual cells based on routing order
+        routflow_looper = cell_order[cell]
         x, y = rout_order[routflow_looper]
 
         if np.isnan(basin[x, y]) is False:
             # Get respective outflow cell for routing ordered cells.
             m, n = outflow_cell[routflow_looper]
 
-            # Get neigbouring cells (for demand cell)and respective outflow cells
-            neigbourcells_for_demandcell = neigbourcells[routflow_looper]
-            outflowcell_for_neigbourcells = \
-                neighbourcells_outflowcell[routflow_looper]
-
             # update  accumulated_unsatisfied_potential_netabs_sw  with
             # unsatisfied_potential_netabs_riparian.
             # Note: In riparaian cell water supply option, the unsatisfied demand
@@ -227,12 +359,13 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
             # riparian cells (local lakes or rivers) either on the same day or the
             # next day depending on the routing order.
 
-            if glwdunits[x, y] > 0 and subtract_use_option:
+            if potential_net_abstraction_sw is not None and \
+                    cell_unit[x, y] >= 0:
                 accumulated_unsatisfied_potential_netabs_sw[x, y] += \
                     unsatisfied_potential_netabs_riparian[x, y]
 
 
-            if subtract_use_option and neighbouringcell_option:
+            if neighbouring_cells_map is not None:
 
                 if returned_demand_from_supplycell[x, y] >= 0:
                     # Here routing order of demand cell > supply cell.
@@ -278,47 +411,66 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
         # regions into surface waterbodies(local and global lakes and
         #  wetlands) except rivers. See section 4.5 of Müller Schmied et al. (2021)
 
+            # Potential net abstraction from groundwater and its adaption
+            # (no water use in naturalised runs)
+            if potential_net_abstraction_gw is not None:
+                netabs_gw = potential_net_abstraction_gw[x, y]
+                unsat_pot_nas = daily_unsatisfied_pot_nas[x, y]
+                prev_withdrawal_sw_irri = \
+                    prev_potential_water_withdrawal_sw_irri[x, y]
+                prev_consuse_sw_irri = \
+                    prev_potential_consumptive_use_sw_irri[x, y]
+                returnflow_to_gw = frac_irri_returnflow_to_gw[x, y]
+            else:
+                netabs_gw = 0.0
+                unsat_pot_nas = 0.0
+                prev_withdrawal_sw_irri = 0.0
+                prev_consuse_sw_irri = 0.0
+                returnflow_to_gw = 0.0
+
             if (aridhumid[x, y] == 0) & (drainage_direction[x, y] >= 0):
                 daily_groundwaterbalance_humid = \
-                    gw.groundwater_balance(x, y,
-                                           "humid",
-                                           groundwater_storage[x, y],
-                                           diffuse_gw_recharge[x, y],
-                                           potential_net_abstraction_gw[x, y],
-                                           daily_unsatisfied_pot_nas[x, y],
-                                           gw_dis_coeff[x, y],
-                                           prev_potential_water_withdrawal_sw_irri[x, y],
-                                           prev_potential_consumptive_use_sw_irri[x, y],
-                                           frac_irri_returnflow_to_gw[x, y])
+                    gw.groundwater_balance_from_coeff(x, y,
+                                                      ct.GroundwaterCell.HUMID,
+                                                      groundwater_storage[x, y],
+                                                      diffuse_gw_recharge[x, y],
+                                                      netabs_gw,
+                                                      unsat_pot_nas,
+                                                      gw_dis_coeff[x, y],
+                                                      exp_gw_dis_coeff[x, y],
+                                                      prev_withdrawal_sw_irri,
+                                                      prev_consuse_sw_irri,
+                                                      returnflow_to_gw)
 
                 storage, discharge, actual_netabs_gw =\
                     daily_groundwaterbalance_humid
 
-                groundwater_storage_out[x, y] = storage.item()
-                groundwater_discharge[x, y] = discharge.item()
-                actual_net_abstraction_gw[x, y] = actual_netabs_gw.item()
+                groundwater_storage_out[x, y] = storage
+                groundwater_discharge[x, y] = discharge
+                actual_net_abstraction_gw[x, y] = actual_netabs_gw
         # =========================================================================
         # 2. Compute groundwater storage for inland sink
         # =========================================================================
             if drainage_direction[x, y] < 0:
                 daily_groundwaterbalance_landsink = \
-                    gw.groundwater_balance(x, y,
-                                           "inland sink",
-                                           groundwater_storage[x, y],
-                                           diffuse_gw_recharge[x, y],
-                                           potential_net_abstraction_gw[x, y],
-                                           daily_unsatisfied_pot_nas[x, y],
-                                           gw_dis_coeff[x, y],
-                                           prev_potential_water_withdrawal_sw_irri[x, y],
-                                           prev_potential_consumptive_use_sw_irri[x, y],
-                                           frac_irri_returnflow_to_gw[x, y])
+                    gw.groundwater_balance_from_coeff(x, y,
+                                                      ct.GroundwaterCell.INLAND_SINK,
+                                                      groundwater_storage[x, y],
+                                                      diffuse_gw_recharge[x, y],
+                                                      netabs_gw,
+                                                      unsat_pot_nas,
+                                                      gw_dis_coeff[x, y],
+                                                      exp_gw_dis_coeff[x, y],
+                                                      prev_withdrawal_sw_irri,
+                                                      prev_consuse_sw_irri,
+                                                      returnflow_to_gw)
 
                 storage_sink, discharge_sink, actual_netabs_gw =\
                     daily_groundwaterbalance_landsink
 
-                groundwater_storage_out[x, y] = storage_sink.item()
-                groundwater_discharge[x, y] = discharge_sink.item()
-                actual_net_abstraction_gw[x, y] = actual_netabs_gw.item()
+                groundwater_storage_out[x, y] = storage_sink
+                groundwater_discharge[x, y] = discharge_sink
+                actual_net_abstraction_gw[x, y] = actual_netabs_gw
 
         #                  =================================
         #                  ||   Fractional routing        ||
@@ -351,31 +503,31 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
 
             if loclake_frac[x, y] > 0:
                 daily_loclake_balance = lw.\
-                     lake_wetland_water_balance(x, y,
-                                                "local lake",
-                                                loclake_storage[x, y],
-                                                precipitation[x, y],
-                                                openwater_pot_evap[x, y],
-                                                aridhumid[x, y],
-                                                drainage_direction[x, y],
-                                                inflow_to_swb,
-                                                swb_outflow_coeff[x, y],
-                                                gw_recharge_constant[x, y],
-                                                reduction_exponent_lakewet[x, y],
-                                                areal_corr_factor[x, y],
-                                                max_storage=max_loclake_storage[x, y],
-                                                max_area=max_loclake_area[x, y],
-                                                lakewet_frac=loclake_frac[x, y],
-                                                lake_outflow_exp=lake_out_exp[x, y])
+                     lake_wetland_water_balance_from_type(x, y,
+                                                          ct.SurfaceWaterBody.LOCAL_LAKE,
+                                                          loclake_storage[x, y],
+                                                          precipitation[x, y],
+                                                          openwater_pot_evap[x, y],
+                                                          aridhumid[x, y],
+                                                          drainage_direction[x, y],
+                                                          inflow_to_swb,
+                                                          swb_outflow_coeff[x, y],
+                                                          gw_recharge_constant[x, y],
+                                                          reduction_exponent_lakewet[x, y],
+                                                          areal_corr_factor[x, y],
+                                                          max_storage=max_loclake_storage[x, y],
+                                                          max_area=max_loclake_area[x, y],
+                                                          lakewet_frac=loclake_frac[x, y],
+                                                          lake_outflow_exp=lake_out_exp[x, y])
 
                 storage, outflow, recharge, frac, accum_unpot_netabs_sw, \
                     actual_use, openwater_evapo_cor = daily_loclake_balance
 
-                loclake_storage_out[x, y] = storage.item()
-                loclake_outflow[x, y] = outflow.item()
-                gwr_loclake[x, y] = recharge.item()
-                dyn_loclake_frac[x, y] = frac.item()
-                loclake_evapo[x, y] = openwater_evapo_cor.item()
+                loclake_storage_out[x, y] = storage
+                loclake_outflow[x, y] = outflow
+                gwr_loclake[x, y] = recharge
+                dyn_loclake_frac[x, y] = frac
+                loclake_evapo[x, y] = openwater_evapo_cor
 
                 # update inflow to surface water bodies
                 inflow_to_swb = outflow
@@ -392,31 +544,31 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
 
             if locwet_frac[x, y] > 0:
                 daily_locwet_balance = lw.\
-                    lake_wetland_water_balance(x, y,
-                                               'local wetland',
-                                               locwet_storage[x, y],
-                                               precipitation[x, y],
-                                               openwater_pot_evap[x, y],
-                                               aridhumid[x, y],
-                                               drainage_direction[x, y],
-                                               locwet_inflow,
-                                               swb_outflow_coeff[x, y],
-                                               gw_recharge_constant[x, y],
-                                               reduction_exponent_lakewet[x, y],
-                                               areal_corr_factor[x, y],
-                                               max_storage=max_locwet_storage[x, y],
-                                               wetland_outflow_exp=wetland_out_exp[x, y],
-                                               max_area=max_locwet_area[x, y],
-                                               lakewet_frac=locwet_frac[x, y],)
+                    lake_wetland_water_balance_from_type(x, y,
+                                                         ct.SurfaceWaterBody.LOCAL_WETLAND,
+                                                         locwet_storage[x, y],
+                                                         precipitation[x, y],
+                                                         openwater_pot_evap[x, y],
+                                                         aridhumid[x, y],
+                                                         drainage_direction[x, y],
+                                                         locwet_inflow,
+                                                         swb_outflow_coeff[x, y],
+                                                         gw_recharge_constant[x, y],
+                                                         reduction_exponent_lakewet[x, y],
+                                                         areal_corr_factor[x, y],
+                                                         max_storage=max_locwet_storage[x, y],
+                                                         wetland_outflow_exp=wetland_out_exp[x, y],
+                                                         max_area=max_locwet_area[x, y],
+                                                         lakewet_frac=locwet_frac[x, y],)
 
                 storage, outflow, recharge, frac, accum_unpot_netabs_sw, \
                     actual_use, openwater_evapo_cor = daily_locwet_balance
 
-                locwet_storage_out[x, y] = storage.item()
-                locwet_outflow[x, y] = outflow.item()
-                gwr_locwet[x, y] = recharge.item()
-                dyn_locwet_frac[x, y] = frac.item()
-                locwet_evapo[x, y] = openwater_evapo_cor.item()
+                locwet_storage_out[x, y] = storage
+                locwet_outflow[x, y] = outflow
+                gwr_locwet[x, y] = recharge
+                dyn_locwet_frac[x, y] = frac
+                locwet_evapo[x, y] = openwater_evapo_cor
 
                 # update inflow to surface water bodies
                 inflow_to_swb = outflow
@@ -435,8 +587,8 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
 
             if glolake_area[x, y] > 0:
                 daily_glolake_balance = lw.\
-                    lake_wetland_water_balance(x, y,
-                            'global lake',
+                    lake_wetland_water_balance_from_type(x, y,
+                            ct.SurfaceWaterBody.GLOBAL_LAKE,
                             glolake_storage[x, y],
                             precipitation[x, y],
                             openwater_pot_evap[x, y],
@@ -458,12 +610,12 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
                     actual_use, openwater_evapo_cor = daily_glolake_balance
 
                 glolake_precip[x, y] = precipitation[x, y] * glolake_area[x, y]
-                glolake_storage_out[x, y] = storage.item()
-                glolake_outflow[x, y] = outflow.item()
-                gwr_glolake[x, y] = recharge.item()
-                actual_daily_netabstraction_sw[x, y] = actual_use.item()
-                accu_unsatisfied_pot_netabstr_glolake = accum_unpot_netabs_sw.item()
-                glolake_evapo[x, y] = openwater_evapo_cor.item()
+                glolake_storage_out[x, y] = storage
+                glolake_outflow[x, y] = outflow
+                gwr_glolake[x, y] = recharge
+                actual_daily_netabstraction_sw[x, y] = actual_use
+                accu_unsatisfied_pot_netabstr_glolake = accum_unpot_netabs_sw
+                glolake_evapo[x, y] = openwater_evapo_cor
 
                 # update inflow to surface water bodies
                 inflow_to_swb = outflow
@@ -476,11 +628,10 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
         # for each cell. See section 4.6.1 of Müller Schmied et al. (2021)
         # ** need to compute actual use from here too** (to be done**)
         # =========================================================================
-            if glores_area[x, y] > 0:
+            if glores_capacity is not None and glores_area[x, y] > 0:
 
                 daily_res_reg_balance = res_reg.\
                     reservoir_regulated_lake_water_balance(rout_order, routflow_looper,
-                                        outflow_cell,
                                         glores_storage[x, y],
                                         glores_capacity[x, y],
                                         precipitation[x, y],
@@ -496,15 +647,13 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
                                         current_mon_day,
                                         k_release[x, y],
                                         glores_type[x, y],
-                                        allocation_coeff,
-                                        monthly_potential_net_abstraction_sw,
-                                        mean_annual_demand_res,
+                                        monthly_downstream_demand[x, y],
+                                        mean_annual_downstream_demand[x, y],
                                         mean_annual_inflow_res[x, y],
                                         glolake_area[x, y],
                                         accumulated_unsatisfied_potential_netabs_sw[x, y],
                                         accu_unsatisfied_pot_netabstr_glolake,
                                         num_days_in_month,
-                                        all_reservoir_and_regulated_lake_area,
                                         reg_lake_redfactor_firstday[x, y],
                                         minstorage_volume)
 
@@ -512,13 +661,13 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
                     actual_use, openwater_evapo_cor = daily_res_reg_balance
 
                 glores_precip[x, y] = precipitation[x, y] * glores_area[x, y]
-                glores_storage_out[x, y] = storage.item()
-                glores_outflow[x, y] = outflow.item()
-                gwr_glores[x, y] = recharge.item()
-                k_release_out[x, y] = res_k_release.item()
-                actual_daily_netabstraction_sw[x, y] += actual_use.item()
-                accu_unsatisfied_pot_netabstr_glores = accum_unpot_netabs_sw.item()
-                glores_evapo[x, y] = openwater_evapo_cor.item()
+                glores_storage_out[x, y] = storage
+                glores_outflow[x, y] = outflow
+                gwr_glores[x, y] = recharge
+                k_release_out[x, y] = res_k_release
+                actual_daily_netabstraction_sw[x, y] += actual_use
+                accu_unsatisfied_pot_netabstr_glores = accum_unpot_netabs_sw
+                glores_evapo[x, y] = openwater_evapo_cor
 
                 # update inflow to surface water bodies
                 inflow_to_swb = outflow
@@ -526,7 +675,7 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
 
             # Update accumulated_unsatisfied_potential_netabs_sw  after global lake
             # and reservior abstraction since a cell may contain both.
-            if glores_area[x, y] > 0:
+            if glores_capacity is not None and glores_area[x, y] > 0:
                 accumulated_unsatisfied_potential_netabs_sw[x, y] = \
                     accu_unsatisfied_pot_netabstr_glores
             elif glolake_area[x, y] > 0:
@@ -537,7 +686,7 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
         #    || Resdistribute unsatisfied net abstraction to riparian cell  ||
         #    ||               for global lakes and reservoirs               ||
         #    -----------------------------------------------------------------
-            if subtract_use_option:
+            if potential_net_abstraction_sw is not None:
                 if (glores_area[x, y] > 0) | (glolake_area[x, y] > 0):
 
                     # demand_riparian_outflowcell: is the total unsatisfied demand
@@ -548,25 +697,37 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
                     demand_riparian_outflowcell = \
                             accumulated_unsatisfied_potential_netabs_sw[x, y]
 
+                    # Without neighbouring cell water supply, no demand is
+                    # allocated to or returned from a supply cell.
+                    if neighbouring_cells_map is not None:
+                        demand_to_supplycell = \
+                            unsat_potnetabs_sw_to_supplycell[x, y]
+                        prev_returned_demand = \
+                            returned_demand_from_supplycell_nextday[x, y]
+                    else:
+                        demand_to_supplycell = 0.0
+                        prev_returned_demand = np.nan
+
                     distributed_potnetabs = dist_netabstr.\
                         redistritute_to_riparian(
                             prev_accumulated_unsatisfied_potential_netabs_sw[x, y],
-                            unsat_potnetabs_sw_to_supplycell[x, y],
+                            demand_to_supplycell,
                             accumulated_unsatisfied_potential_netabs_sw[x, y],
                             unagregrgated_potential_netabs_sw,
                             potential_net_abstraction_sw[x, y],
-                            glwdunits, rout_order,
+                            unit_start, unit_cells, unit_rout_position,
+                            cell_unit[x, y],
                             unsatisfied_potential_netabs_riparian,
-                            returned_demand_from_supplycell_nextday[x, y],
-                            x, y)
+                            prev_returned_demand, x, y)
 
                     accumulated_unsatisfied_potential_netabs_sw[x, y] = \
                         distributed_potnetabs[0]
 
                     # total unsatisfied demand of all riparian cells
-                    total_unsatisfied_demand_ripariancell[x, y] = \
-                        demand_riparian_outflowcell - \
-                        accumulated_unsatisfied_potential_netabs_sw[x, y]
+                    if neighbouring_cells_map is not None:
+                        total_unsatisfied_demand_ripariancell[x, y] = \
+                            demand_riparian_outflowcell - \
+                            accumulated_unsatisfied_potential_netabs_sw[x, y]
                     # unsatisfied potential net abstraction for each  riparian cell
                     unsatisfied_potential_netabs_riparian = \
                         distributed_potnetabs[1]
@@ -583,31 +744,31 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
 
             if glowet_frac[x, y] > 0:
                 daily_glowet_balance = lw.\
-                    lake_wetland_water_balance(x, y,
-                                               'global wetland',
-                                               glowet_storage[x, y],
-                                               precipitation[x, y],
-                                               openwater_pot_evap[x, y],
-                                               aridhumid[x, y],
-                                               drainage_direction[x, y],
-                                               glowet_inflow,
-                                               swb_outflow_coeff[x, y],
-                                               gw_recharge_constant[x, y],
-                                               reduction_exponent_lakewet[x, y],
-                                               areal_corr_factor[x, y],
-                                               max_storage=max_glowet_storage[x, y],
-                                               wetland_outflow_exp=wetland_out_exp[x, y],
-                                               max_area=max_glowet_area[x, y],
-                                               lakewet_frac=glowet_frac[x, y])
+                    lake_wetland_water_balance_from_type(x, y,
+                                                         ct.SurfaceWaterBody.GLOBAL_WETLAND,
+                                                         glowet_storage[x, y],
+                                                         precipitation[x, y],
+                                                         openwater_pot_evap[x, y],
+                                                         aridhumid[x, y],
+                                                         drainage_direction[x, y],
+                                                         glowet_inflow,
+                                                         swb_outflow_coeff[x, y],
+                                                         gw_recharge_constant[x, y],
+                                                         reduction_exponent_lakewet[x, y],
+                                                         areal_corr_factor[x, y],
+                                                         max_storage=max_glowet_storage[x, y],
+                                                         wetland_outflow_exp=wetland_out_exp[x, y],
+                                                         max_area=max_glowet_area[x, y],
+                                                         lakewet_frac=glowet_frac[x, y])
 
                 storage, outflow, recharge, frac, accum_unpot_netabs_sw, \
                     actual_use, openwater_evapo_cor = daily_glowet_balance
 
-                glowet_storage_out[x, y] = storage.item()
-                glowet_outflow[x, y] = outflow.item()
-                gwr_glowet[x, y] = recharge.item()
-                dyn_glowet_frac[x, y] = frac.item()
-                glowet_evapo[x, y] = openwater_evapo_cor.item()
+                glowet_storage_out[x, y] = storage
+                glowet_outflow[x, y] = outflow
+                gwr_glowet[x, y] = recharge
+                dyn_glowet_frac[x, y] = frac
+                glowet_evapo[x, y] = openwater_evapo_cor
 
                 # update inflow to surface water bodies
                 inflow_to_swb = outflow
@@ -626,24 +787,25 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
 
             if (aridhumid[x, y] == 1) & (drainage_direction[x, y] >= 0):
                 daily_groundwater_balance_arid = \
-                   gw.groundwater_balance(x, y,
-                                          "arid",
-                                          groundwater_storage[x, y],
-                                          diffuse_gw_recharge[x, y],
-                                          potential_net_abstraction_gw[x, y],
-                                          daily_unsatisfied_pot_nas[x, y],
-                                          gw_dis_coeff[x, y],
-                                          prev_potential_water_withdrawal_sw_irri[x, y],
-                                          prev_potential_consumptive_use_sw_irri[x, y],
-                                          frac_irri_returnflow_to_gw[x, y],
-                                          point_source_recharge[x, y])
+                   gw.groundwater_balance_from_coeff(x, y,
+                                                     ct.GroundwaterCell.ARID,
+                                                     groundwater_storage[x, y],
+                                                     diffuse_gw_recharge[x, y],
+                                                     netabs_gw,
+                                                     unsat_pot_nas,
+                                                     gw_dis_coeff[x, y],
+                                                     exp_gw_dis_coeff[x, y],
+                                                     prev_withdrawal_sw_irri,
+                                                     prev_consuse_sw_irri,
+                                                     returnflow_to_gw,
+                                                     point_source_recharge[x, y])
 
                 storage, discharge_arid, actual_netabs_gw = \
                     daily_groundwater_balance_arid
 
-                groundwater_storage_out[x, y] = storage.item()
-                groundwater_discharge[x, y] = discharge_arid.item()
-                actual_net_abstraction_gw[x, y] = actual_netabs_gw.item()
+                groundwater_storage_out[x, y] = storage
+                groundwater_discharge[x, y] = discharge_arid
+                actual_net_abstraction_gw[x, y] = actual_netabs_gw
 
                 # In semi-arid/arid areas, groundwater reaches the river directly
                 inflow_to_river += groundwater_discharge[x, y]
@@ -668,10 +830,12 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
             # Output of "velocity_and_outflowconst" are
             # 0 = velocity (km/day),  1 =  outflow contstant (1/day)
             velocity_and_outflowconst = \
-                river.river_velocity(x, y,
-                                     river_storage[x, y], river_length[x, y],
-                                     river_bottom_width[x, y], roughness[x, y],
-                                     roughness_multiplier[x, y], river_slope[x, y])
+                river.river_velocity_from_invariants(x, y, river_storage[x, y],
+                                                     river_length[x, y],
+                                                     river_bottom_width_m[x, y],
+                                                     bottom_width_term[x, y],
+                                                     manning_coeff[x, y],
+                                                     sqrt_river_slope[x, y])
 
             velocity, outflow_constant = velocity_and_outflowconst
             river_velocity[x, y] = velocity
@@ -690,11 +854,11 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
             storage, streamflow, accum_unpot_netabs_sw, actual_use = \
                 daily_river_balance
 
-            river_storage_out[x, y] = storage.item()
-            river_streamflow[x, y] = streamflow.item()
+            river_storage_out[x, y] = storage
+            river_streamflow[x, y] = streamflow
             accumulated_unsatisfied_potential_netabs_sw[x, y] = \
-                accum_unpot_netabs_sw.item()
-            actual_daily_netabstraction_sw[x, y] += actual_use.item()
+                accum_unpot_netabs_sw
+            actual_daily_netabstraction_sw[x, y] += actual_use
 
             # =================================
             # 3. Put water into downstream cell
@@ -724,7 +888,7 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
             #    ||  Neighbouring cell Water supply option  &   ||
             #    ||  Abstraction from  local lake               ||
             #    ==================================================
-            if subtract_use_option:
+            if potential_net_abstraction_sw is not None:
                 #               ====================================
                 #               ||  Abstraction from  local lake  ||
                 #               ====================================
@@ -749,17 +913,17 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
                                     accumulated_unsatisfied_potential_netabs_sw[x, y],
                                     x, y)
 
-                        loclake_storage_out[x, y] = storage.item()
+                        loclake_storage_out[x, y] = storage
                         accumulated_unsatisfied_potential_netabs_sw[x, y] = \
-                            accum_unpot_netabs_sw.item()
-                        actual_daily_netabstraction_sw[x, y] += actual_use.item()
+                            accum_unpot_netabs_sw
+                        actual_daily_netabstraction_sw[x, y] += actual_use
 
-                        dyn_loclake_frac[x, y] = frac.item()
+                        dyn_loclake_frac[x, y] = frac
 
                 #               =============================================
                 #               ||  Neighbouring cell Water supply option  ||
                 #               =============================================
-                if neighbouringcell_option:
+                if neighbouring_cells_map is not None:
                     #         # +++++++++++++++++++++++++++++++++++++++++++++++++++
                     #         # Allocation of usatisfied demand  back to demandcell
                     #         # +++++++++++++++++++++++++++++++++++++++++++++++++++
@@ -793,13 +957,13 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
                     #      # +++++++++++++++++++++++++++++++++++
 
                     nbcell_lat, nbcell_lon = nbcell.\
-                        get_neighbouringcell(neigbourcells_for_demandcell,
-                                             outflowcell_for_neigbourcells,
+                        get_neighbouringcell(neigbourcells[routflow_looper],
+                                             neighbourcells_outflowcell[routflow_looper],
                                              river_storage_out, loclake_storage_out,
                                              glolake_storage_out, max_loclake_storage,
                                              max_glolake_storage,
                                              accumulated_unsatisfied_potential_netabs_sw[x, y],
-                                             reservoir_operation,
+                                             glores_capacity is not None,
                                              glores_storage_out,
                                              x, y, current_mon_day,
                                              cell_calculated)
@@ -825,9 +989,9 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
                     else:
                         unsat_potnetabs_sw_from_demandcell[x, y] = 0
 
-                # ***************************************
-                cell_calculated[x, y] = 1
-                # ***************************************
+                    # ***************************************
+                    cell_calculated[x, y] = 1
+                    # ***************************************
 
             #    =================================================
             #    ||             Additional Output                ||
@@ -861,17 +1025,441 @@ def river_routing(rout_order, outflow_cell, drainage_direction, aridhumid,
                 glowet_storage_out[x, y] + river_storage_out[x, y] + \
                 sum_canopy_snow_soil_storage[x, y]
 
-    return groundwater_storage_out, loclake_storage_out, locwet_storage_out,\
-        glolake_storage_out, glores_storage_out, k_release_out, \
-        glowet_storage_out, river_storage_out, groundwater_discharge, \
-        loclake_outflow, locwet_outflow, glolake_outflow, glowet_outflow, \
-        river_streamflow,  cellrunoff, dyn_loclake_frac, dyn_locwet_frac, \
-        dyn_glowet_frac, accumulated_unsatisfied_potential_netabs_sw, \
-        unsatisfied_potential_netabs_riparian, actual_net_abstraction_gw, \
+
+@njit(cache=True)
+def get_routing_results(outputs, accumulated_unsatisfied_potential_netabs_sw,
+                        unsatisfied_potential_netabs_riparian,
+                        unsat_potnetabs_sw_from_demandcell,
+                        unsat_potnetabs_sw_to_supplycell,
+                        neighbouring_cells_map, daily_unsatisfied_pot_nas,
+                        returned_demand_from_supplycell,
+                        returned_demand_from_supplycell_nextday):
+    """
+    Get outputs of routing.
+
+    Returns
+    -------
+    tuple
+        Storages of next time step, fluxes and factors in order of
+        river_routing outputs (see waterbalance_lateral.py). Arrays of options
+        which are not selected are None.
+
+    """
+    # outputs (see get_routing_outputs in waterbalance_lateral.py) are
+    # 0 = consistent_precip, 1 = total_water_storage,
+    # 2 = groundwater_storage_out, 3 = groundwater_discharge,
+    # 4 = point_source_recharge, 5 = loclake_storage_out,
+    # 6 = loclake_outflow, 8 = dyn_loclake_frac, 9 = locwet_storage_out,
+    # 10 = locwet_outflow, 12 = dyn_locwet_frac, 13 = glolake_storage_out,
+    # 14 = glolake_outflow, 17 = glores_storage_out, 18 = glores_outflow,
+    # 20 = k_release_out, 22 = glowet_storage_out, 23 = glowet_outflow,
+    # 25 = dyn_glowet_frac, 26 = river_storage_out, 27 = river_streamflow,
+    # 29 = cellrunoff, 30 = inflow_from_upstream, 31 = river_velocity,
+    # 32 = actual_net_abstraction_gw, 33 = actual_daily_netabstraction_sw,
+    # 34 = cell_aet_consuse
+    # Other outputs are only used within routing.
+    return outputs[2], outputs[5], outputs[9], outputs[13], outputs[17], \
+        outputs[20], outputs[22], outputs[26], outputs[3], outputs[6], \
+        outputs[10], outputs[14], outputs[23], outputs[27], outputs[29], \
+        outputs[8], outputs[12], outputs[25], \
+        accumulated_unsatisfied_potential_netabs_sw, \
+        unsatisfied_potential_netabs_riparian, outputs[32], \
         unsat_potnetabs_sw_from_demandcell, unsat_potnetabs_sw_to_supplycell,\
         returned_demand_from_supplycell, returned_demand_from_supplycell_nextday,\
-        neighbouring_cells_map, daily_unsatisfied_pot_nas, glores_outflow, \
-        actual_daily_netabstraction_sw, consistent_precip, inflow_from_upstream,\
-        cell_aet_consuse, total_water_storage, point_source_recharge, river_velocity,\
+        neighbouring_cells_map, daily_unsatisfied_pot_nas, outputs[18], \
+        outputs[33], outputs[0], outputs[30], outputs[34], outputs[1], \
+        outputs[4], outputs[31]
 
 
+@njit(cache=True)
+def river_routing(rout_order, outflow_cell, drainage_direction,
+                  aridhumid, precipitation, openwater_pot_evap, surface_runoff,
+                  diffuse_gw_recharge, groundwater_storage, loclake_storage,
+                  locwet_storage, glolake_storage, glores_storage,
+                  glowet_storage, river_storage, max_loclake_storage,
+                  max_locwet_storage, max_glolake_storage, max_glowet_storage,
+                  glores_capacity, max_loclake_area, max_locwet_area,
+                  glolake_area, glores_area, max_glowet_area, loclake_frac,
+                  locwet_frac, glowet_frac, glolake_frac, reglake_frac,
+                  headwatercell, gw_dis_coeff, exp_gw_dis_coeff,
+                  swb_drainage_area_factor, swb_outflow_coeff,
+                  gw_recharge_constant, reduction_exponent_lakewet,
+                  reduction_exponent_res, lake_out_exp, wetland_out_exp,
+                  areal_corr_factor, stat_corr_fact, river_length,
+                  river_bottom_width_m, bottom_width_term, manning_coeff,
+                  sqrt_river_slope, glores_startmonth, current_mon_day,
+                  k_release, glores_type, monthly_downstream_demand,
+                  mean_annual_downstream_demand, mean_annual_inflow_res,
+                  accumulated_unsatisfied_potential_netabs_sw,
+                  num_days_in_month, reg_lake_redfactor_firstday, basin,
+                  landwaterfrac_excl_glolake_res, cell_area, land_aet_corr,
+                  sum_canopy_snow_soil_storage, delayed_use_option,
+                  cell_unit, unit_start, unit_cells,
+                  unit_rout_position, potential_net_abstraction_gw,
+                  potential_net_abstraction_sw,
+                  unagregrgated_potential_netabs_sw,
+                  prev_accumulated_unsatisfied_potential_netabs_sw,
+                  daily_unsatisfied_pot_nas,
+                  prev_potential_water_withdrawal_sw_irri,
+                  prev_potential_consumptive_use_sw_irri,
+                  frac_irri_returnflow_to_gw,
+                  unsatisfied_potential_netabs_riparian, neigbourcells,
+                  neighbourcells_outflowcell,
+                  unsat_potnetabs_sw_from_demandcell,
+                  unsat_potnetabs_sw_to_supplycell, neighbouring_cells_map,
+                  cell_calculated, total_demand_sw_noallocation,
+                  total_unsatisfied_demand_ripariancell,
+                  returned_demand_from_supplycell,
+                  returned_demand_from_supplycell_nextday, outputs):
+    """
+    Route flow to river.
+
+    Cells are computed in routing order (see route_cells). Outputs (storages
+    of next time step, fluxes and factors) are preallocated arrays in order of
+    get_routing_outputs (see waterbalance_lateral.py), which are reset here
+    (see reset_routing_outputs). Output storages must not be the arrays of the
+    current storages.
+
+    Arrays of reservoirs (glores_capacity, glores_startmonth, glores_type,
+    monthly_downstream_demand, mean_annual_downstream_demand,
+    mean_annual_inflow_res and reg_lake_redfactor_firstday) are None if
+    reservoirs are not operated, arrays of water use (cell_unit to
+    unsatisfied_potential_netabs_riparian) are None in naturalised runs and
+    arrays of the neighbouring cell water supply option (neigbourcells to
+    returned_demand_from_supplycell_nextday) are None if the option is not
+    selected, such that routing is compiled without them. Routing is compiled
+    for either value of delayed_use_option (literal).
+
+    """
+    literally(delayed_use_option)
+    reset_routing_outputs(basin, groundwater_storage, loclake_storage,
+                          locwet_storage, glolake_storage, glores_storage,
+                          glowet_storage, river_storage, k_release, outputs)
+    if neighbouring_cells_map is not None:
+        reset_neighbouring_cell_outputs(
+            basin, cell_calculated, total_demand_sw_noallocation,
+            total_unsatisfied_demand_ripariancell,
+            returned_demand_from_supplycell,
+            returned_demand_from_supplycell_nextday)
+
+    # =========================================================================
+    # Routing is calulated according to the routing order for individual cells
+    # =========================================================================
+    cell_order = np.arange(len(rout_order))
+    route_cells(cell_order, 0, len(rout_order), rout_order, outflow_cell,
+                drainage_direction, aridhumid, precipitation,
+                openwater_pot_evap, surface_runoff, diffuse_gw_recharge,
+                groundwater_storage, loclake_storage, locwet_storage,
+                glolake_storage, glores_storage, glowet_storage, river_storage,
+                max_loclake_storage, max_locwet_storage, max_glolake_storage,
+                max_glowet_storage, glores_capacity, max_loclake_area,
+                max_locwet_area, glolake_area, glores_area, max_glowet_area,
+                loclake_frac, locwet_frac, glowet_frac, glolake_frac,
+                reglake_frac, headwatercell, gw_dis_coeff, exp_gw_dis_coeff,
+                swb_drainage_area_factor, swb_outflow_coeff,
+                gw_recharge_constant, reduction_exponent_lakewet,
+                reduction_exponent_res, lake_out_exp, wetland_out_exp,
+                areal_corr_factor, stat_corr_fact, river_length,
+                river_bottom_width_m, bottom_width_term, manning_coeff,
+                sqrt_river_slope, glores_startmonth, current_mon_day,
+                k_release, glores_type, monthly_downstream_demand,
+                mean_annual_downstream_demand, mean_annual_inflow_res,
+                accumulated_unsatisfied_potential_netabs_sw, num_days_in_month,
+                reg_lake_redfactor_firstday, basin,
+                landwaterfrac_excl_glolake_res, cell_area, land_aet_corr,
+                sum_canopy_snow_soil_storage, delayed_use_option,
+                cell_unit, unit_start, unit_cells,
+                unit_rout_position, potential_net_abstraction_gw,
+                potential_net_abstraction_sw,
+                unagregrgated_potential_netabs_sw,
+                prev_accumulated_unsatisfied_potential_netabs_sw,
+                daily_unsatisfied_pot_nas,
+                prev_potential_water_withdrawal_sw_irri,
+                prev_potential_consumptive_use_sw_irri,
+                frac_irri_returnflow_to_gw,
+                unsatisfied_potential_netabs_riparian, neigbourcells,
+                neighbourcells_outflowcell, unsat_potnetabs_sw_from_demandcell,
+                unsat_potnetabs_sw_to_supplycell, neighbouring_cells_map,
+                cell_calculated, total_demand_sw_noallocation,
+                total_unsatisfied_demand_ripariancell,
+                returned_demand_from_supplycell,
+                returned_demand_from_supplycell_nextday, outputs)
+
+    return get_routing_results(outputs,
+                               accumulated_unsatisfied_potential_netabs_sw,
+                               unsatisfied_potential_netabs_riparian,
+                               unsat_potnetabs_sw_from_demandcell,
+                               unsat_potnetabs_sw_to_supplycell,
+                               neighbouring_cells_map,
+                               daily_unsatisfied_pot_nas,
+                               returned_demand_from_supplycell,
+                               returned_demand_from_supplycell_nextday)
+
+
+@njit(parallel=True, cache=True)
+def river_routing_parallel(thread_cells, thread_start, rout_order,
+                           outflow_cell, drainage_direction,
+                           aridhumid, precipitation, openwater_pot_evap,
+                           surface_runoff, diffuse_gw_recharge,
+                           groundwater_storage, loclake_storage,
+                           locwet_storage, glolake_storage, glores_storage,
+                           glowet_storage, river_storage, max_loclake_storage,
+                           max_locwet_storage, max_glolake_storage,
+                           max_glowet_storage, glores_capacity,
+                           max_loclake_area, max_locwet_area, glolake_area,
+                           glores_area, max_glowet_area, loclake_frac,
+                           locwet_frac, glowet_frac, glolake_frac,
+                           reglake_frac, headwatercell, gw_dis_coeff,
+                           exp_gw_dis_coeff, swb_drainage_area_factor,
+                           swb_outflow_coeff, gw_recharge_constant,
+                           reduction_exponent_lakewet, reduction_exponent_res,
+                           lake_out_exp, wetland_out_exp, areal_corr_factor,
+                           stat_corr_fact, river_length, river_bottom_width_m,
+                           bottom_width_term, manning_coeff, sqrt_river_slope,
+                           glores_startmonth, current_mon_day, k_release,
+                           glores_type, monthly_downstream_demand,
+                           mean_annual_downstream_demand,
+                           mean_annual_inflow_res,
+                           accumulated_unsatisfied_potential_netabs_sw,
+                           num_days_in_month, reg_lake_redfactor_firstday,
+                           basin, landwaterfrac_excl_glolake_res, cell_area,
+                           land_aet_corr, sum_canopy_snow_soil_storage,
+                           delayed_use_option, cell_unit,
+                           unit_start, unit_cells, unit_rout_position,
+                           potential_net_abstraction_gw,
+                           potential_net_abstraction_sw,
+                           unagregrgated_potential_netabs_sw,
+                           prev_accumulated_unsatisfied_potential_netabs_sw,
+                           daily_unsatisfied_pot_nas,
+                           prev_potential_water_withdrawal_sw_irri,
+                           prev_potential_consumptive_use_sw_irri,
+                           frac_irri_returnflow_to_gw,
+                           unsatisfied_potential_netabs_riparian,
+                           neigbourcells, neighbourcells_outflowcell,
+                           unsat_potnetabs_sw_from_demandcell,
+                           unsat_potnetabs_sw_to_supplycell,
+                           neighbouring_cells_map, cell_calculated,
+                           total_demand_sw_noallocation,
+                           total_unsatisfied_demand_ripariancell,
+                           returned_demand_from_supplycell,
+                           returned_demand_from_supplycell_nextday, outputs):
+    """
+    Route flow to river in parallel over basins.
+
+    Cells are grouped into independent basins which are distributed over
+    threads (see get_thread_cells in routing_basins module). Every thread
+    computes its cells in routing order (see route_cells), such that results
+    are identical to river_routing.
+
+    Parameters
+    ----------
+    thread_cells : array
+        Index of cells in routing order, grouped by thread.
+    thread_start : array
+        Start index of threads in thread_cells and end index of last thread.
+
+    Other parameters and outputs are the ones of river_routing.
+
+    """
+    literally(delayed_use_option)
+    reset_routing_outputs(basin, groundwater_storage, loclake_storage,
+                          locwet_storage, glolake_storage, glores_storage,
+                          glowet_storage, river_storage, k_release, outputs)
+    if neighbouring_cells_map is not None:
+        reset_neighbouring_cell_outputs(
+            basin, cell_calculated, total_demand_sw_noallocation,
+            total_unsatisfied_demand_ripariancell,
+            returned_demand_from_supplycell,
+            returned_demand_from_supplycell_nextday)
+
+    # Loop through threads in parallel, cells of a thread in routing order
+    for thread in prange(len(thread_start) - 1):  # pylint: disable=not-an-iterable
+        route_cells(thread_cells, thread_start[thread],
+                    thread_start[thread + 1], rout_order, outflow_cell,
+                    drainage_direction, aridhumid, precipitation,
+                    openwater_pot_evap, surface_runoff, diffuse_gw_recharge,
+                    groundwater_storage, loclake_storage, locwet_storage,
+                    glolake_storage, glores_storage, glowet_storage,
+                    river_storage, max_loclake_storage, max_locwet_storage,
+                    max_glolake_storage, max_glowet_storage, glores_capacity,
+                    max_loclake_area, max_locwet_area, glolake_area,
+                    glores_area, max_glowet_area, loclake_frac, locwet_frac,
+                    glowet_frac, glolake_frac, reglake_frac, headwatercell,
+                    gw_dis_coeff, exp_gw_dis_coeff, swb_drainage_area_factor,
+                    swb_outflow_coeff, gw_recharge_constant,
+                    reduction_exponent_lakewet, reduction_exponent_res,
+                    lake_out_exp, wetland_out_exp, areal_corr_factor,
+                    stat_corr_fact, river_length, river_bottom_width_m,
+                    bottom_width_term, manning_coeff, sqrt_river_slope,
+                    glores_startmonth, current_mon_day, k_release, glores_type,
+                    monthly_downstream_demand, mean_annual_downstream_demand,
+                    mean_annual_inflow_res,
+                    accumulated_unsatisfied_potential_netabs_sw,
+                    num_days_in_month, reg_lake_redfactor_firstday, basin,
+                    landwaterfrac_excl_glolake_res, cell_area, land_aet_corr,
+                    sum_canopy_snow_soil_storage, delayed_use_option,
+                    cell_unit, unit_start, unit_cells,
+                    unit_rout_position, potential_net_abstraction_gw,
+                    potential_net_abstraction_sw,
+                    unagregrgated_potential_netabs_sw,
+                    prev_accumulated_unsatisfied_potential_netabs_sw,
+                    daily_unsatisfied_pot_nas,
+                    prev_potential_water_withdrawal_sw_irri,
+                    prev_potential_consumptive_use_sw_irri,
+                    frac_irri_returnflow_to_gw,
+                    unsatisfied_potential_netabs_riparian, neigbourcells,
+                    neighbourcells_outflowcell,
+                    unsat_potnetabs_sw_from_demandcell,
+                    unsat_potnetabs_sw_to_supplycell, neighbouring_cells_map,
+                    cell_calculated, total_demand_sw_noallocation,
+                    total_unsatisfied_demand_ripariancell,
+                    returned_demand_from_supplycell,
+                    returned_demand_from_supplycell_nextday, outputs)
+
+    return get_routing_results(outputs,
+                               accumulated_unsatisfied_potential_netabs_sw,
+                               unsatisfied_potential_netabs_riparian,
+                               unsat_potnetabs_sw_from_demandcell,
+                               unsat_potnetabs_sw_to_supplycell,
+                               neighbouring_cells_map,
+                               daily_unsatisfied_pot_nas,
+                               returned_demand_from_supplycell,
+                               returned_demand_from_supplycell_nextday)
+
+
+@njit(parallel=True, cache=True)
+def river_routing_levels(level_cells, chunk_start, level_chunks, rout_order,
+                         outflow_cell, drainage_direction,
+                         aridhumid, precipitation, openwater_pot_evap,
+                         surface_runoff, diffuse_gw_recharge,
+                         groundwater_storage, loclake_storage, locwet_storage,
+                         glolake_storage, glores_storage, glowet_storage,
+                         river_storage, max_loclake_storage,
+                         max_locwet_storage, max_glolake_storage,
+                         max_glowet_storage, glores_capacity, max_loclake_area,
+                         max_locwet_area, glolake_area, glores_area,
+                         max_glowet_area, loclake_frac, locwet_frac,
+                         glowet_frac, glolake_frac, reglake_frac,
+                         headwatercell, gw_dis_coeff, exp_gw_dis_coeff,
+                         swb_drainage_area_factor, swb_outflow_coeff,
+                         gw_recharge_constant, reduction_exponent_lakewet,
+                         reduction_exponent_res, lake_out_exp, wetland_out_exp,
+                         areal_corr_factor, stat_corr_fact, river_length,
+                         river_bottom_width_m, bottom_width_term,
+                         manning_coeff, sqrt_river_slope, glores_startmonth,
+                         current_mon_day, k_release, glores_type,
+                         monthly_downstream_demand,
+                         mean_annual_downstream_demand, mean_annual_inflow_res,
+                         accumulated_unsatisfied_potential_netabs_sw,
+                         num_days_in_month, reg_lake_redfactor_firstday, basin,
+                         landwaterfrac_excl_glolake_res, cell_area,
+                         land_aet_corr, sum_canopy_snow_soil_storage,
+                         delayed_use_option, cell_unit,
+                         unit_start, unit_cells, unit_rout_position,
+                         potential_net_abstraction_gw,
+                         potential_net_abstraction_sw,
+                         unagregrgated_potential_netabs_sw,
+                         prev_accumulated_unsatisfied_potential_netabs_sw,
+                         daily_unsatisfied_pot_nas,
+                         prev_potential_water_withdrawal_sw_irri,
+                         prev_potential_consumptive_use_sw_irri,
+                         frac_irri_returnflow_to_gw,
+                         unsatisfied_potential_netabs_riparian, neigbourcells,
+                         neighbourcells_outflowcell,
+                         unsat_potnetabs_sw_from_demandcell,
+                         unsat_potnetabs_sw_to_supplycell,
+                         neighbouring_cells_map, cell_calculated,
+                         total_demand_sw_noallocation,
+                         total_unsatisfied_demand_ripariancell,
+                         returned_demand_from_supplycell,
+                         returned_demand_from_supplycell_nextday, outputs):
+    """
+    Route flow to river in parallel over the cells of a level.
+
+    Levels are computed one after another (see get_routing_levels in
+    routing_basins module). Cells of a level do not depend on each other and
+    are split into contiguous chunks (see get_level_chunks) which are
+    computed in parallel, such that results are identical to river_routing.
+
+    Parameters
+    ----------
+    level_cells : array
+        Index of cells in routing order, grouped by level.
+    chunk_start : array
+        Start index of chunks in level_cells and end index of last chunk.
+    level_chunks : array
+        Index of first chunk of levels and number of chunks.
+
+    Other parameters and outputs are the ones of river_routing.
+
+    """
+    literally(delayed_use_option)
+    reset_routing_outputs(basin, groundwater_storage, loclake_storage,
+                          locwet_storage, glolake_storage, glores_storage,
+                          glowet_storage, river_storage, k_release, outputs)
+    if neighbouring_cells_map is not None:
+        reset_neighbouring_cell_outputs(
+            basin, cell_calculated, total_demand_sw_noallocation,
+            total_unsatisfied_demand_ripariancell,
+            returned_demand_from_supplycell,
+            returned_demand_from_supplycell_nextday)
+
+    for level in range(len(level_chunks) - 1):
+        # Loop through chunks of cells of a level in parallel
+        # pylint: disable-next=not-an-iterable
+        for chunk in prange(level_chunks[level], level_chunks[level + 1]):
+            route_cells(level_cells, chunk_start[chunk],
+                        chunk_start[chunk + 1], rout_order, outflow_cell,
+                        drainage_direction, aridhumid,
+                        precipitation, openwater_pot_evap, surface_runoff,
+                        diffuse_gw_recharge, groundwater_storage,
+                        loclake_storage, locwet_storage, glolake_storage,
+                        glores_storage, glowet_storage, river_storage,
+                        max_loclake_storage, max_locwet_storage,
+                        max_glolake_storage, max_glowet_storage,
+                        glores_capacity, max_loclake_area, max_locwet_area,
+                        glolake_area, glores_area, max_glowet_area,
+                        loclake_frac, locwet_frac, glowet_frac, glolake_frac,
+                        reglake_frac, headwatercell, gw_dis_coeff,
+                        exp_gw_dis_coeff, swb_drainage_area_factor,
+                        swb_outflow_coeff, gw_recharge_constant,
+                        reduction_exponent_lakewet, reduction_exponent_res,
+                        lake_out_exp, wetland_out_exp, areal_corr_factor,
+                        stat_corr_fact, river_length, river_bottom_width_m,
+                        bottom_width_term, manning_coeff, sqrt_river_slope,
+                        glores_startmonth, current_mon_day, k_release,
+                        glores_type, monthly_downstream_demand,
+                        mean_annual_downstream_demand, mean_annual_inflow_res,
+                        accumulated_unsatisfied_potential_netabs_sw,
+                        num_days_in_month, reg_lake_redfactor_firstday, basin,
+                        landwaterfrac_excl_glolake_res, cell_area,
+                        land_aet_corr, sum_canopy_snow_soil_storage,
+                        delayed_use_option, cell_unit,
+                        unit_start, unit_cells, unit_rout_position,
+                        potential_net_abstraction_gw,
+                        potential_net_abstraction_sw,
+                        unagregrgated_potential_netabs_sw,
+                        prev_accumulated_unsatisfied_potential_netabs_sw,
+                        daily_unsatisfied_pot_nas,
+                        prev_potential_water_withdrawal_sw_irri,
+                        prev_potential_consumptive_use_sw_irri,
+                        frac_irri_returnflow_to_gw,
+                        unsatisfied_potential_netabs_riparian, neigbourcells,
+                        neighbourcells_outflowcell,
+                        unsat_potnetabs_sw_from_demandcell,
+                        unsat_potnetabs_sw_to_supplycell,
+                        neighbouring_cells_map, cell_calculated,
+                        total_demand_sw_noallocation,
+                        total_unsatisfied_demand_ripariancell,
+                        returned_demand_from_supplycell,
+                        returned_demand_from_supplycell_nextday, outputs)
+
+    return get_routing_results(outputs,
+                               accumulated_unsatisfied_potential_netabs_sw,
+                               unsatisfied_potential_netabs_riparian,
+                               unsat_potnetabs_sw_from_demandcell,
+                               unsat_potnetabs_sw_to_supplycell,
+                               neighbouring_cells_map,
+                               daily_unsatisfied_pot_nas,
+                               returned_demand_from_supplycell,
+                               returned_demand_from_supplycell_nextday)
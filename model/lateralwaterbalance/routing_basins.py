@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Partition of land cells into basins and levels for parallel routing."""
+
+# =============================================================================
+# River flow is routed from a cell to its outflow cell until it reaches the
+# ocean or an inland sink (outflow cell (0, 0)). A cell depends on cells
+# which come first in the routing order and
+#  1) flow into the cell (inflow of upstream cells),
+#  2) flow into the same outflow cell (inflow of the outflow cell is summed
+#     in routing order),
+#  3) belong to the same global lake or reservoir if net abstraction is
+#     subtracted (unsatisfied potential net abstraction of the outflow cell
+#     is distributed to the riparian cells with the same glwdunits, see
+#     distribute_net_abstraction module),
+#  4) are neighbouring cells or demand cells of the same neighbouring cell
+#     with the neighbouring cell water supply option (see neighbouring_cell
+#     module).
+# Cells which depend on each other either way are routed in routing order,
+# such that results are identical to the serial routing. Two schedules are
+# derived from these dependencies:
+#  - Basins: Cells connected by dependencies form independent basins
+#    (drainage basins and drainage basins coupled by water use). Basins are
+#    sorted from largest to smallest and distributed over threads (largest
+#    basin first to the thread with the least cells). Every thread computes
+#    its cells in routing order (see river_routing_parallel in routing
+#    module).
+#  - Levels: The level of a cell is the length of the longest chain of
+#    dependencies which ends at the cell (0 for cells without dependencies).
+#    Cells of a level only depend on cells of lower levels and are computed
+#    in parallel, level by level (see river_routing_levels in routing
+#    module). Large basins (e.g. Amazon, Congo and Mississippi) are thereby
+#    split over threads.
+# =============================================================================
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def find_basin(parent, cell):
+    """
+    Find root cell of the basin of a cell.
+
+    Parameters
+    ----------
+    parent : array
+        Parent cell of every cell (index in routing order).
+    cell : int
+        Index of cell in routing order.
+
+    Returns
+    -------
+    int
+        Index of root cell of basin in routing order.
+
+    """
+    while parent[cell] != cell:
+        # Path halving keeps the trees flat.
+        parent[cell] = parent[parent[cell]]
+        cell = parent[cell]
+    return cell
+
+
+@njit(cache=True)
+def merge_basins(parent, first_cells, second_cells):
+    """
+    Merge basins of pairs of cells.
+
+    The root of a merged basin is the cell which comes first in the routing
+    order. Pairs with a cell which is not in the routing order (index -1)
+    are skipped.
+
+    Parameters
+    ----------
+    parent : array
+        Parent cell of every cell (index in routing order), updated in place.
+    first_cells : array
+        Index of first cell of pairs in routing order.
+    second_cells : array
+        Index of second cell of pairs in routing order.
+
+    Returns
+    -------
+    None.
+
+    """
+    for first_cell, second_cell in zip(first_cells, second_cells):
+        if first_cell < 0 or second_cell < 0:
+            continue
+        first_root = find_basin(parent, first_cell)
+        second_root = find_basin(parent, second_cell)
+        if first_root < second_root:
+            parent[second_root] = first_root
+        elif second_root < first_root:
+            parent[first_root] = second_root
+
+
+def get_cell_index(rout_order, grid_shape):
+    """
+    Get index of land cells in routing order on grid.
+
+    Parameters
+    ----------
+    rout_order : array
+        Latitude and longitude index of cells in routing order.
+    grid_shape : tuple
+        Shape of grid (lat, lon).
+
+    Returns
+    -------
+    cell_index : array
+        Index of cell in routing order, -1 for cells not in routing order.
+
+    """
+    cell_index = np.full(grid_shape, -1, dtype=np.int64)
+    cell_index[rout_order[:, 0], rout_order[:, 1]] = np.arange(len(rout_order))
+    return cell_index
+
+
+def get_chain_pairs(keys, cells):
+    """
+    Get pairs of consecutive cells (in routing order) with the same key.
+
+    Parameters
+    ----------
+    keys : array
+        Key of cells, e.g. outflow cell or glwdunits.
+    cells : array
+        Index of cells in routing order, cells may appear more than once.
+
+    Returns
+    -------
+    first_cells : array
+        Index of first cell of pairs in routing order.
+    second_cells : array
+        Index of second cell of pairs in routing order.
+
+    """
+    order = np.lexsort((cells, keys))
+    keys = keys[order]
+    cells = cells[order]
+    chained = (keys[1:] == keys[:-1]) & (cells[1:] != cells[:-1])
+    return cells[:-1][chained], cells[1:][chained]
+
+
+def get_dependency_pairs(rout_order, outflow_cell, glwdunits, swb_area,
+                         neighbourcells, subtract_use_option,
+                         neighbouringcell_option):
+    """
+    Get pairs of cells which have to be routed in routing order.
+
+    Parameters
+    ----------
+    rout_order : array
+        Latitude and longitude index of cells in routing order.
+    outflow_cell : array
+        Latitude and longitude index of outflow cell of cells in routing
+        order, (0, 0) for ocean outlets and inland sinks.
+    glwdunits : array
+        Global Lakes and Wetlands units (outflow cell and riparian cell)
+    swb_area : array
+        Area of global lakes, reservoirs and regulated lakes (of all years),
+        Units: [km2]
+    neighbourcells : array
+        Latitude and longitude index of neighbouring cells of cells in
+        routing order, (0, 0) for no neighbouring cell (None if
+        neighbouringcell_option is not selected).
+    subtract_use_option : bool
+        Net abstraction is subtracted from water storages.
+    neighbouringcell_option : bool
+        Demand can be satisfied from neighbouring cells.
+
+    Returns
+    -------
+    first_cells : array
+        Index of first cell of pairs in routing order.
+    second_cells : array
+        Index of second cell of pairs in routing order (after first cell).
+
+    """
+    num_cells = len(rout_order)
+    cell_index = get_cell_index(rout_order, glwdunits.shape)
+    pairs = []
+
+    # River flow to outflow cell (not routed if outflow cell has latitude or
+    # longitude index 0, see river_routing)
+    downstream = (outflow_cell[:, 0] > 0) & (outflow_cell[:, 1] > 0)
+    upstream_cells = np.flatnonzero(downstream)
+    downstream_cells = cell_index[outflow_cell[downstream, 0],
+                                  outflow_cell[downstream, 1]]
+    upstream_cells = upstream_cells[downstream_cells >= 0]
+    downstream_cells = downstream_cells[downstream_cells >= 0]
+    pairs.append((upstream_cells, downstream_cells))
+
+    # Cells with the same outflow cell
+    pairs.append(get_chain_pairs(downstream_cells, upstream_cells))
+
+    if subtract_use_option:
+        # Riparian cells of global lakes and reservoirs
+        cell_units = glwdunits[rout_order[:, 0], rout_order[:, 1]]
+        swb_units = np.unique(
+            cell_units[swb_area[rout_order[:, 0], rout_order[:, 1]] > 0])
+        riparian = np.flatnonzero(np.isin(cell_units, swb_units))
+        pairs.append(get_chain_pairs(cell_units[riparian], riparian))
+
+        if neighbouringcell_option:
+            # Neighbouring cells (latitude and longitude index alternate).
+            # A cell, its neighbouring cells and the demand cells it is a
+            # neighbouring cell of are chained.
+            neighbour_lat = neighbourcells[:, 0::2]
+            neighbour_lon = neighbourcells[:, 1::2]
+            demand_cell, neighbour = \
+                np.nonzero((neighbour_lat > 0) | (neighbour_lon > 0))
+            neighbour = cell_index[neighbour_lat[demand_cell, neighbour],
+                                   neighbour_lon[demand_cell, neighbour]]
+            demand_cell = demand_cell[neighbour >= 0]
+            neighbour = neighbour[neighbour >= 0]
+            all_cells = np.arange(num_cells)
+            pairs.append(get_chain_pairs(
+                np.concatenate((all_cells, demand_cell, neighbour)),
+                np.concatenate((all_cells, neighbour, demand_cell))))
+
+    first_cells = np.concatenate([first for first, _ in pairs])
+    second_cells = np.concatenate([second for _, second in pairs])
+    return (np.minimum(first_cells, second_cells),
+            np.maximum(first_cells, second_cells))
+
+
+def get_routing_basins(rout_order, outflow_cell, glwdunits, swb_area,
+                       neighbourcells, subtract_use_option,
+                       neighbouringcell_option):
+    """
+    Partition cells in routing order into independent basins.
+
+    Parameters are the ones of get_dependency_pairs.
+
+    Returns
+    -------
+    basin_cells : array
+        Index of cells in routing order, grouped by basin. Cells of a basin
+        are in routing order, basins are sorted by number of cells
+        (largest first).
+    basin_start : array
+        Start index of basins in basin_cells and end index of last basin.
+
+    """
+    num_cells = len(rout_order)
+    parent = np.arange(num_cells)
+    merge_basins(parent, *get_dependency_pairs(rout_order, outflow_cell,
+                                               glwdunits, swb_area,
+                                               neighbourcells,
+                                               subtract_use_option,
+                                               neighbouringcell_option))
+
+    basin_root = np.array([find_basin(parent, cell)
+                           for cell in range(num_cells)], dtype=np.int64)
+    roots, basin_size = np.unique(basin_root, return_counts=True)
+
+    # Basins are sorted by size (largest first, ties in routing order of root
+    # cell). Cells of a basin stay in routing order (stable sort).
+    basin_rank = np.empty(num_cells, dtype=np.int64)
+    basin_rank[roots] = np.argsort(np.argsort(-basin_size, kind='stable'))
+    basin_cells = np.argsort(basin_rank[basin_root], kind='stable')
+    basin_start = np.zeros(len(roots) + 1, dtype=np.int64)
+    basin_start[1:] = np.cumsum(np.sort(basin_size)[::-1])
+
+    return basin_cells, basin_start
+
+
+@njit(cache=True)
+def get_levels(num_cells, first_cells, second_cells):
+    """
+    Get level of cells (longest chain of dependencies ending at a cell).
+
+    Parameters
+    ----------
+    num_cells : int
+        Number of cells in routing order.
+    first_cells : array
+        Index of first cell of pairs in routing order.
+    second_cells : array
+        Index of second cell of pairs in routing order, sorted.
+
+    Returns
+    -------
+    level : array
+        Level of cells in routing order.
+
+    """
+    level = np.zeros(num_cells, dtype=np.int64)
+    # Pairs are sorted by second cell and first cells come before second
+    # cells, hence the level of a first cell is final when it is used.
+    for first_cell, second_cell in zip(first_cells, second_cells):
+        level[second_cell] = max(level[second_cell], level[first_cell] + 1)
+    return level
+
+
+def get_routing_levels(rout_order, outflow_cell, glwdunits, swb_area,
+                       neighbourcells, subtract_use_option,
+                       neighbouringcell_option):
+    """
+    Partition cells in routing order into levels of independent cells.
+
+    Parameters are the ones of get_dependency_pairs.
+
+    Returns
+    -------
+    level_cells : array
+        Index of cells in routing order, grouped by level (lowest first).
+        Cells of a level are in routing order.
+    level_start : array
+        Start index of levels in level_cells and end index of last level.
+
+    """
+    first_cells, second_cells = \
+        get_dependency_pairs(rout_order, outflow_cell, glwdunits, swb_area,
+                             neighbourcells, subtract_use_option,
+                             neighbouringcell_option)
+    order = np.argsort(second_cells, kind='stable')
+    level = get_levels(len(rout_order), first_cells[order],
+                       second_cells[order])
+
+    level_cells = np.argsort(level, kind='stable')
+    level_start = np.zeros(level.max() + 2, dtype=np.int64)
+    level_start[1:] = np.cumsum(np.bincount(level))
+
+    return level_cells, level_start
+
+
+def get_thread_cells(basin_cells, basin_start, num_threads):
+    """
+    Distribute basins over threads.
+
+    Basins are assigned from largest to smallest to the thread with the
+    least cells so far.
+
+    Parameters
+    ----------
+    basin_cells : array
+        Index of cells in routing order, grouped by basin (largest basin
+        first, see get_routing_basins).
+    basin_start : array
+        Start index of basins in basin_cells and end index of last basin.
+    num_threads : int
+        Number of threads.
+
+    Returns
+    -------
+    thread_cells : array
+        Index of cells in routing order, grouped by thread. Cells of a thread
+        are in routing order.
+    thread_start : array
+        Start index of threads in thread_cells and end index of last thread.
+
+    """
+    thread_size = np.zeros(num_threads, dtype=np.int64)
+    thread_of_cell = np.empty(len(basin_cells), dtype=np.int64)
+    for basin in range(len(basin_start) - 1):
+        thread = np.argmin(thread_size)
+        cells = basin_cells[basin_start[basin]:basin_start[basin + 1]]
+        thread_of_cell[cells] = thread
+        thread_size[thread] += len(cells)
+
+    # Cells sorted by thread and within a thread in routing order
+    thread_cells = np.argsort(thread_of_cell, kind='stable')
+    thread_start = np.zeros(num_threads + 1, dtype=np.int64)
+    thread_start[1:] = np.cumsum(thread_size)
+
+    return thread_cells, thread_start
+
+
+def get_level_chunks(level_start, num_threads):
+    """
+    Split levels into contiguous chunks of cells for threads.
+
+    Every level is split into at most num_threads chunks of about equal
+    number of cells.
+
+    Parameters
+    ----------
+    level_start : array
+        Start index of levels in level_cells and end index of last level
+        (see get_routing_levels).
+    num_threads : int
+        Number of threads.
+
+    Returns
+    -------
+    chunk_start : array
+        Start index of chunks in level_cells and end index of last chunk.
+    level_chunks : array
+        Index of first chunk of levels and number of chunks.
+
+    """
+    level_size = np.diff(level_start)
+    num_chunks = np.minimum(level_size, num_threads)
+    level_chunks = np.zeros(len(level_size) + 1, dtype=np.int64)
+    level_chunks[1:] = np.cumsum(num_chunks)
+
+    chunk_start = np.empty(level_chunks[-1] + 1, dtype=np.int64)
+    for level, size in enumerate(level_size):
+        chunks = np.arange(num_chunks[level])
+        chunk_start[level_chunks[level]:level_chunks[level + 1]] = \
+            level_start[level] + chunks * size // num_chunks[level]
+    chunk_start[-1] = level_start[-1]
+
+    return chunk_start, level_chunks
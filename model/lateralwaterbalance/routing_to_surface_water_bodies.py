@@ -16,7 +16,6 @@
 #  section of 4 and figuure 2. of (Müller Schmied et al. (2021)  differs
 # between (semi)arid and humid grid cells
 # =============================================================================
-import numpy as np
 from numba import njit
 
 
@@ -77,7 +76,8 @@ def frac_routing(x, y,
     fswb_catchment = (loclake_frac + locwet_frac + glowet_frac) * \
         swb_drainage_area_factor
 
-    fswb_catchment = np.where(fswb_catchment > 1, 1, fswb_catchment)
+    if fswb_catchment > 1:
+        fswb_catchment = 1.0
 
     # =========================================================================
     #   Routing surface runoff and groundwater discharge into surface water
@@ -99,16 +99,11 @@ def frac_routing(x, y,
     # =========================================================================
     # Surface runoff and groundwater discharge fills an inland sink.
     # There are no outflows from the inland sinks .
-    local_runoff_river = \
-        np.where(drainage_direction < 0, 0, local_runoff_river)
-
-    local_runoff_swb = np.where(drainage_direction < 0, surface_runoff,
-                                local_runoff_swb)
-    local_gwrunoff_swb = \
-        np.where(drainage_direction < 0, groundwater_discharge,
-                 local_gwrunoff_swb)
-    local_gwrunoff_river = \
-        np.where(drainage_direction < 0, 0, local_gwrunoff_river)
+    if drainage_direction < 0:
+        local_runoff_river = 0.0
+        local_runoff_swb = surface_runoff
+        local_gwrunoff_swb = groundwater_discharge
+        local_gwrunoff_river = 0.0
 
     # =========================================================================
     # Combining routed surface runoff and groundwater discharge into local
@@ -12,6 +12,7 @@
 
 import numpy as np
 from numba import njit
+from model.lateralwaterbalance import cell_types as ct
 
 
 # =============================================================================
@@ -21,8 +22,7 @@ from numba import njit
 
 
 @njit(cache=True)
-def swb_redfactor(storage, max_storage, reduction_exponent_swb,
-                  choose_swb=None):
+def swb_redfactor(storage, max_storage, reduction_exponent_swb, swb_type):
     """
     Compute reduction factor  surface water bodies(swb).
 
@@ -34,15 +34,16 @@ def swb_redfactor(storage, max_storage, reduction_exponent_swb,
         Daily surface waterbody storage, Unit: [km3]
     max_storage : float
         Maximum storage of surface waterbody storage, Unit: [km3]
-    choose_swb : string
-        select surface water body type ( global and local lakes and wetlands)
+    swb_type : SurfaceWaterBody
+        select surface water body type (global and local lakes and wetlands,
+        reservoirs and regulated lakes, see cell_types)
     reduction_exponent_swb: float
        Reduction exponent taken from Eqn 24 and 25 of  Müller Schmied et al.
        (2021) for respective waterbodies.,  Units: [-].
 
     Returns
     -------
-    reductionfactor : array
+    reductionfactor : float
         reduction factor for dynamic area (local lake and wetland)
         or evaporation (global lake, wetland,reserviour and regulated lake)
 
@@ -54,7 +55,8 @@ def swb_redfactor(storage, max_storage, reduction_exponent_swb,
     # n_factor=2 is for global and local lakes and n_factor=1 is for global
     #  reservoirs/regulated lakes and local and global wetlands
     # =========================================================================
-    if choose_swb == "local lake" or choose_swb == "global lake":
+    if swb_type == ct.SurfaceWaterBody.LOCAL_LAKE or \
+            swb_type == ct.SurfaceWaterBody.GLOBAL_LAKE:
         n_factor = 2.0
     else:
         n_factor = 1.0
@@ -66,7 +68,7 @@ def swb_redfactor(storage, max_storage, reduction_exponent_swb,
 
     # # limits of the Lake reduction factor
     if reductionfactor < 0:
-        reductionfactor = 0
+        reductionfactor = 0.0
     elif reductionfactor > 1.0:
         reductionfactor = 1.0
 
@@ -14,9 +14,16 @@
 # This module brings all lateral water balance functions together to run
 # =============================================================================
 import numpy as np
-import pandas as pd
 from model.lateralwaterbalance import river_init
+from model.lateralwaterbalance import river
+from model.lateralwaterbalance import groundwater as gw
+from model.lateralwaterbalance import reservoir_schedule as rs
+from model.lateralwaterbalance import reservoir_release_hanasaki as hanasaki
 from model.lateralwaterbalance import routing as rt
+from model.lateralwaterbalance import routing_basins
+from model.utility import riparian_cells
+from model.utility import workspace as ws
+from model.utility import threads
 from controller import configuration_module as cm
 
 
@@ -35,6 +42,7 @@ class LateralWaterBalance:
         # water balance
         # +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
         self.static_data = forcings_static.static_data
+        self.calendar = forcings_static.calendar
         #                  =================================
         #                  ||     Continent properties    ||
         #                  =================================
@@ -42,7 +50,10 @@ class LateralWaterBalance:
         self.cell_area = self.static_data.cell_area.\
             astype(np.float64)
 
-        self.parameters = parameters.global_params
+        # Parameter store (see parameters module). Fields are passed to river
+        # routing.
+        self.parameters = parameters
+        self.kernel_params = parameters.fields
         self.aridhumid = self.static_data.humid_arid
         self.drainage_direction = \
             self.static_data.soil_static_files.drainage_direction[0].values
@@ -66,7 +77,7 @@ class LateralWaterBalance:
         self.max_loclake_area = self.cell_area * self.loclake_frac
 
         self.max_loclake_storage = self.max_loclake_area * \
-            self.parameters.activelake_depth.values * m_to_km
+            self.parameters.fields['activelake_depth'] * m_to_km
 
         self.loclake_storage = self.max_loclake_storage
 
@@ -81,7 +92,7 @@ class LateralWaterBalance:
         # Local wetland area and storage,  Units : km2 & km3 respectively
         self.max_locwet_area = self.cell_area * self.locwet_frac
         self.max_locwet_storage = self.max_locwet_area * \
-            self.parameters.activewetland_depth.values * m_to_km
+            self.parameters.fields['activewetland_depth'] * m_to_km
 
         self.locwet_storage = self.max_locwet_storage
 
@@ -95,7 +106,7 @@ class LateralWaterBalance:
 
         # Initializing global lake storage to maximum,  Units : km3
         self.max_glolake_storage = self.glolake_area * \
-            self.parameters.activelake_depth.values * m_to_km
+            self.parameters.fields['activelake_depth'] * m_to_km
         self.glolake_storage = self.max_glolake_storage
 
         #                  =================================
@@ -108,7 +119,7 @@ class LateralWaterBalance:
         # Global wetland area and storage,  Units : km2 & km3 respectively
         self.max_glowet_area = self.cell_area * self.glowet_frac
         self.max_glowet_storage = self.max_glowet_area * \
-            self.parameters.activewetland_depth.values * m_to_km
+            self.parameters.fields['activewetland_depth'] * m_to_km
         self.glowet_storage = self.max_glowet_storage
 
         #                  =================================
@@ -130,7 +141,7 @@ class LateralWaterBalance:
 
         # Roughness multiplier (-)
         self.roughness_multiplier = \
-            self.parameters.river_roughness_coeff_mult.values.astype(np.float64)
+            self.kernel_params['river_roughness_coeff_mult']
 
         # River length  with uncorrected length in coastal cells (km).
         # Note: River length is later corrected with continental cell fraction
@@ -151,6 +162,16 @@ class LateralWaterBalance:
                                        river_length, bankfull_flow,
                                        continental_fraction)
 
+        # Terms of river velocity and groundwater balance which only depend on
+        # parameters and static data are computed once per run.
+        self.river_velocity_invariants = river.\
+            get_velocity_invariants(self.get_river_prop.river_bottom_width,
+                                    self.get_river_prop.roughness,
+                                    self.roughness_multiplier,
+                                    self.get_river_prop.river_slope)
+        self.exp_gw_dis_coeff = parameters.\
+            get_kernel_field('gw_dis_coeff', gw.get_exp_gw_dis_coeff)
+
         # Initialise routing order and respective outflow cell
         rout_order = self.static_data.rout_order
         self.rout_order = rout_order[['Lat_index_routorder',
@@ -234,6 +255,31 @@ class LateralWaterBalance:
             land_surface_water_fraction.reservoir_and_regulated_lake_area[0].\
             values.astype(np.float64)
 
+        # Reservior and regulated lake capacity once active, Units : km3
+        self.glores_capacity_active = self.static_data.\
+            res_reg_files.stor_cap[0].values.astype(np.float64)
+
+        # Schedule of reservoirs and regulated lakes which become active
+        # (see activate_res_area_storage_capacity)
+        self.reservoir_schedule = \
+            rs.ReservoirSchedule(self.glores_startyear,
+                                 self.regulated_lake_status,
+                                 self.mean_annual_inflow_res)
+
+        # Downstream cells (up to 5) of reservoirs and regulated lakes for
+        # the release of irrigation reservoirs. Monthly and mean annual demand
+        # of reservoirs and their downstream cells are computed on the first
+        # day of each month (see calculate).
+        self.reservoir_cells, self.downstream_cells = hanasaki.\
+            get_downstream_cells(self.rout_order, self.outflow_cell,
+                                 self.all_reservoir_and_regulated_lake_area)
+        # Units: km3/month
+        self.monthly_downstream_demand = \
+            np.zeros((forcings_static.lat_length, forcings_static.lon_length))
+        # Units: m3/year
+        self.mean_annual_downstream_demand = \
+            np.zeros((forcings_static.lat_length, forcings_static.lon_length))
+
         # To convert units for monthly downstream demand from km3/month to m3/s
         self.num_days_in_month = 0
 
@@ -269,6 +315,16 @@ class LateralWaterBalance:
         # class
         self.get_aggr_func = pot_net_abstraction
 
+        # Cells of global lakes and wetlands units and their position in
+        # routing order to redistribute unsatisfied potential net abstraction
+        # of global lakes and reservoirs to riparian cells.
+        self.unit_start = pot_net_abstraction.unit_start
+        self.unit_cells = pot_net_abstraction.unit_cells
+        self.cell_unit = pot_net_abstraction.cell_unit
+        self.unit_rout_position = \
+            riparian_cells.get_rout_position(self.unit_cells, self.rout_order,
+                                             self.cell_unit.shape)
+
         # Potential net groundwater abstraction , Units : km3/ day
         self.potential_net_abstraction_gw = \
             np.zeros((forcings_static.lat_length,
@@ -340,11 +396,17 @@ class LateralWaterBalance:
         # Neighbouuring cells (8 per cell) from which wateruse from demand
         # cells could be satified. Data is a numpy array of lat and lon index
         # for cells.
-        self.neighbourcells = \
-            self.static_data.neighbourcells.iloc[:, 1:].values
-        # Respective outflow for neigbouring cells
-        self.neighbourcells_outflowcell = \
-            self.static_data.neighbourcells_outflowcell.iloc[:, 1:].values
+        if cm.NEIGHBOURING_CELL:
+            self.neighbourcells = \
+                self.static_data.neighbourcells.iloc[:, 1:].values
+            # Respective outflow for neigbouring cells
+            self.neighbourcells_outflowcell = \
+                self.static_data.neighbourcells_outflowcell.iloc[:, 1:].values
+        else:
+            # Neighbouring cells are not read if option is not selected
+            # (routing is compiled without the option, see routing.py).
+            self.neighbourcells = None
+            self.neighbourcells_outflowcell = None
 
         # Unsatisfied potential net abstraction from demand cell and to
         # supply cell. Required for neigbouuring cell water suplly option,
@@ -363,11 +425,40 @@ class LateralWaterBalance:
                                                     forcings_static.lon_length),
                                                    dtype=np.dtype('(2,)i4'))
 
+        #                  =================================
+        #                  ||  Parallel routing           ||
+        #                  =================================
+        # Number of threads for routing. Independent basins (see
+        # river_routing_parallel) or cells of a level (see
+        # river_routing_levels) are routed in parallel if more than one
+        # thread is used, 0 uses all available cores.
+        self.num_threads = threads.get_num_threads()
+        if self.num_threads > 1:
+
+            routing_network = self.get_routing_network()
+            if cm.routing_schedule == 'levels':
+                self.level_cells, level_start = routing_basins.\
+                    get_routing_levels(*routing_network)
+                self.chunk_start, self.level_chunks = routing_basins.\
+                    get_level_chunks(level_start, self.num_threads)
+            else:
+                basin_cells, basin_start = routing_basins.\
+                    get_routing_basins(*routing_network)
+                self.thread_cells, self.thread_start = routing_basins.\
+                    get_thread_cells(basin_cells, basin_start,
+                                     self.num_threads)
+
+        #                  =================================
+        #                  ||  Preallocated arrays        ||
+        #                  =================================
+        # Outputs of river routing and temporary arrays which are reused
+        # every day (see workspace module)
+        self.workspace = ws.Workspace()
+
     #                  =====================================================
     #                  ||  Activcate Reservior and Regulated lake storage ||
     #                  =====================================================
-    def activate_res_area_storage_capacity(self, simulation_date,
-                                           reservoir_opt_year, restart):
+    def activate_res_area_storage_capacity(self, day, restart):
         """
         Activate storage,area and capacity of reservoir in current year.
 
@@ -375,10 +466,10 @@ class LateralWaterBalance:
 
         Parameters
         ----------
-        simulation_date : np.datetime64
-            Current day, month and year of simulation.
-        reservoir_opt_year : np.datetime64
-            Year of operation  for reservoir
+        day : int
+            Index of simulation day (see simulation_calendar).
+        restart : bool
+            Flag for restart run.
 
         Returns
         -------
@@ -390,43 +481,41 @@ class LateralWaterBalance:
             m_to_km = 0.001
             # Activate  area and capacity of reservoir and regulated lake that
             # are  active in current year
-            if simulation_date.astype('datetime64[D]') in reservoir_opt_year \
+            if self.calendar.is_reservoir_year[day] \
                     or self.set_res_storage_flag or self.check_res_area_flag:
 
-                resyear = pd.to_datetime(simulation_date).year
-
-                # Initialize reservior and regulated lake capacity, Units : km3
-                glores_capacity_active = self.static_data.\
-                    res_reg_files.stor_cap[0].values.astype(np.float64)
-
-                # ---------------------------------
-                # Regulated Lakes Area and Capacity
-                # ----------------------------------
-                self.glores_area = \
-                    np.where((self.regulated_lake_status == 1),
-                             self.all_reservoir_and_regulated_lake_area,
-                             self.glores_area)
-
-                self.glores_capacity = \
-                    np.where((self.regulated_lake_status == 1),
-                             glores_capacity_active, self.glores_capacity)
+                resyear = self.calendar.year[day]
+
+                # Reservoirs and regulated lakes which become active in
+                # current year (at simulation start or restart all
+                # reservoirs that started operation before or in current
+                # year). Reservoirs that are already active are not changed.
+                first_activation = \
+                    self.reservoir_schedule.activated_year is None
+                event_index, event_no_inflow = \
+                    self.reservoir_schedule.get_events(resyear)
+
+                if first_activation:
+                    # ---------------------------------
+                    # Regulated Lakes Area and Capacity
+                    # ----------------------------------
+                    regulated_lake_index = \
+                        self.reservoir_schedule.regulated_lake_index
+                    self.glores_area[regulated_lake_index] = \
+                        self.all_reservoir_and_regulated_lake_area[
+                            regulated_lake_index]
+                    self.glores_capacity[regulated_lake_index] = \
+                        self.glores_capacity_active[regulated_lake_index]
 
                 # ---------------------------
                 # Reservoir Area and Capacity
                 # ---------------------------
-                # Initialize newly activated reservior area, Units : km2
-                # Keep area values of already activate reservoirs
-                self.glores_area =\
-                    np.where(resyear >= self.glores_startyear,
-                             self.all_reservoir_and_regulated_lake_area,
-                             self.glores_area)
-
-                # Initialize newly activated global reservior capacity,
-                # Units : km3, Keep capacity values of already activate
-                # reservoirs
-                self.glores_capacity = \
-                    np.where(resyear >= self.glores_startyear,
-                             glores_capacity_active, self.glores_capacity)
+                # Initialize newly activated reservior area (km2) and
+                # capacity (km3)
+                self.glores_area[event_index] = \
+                    self.all_reservoir_and_regulated_lake_area[event_index]
+                self.glores_capacity[event_index] = \
+                    self.glores_capacity_active[event_index]
 
                 # ------------------------------------------------------
                 # Reservoir area is added to global lake if
@@ -434,20 +523,28 @@ class LateralWaterBalance:
                 #  to zero after.
                 # ------------------------------------------------------
                 mask_mean_annual_inflow = \
-                    ((self.glores_area > 0)
-                     & (resyear >= self.glores_startyear)
-                     & (self.mean_annual_inflow_res == 0))
+                    (self.glores_area[event_index] > 0) & event_no_inflow
 
-                self.glolake_area =\
-                    np.where(mask_mean_annual_inflow,
-                             self.glores_area + self.glolake_area,
-                             self.glolake_area)
+                if np.any(mask_mean_annual_inflow):
+                    lake_index = (event_index[0][mask_mean_annual_inflow],
+                                  event_index[1][mask_mean_annual_inflow])
 
-                self.glores_area[mask_mean_annual_inflow] = 0
-                self.all_reservoir_and_regulated_lake_area[mask_mean_annual_inflow] = 0
+                    # Global lake area and maximum storage are copied since
+                    # they can be shared with other variables (e.g. initial
+                    # global lake storage).
+                    self.glolake_area = self.glolake_area.copy()
+                    self.glolake_area[lake_index] = \
+                        self.glores_area[lake_index] + \
+                        self.glolake_area[lake_index]
 
-                self.max_glolake_storage = self.glolake_area * \
-                    self.parameters.activelake_depth.values * m_to_km
+                    self.glores_area[lake_index] = 0
+                    self.all_reservoir_and_regulated_lake_area[lake_index] = 0
+
+                    self.max_glolake_storage = self.max_glolake_storage.copy()
+                    self.max_glolake_storage[lake_index] = \
+                        self.glolake_area[lake_index] * \
+                        self.parameters.fields['activelake_depth'][lake_index] \
+                        * m_to_km
 
                 # This is set should be set to false to enable that
                 # reservoir and regulated lake are initiallised once each year
@@ -456,7 +553,7 @@ class LateralWaterBalance:
             # Note!: Storages are activated on the 1st day of the year
             if self.set_res_storage_flag:
 
-                simu_start_year = pd.to_datetime(cm.start).year
+                simu_start_year = self.calendar.year[0]
 
                 # If run is a restart run, saved storage is used
                 # -----------------
@@ -465,8 +562,7 @@ class LateralWaterBalance:
                 # # Initialize newly activated reservior storage in
                 # the current year to maximum,  Units : km3
                 # Keep storage values of already activate reservoirs
-                glores_storage_active = self.static_data.\
-                    res_reg_files.stor_cap[0].values.astype(np.float64)
+                glores_storage_active = self.glores_capacity_active
 
                 self.glores_storage = \
                     np.where(simu_start_year >= self.glores_startyear,
@@ -483,7 +579,7 @@ class LateralWaterBalance:
                     np.where((simu_start_year < self.glores_startyear) &
                              (self.regulated_lake_status == 1),
                              (self.all_reservoir_and_regulated_lake_area *
-                              self.parameters.activelake_depth.values * m_to_km)
+                              self.parameters.fields['activelake_depth'] * m_to_km)
                              + self.glores_storage,
                              self.glores_storage)
 
@@ -512,8 +608,8 @@ class LateralWaterBalance:
                   surface_runoff, daily_storage_transfer, land_aet_corr,
                   current_landarea_frac, previous_landarea_frac,
                   landwaterfrac_excl_glolake_res,
-                  simulation_date, first_day_of_month, basin,
-                  sum_canopy_snow_soil_storage, run_calib):
+                  day, basin,
+                  sum_canopy_snow_soil_storage):
         """
         Calculate lateral water balance.
 
@@ -536,12 +632,11 @@ class LateralWaterBalance:
             Current land area fraction
         previous_landarea_frac: array
             Previous land area fraction
-        simulation_date: np.datetime64
-            Current day, month and year of simulation.
+        day: int
+            Index of simulation day (see simulation_calendar).
         sum_canopy_snow_soil_storage: array
             Sum  of canopy soil and snow storages for total water storage
             calulation,  unit: mm/day
-        run_calib: flag to run WaterGAP calibration
 
         Returns
         -------
@@ -551,121 +646,111 @@ class LateralWaterBalance:
         # Converting input fluxes or storages to km/day or km3/day or km3
         # =====================================================================
         mm_to_km = 1e-6
-        # Fluxes in km/day
-        precipitation *= mm_to_km
+        # Converted and temporary arrays are written to preallocated arrays
+        # of the workspace (products are computed from left to right).
+        workspace = self.workspace
+
+        def multiply(name, array, *factors):
+            dtype = np.result_type(array, *factors)
+            product = np.multiply(array, factors[0],
+                                  out=workspace.get(name, basin, dtype))
+            for factor in factors[1:]:
+                np.multiply(product, factor, out=product)
+            return product
+
+        # Fluxes in km/day. Note!!! precipitation is not converted in place
+        # since it is a view into the cached climate forcing year block.
+        precipitation = multiply('precipitation', precipitation, mm_to_km)
         openwater_pot_evap *= mm_to_km
 
         # Corrected land actual evaporation including canopy and snow (km3/day)
 
-        land_aet_corr = land_aet_corr * mm_to_km * current_landarea_frac *\
-            self.cell_area
+        land_aet_corr = multiply('land_aet_corr', land_aet_corr, mm_to_km,
+                                 current_landarea_frac, self.cell_area)
 
-        diffuse_gw_recharge = diffuse_gw_recharge * self.cell_area * \
-            mm_to_km * current_landarea_frac
-        daily_storage_transfer = daily_storage_transfer * self.cell_area * \
-            mm_to_km * previous_landarea_frac
+        diffuse_gw_recharge = multiply('diffuse_gw_recharge',
+                                       diffuse_gw_recharge, self.cell_area,
+                                       mm_to_km, current_landarea_frac)
+        daily_storage_transfer = multiply('daily_storage_transfer',
+                                          daily_storage_transfer,
+                                          self.cell_area, mm_to_km,
+                                          previous_landarea_frac)
 
-        surface_runoff = surface_runoff * self.cell_area * mm_to_km * \
-            current_landarea_frac
+        surface_runoff = multiply('surface_runoff', surface_runoff,
+                                  self.cell_area, mm_to_km,
+                                  current_landarea_frac)
 
         # When cuurent land area fraction = 0, canopy, snow, and soil storage
         # from the previous timestep (stored in daily_storage_transfer)
         # becomes surface runoff
-        surface_runoff = np.where(current_landarea_frac == 0,
-                                  daily_storage_transfer, surface_runoff)
+        no_landarea = np.equal(current_landarea_frac, 0,
+                               out=workspace.get('no_landarea', basin,
+                                                 dtype=bool))
+        ws.where(no_landarea, daily_storage_transfer, surface_runoff,
+                 out=surface_runoff)
 
         # for total water storages only.
-        sum_canopy_snow_soil_storage = sum_canopy_snow_soil_storage * \
-            (mm_to_km * current_landarea_frac * self.cell_area)
+        storage_to_km3 = multiply('storage_to_km3', current_landarea_frac,
+                                  mm_to_km, self.cell_area)
+        sum_canopy_snow_soil_storage = \
+            multiply('sum_canopy_snow_soil_storage',
+                     sum_canopy_snow_soil_storage, storage_to_km3)
 
         #      =============================================================
         #      || Potential net abstraction from surface and ground water ||
         #      =============================================================
-        m3_to_km3 = 1e9
-
-        # get current year and month to select relevant net abstraction data
-        current_year_mon_day = [str(pd.to_datetime(simulation_date).year),
-                                str(pd.to_datetime(simulation_date).month),
-                                int(pd.to_datetime(simulation_date).day)]
-
-        date = current_year_mon_day[0] + "-" + current_year_mon_day[1]
-
-        days_in_month = {1: 31, 2: 28, 3: 31, 4: 30, 5: 31, 6: 30, 7: 31,
-                         8: 31, 9: 30, 10: 31, 11: 30, 12: 31}
-        # Check if current day is first available day of the month.
-        # Required to load in NAs and NAg value (during a restart run)
-        first_day = [pd.to_datetime(date).day for date in first_day_of_month if
-                     pd.to_datetime(date) == pd.to_datetime(simulation_date)]
-        first_day = first_day[0] if len(first_day) > 0 else 0
-
-        current_day = current_year_mon_day[2]
-
-        for month, num_of_days in days_in_month.items():
-            if month == int(pd.to_datetime(simulation_date).month) and \
-                    current_day == first_day:
-
-                self.num_days_in_month = num_of_days
-
-                # Only consider abstraction in anthropogenic run.
-                if cm.SUBTRACT_USE:
-                    # Read in pnas and pnag in =m3/month
-                    if run_calib is False:
-                        self.potential_net_abstraction_gw = self.potential_net_abstraction.pnag.\
-                            sel(time=date)[0].values.astype(np.float64)
-
-                        self.potential_net_abstraction_sw = self.potential_net_abstraction.pnas.\
-                            sel(time=date)[0].values.astype(np.float64)
-                    else:
-                        self.potential_net_abstraction_gw = self.actual_net_abstraction.atotusegw.\
-                            sel(time=date)[0].values.astype(np.float64)
-
-                        self.potential_net_abstraction_sw = self.actual_net_abstraction.atotusesw.\
-                            sel(time=date)[0].values.astype(np.float64)
-
-                    # coverted to units = km3/day
-                    self.potential_net_abstraction_gw = \
-                        self.potential_net_abstraction_gw / (num_of_days * m3_to_km3)
-
-                    # *********************************************************
-                    # Aggregate potential net abstaraction of riparaian cell to
-                    # outflow cell and convert from m3/month to km3/day
-                    # *********************************************************
-
-                    # Monthly demand for reservoir release compution (km3/month)
-                    self.monthly_potential_net_abstraction_sw = \
-                        self.potential_net_abstraction_sw.copy()/m3_to_km3
-
-                    self.unagregrgated_potential_netabs_sw = \
-                        self.potential_net_abstraction_sw.copy()/(num_of_days * m3_to_km3)
-
-                    self.potential_net_abstraction_sw = self.get_aggr_func.\
-                        aggregate_riparian_netpotabs(self.glolake_area,
-                                                     self.glores_area,
-                                                     self.potential_net_abstraction_sw)
-
-                    # outflow cells of global lakes, regulated lakes and
-                    # reseviors have aggregated potential net abstraction.
-                    # Respective riparian cells have values of 0.
-                    self.potential_net_abstraction_sw = \
-                        self.potential_net_abstraction_sw / (num_of_days * m3_to_km3)
-
-                    # *********************************************************
-                    # load in Potential water withdrawal from surfacewater and
-                    #  consumptive use and convert  from m3/ month to km3/day
-                    # *********************************************************
-                    self.potential_water_withdrawal_sw_irri = \
-                        self.potential_net_abstraction["pirrwwsw"].\
-                        sel(time=date)[0].values.astype(np.float64)
-
-                    self.potential_water_withdrawal_sw_irri = (
-                        self.potential_water_withdrawal_sw_irri / (num_of_days * m3_to_km3))
-
-                    self.potential_consumptive_use_sw_irri = \
-                        self.potential_net_abstraction["pirrusesw"].\
-                        sel(time=date)[0].values.astype(np.float64)
-
-                    self.potential_consumptive_use_sw_irri = \
-                        self.potential_consumptive_use_sw_irri / (num_of_days * m3_to_km3)
+        # Load NAs and NAg on the first available day of each month (also
+        # first day of a restart run)
+        if self.calendar.is_first_of_month[day]:
+            month = int(self.calendar.month[day])
+            num_of_days = int(self.calendar.days_in_month[day])
+            self.num_days_in_month = num_of_days
+
+            # Only consider abstraction in anthropogenic run.
+            if cm.SUBTRACT_USE:
+                # Get pnas and pnag (atotusesw and atotusegw for
+                # calibration), and potential water withdrawal and
+                # consumptive use from surface water for irrigation
+                # converted from m3/month to km3/day. Potential net
+                # abstraction of riparaian cells is aggregated to outflow
+                # cell of global lakes, regulated lakes and reseviors
+                # (riparian cells have values of 0). Months are converted
+                # and aggregated once per year (see wateruse_handler).
+                daily_wateruse = self.get_aggr_func.\
+                    get_daily_wateruse(int(self.calendar.year[day]),
+                                       month, num_of_days,
+                                       self.glolake_area,
+                                       self.glores_area)
+
+                self.potential_net_abstraction_gw = \
+                    daily_wateruse['net_abstraction_gw']
+
+                # Monthly demand for reservoir release compution (km3/month)
+                self.monthly_potential_net_abstraction_sw = \
+                    daily_wateruse['monthly_net_abstraction_sw']
+
+                self.unagregrgated_potential_netabs_sw = \
+                    daily_wateruse['unaggregated_net_abstraction_sw']
+
+                self.potential_net_abstraction_sw = \
+                    daily_wateruse['net_abstraction_sw']
+
+                self.potential_water_withdrawal_sw_irri = \
+                    daily_wateruse['water_withdrawal_sw_irri']
+
+                self.potential_consumptive_use_sw_irri = \
+                    daily_wateruse['consumptive_use_sw_irri']
+
+            # Demand of reservoirs and their downstream cells (reservoirs are
+            # activated on the first day of a year)
+            hanasaki.get_downstream_demand(
+                self.rout_order, self.reservoir_cells, self.downstream_cells,
+                self.glores_area, self.allocation_coeff,
+                self.monthly_potential_net_abstraction_sw,
+                self.mean_annual_demand_res,
+                self.all_reservoir_and_regulated_lake_area,
+                self.monthly_downstream_demand,
+                self.mean_annual_downstream_demand)
 
         # ------------
         # Delayed use
@@ -679,84 +764,138 @@ class LateralWaterBalance:
         # this module below)
 
         accumulated_unsatisfied_potential_netabs_sw = \
-            np.zeros_like(self.potential_net_abstraction_sw)
+            workspace.get('routing_accumulated_unsatisfied_potential_netabs_sw',
+                          self.potential_net_abstraction_sw)
         if cm.SUBTRACT_USE:
             if cm.DELAYED_USE:
-                accumulated_unsatisfied_potential_netabs_sw =  \
-                    self.potential_net_abstraction_sw + \
-                    self.accumulated_unsatisfied_potential_netabs_sw
+                np.add(self.potential_net_abstraction_sw,
+                       self.accumulated_unsatisfied_potential_netabs_sw,
+                       out=accumulated_unsatisfied_potential_netabs_sw)
             else:
-                accumulated_unsatisfied_potential_netabs_sw =  \
-                     self.potential_net_abstraction_sw.copy()
+                np.copyto(accumulated_unsatisfied_potential_netabs_sw,
+                          self.potential_net_abstraction_sw)
+        else:
+            accumulated_unsatisfied_potential_netabs_sw.fill(0)
         # =====================================================================
         #   Additional  input variables for river routing
         # =====================================================================
-        glwdunits = self.get_aggr_func.glwdunits
-
-        current_mon_day = np.array([int(current_year_mon_day[1]),
-                                    current_year_mon_day[2]])
+        current_mon_day = np.array([self.calendar.month[day],
+                                    self.calendar.day[day]])
 
         river_length = self.get_river_prop.river_length
-        river_bottom_width = self.get_river_prop.river_bottom_width
-        roughness = self.get_river_prop.roughness
-        river_slope = self.get_river_prop.river_slope
-        neighbouring_cells_map = self.get_neighbouring_cells_map.copy()
-        
+        river_bottom_width_m, bottom_width_term, manning_coeff, \
+            sqrt_river_slope = self.river_velocity_invariants
+
+        # Arrays of reservoirs, water use and neighbouring cell water supply
+        # are only passed to routing if the option is selected, else routing
+        # is compiled without them (see routing.py).
+        if cm.RESERVOIR_OPT:
+            reservoir_inputs = (self.glores_capacity, self.glores_startmonth,
+                                self.glores_type,
+                                self.monthly_downstream_demand,
+                                self.mean_annual_downstream_demand,
+                                self.mean_annual_inflow_res,
+                                self.reg_lake_redfactor_firstday)
+        else:
+            reservoir_inputs = (None,) * 7
+        glores_capacity, glores_startmonth, glores_type, \
+            monthly_downstream_demand, mean_annual_downstream_demand, \
+            mean_annual_inflow_res, reg_lake_redfactor_firstday = \
+            reservoir_inputs
+
+        neighbouring_cell = cm.SUBTRACT_USE and cm.NEIGHBOURING_CELL
+        if cm.SUBTRACT_USE:
+            wateruse_inputs = \
+                (self.cell_unit, self.unit_start, self.unit_cells,
+                 self.unit_rout_position, self.potential_net_abstraction_gw,
+                 self.potential_net_abstraction_sw,
+                 self.unagregrgated_potential_netabs_sw,
+                 self.prev_accumulated_unsatisfied_potential_netabs_sw,
+                 self.daily_unsatisfied_pot_nas,
+                 self.prev_potential_water_withdrawal_sw_irri,
+                 self.prev_potential_consumptive_use_sw_irri,
+                 self.frac_irri_returnflow_to_gw,
+                 self.unsatisfied_potential_netabs_riparian)
+        else:
+            wateruse_inputs = (None,) * 13
+
+        if neighbouring_cell:
+            neighbouring_cells_map = \
+                workspace.get_state('neighbouring_cells_map',
+                                    self.get_neighbouring_cells_map)
+            np.copyto(neighbouring_cells_map, self.get_neighbouring_cells_map)
+            neighbouring_cell_inputs = \
+                (self.neighbourcells, self.neighbourcells_outflowcell,
+                 self.unsat_potnetabs_sw_from_demandcell,
+                 self.unsat_potnetabs_sw_to_supplycell,
+                 neighbouring_cells_map,
+                 workspace.get('cell_calculated', basin),
+                 workspace.get('total_demand_sw_noallocation', basin),
+                 workspace.get('total_unsatisfied_demand_ripariancell', basin),
+                 workspace.get('returned_demand_from_supplycell', basin,
+                               np.float64),
+                 workspace.get('returned_demand_from_supplycell_nextday',
+                               basin, np.float64))
+        else:
+            neighbouring_cell_inputs = (None,) * 10
+
         # =====================================================================
         # Routing (Routing function is optimised for with numba)
         # =====================================================================
-        out = rt.river_routing(self.rout_order, self.outflow_cell,
-                               self.drainage_direction, self.aridhumid,
-                               precipitation, openwater_pot_evap, surface_runoff,
-                               diffuse_gw_recharge, self.groundwater_storage,
-                               self.loclake_storage, self.locwet_storage,
-                               self.glolake_storage, self.glores_storage,
-                               self.glowet_storage, self.river_storage,
-                               self.max_loclake_storage, self.max_locwet_storage,
-                               self.max_glolake_storage, self.max_glowet_storage,
-                               self.glores_capacity, self.max_loclake_area,
-                               self.max_locwet_area, self.glolake_area,
-                               self.glores_area, self.max_glowet_area,
-                               self.loclake_frac, self.locwet_frac,
-                               self.glowet_frac, self.glolake_frac,
-                               self.reglake_frac, self.headwatercell,
-                               self.parameters.gw_dis_coeff.values,
-                               self.parameters.swb_drainage_area_factor.values,
-                               self.parameters.swb_outflow_coeff.values,
-                               self.parameters.gw_recharge_constant.values,
-                               self.parameters.reduction_exponent_lakewet.values,
-                               self.parameters.reduction_exponent_res.values,
-                               self.parameters.lake_out_exp.values,
-                               self.parameters.wetland_out_exp.values,
-                               self.parameters.areal_corr_factor.values,
-                               self.parameters.stat_corr_fact.values,
-                               river_length, river_bottom_width, roughness,
-                               self.roughness_multiplier, river_slope,
-                               glwdunits, self.glores_startmonth, current_mon_day,
-                               self.k_release, self.glores_type, self.allocation_coeff,
-                               self.mean_annual_demand_res, self.mean_annual_inflow_res,
-                               self.potential_net_abstraction_gw,
-                               self.potential_net_abstraction_sw,
-                               self.unagregrgated_potential_netabs_sw,
-                               accumulated_unsatisfied_potential_netabs_sw,
-                               self.prev_accumulated_unsatisfied_potential_netabs_sw,
-                               self.daily_unsatisfied_pot_nas,
-                               self.monthly_potential_net_abstraction_sw,
-                               self.prev_potential_water_withdrawal_sw_irri,
-                               self.prev_potential_consumptive_use_sw_irri,
-                               self.frac_irri_returnflow_to_gw,
-                               self.unsatisfied_potential_netabs_riparian,
-                               self.neighbourcells, self.neighbourcells_outflowcell,
-                               self.unsat_potnetabs_sw_from_demandcell,
-                               self.unsat_potnetabs_sw_to_supplycell,
-                               neighbouring_cells_map,
-                               cm.SUBTRACT_USE,
-                               cm.NEIGHBOURING_CELL, cm.RESERVOIR_OPT,
-                               self.num_days_in_month,
-                               self.all_reservoir_and_regulated_lake_area,
-                               self.reg_lake_redfactor_firstday, basin, cm.DELAYED_USE,
-                               landwaterfrac_excl_glolake_res, self.cell_area,
-                               land_aet_corr, sum_canopy_snow_soil_storage)
+        routing_inputs = (self.rout_order, self.outflow_cell,
+                          self.drainage_direction, self.aridhumid,
+                          precipitation, openwater_pot_evap, surface_runoff,
+                          diffuse_gw_recharge, self.groundwater_storage,
+                          self.loclake_storage, self.locwet_storage,
+                          self.glolake_storage, self.glores_storage,
+                          self.glowet_storage, self.river_storage,
+                          self.max_loclake_storage, self.max_locwet_storage,
+                          self.max_glolake_storage, self.max_glowet_storage,
+                          glores_capacity, self.max_loclake_area,
+                          self.max_locwet_area, self.glolake_area,
+                          self.glores_area, self.max_glowet_area,
+                          self.loclake_frac, self.locwet_frac,
+                          self.glowet_frac, self.glolake_frac,
+                          self.reglake_frac, self.headwatercell,
+                          self.kernel_params['gw_dis_coeff'],
+                          self.exp_gw_dis_coeff,
+                          self.kernel_params['swb_drainage_area_factor'],
+                          self.kernel_params['swb_outflow_coeff'],
+                          self.kernel_params['gw_recharge_constant'],
+                          self.kernel_params['reduction_exponent_lakewet'],
+                          self.kernel_params['reduction_exponent_res'],
+                          self.kernel_params['lake_out_exp'],
+                          self.kernel_params['wetland_out_exp'],
+                          self.kernel_params['areal_corr_factor'],
+                          self.kernel_params['stat_corr_fact'],
+                          river_length, river_bottom_width_m,
+                          bottom_width_term, manning_coeff,
+                          sqrt_river_slope, glores_startmonth,
+                          current_mon_day, self.k_release, glores_type,
+                          monthly_downstream_demand,
+                          mean_annual_downstream_demand,
+                          mean_annual_inflow_res,
+                          accumulated_unsatisfied_potential_netabs_sw,
+                          self.num_days_in_month,
+                          reg_lake_redfactor_firstday, basin,
+                          landwaterfrac_excl_glolake_res, self.cell_area,
+                          land_aet_corr, sum_canopy_snow_soil_storage,
+                          cm.DELAYED_USE) + \
+            wateruse_inputs + neighbouring_cell_inputs
+        outputs = self.get_routing_outputs(basin)
+
+        if self.num_threads > 1 and cm.routing_schedule == 'levels':
+            # Levels one after another, cells of a level over threads
+            out = rt.river_routing_levels(self.level_cells, self.chunk_start,
+                                          self.level_chunks, *routing_inputs,
+                                          outputs)
+        elif self.num_threads > 1:
+            # Independent basins distributed over threads
+            out = rt.river_routing_parallel(self.thread_cells,
+                                            self.thread_start,
+                                            *routing_inputs, outputs)
+        else:
+            out = rt.river_routing(*routing_inputs, outputs)
 
         # update variables for next timestep or output.
         self.groundwater_storage = out[0]
@@ -768,17 +907,22 @@ class LateralWaterBalance:
         self.glowet_storage = out[6]
         self.river_storage = out[7]
         self.accumulated_unsatisfied_potential_netabs_sw = out[18]
-        self.unsatisfied_potential_netabs_riparian = out[19]
-        self.unsat_potnetabs_sw_from_demandcell = out[21]
-        self.unsat_potnetabs_sw_to_supplycell = out[22]
-        self.get_neighbouring_cells_map = out[25]
+        if cm.SUBTRACT_USE:
+            self.unsatisfied_potential_netabs_riparian = out[19]
+        if neighbouring_cell:
+            self.unsat_potnetabs_sw_from_demandcell = out[21]
+            self.unsat_potnetabs_sw_to_supplycell = out[22]
+            self.get_neighbouring_cells_map = out[25]
 
         groundwater_discharge = out[8]
         loclake_outflow = out[9]
         locwet_outflow = out[10]
         glolake_outflow = out[11]
         glowet_outflow = out[12]
-        streamflow = np.where(self.drainage_direction < 0, np.nan , out[13])
+        no_drainage = np.less(self.drainage_direction, 0,
+                              out=workspace.get('no_drainage', basin,
+                                                dtype=bool))
+        streamflow = ws.where(no_drainage, np.nan, out[13], out=out[13])
 
         net_cell_runoff = out[14]
 
@@ -798,19 +942,51 @@ class LateralWaterBalance:
         groundwater_recharge_swb = out[33]
         river_velocity = out[34]
 
-        total_groundwater_recharge = groundwater_recharge_swb + diffuse_gw_recharge
-        total_runoff = groundwater_discharge + surface_runoff
-        actual_water_consumption = actual_net_abstraction_gw + actual_net_abstraction_sw
+        total_groundwater_recharge = \
+            np.add(groundwater_recharge_swb, diffuse_gw_recharge,
+                   out=workspace.get('total_groundwater_recharge', basin,
+                                     np.result_type(groundwater_recharge_swb,
+                                                    diffuse_gw_recharge)))
+        total_runoff = \
+            np.add(groundwater_discharge, surface_runoff,
+                   out=workspace.get('total_runoff', basin,
+                                     np.result_type(groundwater_discharge,
+                                                    surface_runoff)))
+        actual_water_consumption = \
+            np.add(actual_net_abstraction_gw, actual_net_abstraction_sw,
+                   out=workspace.get('actual_water_consumption', basin,
+                                     np.result_type(actual_net_abstraction_gw,
+                                                    actual_net_abstraction_sw)))
 
         # compute potential cell runoff: required for calibration purpose only
-        swb_balance = (precipitation - openwater_pot_evap) * \
-            self.parameters.areal_corr_factor.values
-
-        swb_area_total = (self.glores_area + self.glolake_area +
-                          self.max_loclake_area + self.max_locwet_area +
-                          self.max_glowet_area)
-
-        pot_cell_runoff = total_runoff + (swb_balance * (swb_area_total))
+        # pot_cell_runoff = total_runoff + (precipitation - openwater_pot_evap)
+        # * areal_corr_factor * swb_area_total
+        areal_corr_factor = self.parameters.fields['areal_corr_factor']
+        swb_balance = \
+            np.subtract(precipitation, openwater_pot_evap,
+                        out=workspace.get('swb_balance', basin,
+                                          np.result_type(precipitation,
+                                                         openwater_pot_evap,
+                                                         areal_corr_factor)))
+        np.multiply(swb_balance, areal_corr_factor, out=swb_balance)
+
+        swb_areas = (self.glores_area, self.glolake_area,
+                     self.max_loclake_area, self.max_locwet_area,
+                     self.max_glowet_area)
+        swb_area_total = \
+            np.add(swb_areas[0], swb_areas[1],
+                   out=workspace.get('swb_area_total', basin,
+                                     np.result_type(*swb_areas)))
+        for swb_area in swb_areas[2:]:
+            np.add(swb_area_total, swb_area, out=swb_area_total)
+
+        pot_cell_runoff = \
+            np.multiply(swb_balance, swb_area_total,
+                        out=workspace.get('pot_cell_runoff', basin,
+                                          np.result_type(total_runoff,
+                                                         swb_balance,
+                                                         swb_area_total)))
+        np.add(total_runoff, pot_cell_runoff, out=pot_cell_runoff)
         # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
         # Update accumulated unsatisfied potential net abstraction from
         # surface water and daily_unsatisfied_pot_nas.
@@ -835,70 +1011,127 @@ class LateralWaterBalance:
         #           unsatisfied use, together with the new accumulated
         #           remaining use, at the end of this day.
 
-        self.accumulated_unsatisfied_potential_netabs_sw = \
-            np.where(~np.isnan(returned_demand_from_supplycell),
-                     returned_demand_from_supplycell,
-                     self.accumulated_unsatisfied_potential_netabs_sw)
+        # Cells with values (not nan), used instead of ~np.isnan(array)
+        def is_value(name, array):
+            isnan = np.isnan(array, out=workspace.get(name, basin,
+                                                      dtype=bool))
+            return np.logical_not(isnan, out=isnan)
+
+        if neighbouring_cell:
+            self.accumulated_unsatisfied_potential_netabs_sw = \
+                ws.where(is_value('returned_demand',
+                                  returned_demand_from_supplycell),
+                         returned_demand_from_supplycell,
+                         self.accumulated_unsatisfied_potential_netabs_sw,
+                         out=workspace.get(
+                             'accumulated_unsatisfied_potential_netabs_sw', basin,
+                             np.result_type(returned_demand_from_supplycell,
+                                            self.accumulated_unsatisfied_potential_netabs_sw)))
 
         # Note for output purpose only
         # ======================================================================
-        unsat_potnetabs_sw_from_demandcell_out = \
-            self.unsat_potnetabs_sw_from_demandcell.copy()
+        # Without neighbouring cell water supply, arrays of the option are not
+        # changed in routing and no demand is returned from supply cells.
+        if neighbouring_cell:
+            unsat_potnetabs_sw_from_demandcell_out = \
+                workspace.get('unsat_potnetabs_sw_from_demandcell_out',
+                              self.unsat_potnetabs_sw_from_demandcell)
+            np.copyto(unsat_potnetabs_sw_from_demandcell_out,
+                      self.unsat_potnetabs_sw_from_demandcell)
+        else:
+            unsat_potnetabs_sw_from_demandcell_out = \
+                self.unsat_potnetabs_sw_from_demandcell
+            returned_demand_from_supplycell = \
+                workspace.get('returned_demand_from_supplycell', basin,
+                              np.float64)
+            returned_demand_from_supplycell.fill(np.nan)
+            returned_demand_from_supplycell_nextday = \
+                returned_demand_from_supplycell
 
         demand_left_excl_returned_nextday = \
-            self.accumulated_unsatisfied_potential_netabs_sw.copy() + \
-            self.unsatisfied_potential_netabs_riparian.copy()
-
-        get_neighbouring_cells_map_out = self.get_neighbouring_cells_map.copy()
+            np.add(self.accumulated_unsatisfied_potential_netabs_sw,
+                   self.unsatisfied_potential_netabs_riparian,
+                   out=workspace.get('demand_left_excl_returned_nextday', basin,
+                                     np.result_type(
+                                         self.accumulated_unsatisfied_potential_netabs_sw,
+                                         self.unsatisfied_potential_netabs_riparian)))
+
+        if neighbouring_cell:
+            get_neighbouring_cells_map_out = \
+                workspace.get('get_neighbouring_cells_map_out',
+                              self.get_neighbouring_cells_map)
+            np.copyto(get_neighbouring_cells_map_out,
+                      self.get_neighbouring_cells_map)
+        else:
+            get_neighbouring_cells_map_out = self.get_neighbouring_cells_map
         # =====================================================================
 
         if cm.SUBTRACT_USE:
+            # States are double buffered (see Workspace.get_state), since
+            # check_daily_unsatisfied_pot_nas is the daily_unsatisfied_pot_nas
+            # of the current day.
+            daily_unsatisfied_pot_nas = \
+                workspace.get_state('daily_unsatisfied_pot_nas',
+                                    self.daily_unsatisfied_pot_nas)
             if cm.DELAYED_USE:
 
                 self.prev_accumulated_unsatisfied_potential_netabs_sw = \
-                    np.where(~np.isnan(returned_demand_from_supplycell_nextday),
+                    ws.where(is_value('returned_demand_nextday',
+                                      returned_demand_from_supplycell_nextday),
                              returned_demand_from_supplycell_nextday,
-                             self.prev_accumulated_unsatisfied_potential_netabs_sw)
+                             self.prev_accumulated_unsatisfied_potential_netabs_sw,
+                             out=workspace.get_state(
+                                 'prev_accumulated_unsatisfied_potential_netabs_sw',
+                                 self.prev_accumulated_unsatisfied_potential_netabs_sw))
 
-                end_of_year = [str(pd.to_datetime(simulation_date).month),
-                               str(pd.to_datetime(simulation_date).day)]
                 # accumulated_unsatisfied_potential_netabs_sw and
                 # daily_unsatisfied_pot_nas is zero at the end of the calender
                 # year
-                if end_of_year[0] == '12' and end_of_year[1] == '31':
-                    self.accumulated_unsatisfied_potential_netabs_sw = \
-                        np.zeros_like(self.accumulated_unsatisfied_potential_netabs_sw)
-                    self.daily_unsatisfied_pot_nas = \
-                        np.zeros_like(self.daily_unsatisfied_pot_nas)
+                has_daily_unsatisfied_pot_nas = \
+                    is_value('daily_unsatisfied_pot_nas',
+                             check_daily_unsatisfied_pot_nas)
+                if self.calendar.is_year_end[day]:
+                    self.accumulated_unsatisfied_potential_netabs_sw.fill(0)
+                    daily_unsatisfied_pot_nas.fill(0)
                 else:
-                    self.daily_unsatisfied_pot_nas = \
-                        np.where(~np.isnan(check_daily_unsatisfied_pot_nas),
-                                 self.accumulated_unsatisfied_potential_netabs_sw -
-                                 self.prev_accumulated_unsatisfied_potential_netabs_sw,
-                                 0)
+                    daily_unsatisfied_pot_nas.fill(0)
+                    np.subtract(self.accumulated_unsatisfied_potential_netabs_sw,
+                                self.prev_accumulated_unsatisfied_potential_netabs_sw,
+                                out=daily_unsatisfied_pot_nas,
+                                where=has_daily_unsatisfied_pot_nas)
+                self.daily_unsatisfied_pot_nas = daily_unsatisfied_pot_nas
 
                 self.prev_accumulated_unsatisfied_potential_netabs_sw = \
-                    np.where(~np.isnan(check_daily_unsatisfied_pot_nas),
-                             self.accumulated_unsatisfied_potential_netabs_sw.copy(),
-                             self.prev_accumulated_unsatisfied_potential_netabs_sw)
+                    ws.where(has_daily_unsatisfied_pot_nas,
+                             self.accumulated_unsatisfied_potential_netabs_sw,
+                             self.prev_accumulated_unsatisfied_potential_netabs_sw,
+                             out=workspace.get_state(
+                                 'prev_accumulated_unsatisfied_potential_netabs_sw',
+                                 self.prev_accumulated_unsatisfied_potential_netabs_sw))
 
             else:
-                self.daily_unsatisfied_pot_nas = \
-                    self.accumulated_unsatisfied_potential_netabs_sw.copy()
+                np.copyto(daily_unsatisfied_pot_nas,
+                          self.accumulated_unsatisfied_potential_netabs_sw)
+                self.daily_unsatisfied_pot_nas = daily_unsatisfied_pot_nas
 
         # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
         # The ff. variables also needed to  adapt potential net abstraction
         # from groundwter.
-        self.prev_potential_water_withdrawal_sw_irri =\
-            self.potential_water_withdrawal_sw_irri.copy()
+        self.prev_potential_water_withdrawal_sw_irri = \
+            workspace.get('prev_potential_water_withdrawal_sw_irri',
+                          self.potential_water_withdrawal_sw_irri)
+        np.copyto(self.prev_potential_water_withdrawal_sw_irri,
+                  self.potential_water_withdrawal_sw_irri)
 
         self.prev_potential_consumptive_use_sw_irri = \
-            self.potential_consumptive_use_sw_irri.copy()
+            workspace.get('prev_potential_consumptive_use_sw_irri',
+                          self.potential_consumptive_use_sw_irri)
+        np.copyto(self.prev_potential_consumptive_use_sw_irri,
+                  self.potential_consumptive_use_sw_irri)
         # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 
         # update flag to compute regulated lake reduction factor on 1st day
-        self.reg_lake_redfactor_firstday = \
-            np.zeros_like(self.reg_lake_redfactor_firstday)
+        self.reg_lake_redfactor_firstday.fill(0)
 
         # =====================================================================
         # Getting storages, fluxes and updated surface water fractions
@@ -913,6 +1146,16 @@ class LateralWaterBalance:
                     "reservoirstor": self.glores_storage,
                     "tws": total_water_storage})
 
+        if cm.SUBTRACT_USE:
+            potential_net_abstraction_sw_out = \
+                workspace.get('potential_net_abstraction_sw_out',
+                              self.potential_net_abstraction_sw)
+            np.copyto(potential_net_abstraction_sw_out,
+                      self.potential_net_abstraction_sw)
+        else:
+            potential_net_abstraction_sw_out = \
+                self.potential_net_abstraction_sw
+
         LateralWaterBalance.fluxes.\
             update({"consistent-precipitation": consistent_precip,
                     'qg': groundwater_discharge,
@@ -937,7 +1180,7 @@ class LateralWaterBalance:
                         returned_demand_from_supplycell_nextday,
                     "demand_left_excl_returned_nextday":
                         demand_left_excl_returned_nextday,
-                    "potnetabs_sw": self.potential_net_abstraction_sw.copy(),
+                    "potnetabs_sw": potential_net_abstraction_sw_out,
                     "get_neighbouring_cells_map": get_neighbouring_cells_map_out,
                     "ncrun": net_cell_runoff,
                     "river-velocity": river_velocity,
@@ -950,6 +1193,91 @@ class LateralWaterBalance:
             "new_localwetland_fraction": updated_localwetland_fraction,
             "new_globalwetland_fraction":  updated_globalwetland_fraction})
 
+    def get_routing_outputs(self, basin):
+        """
+        Get preallocated outputs of river routing.
+
+        Storages are double buffered (see Workspace.get_state), such that the
+        storages of the current day are read while storages of the next day
+        are written. All outputs are reset to initial values in river routing.
+
+        Parameters
+        ----------
+        basin: array
+            Array  which contains selected basin(or global)
+
+        Returns
+        -------
+        tuple
+            Output arrays in order of river_routing (see routing.py).
+
+        """
+        workspace = self.workspace
+        return (workspace.get('consistent_precip', basin),
+                workspace.get('total_water_storage', basin),
+                workspace.get_state('groundwater_storage',
+                                    self.groundwater_storage),
+                workspace.get('groundwater_discharge', basin),
+                workspace.get('point_source_recharge', basin),
+                workspace.get_state('loclake_storage', self.loclake_storage),
+                workspace.get('loclake_outflow', basin),
+                workspace.get('gwr_loclake', basin),
+                workspace.get('dyn_loclake_frac', basin),
+                workspace.get_state('locwet_storage', self.locwet_storage),
+                workspace.get('locwet_outflow', basin),
+                workspace.get('gwr_locwet', basin),
+                workspace.get('dyn_locwet_frac', basin),
+                workspace.get_state('glolake_storage', self.glolake_storage),
+                workspace.get('glolake_outflow', basin),
+                workspace.get('gwr_glolake', basin),
+                workspace.get('glolake_precip', basin),
+                workspace.get_state('glores_storage', self.glores_storage),
+                workspace.get('glores_outflow', basin),
+                workspace.get('gwr_glores', basin),
+                workspace.get_state('k_release', self.k_release),
+                workspace.get('glores_precip', basin),
+                workspace.get_state('glowet_storage', self.glowet_storage),
+                workspace.get('glowet_outflow', basin),
+                workspace.get('gwr_glowet', basin),
+                workspace.get('dyn_glowet_frac', basin),
+                workspace.get_state('river_storage', self.river_storage),
+                workspace.get('river_streamflow', basin),
+                workspace.get('river_inflow', basin),
+                workspace.get('cellrunoff', basin),
+                workspace.get('inflow_from_upstream', basin),
+                workspace.get('river_velocity', basin),
+                workspace.get('actual_net_abstraction_gw', basin),
+                workspace.get('actual_daily_netabstraction_sw', basin),
+                workspace.get('cell_aet_consuse', basin),
+                workspace.get('daily_total_aet', basin),
+                workspace.get('total_open_water_aet', basin),
+                workspace.get('loclake_evapo', basin),
+                workspace.get('locwet_evapo', basin),
+                workspace.get('glolake_evapo', basin),
+                workspace.get('glores_evapo', basin),
+                workspace.get('glowet_evapo', basin))
+
+    def get_routing_network(self):
+        """
+        Get inputs of parallel routing schedules.
+
+        Cells are coupled by riparian cells of global lakes and reservoirs
+        (of all years) or neighbouring cells in addition to river flow (see
+        routing_basins module).
+
+        Returns
+        -------
+        tuple
+            Arguments of get_routing_basins and get_routing_levels (see
+            routing_basins.py).
+
+        """
+        swb_area = np.where(self.glolake_area > 0, self.glolake_area,
+                            self.all_reservoir_and_regulated_lake_area)
+        return (self.rout_order, self.outflow_cell,
+                self.get_aggr_func.glwdunits, swb_area, self.neighbourcells,
+                cm.SUBTRACT_USE, cm.NEIGHBOURING_CELL)
+
     def get_storages_and_fluxes(self):
         """
         Get daily storages and fluxes for vertical waterbalance.
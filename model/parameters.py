@@ -13,11 +13,18 @@
 
 # =============================================================================
 # This module contains all paameter values to run  WaterGAP
+#
+# Parameters are read into memory once and stored as read-only, C-contiguous
+# float64 arrays (fields) which are passed to the numba kernels. All kernels
+# hence get parameters of the same array type. Coefficients derived from
+# parameters are computed once per run as fields of the same type (see
+# get_kernel_field).
 # =============================================================================
 import logging
 import os
 import sys
 from pathlib import Path
+import numpy as np
 from controller import configuration_module as cm
 import xarray as xr
 import misc.cli_args as cli
@@ -49,11 +56,50 @@ class Parameters:
             else:
                 # Default
                 param_path = str(Path(cm.global_parameter_path))
-            
-            
-            self.global_params = xr.open_dataset(param_path, decode_times=False)
+
+            # Parameters are loaded into memory and the file is closed.
+            with xr.open_dataset(param_path,
+                                 decode_times=False) as global_params:
+                self.global_params = global_params.load()
 
         except FileNotFoundError:
             log.config_logger(logging.ERROR, modname, 'Global parameter data  '
                               f'{param_path} not found', args.debug)
             sys.exit()  # dont run code if file does not exist
+
+        # =====================================================================
+        # Parameter store
+        # =====================================================================
+        # fields: parameters as contiguous float64 arrays (NaN outside of
+        # land cells)
+        self.fields = {}
+        for name, param in self.global_params.data_vars.items():
+            field = np.ascontiguousarray(param.values, dtype=np.float64)
+            field.flags.writeable = False
+            self.fields[name] = field
+
+    def get_kernel_field(self, name, transform=None):
+        """
+        Get parameter (or coefficient derived from parameter) for kernels.
+
+        Parameters
+        ----------
+        name : str
+            Name of parameter.
+        transform : function, optional
+            Function which computes a coefficient from parameter values (e.g.
+            exponential of a rate constant). The default is None.
+
+        Returns
+        -------
+        kernel_field : array
+            Read-only, contiguous float64 field of parameter or coefficient.
+
+        """
+        field = self.fields[name]
+        if transform is None:
+            return field
+
+        kernel_field = np.ascontiguousarray(transform(field), dtype=np.float64)
+        kernel_field.flags.writeable = False
+        return kernel_field
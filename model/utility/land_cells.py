@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Conversion between grids and cell-major arrays of land cells."""
+
+# =============================================================================
+# Variables with a value per elevation subgrid (e.g. GTOPO30 elevation and
+# snow water storage of subgrids) are read and written as grids of shape
+# (subgrid, lat, lon). The vertical water balance stores them cell-major with
+# shape (land_cell, subgrid), such that the subgrids of one cell are
+# contiguous in memory. Land cells are given by their (lat, lon) index, e.g.
+# in routing order.
+# =============================================================================
+
+import numpy as np
+
+
+def grid_to_cells(grid, cells):
+    """
+    Convert grid to cell-major array of land cells.
+
+    Parameters
+    ----------
+    grid : array
+        Grid with shape (subgrid, lat, lon).
+    cells : array
+        Latitude and longitude index of land cells, shape (land_cell, 2).
+
+    Returns
+    -------
+    array
+        Cell-major array with shape (land_cell, subgrid).
+
+    """
+    return np.ascontiguousarray(grid[:, cells[:, 0], cells[:, 1]].T)
+
+
+def cells_to_grid(values, cells, shape, fill_value=np.nan):
+    """
+    Convert cell-major array of land cells to grid.
+
+    Parameters
+    ----------
+    values : array
+        Cell-major array with shape (land_cell, subgrid).
+    cells : array
+        Latitude and longitude index of land cells, shape (land_cell, 2).
+    shape : tuple
+        Shape of grid (lat, lon).
+    fill_value : float, optional
+        Value of cells which are not land cells. The default is nan.
+
+    Returns
+    -------
+    grid : array
+        Grid with shape (subgrid, lat, lon).
+
+    """
+    grid = np.full((values.shape[1],) + tuple(shape), fill_value,
+                   dtype=values.dtype)
+    grid[:, cells[:, 0], cells[:, 1]] = values.T
+    return grid
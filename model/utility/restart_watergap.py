@@ -52,7 +52,8 @@ class RestartState:
                   water_freq, land_freq, updated_loclake_frac,
                   lai_days_since_start, lai_cum_precipitation,
                   lai_growth_status, canopy_storage,
-                  snow_storage, snow_storage_subgrid, soil_water_content,
+                  snow_storage, snow_storage_subgrid,
+                  snow_storage_subgrid_cells, soil_water_content,
                   daily_storage_transfer, groundwater_storage, loclake_storage,
                   locwet_storage,  glolake_storage, glowet_storage,
                   river_storage, glores_storage, k_release,
@@ -113,7 +114,11 @@ class RestartState:
         snow_storage : array
             Snow storage, Unit: [mm]   
         snow_storage_subgrid : array
-            The subgrid-specific snow storage, Unit: [mm]    
+            The subgrid-specific snow storage, cell-major with shape
+            (land_cell, subgrid), Unit: [mm]
+        snow_storage_subgrid_cells : array
+            Latitude and longitude index of land cells of
+            snow_storage_subgrid, shape (land_cell, 2).
         soil_water_content : array
             Water content in the soil, Unit: [mm]    
         daily_storage_transfer : array
@@ -190,6 +195,8 @@ class RestartState:
                            "canopy_storage": canopy_storage,
                            "snow_water_stor": snow_storage,
                            "snow_water_storsubgrid": snow_storage_subgrid,
+                           "snow_water_storsubgrid_cells":
+                               snow_storage_subgrid_cells,
                            "soil_water_content": soil_water_content,
                            "daily_storage_transfer": daily_storage_transfer}
 
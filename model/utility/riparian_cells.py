@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Index of riparian cells of global lakes and reservoirs."""
+
+# =============================================================================
+# A global lake or reservoir may extend over several cells. The cells of one
+# lake or reservoir (outflow cell and riparian cells) share the same unit
+# value, e.g. in glwdunits or outflowcell_assignment_glores (0 and fill value
+# are no unit). Instead of searching the cells of a unit in the whole grid or
+# routing order, the cells are indexed once at model start in compressed form:
+# the cells of unit i are unit_cells[unit_start[i]:unit_start[i + 1]], in
+# grid order (row by row, as returned by np.where). The outflow cell of a
+# unit depends on the (yearly changing) lake and reservoir area and is
+# searched in these cells.
+# =============================================================================
+
+import numpy as np
+
+
+def get_unit_index(units):
+    """
+    Index cells of global lake and reservoir units.
+
+    Parameters
+    ----------
+    units : array
+        Unit of each cell, e.g. global Lakes and Wetlands units (outflow cell
+        and riparian cells).
+
+    Returns
+    -------
+    unit_start : array
+        Start of cells of each unit in unit_cells, shape (unit + 1).
+    unit_cells : array
+        Latitude and longitude index of cells of all units, shape
+        (unit_cell, 2).
+    cell_unit : array
+        Unit index of each cell, -1 if cell is not part of a unit.
+
+    """
+    # Unique units without 0 and fill value.
+    unique_units = np.unique(units)[1:-1]
+    cells = np.argwhere(np.isin(units, unique_units))
+
+    # Stable sort keeps grid order of cells of one unit.
+    cell_units = np.searchsorted(unique_units, units[cells[:, 0], cells[:, 1]])
+    order = np.argsort(cell_units, kind='stable')
+    unit_cells = cells[order]
+    unit_start = np.searchsorted(cell_units[order],
+                                 np.arange(len(unique_units) + 1))
+
+    cell_unit = np.full(units.shape, -1, dtype=np.int32)
+    cell_unit[unit_cells[:, 0], unit_cells[:, 1]] = \
+        np.repeat(np.arange(len(unique_units)), np.diff(unit_start))
+    return unit_start, unit_cells, cell_unit
+
+
+def get_rout_position(unit_cells, rout_order, grid_shape):
+    """
+    Get position of cells of units in routing order.
+
+    Parameters
+    ----------
+    unit_cells : array
+        Latitude and longitude index of cells of all units, shape
+        (unit_cell, 2).
+    rout_order : array
+        Latitude and longitude index of cells in routing order.
+    grid_shape : tuple
+        Shape of grid (lat, lon).
+
+    Returns
+    -------
+    array
+        Position in routing order of each cell of unit_cells, -1 if cell is
+        not routed.
+
+    """
+    position = np.full(grid_shape, -1, dtype=np.int64)
+    position[rout_order[:, 0], rout_order[:, 1]] = np.arange(len(rout_order))
+    return position[unit_cells[:, 0], unit_cells[:, 1]]
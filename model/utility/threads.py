@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Number of threads of parallel numba kernels."""
+
+# =============================================================================
+# The vertical and lateral water balance run their numba kernels in parallel
+# if more than one thread is used. The number of threads is set in the
+# performance options of the configuration file (or command line) and
+# limited by the number of threads numba was started with.
+# =============================================================================
+
+import numba
+from controller import configuration_module as cm
+
+
+def get_num_threads():
+    """
+    Get number of threads and set it for numba.
+
+    A configured number of threads of 0 uses all available cores.
+
+    Returns
+    -------
+    num_threads : int
+        Number of threads of parallel numba kernels.
+
+    """
+    num_threads = numba.config.NUMBA_NUM_THREADS  # pylint: disable=no-member
+    if cm.num_threads > 0:
+        num_threads = min(cm.num_threads, num_threads)
+    if num_threads > 1:
+        numba.set_num_threads(num_threads)
+
+    return num_threads
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Preallocated arrays of the water balance."""
+
+# =============================================================================
+# This module holds arrays which the vertical and lateral water balance reuse
+# every simulation day instead of allocating new (full grid) arrays. Fluxes
+# and temporary arrays are written in place to one buffer per name. States
+# have two buffers (double buffering), such that numba kernels read the state
+# of the current time step from one buffer and write the state of the next
+# time step to the other buffer.
+
+# Arrays in the workspace are overwritten on the next day. Arrays which have
+# to be kept longer must be copied (e.g. for restart or output they are
+# written or copied on the same day).
+# =============================================================================
+
+import numpy as np
+
+
+class Workspace:
+    """Preallocated arrays which are reused every simulation day."""
+
+    def __init__(self):
+        self.buffers = {}
+        self.states = {}
+
+    def get(self, name, like, dtype=None):
+        """
+        Get buffer by name.
+
+        Parameters
+        ----------
+        name : str
+            Name of buffer.
+        like : array
+            The buffer is created as copy of this array (with dtype) when it
+            is used the first time.
+        dtype : numpy dtype, optional
+            Data type of buffer. The default is the data type of like.
+
+        Returns
+        -------
+        buffer : array
+            Preallocated array.
+
+        """
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            buffer = np.array(like, dtype=dtype, order='C')
+            self.buffers[name] = buffer
+        return buffer
+
+    def get_state(self, name, current, basin=None):
+        """
+        Get buffer for the state of the next time step.
+
+        The returned buffer is never the array of the current state. If the
+        current state is not a buffer of the workspace (first time step,
+        restart or state set outside the water balance), both buffers are
+        reset to the current state.
+
+        Parameters
+        ----------
+        name : str
+            Name of state.
+        current : array
+            State of the current time step.
+        basin : array, optional
+            Array which contains selected basin (or global). If given,
+            buffers are reset to basin + current state (nan outside basin).
+
+        Returns
+        -------
+        buffer : array
+            Preallocated array for state of next time step.
+
+        """
+        buffers = self.states.get(name)
+        if buffers is None:
+            dtype = current.dtype if basin is None else \
+                np.result_type(basin, current)
+            buffers = (np.empty(current.shape, dtype=dtype),
+                       np.empty(current.shape, dtype=dtype))
+            self.states[name] = buffers
+        elif current is buffers[0]:
+            return buffers[1]
+        elif current is buffers[1]:
+            return buffers[0]
+
+        for buffer in buffers:
+            if basin is None:
+                np.copyto(buffer, current)
+            else:
+                np.add(basin, current, out=buffer)
+        return buffers[0]
+
+    def nbytes(self):
+        """
+        Get size of all buffers.
+
+        Returns
+        -------
+        int
+            Size of all buffers, Unit: [bytes]
+
+        """
+        return sum(buffer.nbytes for buffer in self.buffers.values()) + \
+            sum(buffer.nbytes for buffers in self.states.values()
+                for buffer in buffers)
+
+
+def where(condition, x, y, out):
+    """
+    Write np.where(condition, x, y) to preallocated array.
+
+    Parameters
+    ----------
+    condition : array
+        Where True, take x, otherwise take y.
+    x : array or scalar
+        Values where condition is True. Must not be the array out.
+    y : array or scalar
+        Values where condition is False. Can be the array out.
+    out : array
+        Preallocated array.
+
+    Returns
+    -------
+    out : array
+        Preallocated array with values of x or y.
+
+    """
+    np.copyto(out, y)
+    np.copyto(out, x, where=condition)
+    return out
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Elevation bands of the snow water balance."""
+
+# =============================================================================
+# The snow water balance divides each cell into 100 subgrids of equal area
+# with land surface elevations according to GTOPO30 (U.S. Geological Survey,
+# 1996), sorted from lowest to highest elevation. For faster (e.g. scenario
+# screening) runs, the subgrids can be aggregated into fewer elevation bands
+# of equal area (num_elevation_bands in configuration file). Each band
+# contains the same number of consecutive subgrids and gets their mean
+# elevation. The mean elevation of the cell is not changed. With 100 bands
+# the subgrids are used unchanged.
+# =============================================================================
+
+import numpy as np
+
+
+def check_num_bands(num_subgrid, num_bands):
+    """
+    Check if subgrids can be aggregated into bands of equal area.
+
+    Parameters
+    ----------
+    num_subgrid : int
+        Number of elevation subgrids.
+    num_bands : int
+        Number of elevation bands.
+
+    Returns
+    -------
+    bool
+        True if num_bands is positive and a divisor of num_subgrid.
+
+    """
+    return 0 < num_bands <= num_subgrid and num_subgrid % num_bands == 0
+
+
+def aggregate_elevation(elevation, num_bands):
+    """
+    Aggregate elevation of subgrids into elevation bands of equal area.
+
+    Parameters
+    ----------
+    elevation : array
+        Mean elevation and elevation of subgrids (sorted from lowest to
+        highest), cell-major with shape (land_cell, 1 + subgrid), Units: [m]
+    num_bands : int
+        Number of elevation bands (divisor of number of subgrids).
+
+    Returns
+    -------
+    array
+        Mean elevation and elevation of bands, shape (land_cell,
+        1 + num_bands), Units: [m]
+
+    """
+    num_subgrid = elevation.shape[1] - 1
+    if num_bands == num_subgrid:
+        return elevation
+
+    band_elevation = aggregate_subgrids(elevation[:, 1:], num_bands)
+    return np.ascontiguousarray(
+        np.concatenate((elevation[:, :1], band_elevation), axis=1))
+
+
+def aggregate_subgrids(subgrid_values, num_bands):
+    """
+    Average values of subgrids into bands of equal area.
+
+    Used for elevation and for snow water storage of restart files written
+    with more subgrids (the mean over a cell is conserved).
+
+    Parameters
+    ----------
+    subgrid_values : array
+        Values of subgrids, cell-major with shape (land_cell, subgrid).
+    num_bands : int
+        Number of bands (divisor of number of subgrids).
+
+    Returns
+    -------
+    array
+        Values of bands with shape (land_cell, num_bands).
+
+    """
+    num_cells, num_subgrid = subgrid_values.shape
+    if num_bands == num_subgrid:
+        return subgrid_values
+
+    subgrids_per_band = num_subgrid // num_bands
+    band_values = subgrid_values.reshape(num_cells, num_bands,
+                                         subgrids_per_band).mean(axis=2)
+    return np.ascontiguousarray(band_values, dtype=subgrid_values.dtype)
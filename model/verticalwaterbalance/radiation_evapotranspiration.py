@@ -20,7 +20,11 @@
 # cells based on "the global water resources and use model WaterGAP v2.2d:
 # model description and evaluation." Müller Schmied et al 2021.
 # Priestly-Taylor potential evapotranspiration is currenlty the default
-# evapotranspiration algorithm
+# evapotranspiration algorithm.
+# Terms which only depend on air temperature (Stefan-Boltzmann emission, slope
+# of the saturation vapour pressure curve, latent heat and psychrometric
+# constant) are computed for all land cells before the cell loop
+# (see compute_temperature_terms).
 # =============================================================================
 
 import numpy as np
@@ -28,7 +32,105 @@ from numba import njit
 
 
 @njit(cache=True)
-def calculate_net_radiation(temperature, down_shortwave_radiation,
+def get_temperature_terms(temperature):
+    """
+    Compute radiation and PET terms which only depend on air temperature.
+
+    Parameters
+    ----------
+    temperature : float
+        Daily air tempeature, Units : [K]
+
+    Returns
+    -------
+    stefan_boltzmann_term : float
+        Emission of a black body at air temperature (σT^4), Units: [Wm−2]
+    slope_of_sat : float
+        Slope of the saturation vapour pressure curve, Units: [kPa°C-1]
+    latent_heat : float
+        Latent heat, Units: [MJkg-1]
+    psy_const : float
+        Psychrometric constant, Units: [kPa°C-1]
+
+    """
+    # Stefan_Boltzmann_constant (5.67 × 10−8 (Wm−2·K−4))
+    stefan_boltzmann_constant = 5.67e-08  # (Müller Schmied et al., 2016)
+    stefan_boltzmann_term = stefan_boltzmann_constant * np.power(temperature, 4)
+
+    # =====================================================================
+    # Slope of the saturation kPa°C-1
+    # =====================================================================
+    # Converting temperature to degrees celcius
+    covert_to_degree = 273.15
+    conv_temperature = temperature - covert_to_degree
+
+    # Actual name: Slope of the saturation, Units: kPa°C-1
+    slope_of_sat_num = 4098 * (0.6108 * np.exp((17.27 * conv_temperature) /
+                                               (conv_temperature + 237.3)))
+
+    slope_of_sat_den = (conv_temperature + 237.3)**2
+
+    slope_of_sat = slope_of_sat_num / slope_of_sat_den
+
+    # =====================================================================
+    # Psychrometric constant  kPa°C-1
+    # =====================================================================
+    # Actual name: Atmospheric pressure,	Units: kPa
+    atm_pressure = 101.3
+
+    # Actual name: Latent heat,	Units: MJkg-1
+    if conv_temperature > 0:
+        latent_heat = 2.501 - (0.002361 * conv_temperature)
+    else:
+        latent_heat = 2.835
+
+    #  Actual name: Psychrometric constant	Unit kPa°C-1
+    psy_const = (0.0016286 * atm_pressure) / latent_heat
+
+    return stefan_boltzmann_term, slope_of_sat, latent_heat, psy_const
+
+
+@njit(cache=True)
+def compute_temperature_terms(rout_order, temperature, stefan_boltzmann_term,
+                              slope_of_sat, latent_heat, psy_const):
+    """
+    Compute temperature terms (see get_temperature_terms) for land cells.
+
+    Terms are written in place to preallocated arrays (see workspace module).
+    Cells which are not in rout_order are not changed.
+
+    Parameters
+    ----------
+    rout_order : array
+        Latitude and longitude index of land cells (routing order).
+    temperature : array
+        Daily air tempeature, Units : [K]
+    stefan_boltzmann_term : array
+        Emission of a black body at air temperature (σT^4), Units: [Wm−2]
+    slope_of_sat : array
+        Slope of the saturation vapour pressure curve, Units: [kPa°C-1]
+    latent_heat : array
+        Latent heat, Units: [MJkg-1]
+    psy_const : array
+        Psychrometric constant, Units: [kPa°C-1]
+
+    Returns
+    -------
+    stefan_boltzmann_term, slope_of_sat, latent_heat, psy_const : array
+        Arrays with temperature terms of land cells.
+
+    """
+    for cell in rout_order:
+        x, y = cell
+        stefan_boltzmann_term[x, y], slope_of_sat[x, y], \
+            latent_heat[x, y], psy_const[x, y] = \
+            get_temperature_terms(temperature[x, y])
+
+    return stefan_boltzmann_term, slope_of_sat, latent_heat, psy_const
+
+
+@njit(cache=True)
+def calculate_net_radiation(stefan_boltzmann_term, down_shortwave_radiation,
                             down_longwave_radiation, snow_water_storage,
                             snow_albedo_thresh, openwater_albedo,
                             snow_albedo, albedo, emissivity, x, y):
@@ -39,8 +141,8 @@ def calculate_net_radiation(temperature, down_shortwave_radiation,
 
     Parameters
     ----------
-    temperature : float
-        Daily air tempeature, Units : [K]
+    stefan_boltzmann_term : float
+        Emission of a black body at air temperature (σT^4), Units: [Wm−2]
     down_shortwave_radiation : float
         Downward shortwave radiation  Units: [Wm−2]
     down_longwave_radiation : float
@@ -78,8 +180,8 @@ def calculate_net_radiation(temperature, down_shortwave_radiation,
 
     # snow_water_storage > 3mm, snow abledo is used for shortwave
     # radiation calulation
-    albedo = np.where(snow_water_storage > snow_albedo_thresh, snow_albedo,
-                      albedo)
+    if snow_water_storage > snow_albedo_thresh:
+        albedo = snow_albedo
 
     # Net shortwave radiation is based on Eq. 1 in
     # Müller Schmied et al., 2016b,  Units: Wm−2
@@ -93,13 +195,9 @@ def calculate_net_radiation(temperature, down_shortwave_radiation,
     # =====================================================================
     #  Net longwave radiation and upward longwave radiation (Wm−2)
     # =====================================================================
-    # Stefan_Boltzmann_constant (5.67 × 10−8 (Wm−2·K−4))
-    stefan_boltzmann_constant = 5.67e-08  # (Müller Schmied et al., 2016)
-
     # Upward longwave radiation is based on Eq. 3 in
     # Müller Schmied et al., 2016b, Units: (Wm−2)
-    up_longwave_radiation = \
-        emissivity * (stefan_boltzmann_constant * np.power(temperature, 4))
+    up_longwave_radiation = emissivity * stefan_boltzmann_term
 
     # Net longwave radiation is based on Eq. 4 in
     # Müller Schmied et al., 2016b,  Unit: (Wm−2)
@@ -153,36 +251,54 @@ def priestley_taylor_pet(temperature, pt_coeff_humid_arid,
         Open water potential evapotranspiration, Units: [mm/day]
 
     """
-    # Index (x, y) to  print out varibales of interest
-    # e.g.  if x==65 and y==137: print(net_radiation)
-    # =====================================================================
-    # Slope of the saturation kPa°C-1
-    # =====================================================================
-    # Converting temperature to degrees celcius
-    covert_to_degree = 273.15
-    conv_temperature = temperature - covert_to_degree
+    _, slope_of_sat, latent_heat, psy_const = \
+        get_temperature_terms(temperature)
 
-    # Actual name: Slope of the saturation, Units: kPa°C-1
-    slope_of_sat_num = 4098 * (0.6108 * np.exp((17.27 * conv_temperature) /
-                                               (conv_temperature + 237.3)))
+    return priestley_taylor_pet_from_terms(slope_of_sat, latent_heat,
+                                           psy_const, pt_coeff_humid_arid,
+                                           net_radiation,
+                                           openwater_net_radiation, x, y)
 
-    slope_of_sat_den = (conv_temperature + 237.3)**2
 
-    slope_of_sat = slope_of_sat_num / slope_of_sat_den
+@njit(cache=True)
+def priestley_taylor_pet_from_terms(slope_of_sat, latent_heat, psy_const,
+                                    pt_coeff_humid_arid, net_radiation,
+                                    openwater_net_radiation, x, y):
+    """
+    Potential evapotranspiration based on Priestly-Taylor algorithm.
 
-    # =====================================================================
-    # Psychrometric constant  kPa°C-1
-    # =====================================================================
-    # Actual name: Atmospheric pressure,	Units: kPa
-    atm_pressure = 101.3
+    Temperature terms are computed beforehand (see get_temperature_terms).
 
-    # Actual name: Latent heat,	Units: MJkg-1
-    latent_heat = np.where(conv_temperature > 0,
-                           (2.501 - (0.002361 * conv_temperature)), 2.835)
+    Parameters
+    ----------
+    slope_of_sat : float
+        Slope of the saturation vapour pressure curve, Units: [kPa°C-1]
+    latent_heat : float
+        Latent heat, Units: [MJkg-1]
+    psy_const : float
+        Psychrometric constant, Units: [kPa°C-1]
+    pt_coeff_humid_arid : flaot
+        Priestley-Taylor coefficient  for humid and arid cells (alpha), Units: [-]
+    net_radiation : float
+        Net radiation  according to Müller Schmied et al., 2016., Units: [Wm−2]
+    openwater_net_radiation : float
+        Open water radiation  according to Müller Schmied et al., 2016.,
+        Units: [Wm−2]
+     x : int
+         Latitude index of cell
+     y : int
+         Longitude index of cell
 
-    #  Actual name: Psychrometric constant	Unit kPa°C-1
-    psy_const = (0.0016286 * atm_pressure) / latent_heat
+    Returns
+    -------
+    potential_evap : float
+        Potential evapotranspiration, Units: [mm/day]
+    openwater_pot_evap : float
+        Open water potential evapotranspiration, Units: [mm/day]
 
+    """
+    # Index (x, y) to  print out varibales of interest
+    # e.g.  if x==65 and y==137: print(net_radiation)
     # =====================================================================
     #  Priestley-Taylor Potential evapotranspiration (mm/day)
     #  (Eq. 7 in Müller Schmied et al 2021.)
@@ -202,7 +318,8 @@ def priestley_taylor_pet(temperature, pt_coeff_humid_arid,
                                              / (slope_of_sat + psy_const))
 
     # Accounting for negative net radiation and setting them to zero
-    potential_evap = np.where(net_radiation <= 0, 0, potential_evap)
+    if net_radiation <= 0:
+        potential_evap = 0.0
 
     # =====================================================================
     # Priestley-Taylor open water potential evapotranspiration (mm/day)
@@ -217,6 +334,6 @@ def priestley_taylor_pet(temperature, pt_coeff_humid_arid,
                                 (slope_of_sat + psy_const))
 
     # Accounting for negative net radiation and setting them to zero
-    openwater_pot_evap = np.where(openwater_net_radiation <= 0, 0,
-                                  openwater_pot_evap)
+    if openwater_net_radiation <= 0:
+        openwater_pot_evap = 0.0
     return potential_evap, openwater_pot_evap
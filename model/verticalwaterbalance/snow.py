@@ -18,6 +18,11 @@
 # subdivided into 100 non localized subgrids that are assigned different land
 # surface elevations according to GTOPO30 (U.S. Geological Survey, 1996).
 # For model output, subgrid values are aggregated to 0.5 degree cell value.
+# Subgrids may be aggregated into fewer elevation bands of equal area
+# (see elevation_bands module), which are computed in the same way.
+# Cells without snow in any subgrid, where even the coldest subgrid is warmer
+# than the snow freeze temperature, skip the subgrid loop (see is_snow_free):
+# throughfall is passed to effective precipitation with identical results.
 # This module uses numba (See https://numba.pydata.org/) to optimizes the
 # runtime speed of the snow water storage funtion
 # =============================================================================
@@ -28,6 +33,53 @@ from numba import njit
 # @njit is a decorator from numba to optimised the python code for speed.
 
 
+@njit(cache=True)
+def is_snow_free(snow_water_storage_subgrid, temperature, elevation,
+                 adiabatic_lapse_rate, snow_freeze_temp):
+    """
+    Check if no snow is stored or falls in any subgrid of a cell.
+
+    Parameters
+    ----------
+    snow_water_storage_subgrid : array
+        Snow water storage divided into 100 subgrids, Units: [mm]
+    temperature :float
+        Daily temperature climate forcing, Units: [K]
+    elevation :array
+        Mean elevation and elevation of subgrids, Units: [m]
+    adiabatic_lapse_rate:float
+        Adiabatic lapse rate , Units:  [K/m or °C/m]
+    snow_freeze_temp:float
+        Snow freeze temperature  , Units:  [K]
+
+    Returns
+    -------
+    bool
+        True if snow storage is zero in all subgrids and the temperature of
+        the coldest subgrid is above the snow freeze temperature.
+
+    """
+    for storage in snow_water_storage_subgrid:
+        if storage != 0:
+            return False
+
+    # Temperature of subgrids is monotonic in elevation, such that the
+    # coldest subgrid is the lowest or highest one (sign of lapse rate).
+    mean_elevation = elevation[0]
+    min_elevation = elevation[1]
+    max_elevation = elevation[1]
+    for i in range(2, len(elevation)):
+        min_elevation = min(min_elevation, elevation[i])
+        max_elevation = max(max_elevation, elevation[i])
+
+    coldest_temp = \
+        min(temperature - ((min_elevation - mean_elevation) *
+                           adiabatic_lapse_rate),
+            temperature - ((max_elevation - mean_elevation) *
+                           adiabatic_lapse_rate))
+    return coldest_temp > snow_freeze_temp
+
+
 @njit(cache=True)
 def snow_water_balance(snow_water_storage, snow_water_storage_subgrid,
                        temperature, precipitation, throughfall, pet_to_soil,
@@ -104,6 +156,9 @@ def snow_water_balance(snow_water_storage, snow_water_storage_subgrid,
        of current time step is zero, Units: [mm]
     snowcover_frac: float
         Snow cover fraction
+    snow_free: bool
+        True if the subgrids were skipped since the cell is snow free
+        (see is_snow_free).
 
     References.
 
@@ -127,6 +182,31 @@ def snow_water_balance(snow_water_storage, snow_water_storage_subgrid,
     # Initializing elevation threshold to prevent excessive snow accumulation
     thresh_elev = 0.0
 
+    num_subgrid = len(elevation_subgrid)
+    if current_landarea_frac > 0 and \
+            is_snow_free(snow_water_storage_subgrid, temperature, elevation,
+                         adiabatic_lapse_rate, snow_freeze_temp):
+        # =================================================================
+        # Snow free cell: all subgrids are warmer than snow_freeze_temp and
+        # have no snow storage, so no snow falls, sublimates or melts and
+        # throughfall becomes effective precipitation in every subgrid.
+        # Effective precipitation is aggregated as sum of subgrids (as
+        # below), such that results are identical to the subgrid loop.
+        # =================================================================
+        snow_water_storage_subgrid[:] = 0
+        effective_precipitation = 0.0
+        for i in range(num_subgrid):
+            effective_precipitation += throughfall
+        effective_precipitation /= num_subgrid
+
+        max_temp_elev = temperature - ((elevation_subgrid[0] - mean_elevation)
+                                       * adiabatic_lapse_rate)
+
+        return 0.0, snow_water_storage_subgrid, 0.0, 0.0, 0.0, \
+            effective_precipitation, max_temp_elev, \
+            float(land_storage_change_sum), float(daily_storage_transfer), \
+            0.0, True
+
     # =====================================================================
     # Creating subgrid variable
     # =====================================================================
@@ -269,4 +349,5 @@ def snow_water_balance(snow_water_storage, snow_water_storage_subgrid,
 
     return snow_water_storage, snow_water_storage_subgrid, snow_fall, \
         sublimation, snow_melt, effective_precipitation, max_temp_elev,\
-        land_storage_change_sum,  daily_storage_transfer, snowcover_frac
+        land_storage_change_sum,  daily_storage_transfer, snowcover_frac, \
+        False
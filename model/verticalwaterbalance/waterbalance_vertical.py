@@ -10,8 +10,21 @@
 # =============================================================================
 """vertical waterbalance function with optimised with numba."""
 
+# =============================================================================
+# This module computes the vertical water balance of all land cells. Cells
+# never read the state of other cells, such that the serial loop over the
+# routing order (vert_water_balance) can also run in parallel over chunks of
+# cells (vert_water_balance_parallel). Both compute every cell with
+# cell_water_balance and give identical results. Outputs are either created
+# per call (create_outputs) or preallocated once and reused every day
+# (see Workspace in model/utility/workspace.py). Snow water storage of
+# elevation subgrids and elevation are cell-major (land_cell, subgrid) with
+# land cells in routing order, such that the snow water balance of a cell
+# runs over contiguous memory (see model/utility/land_cells.py).
+# =============================================================================
+
 import numpy as np
-from numba import njit
+from numba import njit, prange
 from model.verticalwaterbalance import radiation_evapotranspiration as rad_pet
 from model.verticalwaterbalance import lai
 from model.verticalwaterbalance import canopy
@@ -20,24 +33,17 @@ from model.verticalwaterbalance import soil
 
 
 @njit(cache=True)
-def vert_water_balance(rout_order, temperature, down_shortwave_radiation,
-                       down_longwave_radiation, snow_water_storage,
-                       snow_albedo_thresh, openwater_albedo, snow_albedo,
-                       albedo, emissivity, humid_arid, pt_coeff_humid_arid,
-                       growth_status, lai_days, initial_days,
-                       cum_precipitation, precipitation, min_leaf_area_index,
-                       max_leaf_area_index, land_cover, canopy_storage,
-                       current_landarea_frac, landareafrac_ratio,
-                       max_storage_coefficient, minstorage_volume,
-                       daily_storage_transfer,
-                       snow_water_storage_subgrid, degreeday, elevation,
-                       adiabatic_lapse_rate, snow_freeze_temp, snow_melt_temp,
-                       runoff_frac_builtup, builtup_area_frac, soil_water_content,
-                       gamma, max_daily_pet, soil_texture, drainage_direction,
-                       max_groundwater_recharge, groundwater_recharge_factor,
-                       critcal_gw_precipitation, max_soil_water_content,
-                       areal_corr_factor, basin):
-    """Compute vertical Waterbalance."""
+def create_outputs(canopy_storage, snow_water_storage,
+                   snow_water_storage_subgrid, soil_water_content, basin):
+    """
+    Create output storages, fluxes and factors of vertical water balance.
+
+    Returns
+    -------
+    tuple
+        Output arrays in order of cell_water_balance arguments.
+
+    """
     # =========================================================================
     #   Creating outputs for storages, fluxes and factors
     # =========================================================================
@@ -84,186 +90,503 @@ def vert_water_balance(rout_order, temperature, down_shortwave_radiation,
     surface_runoff = basin.copy()
     land_aet_corr = basin.copy()
 
+    return net_radiation, openwater_net_radiation, daily_potential_evap, \
+        openwater_potential_evap, leaf_area_index, canopy_storage_out, \
+        throughfall, canopy_evap, pet_to_soil, land_storage_change_sum, \
+        snow_water_storage_out, snow_water_storage_subgrid_out, snow_fall, \
+        sublimation, snow_melt, effective_precipitation, max_temp_elev, \
+        snowcover_frac, soil_water_content_out, immediate_runoff, \
+        groundwater_recharge_from_soil_mm, surface_runoff, land_aet_corr
+
+
+@njit(cache=True)
+def cell_water_balance(x, y, cell, temperature, down_shortwave_radiation,
+                       down_longwave_radiation, stefan_boltzmann_term,
+                       slope_of_sat, latent_heat, psy_const,
+                       snow_water_storage, snow_albedo_thresh,
+                       openwater_albedo, snow_albedo, albedo, emissivity,
+                       humid_arid, pt_coeff_humid_arid, growth_status,
+                       lai_days, initial_days, cum_precipitation,
+                       precipitation, min_leaf_area_index, max_leaf_area_index,
+                       land_cover, canopy_storage, current_landarea_frac,
+                       landareafrac_ratio, max_storage_coefficient,
+                       minstorage_volume, daily_storage_transfer,
+                       snow_water_storage_subgrid, degreeday, elevation,
+                       adiabatic_lapse_rate, snow_freeze_temp, snow_melt_temp,
+                       runoff_frac_builtup, builtup_area_frac,
+                       soil_water_content, gamma, max_daily_pet, soil_texture,
+                       drainage_direction, max_groundwater_recharge,
+                       groundwater_recharge_factor, critcal_gw_precipitation,
+                       max_soil_water_content, areal_corr_factor,
+                       net_radiation, openwater_net_radiation,
+                       daily_potential_evap, openwater_potential_evap,
+                       leaf_area_index, canopy_storage_out, throughfall,
+                       canopy_evap, pet_to_soil, land_storage_change_sum,
+                       snow_water_storage_out, snow_water_storage_subgrid_out,
+                       snow_fall, sublimation, snow_melt,
+                       effective_precipitation, max_temp_elev, snowcover_frac,
+                       soil_water_content_out, immediate_runoff,
+                       groundwater_recharge_from_soil_mm, surface_runoff,
+                       land_aet_corr):
+    """
+    Compute vertical water balance of one cell.
+
+    Outputs of the cell are written to the output arrays (see create_outputs)
+    at index (x, y). Only the cell itself is read and written, such that
+    cells can be computed in any order. Snow water storage of subgrids and
+    elevation are cell-major arrays (land_cell, subgrid) and are read and
+    written at index cell (index of the cell in routing order).
+
+    Returns
+    -------
+    snow_free : bool
+        True if the snow water balance skipped the subgrids of the cell
+        (see snow.is_snow_free).
+
+    """
+    # =================================================================
+    #       Radiation compononents and Priestley-Taylor PET
+    # =================================================================
+    # Terms which only depend on temperature are computed for all
+    # land cells beforehand (see compute_temperature_terms).
+    radiation_for_potevap = rad_pet.\
+        calculate_net_radiation(stefan_boltzmann_term[x, y],
+                                down_shortwave_radiation[x, y],
+                                down_longwave_radiation[x, y],
+                                snow_water_storage[x, y],
+                                snow_albedo_thresh[x, y],
+                                openwater_albedo[x, y],
+                                snow_albedo[x, y], albedo[x, y],
+                                emissivity[x, y], x, y)
+
+    net_rad, openwater_net_rad = radiation_for_potevap
+    net_radiation[x, y] = net_rad
+    openwater_net_radiation[x, y] = openwater_net_rad
+
+    pot_evap, openwater_evap = rad_pet.\
+        priestley_taylor_pet_from_terms(slope_of_sat[x, y],
+                                        latent_heat[x, y],
+                                        psy_const[x, y],
+                                        pt_coeff_humid_arid[x, y],
+                                        net_radiation[x, y],
+                                        openwater_net_radiation[x, y],
+                                        x, y)
+
+    daily_potential_evap[x, y] = pot_evap
+    openwater_potential_evap[x, y] = openwater_evap
+
+    # =================================================================
+    #               	 Daily leaf area index
+    # =================================================================
+    daily_leaf_area_index = lai.\
+        get_leaf_area_index(temperature[x, y], growth_status[x, y],
+                            lai_days[x, y], initial_days[x, y],
+                            cum_precipitation[x, y], precipitation[x, y],
+                            leaf_area_index[x, y], min_leaf_area_index[x, y],
+                            max_leaf_area_index[x, y], land_cover[x, y],
+                            humid_arid[x, y])
+
+    # ouputs from the get_leaf_area_index" are
+    # 0 = daily leaf area index (-),
+    # 1 = days since start leaf area index profile (days),
+    # 2 = cumulative precipitation (mm/day)  and 3 = growth status(-)
+    # ouput(1-3)  get updated per time step.
+
+    leaf_area_index[x, y] = daily_leaf_area_index[0]
+    lai_days[x, y] = daily_leaf_area_index[1]
+    cum_precipitation[x, y] = daily_leaf_area_index[2]
+    growth_status[x, y] = daily_leaf_area_index[3]
+
+    # =================================================================
+    #               Canopy Water Balance
+    # =================================================================
+    daily_canopy_balance = canopy.\
+        canopy_water_balance(canopy_storage[x, y],
+                             leaf_area_index[x, y],
+                             daily_potential_evap[x, y],
+                             precipitation[x, y],
+                             current_landarea_frac[x, y],
+                             landareafrac_ratio[x, y],
+                             max_storage_coefficient[x, y],
+                             minstorage_volume, x, y)
+
+    # ouputs from the  daily_canopy_balance are
+    # 0 = canopy_storage (mm), 1 = throughfall (mm/day),
+    # 2 = canopy_evap (mm/day) , 3 = pet_to_soil (mm/day),
+    # 4 = land_storage_change_sum (mm)
+    # 5 = daily_storage_tranfer (mm/day)
+
+    canopy_storage_out[x, y] = daily_canopy_balance[0]
+    throughfall[x, y] = daily_canopy_balance[1]
+    canopy_evap[x, y] = daily_canopy_balance[2]
+    pet_to_soil[x, y] = daily_canopy_balance[3]
+    land_storage_change_sum[x, y] = daily_canopy_balance[4]
+    daily_storage_transfer[x, y] = daily_canopy_balance[5]
+
+    # =================================================================
+    #               Snow Water Balance
+    # =================================================================
+    daily_snow_balance = \
+        snow.snow_water_balance(snow_water_storage[x, y],
+                                snow_water_storage_subgrid[cell],
+                                temperature[x, y],
+                                precipitation[x, y],
+                                throughfall[x, y],
+                                pet_to_soil[x, y],
+                                land_storage_change_sum[x, y],
+                                degreeday[x, y],
+                                current_landarea_frac[x, y],
+                                landareafrac_ratio[x, y],
+                                elevation[cell],
+                                daily_storage_transfer[x, y],
+                                adiabatic_lapse_rate[x, y],
+                                snow_freeze_temp[x, y],
+                                snow_melt_temp[x, y],
+                                minstorage_volume, x, y)
+    # ouputs from the  daily_snow_balance  are
+    # 0 = snow_water_storage (mm), 1 = snow_water_storage_subgrid (mm),
+    # 2 = snow_fall (mm/day), 3 = sublimation (mm/day),
+    # 4 = snow_melt (mm/day)
+    # 5 = effective_precipitation (mm/day), 6 = max_elev_temp(K),
+    # 7 = land_storage_change_sum (mm),  8 = daily_storage_tranfer (mm/day)
+    # 9 = snow cover fraction (-), 10 = snow free cell (subgrids skipped)
+
+    snow_water_storage_out[x, y] = daily_snow_balance[0]
+    snow_water_storage_subgrid_out[cell] = daily_snow_balance[1]
+    snow_fall[x, y] = daily_snow_balance[2]
+    sublimation[x, y] = daily_snow_balance[3]
+    snow_melt[x, y] = daily_snow_balance[4]
+    effective_precipitation[x, y] = daily_snow_balance[5]
+    max_temp_elev[x, y] = daily_snow_balance[6]
+    land_storage_change_sum[x, y] = daily_snow_balance[7]
+    daily_storage_transfer[x, y] = daily_snow_balance[8]
+    snowcover_frac[x, y] = daily_snow_balance[9]
+
+    # # ===============================================================
+    # #                       Soil Water Balance
+    # # ===============================================================
+    # Modified effective precipitation and immediate runoff
+    modified_effective_precipitation = \
+        soil.immediate_runoff(effective_precipitation[x, y],
+                              runoff_frac_builtup[x, y],
+                              builtup_area_frac[x, y])
+
+    # ouputs from the  modified_effective_precipitation are
+    # 0 = effective_precipitation (mm/day)
+    # 1 = immediate_runoff (mm/day)
+    effective_precipitation[x, y] = modified_effective_precipitation[0]
+    immediate_runoff[x, y] = modified_effective_precipitation[1]
+
+    # compute daily soil water balance.
+    daily_soil_balance = soil.\
+        soil_water_balance(soil_water_content[x, y], pet_to_soil[x, y],
+                           current_landarea_frac[x, y],
+                           landareafrac_ratio[x, y],
+                           max_temp_elev[x, y], canopy_evap[x, y],
+                           effective_precipitation[x, y],
+                           precipitation[x, y],
+                           immediate_runoff[x, y],
+                           land_storage_change_sum[x, y],
+                           sublimation[x, y],
+                           daily_storage_transfer[x, y],
+                           snow_freeze_temp[x, y],
+                           gamma[x, y], max_daily_pet[x, y], humid_arid[x, y],
+                           soil_texture[x, y], drainage_direction[x, y],
+                           max_groundwater_recharge[x, y],
+                           groundwater_recharge_factor[x, y],
+                           critcal_gw_precipitation[x, y],
+                           max_soil_water_content[x, y],
+                           areal_corr_factor[x, y],
+                           minstorage_volume, x, y)
+
+    # ouputs from the  daily_soil_balance  are
+    # 0 = soil_water_content (mm),
+    # 1 = groundwater_recharge_from_soil_mm (mm),
+    # 2 = actual_soil_evap (mm/day) without canopy and snow evap,
+    # 3 =  soil_saturation (-),
+    # 4 = surface_runoff (mm/day) , 5 = daily_storage_tranfer (mm/day)
+    # 6 =  (RL) potential runoff from landcells including the amount of
+    # gw-recharge (mm/day)
+    # 7 = (R3) daily runoff from soil (mm/day)
+    # 8 = (R2) soil overflow runoff from landcells (mm/day)
+    # 9 = (R1) urban runoff from landcells (mm/day) : (accounts only
+    # for built-up area)
+    # 10 = corrected land actual evap including canopy and snow (mm/day)
+
+    soil_water_content_out[x, y] = daily_soil_balance[0]
+    groundwater_recharge_from_soil_mm[x, y] = daily_soil_balance[1]
+    surface_runoff[x, y] = daily_soil_balance[4]
+    daily_storage_transfer[x, y] = daily_soil_balance[5]
+    land_aet_corr[x, y] = daily_soil_balance[10]
+
+    return daily_snow_balance[10]
+
+
+@njit(cache=True)
+def vert_water_balance(rout_order, temperature, down_shortwave_radiation,
+                       down_longwave_radiation, stefan_boltzmann_term,
+                       slope_of_sat, latent_heat, psy_const,
+                       snow_water_storage,
+                       snow_albedo_thresh, openwater_albedo, snow_albedo,
+                       albedo, emissivity, humid_arid, pt_coeff_humid_arid,
+                       growth_status, lai_days, initial_days,
+                       cum_precipitation, precipitation, min_leaf_area_index,
+                       max_leaf_area_index, land_cover, canopy_storage,
+                       current_landarea_frac, landareafrac_ratio,
+                       max_storage_coefficient, minstorage_volume,
+                       daily_storage_transfer,
+                       snow_water_storage_subgrid, degreeday, elevation,
+                       adiabatic_lapse_rate, snow_freeze_temp, snow_melt_temp,
+                       runoff_frac_builtup, builtup_area_frac, soil_water_content,
+                       gamma, max_daily_pet, soil_texture, drainage_direction,
+                       max_groundwater_recharge, groundwater_recharge_factor,
+                       critcal_gw_precipitation, max_soil_water_content,
+                       areal_corr_factor, basin):
+    """Compute vertical Waterbalance."""
+    outputs = create_outputs(canopy_storage, snow_water_storage,
+                             snow_water_storage_subgrid, soil_water_content,
+                             basin)
+
+    return vert_water_balance_to_outputs(rout_order, temperature,
+                                         down_shortwave_radiation,
+                                         down_longwave_radiation,
+                                         stefan_boltzmann_term, slope_of_sat,
+                                         latent_heat, psy_const,
+                                         snow_water_storage,
+                                         snow_albedo_thresh, openwater_albedo,
+                                         snow_albedo, albedo, emissivity,
+                                         humid_arid, pt_coeff_humid_arid,
+                                         growth_status, lai_days, initial_days,
+                                         cum_precipitation, precipitation,
+                                         min_leaf_area_index,
+                                         max_leaf_area_index, land_cover,
+                                         canopy_storage, current_landarea_frac,
+                                         landareafrac_ratio,
+                                         max_storage_coefficient,
+                                         minstorage_volume,
+                                         daily_storage_transfer,
+                                         snow_water_storage_subgrid, degreeday,
+                                         elevation, adiabatic_lapse_rate,
+                                         snow_freeze_temp, snow_melt_temp,
+                                         runoff_frac_builtup,
+                                         builtup_area_frac, soil_water_content,
+                                         gamma, max_daily_pet, soil_texture,
+                                         drainage_direction,
+                                         max_groundwater_recharge,
+                                         groundwater_recharge_factor,
+                                         critcal_gw_precipitation,
+                                         max_soil_water_content,
+                                         areal_corr_factor, basin, outputs)
+
+
+@njit(cache=True)
+def vert_water_balance_to_outputs(rout_order, temperature,
+                                  down_shortwave_radiation,
+                                  down_longwave_radiation,
+                                  stefan_boltzmann_term, slope_of_sat,
+                                  latent_heat, psy_const, snow_water_storage,
+                                  snow_albedo_thresh, openwater_albedo,
+                                  snow_albedo, albedo, emissivity, humid_arid,
+                                  pt_coeff_humid_arid, growth_status, lai_days,
+                                  initial_days, cum_precipitation,
+                                  precipitation, min_leaf_area_index,
+                                  max_leaf_area_index, land_cover,
+                                  canopy_storage, current_landarea_frac,
+                                  landareafrac_ratio, max_storage_coefficient,
+                                  minstorage_volume, daily_storage_transfer,
+                                  snow_water_storage_subgrid, degreeday,
+                                  elevation, adiabatic_lapse_rate,
+                                  snow_freeze_temp, snow_melt_temp,
+                                  runoff_frac_builtup, builtup_area_frac,
+                                  soil_water_content, gamma, max_daily_pet,
+                                  soil_texture, drainage_direction,
+                                  max_groundwater_recharge,
+                                  groundwater_recharge_factor,
+                                  critcal_gw_precipitation,
+                                  max_soil_water_content, areal_corr_factor,
+                                  basin, outputs):
+    """
+    Compute vertical Waterbalance and write to preallocated outputs.
+
+    Outputs are given in order of create_outputs. Storages of the next time
+    step must not be the arrays of the current storages (see
+    Workspace.get_state). Output arrays are only written for cells of the
+    selected basin (all outputs of these cells are written).
+
+    """
+    net_radiation, openwater_net_radiation, daily_potential_evap, \
+        openwater_potential_evap, leaf_area_index, canopy_storage_out, \
+        throughfall, canopy_evap, pet_to_soil, land_storage_change_sum, \
+        snow_water_storage_out, snow_water_storage_subgrid_out, snow_fall, \
+        sublimation, snow_melt, effective_precipitation, max_temp_elev, \
+        snowcover_frac, soil_water_content_out, immediate_runoff, \
+        groundwater_recharge_from_soil_mm, surface_runoff, land_aet_corr = \
+        outputs
+
+    # Number of cells which skipped the snow subgrids (see snow.is_snow_free)
+    snow_free_cells = 0
+
     # =====================================================================
     # Loop through rout order
     # =====================================================================
-    for routflow_looper in range(len(rout_order)):
+    for routflow_looper, cell in enumerate(rout_order):
         # Get invidividual cells based on routing order
-        x, y = rout_order[routflow_looper]
+        x, y = cell
 
         if np.isnan(basin[x, y]) is False:
-            # =================================================================
-            #       Radiation compononents and Priestley-Taylor PET
-            # =================================================================
-
-            radiation_for_potevap = rad_pet.\
-                calculate_net_radiation(temperature[x, y],
-                                        down_shortwave_radiation[x, y],
-                                        down_longwave_radiation[x, y],
-                                        snow_water_storage[x, y],
-                                        snow_albedo_thresh[x, y],
-                                        openwater_albedo[x, y],
-                                        snow_albedo[x, y], albedo[x, y],
-                                        emissivity[x, y], x, y)
-
-            net_rad, openwater_net_rad = radiation_for_potevap
-            net_radiation[x, y] = net_rad.item()
-            openwater_net_radiation[x, y] = openwater_net_rad.item()
-
-            pot_evap, openwater_evap = \
-                rad_pet.priestley_taylor_pet(temperature[x, y],
-                                             pt_coeff_humid_arid[x, y],
-                                             net_radiation[x, y],
-                                             openwater_net_radiation[x, y], x, y)
-
-            daily_potential_evap[x, y] = pot_evap.item()
-            openwater_potential_evap[x, y] = openwater_evap.item()
-
-            # =================================================================
-            #               	 Daily leaf area index
-            # =================================================================
-            daily_leaf_area_index = lai.\
-                get_leaf_area_index(temperature[x, y], growth_status[x, y],
-                                    lai_days[x, y], initial_days[x, y],
-                                    cum_precipitation[x, y], precipitation[x, y],
-                                    leaf_area_index[x, y], min_leaf_area_index[x, y],
-                                    max_leaf_area_index[x, y], land_cover[x, y],
-                                    humid_arid[x, y])
-
-            # ouputs from the get_leaf_area_index" are
-            # 0 = daily leaf area index (-),
-            # 1 = days since start leaf area index profile (days),
-            # 2 = cumulative precipitation (mm/day)  and 3 = growth status(-)
-            # ouput(1-3)  get updated per time step.
-
-            leaf_area_index[x, y] = daily_leaf_area_index[0]
-            lai_days[x, y] = daily_leaf_area_index[1]
-            cum_precipitation[x, y] = daily_leaf_area_index[2]
-            growth_status[x, y] = daily_leaf_area_index[3]
-
-            # =================================================================
-            #               Canopy Water Balance
-            # =================================================================
-            daily_canopy_balance = canopy.\
-                canopy_water_balance(canopy_storage[x, y],
-                                     leaf_area_index[x, y],
-                                     daily_potential_evap[x, y],
-                                     precipitation[x, y],
-                                     current_landarea_frac[x, y],
-                                     landareafrac_ratio[x, y],
-                                     max_storage_coefficient[x, y],
-                                     minstorage_volume, x, y)
-
-            # ouputs from the  daily_canopy_balance are
-            # 0 = canopy_storage (mm), 1 = throughfall (mm/day),
-            # 2 = canopy_evap (mm/day) , 3 = pet_to_soil (mm/day),
-            # 4 = land_storage_change_sum (mm)
-            # 5 = daily_storage_tranfer (mm/day)
-
-            canopy_storage_out[x, y] = daily_canopy_balance[0]
-            throughfall[x, y] = daily_canopy_balance[1]
-            canopy_evap[x, y] = daily_canopy_balance[2]
-            pet_to_soil[x, y] = daily_canopy_balance[3]
-            land_storage_change_sum[x, y] = daily_canopy_balance[4]
-            daily_storage_transfer[x, y] = daily_canopy_balance[5]
-
-            # =================================================================
-            #               Snow Water Balance
-            # =================================================================
-            daily_snow_balance = \
-                snow.snow_water_balance(snow_water_storage[x, y],
-                                        snow_water_storage_subgrid[:, x, y],
-                                        temperature[x, y],
-                                        precipitation[x, y],
-                                        throughfall[x, y],
-                                        pet_to_soil[x, y],
-                                        land_storage_change_sum[x, y],
-                                        degreeday[x, y],
-                                        current_landarea_frac[x, y],
-                                        landareafrac_ratio[x, y],
-                                        elevation[:, x, y],
-                                        daily_storage_transfer[x, y],
-                                        adiabatic_lapse_rate[x, y],
-                                        snow_freeze_temp[x, y],
-                                        snow_melt_temp[x, y],
-                                        minstorage_volume, x, y)
-            # ouputs from the  daily_snow_balance  are
-            # 0 = snow_water_storage (mm), 1 = snow_water_storage_subgrid (mm),
-            # 2 = snow_fall (mm/day), 3 = sublimation (mm/day),
-            # 4 = snow_melt (mm/day)
-            # 5 = effective_precipitation (mm/day), 6 = max_elev_temp(K),
-            # 7 = land_storage_change_sum (mm),  8 = daily_storage_tranfer (mm/day)
-            # 9 = snow cover fraction (-)
-
-            snow_water_storage_out[x, y] = daily_snow_balance[0]
-            snow_water_storage_subgrid_out[:, x, y] = daily_snow_balance[1]
-            snow_fall[x, y] = daily_snow_balance[2]
-            sublimation[x, y] = daily_snow_balance[3]
-            snow_melt[x, y] = daily_snow_balance[4]
-            effective_precipitation[x, y] = daily_snow_balance[5]
-            max_temp_elev[x, y] = daily_snow_balance[6]
-            land_storage_change_sum[x, y] = daily_snow_balance[7]
-            daily_storage_transfer[x, y] = daily_snow_balance[8]
-            snowcover_frac[x, y] = daily_snow_balance[9]
-
-            # # ===============================================================
-            # #                       Soil Water Balance
-            # # ===============================================================
-            # Modified effective precipitation and immediate runoff
-            modified_effective_precipitation = \
-                soil.immediate_runoff(effective_precipitation[x, y],
-                                      runoff_frac_builtup[x, y],
-                                      builtup_area_frac[x, y])
-
-            # ouputs from the  modified_effective_precipitation are
-            # 0 = effective_precipitation (mm/day)
-            # 1 = immediate_runoff (mm/day)
-            effective_precipitation[x, y] = modified_effective_precipitation[0]
-            immediate_runoff[x, y] = modified_effective_precipitation[1]
-
-            # compute daily soil water balance.
-            daily_soil_balance = soil.\
-                soil_water_balance(soil_water_content[x, y], pet_to_soil[x, y],
-                                   current_landarea_frac[x, y],
-                                   landareafrac_ratio[x, y],
-                                   max_temp_elev[x, y], canopy_evap[x, y],
-                                   effective_precipitation[x, y],
-                                   precipitation[x, y],
-                                   immediate_runoff[x, y],
-                                   land_storage_change_sum[x, y],
-                                   sublimation[x, y],
-                                   daily_storage_transfer[x, y],
-                                   snow_freeze_temp[x, y],
-                                   gamma[x, y], max_daily_pet[x, y], humid_arid[x, y],
-                                   soil_texture[x, y], drainage_direction[x, y],
-                                   max_groundwater_recharge[x, y],
-                                   groundwater_recharge_factor[x, y],
-                                   critcal_gw_precipitation[x, y],
-                                   max_soil_water_content[x, y],
-                                   areal_corr_factor[x, y],
-                                   minstorage_volume, x, y)
-
-            # ouputs from the  daily_soil_balance  are
-            # 0 = soil_water_content (mm),
-            # 1 = groundwater_recharge_from_soil_mm (mm),
-            # 2 = actual_soil_evap (mm/day) without canopy and snow evap,
-            # 3 =  soil_saturation (-),
-            # 4 = surface_runoff (mm/day) , 5 = daily_storage_tranfer (mm/day)
-            # 6 =  (RL) potential runoff from landcells including the amount of
-            # gw-recharge (mm/day)
-            # 7 = (R3) daily runoff from soil (mm/day)
-            # 8 = (R2) soil overflow runoff from landcells (mm/day)
-            # 9 = (R1) urban runoff from landcells (mm/day) : (accounts only
-            # for built-up area)
-            # 10 = corrected land actual evap including canopy and snow (mm/day)
-
-            soil_water_content_out[x, y] = daily_soil_balance[0]
-            groundwater_recharge_from_soil_mm[x, y] = daily_soil_balance[1]
-            surface_runoff[x, y] = daily_soil_balance[4]
-            daily_storage_transfer[x, y] = daily_soil_balance[5]
-            land_aet_corr[x, y] = daily_soil_balance[10]
+            snow_free_cells += \
+                cell_water_balance(x, y, routflow_looper, temperature,
+                                   down_shortwave_radiation,
+                                   down_longwave_radiation,
+                                   stefan_boltzmann_term, slope_of_sat,
+                                   latent_heat, psy_const, snow_water_storage,
+                                   snow_albedo_thresh, openwater_albedo,
+                                   snow_albedo, albedo, emissivity, humid_arid,
+                                   pt_coeff_humid_arid, growth_status,
+                                   lai_days, initial_days, cum_precipitation,
+                                   precipitation, min_leaf_area_index,
+                                   max_leaf_area_index, land_cover,
+                                   canopy_storage, current_landarea_frac,
+                                   landareafrac_ratio, max_storage_coefficient,
+                                   minstorage_volume, daily_storage_transfer,
+                                   snow_water_storage_subgrid, degreeday,
+                                   elevation, adiabatic_lapse_rate,
+                                   snow_freeze_temp, snow_melt_temp,
+                                   runoff_frac_builtup, builtup_area_frac,
+                                   soil_water_content, gamma, max_daily_pet,
+                                   soil_texture, drainage_direction,
+                                   max_groundwater_recharge,
+                                   groundwater_recharge_factor,
+                                   critcal_gw_precipitation,
+                                   max_soil_water_content, areal_corr_factor,
+                                   net_radiation, openwater_net_radiation,
+                                   daily_potential_evap,
+                                   openwater_potential_evap, leaf_area_index,
+                                   canopy_storage_out, throughfall,
+                                   canopy_evap, pet_to_soil,
+                                   land_storage_change_sum,
+                                   snow_water_storage_out,
+                                   snow_water_storage_subgrid_out, snow_fall,
+                                   sublimation, snow_melt,
+                                   effective_precipitation, max_temp_elev,
+                                   snowcover_frac, soil_water_content_out,
+                                   immediate_runoff,
+                                   groundwater_recharge_from_soil_mm,
+                                   surface_runoff, land_aet_corr)
+
+    return net_radiation, openwater_net_radiation, daily_potential_evap,\
+        openwater_potential_evap, leaf_area_index, lai_days, cum_precipitation,\
+        growth_status, canopy_storage_out, throughfall, canopy_evap, \
+        pet_to_soil, snow_water_storage_out, snow_water_storage_subgrid_out, \
+        snow_fall, sublimation, snow_melt, soil_water_content_out, \
+        groundwater_recharge_from_soil_mm, surface_runoff, \
+        land_storage_change_sum, daily_storage_transfer, land_aet_corr, \
+        snowcover_frac, snow_free_cells
 
 
+@njit(parallel=True, cache=True)
+def vert_water_balance_parallel(rout_order, cell_chunks, temperature,
+                                down_shortwave_radiation,
+                                down_longwave_radiation, stefan_boltzmann_term,
+                                slope_of_sat, latent_heat, psy_const,
+                                snow_water_storage, snow_albedo_thresh,
+                                openwater_albedo, snow_albedo, albedo,
+                                emissivity, humid_arid, pt_coeff_humid_arid,
+                                growth_status, lai_days, initial_days,
+                                cum_precipitation, precipitation,
+                                min_leaf_area_index, max_leaf_area_index,
+                                land_cover, canopy_storage,
+                                current_landarea_frac, landareafrac_ratio,
+                                max_storage_coefficient, minstorage_volume,
+                                daily_storage_transfer,
+                                snow_water_storage_subgrid, degreeday,
+                                elevation, adiabatic_lapse_rate,
+                                snow_freeze_temp, snow_melt_temp,
+                                runoff_frac_builtup, builtup_area_frac,
+                                soil_water_content, gamma, max_daily_pet,
+                                soil_texture, drainage_direction,
+                                max_groundwater_recharge,
+                                groundwater_recharge_factor,
+                                critcal_gw_precipitation,
+                                max_soil_water_content, areal_corr_factor,
+                                basin, outputs):
+    """
+    Compute vertical Waterbalance in parallel over chunks of cells.
+
+    Chunks are contiguous ranges of the routing order (see get_cell_chunks)
+    and are distributed over numba threads. Outputs are written to the
+    preallocated outputs as in vert_water_balance_to_outputs. Results are
+    identical to vert_water_balance.
+
+    """
+    net_radiation, openwater_net_radiation, daily_potential_evap, \
+        openwater_potential_evap, leaf_area_index, canopy_storage_out, \
+        throughfall, canopy_evap, pet_to_soil, land_storage_change_sum, \
+        snow_water_storage_out, snow_water_storage_subgrid_out, snow_fall, \
+        sublimation, snow_melt, effective_precipitation, max_temp_elev, \
+        snowcover_frac, soil_water_content_out, immediate_runoff, \
+        groundwater_recharge_from_soil_mm, surface_runoff, land_aet_corr = \
+        outputs
+
+    # Number of cells which skipped the snow subgrids per chunk
+    snow_free_cells = np.zeros(len(cell_chunks) - 1, dtype=np.int64)
+
+    # =====================================================================
+    # Loop through chunks of rout order in parallel
+    # =====================================================================
+    for chunk in prange(len(cell_chunks) - 1):  # pylint: disable=not-an-iterable
+        for routflow_looper in range(cell_chunks[chunk],
+                                     cell_chunks[chunk + 1]):
+            # Get invidividual cells based on routing order
+            x, y = rout_order[routflow_looper]
+
+            if np.isnan(basin[x, y]) is False:
+                snow_free_cells[chunk] += \
+                    cell_water_balance(x, y, routflow_looper, temperature,
+                                       down_shortwave_radiation,
+                                       down_longwave_radiation,
+                                       stefan_boltzmann_term, slope_of_sat,
+                                       latent_heat, psy_const,
+                                       snow_water_storage, snow_albedo_thresh,
+                                       openwater_albedo, snow_albedo, albedo,
+                                       emissivity, humid_arid,
+                                       pt_coeff_humid_arid, growth_status,
+                                       lai_days, initial_days,
+                                       cum_precipitation, precipitation,
+                                       min_leaf_area_index,
+                                       max_leaf_area_index, land_cover,
+                                       canopy_storage, current_landarea_frac,
+                                       landareafrac_ratio,
+                                       max_storage_coefficient,
+                                       minstorage_volume,
+                                       daily_storage_transfer,
+                                       snow_water_storage_subgrid, degreeday,
+                                       elevation, adiabatic_lapse_rate,
+                                       snow_freeze_temp, snow_melt_temp,
+                                       runoff_frac_builtup, builtup_area_frac,
+                                       soil_water_content, gamma,
+                                       max_daily_pet, soil_texture,
+                                       drainage_direction,
+                                       max_groundwater_recharge,
+                                       groundwater_recharge_factor,
+                                       critcal_gw_precipitation,
+                                       max_soil_water_content,
+                                       areal_corr_factor, net_radiation,
+                                       openwater_net_radiation,
+                                       daily_potential_evap,
+                                       openwater_potential_evap,
+                                       leaf_area_index, canopy_storage_out,
+                                       throughfall, canopy_evap, pet_to_soil,
+                                       land_storage_change_sum,
+                                       snow_water_storage_out,
+                                       snow_water_storage_subgrid_out,
+                                       snow_fall, sublimation, snow_melt,
+                                       effective_precipitation, max_temp_elev,
+                                       snowcover_frac, soil_water_content_out,
+                                       immediate_runoff,
+                                       groundwater_recharge_from_soil_mm,
+                                       surface_runoff, land_aet_corr)
+
     return net_radiation, openwater_net_radiation, daily_potential_evap,\
         openwater_potential_evap, leaf_area_index, lai_days, cum_precipitation,\
         growth_status, canopy_storage_out, throughfall, canopy_evap, \
@@ -271,4 +594,55 @@ def vert_water_balance(rout_order, temperature, down_shortwave_radiation,
         snow_fall, sublimation, snow_melt, soil_water_content_out, \
         groundwater_recharge_from_soil_mm, surface_runoff, \
         land_storage_change_sum, daily_storage_transfer, land_aet_corr, \
-        snowcover_frac
+        snowcover_frac, np.sum(snow_free_cells)
+
+
+@njit(cache=True)
+def get_cell_chunks(rout_order, current_landarea_frac, snow_water_storage,
+                    num_subgrid, num_chunks):
+    """
+    Split routing order into chunks of about equal computational cost.
+
+    The snow water balance of all elevation subgrids dominates the cost of a
+    cell, but it is skipped for snow free cells (see snow.is_snow_free).
+    Cells with land area and snow storage on the previous day are therefore
+    weighted with one plus the number of subgrids, all other cells with one.
+    Cells where snow falls on the current day are underestimated by this
+    weighting.
+
+    Parameters
+    ----------
+    rout_order : array
+        Routing order of cells (lat, lon index).
+    current_landarea_frac : array
+        The current fraction of land area, Unit: [-]
+    snow_water_storage : array
+        Snow water storage of the previous day, Unit: [mm]
+    num_subgrid : int
+        Number of elevation subgrids of snow water balance.
+    num_chunks : int
+        Number of chunks (e.g. number of threads).
+
+    Returns
+    -------
+    cell_chunks : array
+        Start index of chunks in routing order and end index of last chunk.
+
+    """
+    cost = np.ones(len(rout_order))
+    for routflow_looper, cell in enumerate(rout_order):
+        x, y = cell
+        if current_landarea_frac[x, y] > 0 and snow_water_storage[x, y] > 0:
+            cost[routflow_looper] += num_subgrid
+
+    cum_cost = np.cumsum(cost)
+    chunk_cost = cum_cost[-1] / num_chunks
+
+    # A chunk ends with the cell at which the cumulative cost reaches the
+    # cost of all chunks up to this chunk.
+    cell_chunks = np.zeros(num_chunks + 1, dtype=np.int64)
+    for chunk in range(1, num_chunks):
+        cell_chunks[chunk] = np.searchsorted(cum_cost, chunk * chunk_cost) + 1
+    cell_chunks[num_chunks] = len(rout_order)
+
+    return cell_chunks
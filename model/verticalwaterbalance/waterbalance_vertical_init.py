@@ -15,10 +15,33 @@
 # This module brings all vertical water balance functions together to run
 # =============================================================================
 
+import logging
+import os
+import sys
 import numpy as np
-from model.utility import units_conveter_check_neg_precip as check_or_convert
+from controller import configuration_module as cm
 from model.verticalwaterbalance import waterbalance_vertical as vb_numba
+from model.verticalwaterbalance import radiation_evapotranspiration as rad_pet
 from model.verticalwaterbalance import lai_init
+from model.verticalwaterbalance import elevation_bands
+from model.utility import workspace as ws
+from model.utility import land_cells
+from model.utility import threads
+import misc.cli_args as cli
+import watergap_logger as log
+
+
+# ===============================================================
+# Get module name and remove the .py extension
+# Module name is passed to logger
+# ===============================================================
+modname = os.path.basename(__file__)
+modname = modname.split('.')[0]
+
+# ++++++++++++++++++++++++++++++++++++++++++++++++
+# Parsing  Argguments for CLI from cli_args module
+# +++++++++++++++++++++++++++++++++++++++++++++++++
+args = cli.parse_cli()
 
 
 class VerticalWaterBalance:
@@ -32,7 +55,8 @@ class VerticalWaterBalance:
         self.forcings_static = forcings_static
         self.cont_frac = self.forcings_static.static_data.\
             land_surface_water_fraction.contfrac.values.astype(np.float64)/100
-        self.parameters = parameters.global_params
+        # Parameters passed to numba kernels (see parameters module)
+        self.parameters = parameters.fields
 
         # Initialise routing order
         rout_order = self.forcings_static.static_data.rout_order
@@ -41,6 +65,11 @@ class VerticalWaterBalance:
 
         # Volumes at which storage is set to zero, units: [km3]
         self.minstorage_volume = 1e-15
+
+        # Number of threads for vertical water balance. Land cells are
+        # computed in parallel if more than one thread is used
+        # (see vert_water_balance_parallel), 0 uses all available cores.
+        self.num_threads = threads.get_num_threads()
         # =====================================================================
         #                   Radiation
         # =====================================================================
@@ -125,13 +154,31 @@ class VerticalWaterBalance:
             self.degreeday[self.land_cover[:, :] == parameters_snow.loc[i, 'Number']] = \
                parameters_snow.loc[i, 'degree-day']
 
-        self.elevation = self.forcings_static.static_data.gtopo30_elevation
-
-        # Snow water storage divided into 100 subgrids based on GTOPO30 (U.S.
-        # Geological Survey, 1996) land surface elevation map, Units: mm
-        elev_size = \
-            self.forcings_static.static_data.gtopo30_elevation[1:].shape
-        self.snow_water_storage_subgrid = np.zeros(elev_size)
+        # Mean elevation and elevation of 100 subgrids, cell-major with shape
+        # (land_cell, 101) and land cells in routing order, Units: m
+        self.elevation = land_cells.grid_to_cells(
+            self.forcings_static.static_data.gtopo30_elevation,
+            self.rout_order)
+
+        # Aggregate subgrids into elevation bands of equal area
+        # (see elevation_bands module), shape (land_cell, 1 + bands)
+        num_subgrid = self.elevation.shape[1] - 1
+        if not elevation_bands.check_num_bands(num_subgrid,
+                                               cm.num_elevation_bands):
+            log.config_logger(logging.ERROR, modname, 'Number of elevation '
+                              f'bands ({cm.num_elevation_bands}) must be a '
+                              'divisor of the number of elevation subgrids '
+                              f'({num_subgrid})', args.debug)
+            sys.exit()
+        self.elevation = \
+            elevation_bands.aggregate_elevation(self.elevation,
+                                                cm.num_elevation_bands)
+
+        # Snow water storage divided into 100 subgrids (or elevation bands)
+        # based on GTOPO30 (U.S. Geological Survey, 1996) land surface
+        # elevation map, cell-major with shape (land_cell, bands), Units: mm
+        self.snow_water_storage_subgrid = \
+            np.zeros((len(self.rout_order), self.elevation.shape[1] - 1))
 
         # =====================================================================
         #                   Soil
@@ -167,15 +214,26 @@ class VerticalWaterBalance:
             np.zeros((self.forcings_static.lat_length,
                       self.forcings_static.lon_length))
 
-    def calculate(self, date, current_landarea_frac, landareafrac_ratio,
+        # Number of land cells which skipped the snow subgrids (snow free,
+        # see snow.is_snow_free) on the last day and summed over all days.
+        self.snow_free_cells = 0
+        self.total_snow_free_cells = 0
+        self.simulated_days = 0
+
+        # =====================================================================
+        #   Preallocated outputs and temporary arrays (reused every day)
+        # =====================================================================
+        self.workspace = ws.Workspace()
+
+    def calculate(self, day, current_landarea_frac, landareafrac_ratio,
                   basin, water_freq, land_freq):
         """
         Calculate vertical waterbalance.
 
         Parameters
         ----------
-        date : numpy.datetime64
-            Timestamp or date of a daily simulation.
+        day : int
+            Index of simulation day (see simulation_calendar).
         current_landarea_frac : array
             The current fraction of land area, Unit: [-]
         landareafrac_ratio : array
@@ -195,108 +253,114 @@ class VerticalWaterBalance:
 
         """
         # =====================================================================
-        # Select daily climate forcing and convert units (only precipitation
-        #  and tempearture)
+        # Get daily climate forcing from input provider (by default from
+        # year-block cache of NetCDF files). Negative precipitation check and
+        # unit conversion (only precipitation and tempearture) are done once
+        # per year block.
         # =====================================================================
-        #                  ==================================
-        #                  ||     Precipitation (mm/day)   ||
-        #                  ==================================
-
-        precipitation = self.forcings_static.climate_forcing.precipitation.sel(
-            time=str(date))
-
-        #  Checking negative precipittaion
-        check_or_convert.check_neg_precipitation(precipitation.pr)
-
-        # Covert precipitation units to mm/day
-        precipitation = check_or_convert.to_mm_per_day(precipitation.pr)
-
-        #                  =============================
-        #                  ||     Air tempeature (K)  ||
-        #                  =============================
-        temperature = self.forcings_static.climate_forcing.temperature.sel(
-            time=str(date))
-
-        # Covert air tempeature from degree celcius to Kelvin
-        temperature = check_or_convert.to_kelvin(temperature.tas)
-
-        #                  =========================================
-        #                  || Downward shortwave radiation (Wm−2) ||
-        #                  =========================================
-        down_shortwave_radiation = \
-            self.forcings_static.climate_forcing.down_shortwave_radiation.sel(
-                time=str(date))
-
-        down_shortwave_radiation = \
-            down_shortwave_radiation.rsds.values.astype(np.float64)
-
-        #                  =========================================
-        #                  ||  Downward longwave radiation (Wm−2) ||
-        #                  =========================================
-        down_longwave_radiation = \
-            self.forcings_static.climate_forcing.down_longwave_radiation.sel(
-                time=str(date))
-
-        down_longwave_radiation = \
-            down_longwave_radiation.rlds.values.astype(np.float64)
-
-        # check data dimension make sure dimensions are 360*720 for 0.5 degree
-        if precipitation.shape != basin.shape:
-            precipitation = precipitation[0]
-        if temperature.shape != basin.shape:
-            temperature = temperature[0]
-        if down_shortwave_radiation.shape != basin.shape:
-            down_shortwave_radiation = down_shortwave_radiation[0]
-        if down_longwave_radiation.shape != basin.shape:
-            down_longwave_radiation = down_longwave_radiation[0]
+        # Units: precipitation (mm/day), air temperature (K), downward
+        # shortwave and longwave radiation (Wm−2)
+        precipitation, temperature, down_shortwave_radiation, \
+            down_longwave_radiation = self.forcings_static.climate_forcing.\
+            get_day(self.forcings_static.calendar.dates[day])
+
+        # Radiation and PET terms which only depend on temperature are
+        # computed for all land cells outside the cell loop (to preallocated
+        # arrays).
+        workspace = self.workspace
+        stefan_boltzmann_term, slope_of_sat, latent_heat, psy_const = \
+            rad_pet.compute_temperature_terms(
+                self.rout_order, temperature,
+                *[workspace.get(name, basin, temperature.dtype) for name in
+                  ('stefan_boltzmann_term', 'slope_of_sat', 'latent_heat',
+                   'psy_const')])
 
         # =====================================================================
         # compute vertical waterbalance
         # =====================================================================
-        output = vb_numba.\
-            vert_water_balance(self.rout_order, temperature,
-                               down_shortwave_radiation,
-                               down_longwave_radiation,
-                               self.snow_water_storage,
-                               self.parameters.snow_albedo_thresh.values,
-                               self.parameters.openwater_albedo.values,
-                               self.snow_albedo, self.albedo, self.emissivity,
-                               self.humid_arid,
-                               self.parameters.pt_coeff_humid_arid.values,
-                               self.growth_status, self.lai_days,
-                               self.lai_param.initial_days,
-                               self.cum_precipitation, precipitation,
-                               self.lai_param.min_leaf_area_index,
-                               self.lai_param.max_leaf_area_index,
-                               self.land_cover, self.canopy_storage,
-                               current_landarea_frac, landareafrac_ratio,
-                               self.parameters.max_canopy_storage_coefficient.values,
-                               self.minstorage_volume,
-                               self.daily_storage_transfer,
-                               self.snow_water_storage_subgrid,
-                               self.degreeday, self.elevation,
-                               self.parameters.adiabatic_lapse_rate.values,
-                               self.parameters.snow_freeze_temp.values,
-                               self.parameters.snow_melt_temp.values,
-                               self.parameters.runoff_frac_builtup.values,
-                               self.builtup_area_frac, self.soil_water_content,
-                               self.parameters.gamma.values,
-                               self.parameters.max_daily_pet.values,
-                               self.soil_texture, self.drainage_direction,
-                               self.max_groundwater_recharge,
-                               self.groundwater_recharge_factor,
-                               self.parameters.critcal_gw_precipitation.values,
-                               self.max_soil_water_content,
-                               self.parameters.areal_corr_factor.values,
-                               basin)
+        balance_inputs = (temperature,
+                          down_shortwave_radiation,
+                          down_longwave_radiation,
+                          stefan_boltzmann_term, slope_of_sat,
+                          latent_heat, psy_const,
+                          self.snow_water_storage,
+                          self.parameters['snow_albedo_thresh'],
+                          self.parameters['openwater_albedo'],
+                          self.snow_albedo, self.albedo, self.emissivity,
+                          self.humid_arid,
+                          self.parameters['pt_coeff_humid_arid'],
+                          self.growth_status, self.lai_days,
+                          self.lai_param.initial_days,
+                          self.cum_precipitation, precipitation,
+                          self.lai_param.min_leaf_area_index,
+                          self.lai_param.max_leaf_area_index,
+                          self.land_cover, self.canopy_storage,
+                          current_landarea_frac, landareafrac_ratio,
+                          self.parameters['max_canopy_storage_coefficient'],
+                          self.minstorage_volume,
+                          self.daily_storage_transfer,
+                          self.snow_water_storage_subgrid,
+                          self.degreeday, self.elevation,
+                          self.parameters['adiabatic_lapse_rate'],
+                          self.parameters['snow_freeze_temp'],
+                          self.parameters['snow_melt_temp'],
+                          self.parameters['runoff_frac_builtup'],
+                          self.builtup_area_frac, self.soil_water_content,
+                          self.parameters['gamma'],
+                          self.parameters['max_daily_pet'],
+                          self.soil_texture, self.drainage_direction,
+                          self.max_groundwater_recharge,
+                          self.groundwater_recharge_factor,
+                          self.parameters['critcal_gw_precipitation'],
+                          self.max_soil_water_content,
+                          self.parameters['areal_corr_factor'],
+                          basin)
+
+        outputs = self.get_outputs(basin)
+
+        if self.num_threads > 1:
+            # Chunks of land cells with about equal cost per thread
+            cell_chunks = vb_numba.\
+                get_cell_chunks(self.rout_order, current_landarea_frac,
+                                self.snow_water_storage,
+                                self.elevation.shape[1] - 1, self.num_threads)
+            output = vb_numba.\
+                vert_water_balance_parallel(self.rout_order, cell_chunks,
+                                            *balance_inputs, outputs)
+        else:
+            output = vb_numba.\
+                vert_water_balance_to_outputs(self.rout_order,
+                                              *balance_inputs, outputs)
 
         # Radiation and PET output
         net_radiation = output[0]
         daily_potential_evap = output[2]
         openwater_potential_evap = output[3]
-        total_potential_evap = (((land_freq/100) * daily_potential_evap) + 
-                        ((water_freq/100) * openwater_potential_evap))/self.cont_frac
-    
+
+        # total_potential_evap = ((land_freq/100) * daily_potential_evap +
+        # (water_freq/100) * openwater_potential_evap) / cont_frac
+        total_potential_evap = \
+            np.divide(land_freq, 100,
+                      out=workspace.get('potevap', basin,
+                                        np.result_type(land_freq,
+                                                       daily_potential_evap,
+                                                       water_freq,
+                                                       openwater_potential_evap,
+                                                       self.cont_frac)))
+        np.multiply(total_potential_evap, daily_potential_evap,
+                    out=total_potential_evap)
+        water_potential_evap = \
+            np.divide(water_freq, 100,
+                      out=workspace.get('water_potevap', basin,
+                                        np.result_type(water_freq,
+                                                       openwater_potential_evap)))
+        np.multiply(water_potential_evap, openwater_potential_evap,
+                    out=water_potential_evap)
+        np.add(total_potential_evap, water_potential_evap,
+               out=total_potential_evap)
+        np.divide(total_potential_evap, self.cont_frac,
+                  out=total_potential_evap)
+
         # Leaf area index ouput
         leaf_area_index = output[4]
         self.lai_days = output[5]
@@ -325,18 +389,48 @@ class VerticalWaterBalance:
         # corrected land actual evap including canopy and snow
         land_aet_corr = output[22]
         snowcover_frac = output[23]
+
+        # Snow free cells (subgrids of snow water balance skipped)
+        self.snow_free_cells = int(output[24])
+        self.total_snow_free_cells += self.snow_free_cells
+        self.simulated_days += 1
+
         # =====================================================================
         # Getting all storages
         # =====================================================================
-        # write out data per continental fraction
-        per_contfrac = current_landarea_frac / self.cont_frac
+        # write out data per continental fraction (to preallocated arrays)
+        per_contfrac = \
+            np.divide(current_landarea_frac, self.cont_frac,
+                      out=workspace.get('per_contfrac', basin,
+                                        np.result_type(current_landarea_frac,
+                                                       self.cont_frac)))
+
+        def get_per_contfrac(name, variable):
+            # Buffers are named by output name (e.g. 'throughfall' is also
+            # the name of a flux of the water balance, see get_outputs).
+            dtype = np.result_type(variable, per_contfrac)
+            return np.multiply(variable, per_contfrac,
+                               out=workspace.get(name + ' per contfrac',
+                                                 basin, dtype))
 
         VerticalWaterBalance.storages.\
-            update({'canopystor': self.canopy_storage * per_contfrac,
-                    'swe': self.snow_water_storage * per_contfrac,
-                    'soilmoist':  self.soil_water_content * per_contfrac,
+            update({'canopystor': get_per_contfrac('canopystor',
+                                                   self.canopy_storage),
+                    'swe': get_per_contfrac('swe', self.snow_water_storage),
+                    'soilmoist':  get_per_contfrac('soilmoist',
+                                                   self.soil_water_content),
                     'smax': self.max_soil_water_content})
 
+        # for total water storages only
+        sum_canopy_snow_soil_storage = \
+            np.add(self.canopy_storage, self.snow_water_storage,
+                   out=workspace.get('sum_canopy_snow_soil_storage', basin,
+                                     np.result_type(self.canopy_storage,
+                                                    self.snow_water_storage,
+                                                    self.soil_water_content)))
+        np.add(sum_canopy_snow_soil_storage, self.soil_water_content,
+               out=sum_canopy_snow_soil_storage)
+
         # =====================================================================
         # Getting all fluxes
         # =====================================================================
@@ -345,17 +439,21 @@ class VerticalWaterBalance:
             update({'netrad': net_radiation,
                     'potevap':  total_potential_evap,
                     'lai-total':  leaf_area_index,
-                    'canopy-evap':  canopy_evap * per_contfrac,
-                    'throughfall':  throughfall * per_contfrac,
-                    'snowfall':  snow_fall * per_contfrac,
-                    'snm':  snow_melt * per_contfrac,
-                    'snow-evap':  sublimation * per_contfrac,
-                    'snowcover-frac': snowcover_frac * per_contfrac,
+                    'canopy-evap':  get_per_contfrac('canopy-evap',
+                                                     canopy_evap),
+                    'throughfall':  get_per_contfrac('throughfall',
+                                                     throughfall),
+                    'snowfall':  get_per_contfrac('snowfall', snow_fall),
+                    'snm':  get_per_contfrac('snm', snow_melt),
+                    'snow-evap':  get_per_contfrac('snow-evap', sublimation),
+                    'snowcover-frac': get_per_contfrac('snowcover-frac',
+                                                       snowcover_frac),
                     # Groundwater recharge (qr) and surface runoff(qs)
                     # are writtem out as netcdf and not used for lateral water
                     # balance calculation.
-                    'qrd':  groundwater_recharge_from_soil_mm * per_contfrac,
-                    'qs':  surface_runoff * per_contfrac,
+                    'qrd':  get_per_contfrac('qrd',
+                                             groundwater_recharge_from_soil_mm),
+                    'qs':  get_per_contfrac('qs', surface_runoff),
 
                     # Variables here are used for lateral water balance
                     # calculation.
@@ -367,9 +465,58 @@ class VerticalWaterBalance:
                     'land_aet_corr':land_aet_corr,
 
                     #  for total water storages only
-                    'sum_canopy_snow_soil_storage':  (self.canopy_storage +
-                                        self.snow_water_storage +
-                                        self.soil_water_content)})
+                    'sum_canopy_snow_soil_storage':
+                        sum_canopy_snow_soil_storage})
+
+    def get_outputs(self, basin):
+        """
+        Get preallocated outputs of vertical water balance.
+
+        Storages are double buffered (see Workspace.get_state), such that the
+        storages of the current day are read while storages of the next day
+        are written. Arrays are only written for cells of the selected basin,
+        all other cells keep their initial values.
+
+        Parameters
+        ----------
+        basin: array
+            Array  which contains selected basin(or global)
+
+        Returns
+        -------
+        tuple
+            Output arrays in order of create_outputs
+            (see waterbalance_vertical.py).
+
+        """
+        workspace = self.workspace
+        return (workspace.get('net_radiation', basin),
+                workspace.get('openwater_net_radiation', basin),
+                workspace.get('daily_potential_evap', basin),
+                workspace.get('openwater_potential_evap', basin),
+                workspace.get('leaf_area_index', basin),
+                workspace.get_state('canopy_storage', self.canopy_storage,
+                                    basin),
+                workspace.get('throughfall', basin),
+                workspace.get('canopy_evap', basin),
+                workspace.get('pet_to_soil', basin),
+                workspace.get('land_storage_change_sum', basin),
+                workspace.get_state('snow_water_storage',
+                                    self.snow_water_storage, basin),
+                workspace.get_state('snow_water_storage_subgrid',
+                                    self.snow_water_storage_subgrid),
+                workspace.get('snow_fall', basin),
+                workspace.get('sublimation', basin),
+                workspace.get('snow_melt', basin),
+                workspace.get('effective_precipitation', basin),
+                workspace.get('max_temp_elev', basin),
+                workspace.get('snowcover_frac', basin),
+                workspace.get_state('soil_water_content',
+                                    self.soil_water_content, basin),
+                workspace.get('immediate_runoff', basin),
+                workspace.get('groundwater_recharge_from_soil_mm', basin),
+                workspace.get('surface_runoff', basin),
+                workspace.get('land_aet_corr', basin))
 
     def get_storages_and_fluxes(self):
         """
@@ -385,6 +532,22 @@ class VerticalWaterBalance:
         """
         return VerticalWaterBalance.storages, VerticalWaterBalance.fluxes
 
+    def log_snow_free_cells(self):
+        """
+        Log the number of snow free cells of the simulation.
+
+        Snow free cells skip the snow water balance of their subgrids
+        (see snow.is_snow_free). The total and the average per simulated day
+        are logged.
+
+        """
+        days = max(self.simulated_days, 1)
+        log.config_logger(logging.INFO, modname, 'Snow free cells (snow '
+                          f'subgrids skipped): {self.total_snow_free_cells} in '
+                          f'{self.simulated_days} days, '
+                          f'{self.total_snow_free_cells / days:.0f} per day',
+                          args.debug)
+
     def update_vertbal_for_restart(self, vertbalance_states):
         """
         Update vertical balance parameters for model restart.
@@ -406,7 +569,56 @@ class VerticalWaterBalance:
         self.canopy_storage = vertbalance_states["canopy_storage"]
         self.snow_water_storage = vertbalance_states["snow_water_stor"]
         self.snow_water_storage_subgrid = \
-            vertbalance_states["snow_water_storsubgrid"]
+            self.get_snow_water_storage_subgrid_for_restart(vertbalance_states)
         self.soil_water_content = vertbalance_states["soil_water_content"]
         self.daily_storage_transfer = \
             vertbalance_states["daily_storage_transfer"]
+
+    def get_snow_water_storage_subgrid_for_restart(self, vertbalance_states):
+        """
+        Get cell-major snow water storage of subgrids from restart states.
+
+        Restart files store the snow water storage of subgrids cell-major
+        together with the (lat, lon) index of the land cells. Restart files
+        written before contain a grid (subgrid, lat, lon). Both are
+        converted to the land cells of the current routing order. Restart
+        states with more subgrids than the elevation bands of this run are
+        aggregated into the bands (see elevation_bands module).
+
+        Parameters
+        ----------
+        vertbalance_states : dict
+            Vertical water balance states of restart file.
+
+        Returns
+        -------
+        array
+            Snow water storage of subgrids with shape (land_cell, subgrid),
+            Units: [mm]
+
+        """
+        snow_water_storage_subgrid = \
+            vertbalance_states["snow_water_storsubgrid"]
+        if snow_water_storage_subgrid.ndim == 2:
+            cells = vertbalance_states["snow_water_storsubgrid_cells"]
+            if not np.array_equal(cells, self.rout_order):
+                snow_water_storage_subgrid = \
+                    land_cells.cells_to_grid(snow_water_storage_subgrid,
+                                             cells,
+                                             self.snow_water_storage.shape,
+                                             0.0)
+        if snow_water_storage_subgrid.ndim == 3:
+            snow_water_storage_subgrid = \
+                land_cells.grid_to_cells(snow_water_storage_subgrid,
+                                         self.rout_order)
+
+        num_subgrid = snow_water_storage_subgrid.shape[1]
+        num_bands = self.elevation.shape[1] - 1
+        if not elevation_bands.check_num_bands(num_subgrid, num_bands):
+            log.config_logger(logging.ERROR, modname, 'Snow water storage of '
+                              f'restart file has {num_subgrid} elevation '
+                              f'bands which cannot be aggregated into '
+                              f'{num_bands} bands', args.debug)
+            sys.exit()
+        return elevation_bands.aggregate_subgrids(snow_water_storage_subgrid,
+                                                  num_bands)
@@ -16,7 +16,6 @@
 
 import numpy as np
 from tqdm import tqdm
-import pandas as pd
 from termcolor import colored
 from misc.time_checker_and_ascii_image import check_time
 from controller import configuration_module as cm
@@ -31,10 +30,20 @@ from model.verticalwaterbalance import waterbalance_vertical_init as vb
 from view import createandwrite as cw
 
 
-def run(calib_station=None, watergap_basin=None, basin_id=None):
+def run(calib_station=None, watergap_basin=None, basin_id=None,
+        forcing_provider=None, wateruse_provider=None):
     """
     Run WaterGAP.
 
+    Parameters
+    ----------
+    forcing_provider : object, optional
+        Climate forcing provider (see controller/input_provider module). The
+        default is None (climate forcing NetCDF files).
+    wateruse_provider : object, optional
+        Water use provider (see controller/input_provider module). The
+        default is None (water use NetCDF files).
+
     Returns
     -------
     None.
@@ -98,15 +107,18 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
     # Initialize static data, climate forcings , wateruse data
     # and get data dimensions
     # =====================================================================
-    initialize_forcings_static = rd.InitializeForcingsandStaticdata(run_calib)
+    initialize_forcings_static = \
+        rd.InitializeForcingsandStaticdata(run_calib, forcing_provider)
     grid_coords = initialize_forcings_static.grid_coords
-    potential_net_abstraction = wateruse.Wateruse(cm.SUBTRACT_USE, grid_coords, run_calib)
+    potential_net_abstraction = wateruse.Wateruse(cm.SUBTRACT_USE, grid_coords,
+                                                  run_calib, wateruse_provider)
     parameters = pm.Parameters(run_calib, basin_id)
 
     # initialize Land surface water Fraction
     land_water_frac = \
         lwf.LandsurfacewaterFraction(initialize_forcings_static.static_data,
-                                     cm.RESERVOIR_OPT)
+                                     cm.RESERVOIR_OPT,
+                                     initialize_forcings_static.calendar)
 
     # =====================================================================
     #  Create and write to ouput variable if selected by user
@@ -145,6 +157,11 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
                                 initialize_forcings_static.static_data.lat_lon_arcid,
                                 initialize_forcings_static.static_data.upstream_cells)
 
+    # Read climate forcing only for bounding window of selected basin
+    if cm.run_basin or run_calib:
+        initialize_forcings_static.climate_forcing.\
+            set_spatial_window(watergap_basin.upstream_basin)
+
     # ====================================================================
     # Get time range for Loop
     # ====================================================================
@@ -154,21 +171,10 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
     # getting time range from time input (including the first day).
     timerange_main = round((end_date - start_date + 1)/np.timedelta64(1, 'D'))
 
-    # format main date for simulation.
-    date_main = grid_coords['time'].values.astype('datetime64[D]')
-
-    # Get the first available day for each month (required to load in wateruse
-    # data once each month)
-    date_df = pd.DataFrame({'dates': pd.to_datetime(date_main)})
-
-    # Extract the year and month to group by month
-    date_df['year'] = date_df['dates'].dt.year
-    date_df['month'] = date_df['dates'].dt.month
-    first_day_of_month = date_df.groupby(['year', 'month']).min()
-    first_day_of_month = first_day_of_month.reset_index(drop=True)
-    first_day_of_month.rename(columns={'dates': 'First Day'}, inplace=True)
-    first_day_of_month = \
-        first_day_of_month['First Day'].values.astype('datetime64[D]')
+    # Calendar of simulation days (day index -> date, year, month, day and
+    # flags such as first available day of month, see simulation_calendar)
+    calendar = initialize_forcings_static.calendar
+    date_main = calendar.dates
 
     #               #====================
     #               #   *** Spin up ***
@@ -183,8 +189,8 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
     spin_start = np.where(date_main == start_date)[0].item()
     spin_end = 1 + np.where(date_main == end_spinup)[0].item()
 
-    #  if there is spinup, simulation date will start with the spinup years.
-    simulation_date = date_main[spin_start:spin_end]
+    #  if there is spinup, simulation days will start with the spinup years.
+    simulation_days = range(spin_start, spin_end)
 
     # *********************************************************************
     print('\n' + '++++++++++++++++++++++++++++++++++++++++++++' + '\n' +
@@ -221,25 +227,24 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
             print(colored('Spin up phase over. Starting simulation from ' +
                           cm.start + ':' + cm.end + '\n', 'cyan'))
             time_range = timerange_main
-            simulation_date = date_main
-        for time_step, date in tqdm(zip(range(time_range), simulation_date),
-                                    total=(time_range-1), desc="Processing",
-                                    disable=run_calib):
+            simulation_days = range(time_range)
+        for day in tqdm(simulation_days, total=(time_range-1),
+                        desc="Processing", disable=run_calib):
+            date = date_main[day]
 
             # =================================================================
             #  Get Land area fraction and reservoirs respective years
             # =================================================================
             # Activate reservoirs for current year
             lateral_waterbalance.\
-                activate_res_area_storage_capacity(date, cm.RESERVOIR_OPT_YEARS,
-                                                   restart)
+                activate_res_area_storage_capacity(day, restart)
 
             # Get Land area fraction
             land_water_frac.\
-                landareafrac_with_reservior(date, cm.RESERVOIR_OPT_YEARS)
+                landareafrac_with_reservior(day)
 
             # Get land and water fractions (used to calculate total PET)
-            land_water_frac.get_land_and_water_freq(date)
+            land_water_frac.get_land_and_water_freq(day)
 
             # Adapt global reservoir storage and land area fraction
             # due to net change in land fraction
@@ -254,7 +259,7 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
             #  Computing vertical water balance
             # =================================================================
             vertical_waterbalance.\
-                calculate(date, land_water_frac.current_landareafrac,
+                calculate(day, land_water_frac.current_landareafrac,
                           land_water_frac.landareafrac_ratio,
                           watergap_basin.upstream_basin,
                           land_water_frac.water_freq,
@@ -273,9 +278,8 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
                           land_water_frac.current_landareafrac,
                           land_water_frac.previous_landareafrac,
                           land_water_frac.landwaterfrac_excl_glolake_res,
-                          date, first_day_of_month, watergap_basin.upstream_basin,
-                          vertical_waterbalance.fluxes['sum_canopy_snow_soil_storage'],
-                          run_calib)
+                          day, watergap_basin.upstream_basin,
+                          vertical_waterbalance.fluxes['sum_canopy_snow_soil_storage'])
 
             # =================================================================
             #  Update Land Area Fraction
@@ -287,9 +291,9 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
                 # =============================================================
                 # Write vertical and lateralbalacne variables to file
                 # =============================================================
-                sim_month = pd.to_datetime(date).month
-                sim_day = pd.to_datetime(date).day
-                sim_year = pd.to_datetime(date).year
+                sim_month = int(calendar.month[day])
+                sim_day = int(calendar.day[day])
+                sim_year = int(calendar.year[day])
                 # Getting daily storages and fluxes and writing to variables
                 vb_storages_and_fluxes = \
                     vertical_waterbalance.get_storages_and_fluxes()
@@ -311,10 +315,8 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
                 # =============================================================
                 #  store data yearly or if end date of simulation period is
                 # reached (eg. is data is less than a year)
-                if (pd.to_datetime(date).month == 12 and
-                        pd.to_datetime(date).day == 31) or end_date == \
-                        date.astype('datetime64[D]'):
-                    save_year = date.astype('datetime64[D]')
+                if calendar.is_year_end[day] or end_date == date:
+                    save_year = date
 
                     if run_calib:
                         annual_streamflow = create_out_var.lb_fluxes['dis'].data.\
@@ -341,7 +343,7 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
                 # =============================================================
                 #  Get restart information if restart is needed.
                 # =============================================================
-                if end_date == date.astype('datetime64[D]'):
+                if end_date == date:
                     if savestate_for_restart:
                         restart_model.\
                             savestate(date,
@@ -364,6 +366,7 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
                                       vertical_waterbalance.canopy_storage,
                                       vertical_waterbalance.snow_water_storage,
                                       vertical_waterbalance.snow_water_storage_subgrid,
+                                      vertical_waterbalance.rout_order,
                                       vertical_waterbalance.soil_water_content,
                                       vertical_waterbalance.daily_storage_transfer,
 
@@ -391,7 +394,7 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
                                       lateral_waterbalance.set_res_storage_flag
                                       )
 
-                if end_date == date.astype('datetime64[D]'):
+                if end_date == date:
                     end_main_loop = True
                     break
 
@@ -400,6 +403,7 @@ def run(calib_station=None, watergap_basin=None, basin_id=None):
 
         if end_main_loop:
             print('Status:' + colored(' complete', 'cyan'))
+            vertical_waterbalance.log_snow_free_cells()
             break
 
     if run_calib:
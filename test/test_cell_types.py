@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test cell types module."""
+
+import unittest
+from model.lateralwaterbalance import cell_types as ct
+
+
+class TestCellTypes(unittest.TestCase):
+    """Test integer types of groundwater cells and surface water bodies."""
+
+    def test_names(self):
+        """Names are converted to the respective types in kernels."""
+        for name, groundwater_cell in \
+                (("humid", ct.GroundwaterCell.HUMID),
+                 ("arid", ct.GroundwaterCell.ARID),
+                 ("inland sink", ct.GroundwaterCell.INLAND_SINK)):
+            self.assertEqual(ct.get_groundwater_cell(name), groundwater_cell)
+
+        for name, surface_water_body in \
+                (("local lake", ct.SurfaceWaterBody.LOCAL_LAKE),
+                 ("local wetland", ct.SurfaceWaterBody.LOCAL_WETLAND),
+                 ("global lake", ct.SurfaceWaterBody.GLOBAL_LAKE),
+                 ("global wetland", ct.SurfaceWaterBody.GLOBAL_WETLAND),
+                 ("reservoir", ct.SurfaceWaterBody.RESERVOIR)):
+            self.assertEqual(ct.get_surface_water_body(name),
+                             surface_water_body)
+
+        with self.assertRaises(ValueError):
+            ct.get_groundwater_cell("glacier")
+        with self.assertRaises(ValueError):
+            ct.get_surface_water_body("river")
+
+
+if __name__ == '__main__':
+    unittest.main()
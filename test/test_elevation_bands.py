@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test elevation bands module."""
+
+
+import unittest
+import numpy as np
+from model.verticalwaterbalance import elevation_bands
+
+
+class TestElevationBands(unittest.TestCase):
+    """Test elevation bands module."""
+
+    # creating fixtures
+    def setUp(self):
+        # Mean elevation and 100 sorted subgrids of three land cells (m)
+        random_generator = np.random.default_rng(11)
+        subgrids = np.sort(random_generator.uniform(0, 3000, (3, 100)),
+                           axis=1)
+        self.elevation = np.concatenate(
+            (subgrids.mean(axis=1)[:, None], subgrids), axis=1)
+
+    def test_check_num_bands(self):
+        """
+        Test if only divisors of the number of subgrids are accepted.
+
+        Returns
+        -------
+        None.
+        """
+        for num_bands in (1, 2, 4, 5, 10, 20, 25, 50, 100):
+            self.assertTrue(elevation_bands.check_num_bands(100, num_bands))
+
+        for num_bands in (-10, 0, 3, 7, 30, 99, 101, 200):
+            self.assertFalse(elevation_bands.check_num_bands(100, num_bands))
+
+    def test_aggregate_elevation(self):
+        """
+        Test if bands get the mean elevation of their subgrids.
+
+        Returns
+        -------
+        None.
+        """
+        band_elevation = \
+            elevation_bands.aggregate_elevation(self.elevation, 4)
+
+        self.assertEqual(band_elevation.shape, (3, 5))
+        self.assertTrue(band_elevation.flags.c_contiguous)
+        # Mean elevation of cell is not changed
+        np.testing.assert_array_equal(band_elevation[:, 0],
+                                      self.elevation[:, 0])
+        for band in range(4):
+            np.testing.assert_allclose(
+                band_elevation[:, 1 + band],
+                self.elevation[:, 1 + 25 * band:26 + 25 * band].mean(axis=1))
+        # Bands stay sorted and conserve mean of subgrids
+        self.assertTrue(np.all(np.diff(band_elevation[:, 1:], axis=1) >= 0))
+        np.testing.assert_allclose(band_elevation[:, 1:].mean(axis=1),
+                                   self.elevation[:, 0])
+
+        # One band has the mean elevation of the cell
+        band_elevation = \
+            elevation_bands.aggregate_elevation(self.elevation, 1)
+        np.testing.assert_allclose(band_elevation[:, 1],
+                                   self.elevation[:, 0])
+
+    def test_aggregate_subgrids(self):
+        """
+        Test if mean of subgrid values is conserved by bands.
+
+        Returns
+        -------
+        None.
+        """
+        snow_water_storage = np.arange(300, dtype=np.float32).reshape(3, 100)
+        band_storage = \
+            elevation_bands.aggregate_subgrids(snow_water_storage, 10)
+
+        self.assertEqual(band_storage.shape, (3, 10))
+        self.assertEqual(band_storage.dtype, np.float32)
+        np.testing.assert_allclose(band_storage.mean(axis=1),
+                                   snow_water_storage.mean(axis=1))
+        np.testing.assert_allclose(band_storage[0, :2], [4.5, 14.5])
+
+    def test_identity(self):
+        """
+        Test if subgrids are used unchanged with 100 bands.
+
+        Returns
+        -------
+        None.
+        """
+        self.assertIs(elevation_bands.aggregate_elevation(self.elevation, 100),
+                      self.elevation)
+        subgrids = self.elevation[:, 1:]
+        self.assertIs(elevation_bands.aggregate_subgrids(subgrids, 100),
+                      subgrids)
+
+
+if __name__ == '__main__':
+    unittest.main()
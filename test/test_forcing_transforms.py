@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test forcing transforms module."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import xarray as xr
+from controller import forcing_transforms as ft
+import watergap_logger as log
+
+
+class TestForcingTransforms(unittest.TestCase):
+    """Test transforms of climate forcing year blocks."""
+
+    # creating fixtures
+    def setUp(self):
+        # Two years of a grid (2, 3) with three land cells
+        self.cells = (np.array([0, 1, 1]), np.array([2, 0, 1]))
+        self.blocks = {year: self.get_block(year) for year in (1990, 1991)}
+
+    def get_block(self, year):
+        """Get forcing block of one year (see load_forcing_block)."""
+        time = np.arange(np.datetime64(f'{year}-01-01'),
+                         np.datetime64(f'{year + 1}-01-01'))
+        random_generator = np.random.default_rng(year)
+        forcing_block = {'time': time, 'cells': {}}
+        for var in ft.FORCING_VARIABLES:
+            forcing_block[var] = \
+                random_generator.uniform(1, 10, (len(time), 3))
+            forcing_block['cells'][var] = self.cells
+        # Cell without values (NaN)
+        forcing_block['precipitation'][:, 2] = np.nan
+        return forcing_block
+
+    def transform(self, transforms, year=1990, run_calib=False):
+        """Apply transforms to a copy of the block of the given year."""
+        forcing_block = self.blocks[year]
+        forcing_copy = {var: (value.copy() if var != 'cells' else value)
+                        for var, value in forcing_block.items()}
+        return ft.ForcingTransforms(transforms, run_calib).apply(forcing_copy)
+
+    def test_multiply_and_add(self):
+        """Constant transforms are applied in the given order."""
+        transformed = self.transform(
+            [{'variable': 'temperature', 'type': 'multiply', 'value': 2},
+             {'variable': 'temperature', 'type': 'add', 'value': -1.5}])
+        np.testing.assert_array_equal(
+            transformed['temperature'],
+            self.blocks[1990]['temperature'] * 2 - 1.5)
+        np.testing.assert_array_equal(
+            transformed['precipitation'], self.blocks[1990]['precipitation'])
+
+    def test_non_negative(self):
+        """Precipitation and radiation are not negative, NaN are kept."""
+        transformed = self.transform(
+            [{'variable': 'precipitation', 'type': 'add', 'value': -5},
+             {'variable': 'temperature', 'type': 'add', 'value': -20}])
+        precipitation = transformed['precipitation']
+        self.assertTrue(np.isnan(precipitation[:, 2]).all())
+        self.assertEqual(precipitation[:, :2].min(), 0)
+        self.assertLess(transformed['temperature'].max(), 0)
+
+    def test_monthly_values(self):
+        """Monthly delta change is applied per calendar month."""
+        delta = list(range(1, 13))
+        transformed = self.transform(
+            [{'variable': 'down_shortwave_radiation',
+              'type': 'monthly_multiply', 'value': delta}])
+        radiation = self.blocks[1990]['down_shortwave_radiation']
+        # 1 January, 28 February and 31 December
+        for day, month in ((0, 1), (58, 2), (364, 12)):
+            np.testing.assert_array_equal(
+                transformed['down_shortwave_radiation'][day],
+                radiation[day] * month)
+
+    def test_monthly_file(self):
+        """Monthly delta change fields are applied to the cells of a block."""
+        field = np.arange(12 * 2 * 3, dtype=np.float64).reshape(12, 2, 3)
+        with tempfile.TemporaryDirectory() as tempdir:
+            file_path = os.path.join(tempdir, 'delta.nc')
+            xr.Dataset({'delta': (('time', 'lat', 'lon'), field)}).\
+                to_netcdf(file_path)
+            transformed = self.transform(
+                [{'variable': 'temperature', 'type': 'monthly_add',
+                  'file': file_path}])
+
+        temperature = self.blocks[1990]['temperature']
+        np.testing.assert_array_equal(
+            transformed['temperature'][40],
+            temperature[40] + field[1][self.cells])
+
+    def test_stochastic_multiply(self):
+        """Daily multipliers are reproducible from seed and year."""
+        transforms = [{'variable': 'precipitation',
+                       'type': 'stochastic_multiply', 'std': 0.2,
+                       'seed': 42}]
+        first_run = self.transform(transforms, 1991)['precipitation']
+        second_run = self.transform(transforms, 1991)['precipitation']
+        np.testing.assert_array_equal(first_run, second_run)
+
+        # Same multiplier for all cells of a day
+        multipliers = first_run / self.blocks[1991]['precipitation']
+        np.testing.assert_allclose(multipliers[:, 0], multipliers[:, 1])
+        self.assertFalse(np.allclose(multipliers[:, 0], 1))
+
+        # Multipliers differ between years and seeds
+        multipliers_1990 = (self.transform(transforms)['precipitation'] /
+                            self.blocks[1990]['precipitation'])
+        self.assertFalse(np.allclose(multipliers_1990[:, 0],
+                                     multipliers[:, 0]))
+        transforms[0]['seed'] = 43
+        other_seed = (self.transform(transforms, 1991)['precipitation'] /
+                      self.blocks[1991]['precipitation'])
+        self.assertFalse(np.allclose(other_seed[:, 0], multipliers[:, 0]))
+
+    def test_calibration(self):
+        """Transforms are not applied in calibration runs."""
+        transformed = self.transform(
+            [{'variable': 'temperature', 'type': 'add', 'value': 2}],
+            run_calib=True)
+        for var in ft.FORCING_VARIABLES:
+            np.testing.assert_array_equal(transformed[var],
+                                          self.blocks[1990][var])
+
+    def test_invalid_transform(self):
+        """Transforms with unknown variable or missing options stop run."""
+        for transform in ({'variable': 'wind', 'type': 'add', 'value': 1},
+                          {'variable': 'temperature', 'type': 'add'},
+                          {'variable': 'temperature',
+                           'type': 'monthly_add', 'value': [1, 2]}):
+            with mock.patch.object(log, 'config_logger'), \
+                    self.assertRaises(SystemExit):
+                ft.ForcingTransforms([transform])
+
+
+if __name__ == '__main__':
+    unittest.main()
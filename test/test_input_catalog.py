@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test input catalog module."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import numpy as np
+import pandas as pd
+import xarray as xr
+from controller import configuration_module as cm
+from controller import input_catalog as ic
+
+
+class TestInputCatalog(unittest.TestCase):
+    """Test selection of input files by simulation period."""
+
+    # creating fixtures
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Catalogs are written to the static data folder
+        self.static_path = tempfile.mkdtemp()
+        patcher = mock.patch.object(cm, 'static_land_data_path',
+                                    self.static_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Daily files per year and a file without time axis
+        self.file_paths = [self.write_daily_file(year)
+                           for year in (1989, 1990, 1991)]
+        static_path = os.path.join(self.directory, 'static.nc')
+        xr.Dataset({'area': ('lat', np.ones(2))}).to_netcdf(static_path)
+        self.file_paths.append(static_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        shutil.rmtree(self.static_path)
+
+    def write_daily_file(self, year):
+        """Write file with one value per day of the year."""
+        time = pd.date_range(f'{year}-01-01', f'{year}-12-31')
+        file_path = os.path.join(self.directory, f'pr_{year}.nc')
+        xr.Dataset({'pr': ('time', np.zeros(len(time)))},
+                   coords={'time': time}).to_netcdf(file_path)
+        return file_path
+
+    def select_years(self, period):
+        """Get names of selected files."""
+        return [os.path.basename(file_path) for file_path
+                in ic.select_files(self.file_paths, period)]
+
+    def test_period_edges(self):
+        """Files are selected if the period touches their first/last day."""
+        self.assertEqual(self.select_years(('1989-12-31', '1990-01-01')),
+                         ['pr_1989.nc', 'pr_1990.nc', 'static.nc'])
+        self.assertEqual(self.select_years(('1990-01-01', '1990-12-31')),
+                         ['pr_1990.nc', 'static.nc'])
+        self.assertEqual(self.select_years(('1991-12-31', '1995-01-01')),
+                         ['pr_1991.nc', 'static.nc'])
+        self.assertEqual(self.select_years(('1980-01-01', '1989-01-01')),
+                         ['pr_1989.nc', 'static.nc'])
+
+    def test_period_not_in_files(self):
+        """All files are returned if no file intersects the period."""
+        self.assertEqual(ic.select_files(self.file_paths,
+                                         ('2000-01-01', '2000-12-31')),
+                         self.file_paths)
+
+    def test_monthly_time_axis(self):
+        """Time axis in months since a reference date is read."""
+        file_path = os.path.join(self.directory, 'wateruse.nc')
+        time = xr.DataArray(np.arange(24), dims='time',
+                            attrs={'units': 'months since 1901-01-01'})
+        xr.Dataset({'use': ('time', np.zeros(24))},
+                   coords={'time': time}).to_netcdf(file_path)
+        entry = ic.get_file_entry(file_path)
+        self.assertEqual(entry['time'], ['1901-01-01', '1902-12-01'])
+        self.assertEqual(entry['variables'], ['use'])
+
+    def test_catalog_update(self):
+        """Catalog is written once and updated for changed files only."""
+        ic.select_files(self.file_paths, ('1990-01-01', '1990-12-31'))
+        catalog_path = ic.get_catalog_path(self.directory)
+        self.assertEqual(catalog_path.parent,
+                         Path(self.static_path) / ic.CATALOG_FOLDER)
+        # No file is added to the input directory
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         sorted(map(os.path.basename, self.file_paths)))
+        with open(catalog_path, encoding="utf-8") as catalog_file:
+            catalog = json.load(catalog_file)
+        self.assertEqual(catalog['pr_1991.nc']['time'],
+                         ['1991-01-01', '1991-12-31'])
+        self.assertIsNone(catalog['static.nc']['time'])
+        self.assertEqual(catalog['static.nc']['grid'], {'lat': 2})
+
+        # File of 1991 is replaced by a file of 1992
+        os.remove(self.file_paths[2])
+        os.rename(self.write_daily_file(1992), self.file_paths[2])
+        self.assertEqual(self.select_years(('1992-06-01', '1992-06-01')),
+                         ['pr_1991.nc', 'static.nc'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test input provider module."""
+
+import unittest
+from unittest import mock
+import numpy as np
+from controller import configuration_module as cm
+from controller import forcing_transforms as ft
+from controller import input_provider as ip
+import watergap_logger as log
+
+
+class TestArrayForcingProvider(unittest.TestCase):
+    """Test climate forcing provider of arrays in memory."""
+
+    # creating fixtures
+    def setUp(self):
+        # Two years on a grid (3, 4) with ocean (NaN) in the first row
+        self.time = np.arange(np.datetime64('1990-01-01'),
+                              np.datetime64('1992-01-01'))
+        random_generator = np.random.default_rng(3)
+        self.forcing = [random_generator.uniform(1, 300,
+                                                 (len(self.time), 3, 4))
+                        for _ in range(4)]
+        for forcing in self.forcing:
+            forcing[:, 0] = np.nan
+        self.provider = ip.ArrayForcingProvider(*self.forcing, self.time,
+                                                np.arange(3), np.arange(4))
+
+    def test_daily_forcing(self):
+        """Daily forcing equals the arrays of the provider."""
+        for day in (0, 364, 365, 729):
+            daily_forcing = self.provider.get_day(self.time[day])
+            for forcing, expected in zip(daily_forcing, self.forcing):
+                np.testing.assert_array_equal(forcing, expected[day])
+
+        with mock.patch.object(log, 'config_logger'), \
+                self.assertRaises(SystemExit):
+            self.provider.get_day(np.datetime64('1992-01-01'))
+
+    def test_transforms(self):
+        """Transforms are applied without changing the provider arrays."""
+        self.provider.transforms = ft.ForcingTransforms(
+            [{'variable': 'temperature', 'type': 'add', 'value': 2}])
+        temperature = self.provider.get_day(self.time[400])[1]
+        np.testing.assert_array_equal(temperature,
+                                      self.forcing[1][400] + 2)
+        self.assertEqual(np.isnan(self.forcing[1][400]).sum(), 4)
+        np.testing.assert_array_equal(self.provider.forcing['tas'][400],
+                                      self.forcing[1][400])
+
+    def test_calibration(self):
+        """Transforms of the configuration are not applied in calibration."""
+        transforms = [{'variable': 'temperature', 'type': 'add', 'value': 2}]
+        with mock.patch.object(cm, 'forcing_transforms', transforms):
+            for run_calib, num_transforms in ((False, 1), (True, 0)):
+                provider = ip.ArrayForcingProvider(*self.forcing, self.time,
+                                                   np.arange(3), np.arange(4),
+                                                   run_calib)
+                self.assertEqual(len(provider.transforms.transforms),
+                                 num_transforms)
+
+    def test_negative_precipitation(self):
+        """Negative precipitation is rejected as for NetCDF forcing."""
+        self.forcing[0][3, 1, 1] = -1
+        provider = ip.ArrayForcingProvider(*self.forcing, self.time,
+                                           np.arange(3), np.arange(4))
+        with self.assertRaises(ValueError):
+            provider.get_day(self.time[0])
+
+    def test_spatial_window(self):
+        """Only the bounding window of the basin is provided."""
+        basin = np.full((3, 4), np.nan)
+        basin[1:3, 2] = 0
+        self.provider.set_spatial_window(basin)
+        self.assertEqual(self.provider.spatial_window, (1, 3, 2, 3))
+
+        precipitation = self.provider.get_day(self.time[10])[0]
+        np.testing.assert_array_equal(precipitation[1:3, 2],
+                                      self.forcing[0][10, 1:3, 2])
+        self.assertEqual(np.count_nonzero(~np.isnan(precipitation)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
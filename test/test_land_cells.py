@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test land cells module."""
+
+
+import types
+import unittest
+from unittest import mock
+import numpy as np
+from model.utility import land_cells
+from model.verticalwaterbalance import waterbalance_vertical_init as vbi
+import watergap_logger as log
+
+
+class TestLandCells(unittest.TestCase):
+    """Test conversion between grids and cell-major arrays."""
+
+    # creating fixtures
+    def setUp(self):
+        # Five land cells (not in grid order) of a grid (3, 4) and 6 subgrids
+        self.cells = np.array([[2, 1], [0, 0], [1, 3], [0, 2], [2, 3]])
+        random_generator = np.random.default_rng(7)
+        self.grid = random_generator.uniform(0, 50, (6, 3, 4))
+
+    def test_grid_to_cells(self):
+        """
+        Test if cells are cell-major and contiguous.
+
+        Returns
+        -------
+        None.
+        """
+        values = land_cells.grid_to_cells(self.grid, self.cells)
+
+        self.assertEqual(values.shape, (5, 6))
+        self.assertTrue(values.flags.c_contiguous)
+        for cell, (x, y) in enumerate(self.cells):
+            np.testing.assert_array_equal(values[cell], self.grid[:, x, y])
+
+    def test_round_trip(self):
+        """
+        Test if land cells are kept and other cells get the fill value.
+
+        Returns
+        -------
+        None.
+        """
+        values = land_cells.grid_to_cells(self.grid, self.cells)
+        land = np.zeros((3, 4), dtype=bool)
+        land[self.cells[:, 0], self.cells[:, 1]] = True
+
+        grid = land_cells.cells_to_grid(values, self.cells, (3, 4))
+        np.testing.assert_array_equal(grid[:, land], self.grid[:, land])
+        self.assertTrue(np.all(np.isnan(grid[:, ~land])))
+
+        grid = land_cells.cells_to_grid(values.astype(np.float32),
+                                        self.cells, (3, 4), 0.0)
+        self.assertEqual(grid.dtype, np.float32)
+        self.assertTrue(np.all(grid[:, ~land] == 0))
+        np.testing.assert_array_equal(
+            land_cells.grid_to_cells(grid, self.cells),
+            values.astype(np.float32))
+
+
+class TestRestartSnowSubgrids(unittest.TestCase):
+    """Test snow water storage of subgrids read from restart states."""
+
+    # creating fixtures
+    def setUp(self):
+        rout_order = np.array([[2, 1], [0, 0], [1, 3], [0, 2], [2, 3]])
+        random_generator = np.random.default_rng(9)
+        self.grid = random_generator.uniform(0, 50, (100, 3, 4))
+        self.values = land_cells.grid_to_cells(self.grid, rout_order)
+
+        # Vertical water balance with 100 elevation subgrids
+        self.vertical_waterbalance = types.SimpleNamespace(
+            rout_order=rout_order, snow_water_storage=np.zeros((3, 4)),
+            elevation=np.zeros((len(rout_order), 101)))
+
+    def get_restart_subgrids(self, states):
+        """Read snow water storage of subgrids from restart states."""
+        return vbi.VerticalWaterBalance.\
+            get_snow_water_storage_subgrid_for_restart(
+                self.vertical_waterbalance, states)
+
+    def test_cell_major_layout(self):
+        """
+        Test restart states written cell-major with their land cells.
+
+        Returns
+        -------
+        None.
+        """
+        states = {'snow_water_storsubgrid': self.values,
+                  'snow_water_storsubgrid_cells':
+                      self.vertical_waterbalance.rout_order.copy()}
+        np.testing.assert_array_equal(self.get_restart_subgrids(states),
+                                      self.values)
+
+        # Land cells of restart file in other order and with a cell which is
+        # no land cell of this run, missing land cells have no snow
+        cells = np.array([[0, 2], [2, 1], [1, 0], [0, 0]])
+        states = {'snow_water_storsubgrid':
+                      land_cells.grid_to_cells(self.grid, cells),
+                  'snow_water_storsubgrid_cells': cells}
+        expected = self.values.copy()
+        expected[[2, 4]] = 0
+        np.testing.assert_array_equal(self.get_restart_subgrids(states),
+                                      expected)
+
+    def test_grid_layout(self):
+        """
+        Test restart states written as grid (subgrid, lat, lon).
+
+        Returns
+        -------
+        None.
+        """
+        states = {'snow_water_storsubgrid': self.grid}
+        np.testing.assert_array_equal(self.get_restart_subgrids(states),
+                                      self.values)
+
+    def test_elevation_bands(self):
+        """
+        Test restart states aggregated into fewer elevation bands.
+
+        Returns
+        -------
+        None.
+        """
+        self.vertical_waterbalance.elevation = np.zeros((5, 5))
+        states = {'snow_water_storsubgrid': self.grid}
+        subgrids = self.get_restart_subgrids(states)
+        self.assertEqual(subgrids.shape, (5, 4))
+        np.testing.assert_allclose(subgrids.mean(axis=1),
+                                   self.values.mean(axis=1))
+
+        # Bands which do not divide subgrids of restart file are rejected
+        self.vertical_waterbalance.elevation = np.zeros((5, 4))
+        with mock.patch.object(log, 'config_logger'), \
+                self.assertRaises(SystemExit):
+            self.get_restart_subgrids(states)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test land surfacewater fraction module."""
+
+import unittest
+import numpy as np
+from model import land_surfacewater_fraction as lsf
+from model.utility import riparian_cells
+
+
+class TestLandSurfacewaterFraction(unittest.TestCase):
+    """Test storage adaption of global reservoirs."""
+
+    # creating fixtures
+    def setUp(self):
+        random_generator = np.random.default_rng(7)
+        shape = (60, 80)
+        # Reservoirs 1 to 100 with cells not assigned (0) and outside land
+        # (NaN)
+        self.assignment = random_generator.integers(0, 101, size=shape).\
+            astype(np.float64)
+        self.assignment[0, :] = np.nan
+        self.glores_area = np.where(random_generator.uniform(size=shape) > 0.7,
+                                    random_generator.uniform(size=shape), 0)
+        # Storage of reduced land area fraction in some cells only
+        self.storage_change_km3 = \
+            np.where(random_generator.uniform(size=shape) > 0.5,
+                     random_generator.lognormal(-10, 3, size=shape), 0)
+
+    def test_storage_adaption(self):
+        """Added storage is bounded by the error of the sum over the grid."""
+        assignment_start, assignment_cells, _ = \
+            riparian_cells.get_unit_index(self.assignment)
+        glores_storage = \
+            lsf.add_storage_to_outflowcell(assignment_start, assignment_cells,
+                                           self.glores_area,
+                                           self.storage_change_km3,
+                                           np.zeros_like(self.glores_area))
+
+        # Search of assigned cells in the whole grid and pairwise sum over the
+        # whole grid
+        expected = np.zeros_like(self.glores_area)
+        bound = np.zeros_like(self.glores_area)
+        eps = np.finfo(np.float64).eps  # pylint: disable=no-member
+        for unit in np.unique(self.assignment)[1:-1]:
+            outflowcell_index = np.where((self.assignment == unit) &
+                                         (self.glores_area > 0))
+            if outflowcell_index[0].shape[0] != 0:
+                x, y = outflowcell_index[0][0], outflowcell_index[1][0]
+                storage = np.where(self.assignment == unit,
+                                   self.storage_change_km3, 0)
+                expected[x, y] += storage.sum()
+                # Both sums are within (n - 1) * eps * sum of the exact sum
+                bound[x, y] = 2 * np.count_nonzero(storage) * eps * \
+                    storage.sum()
+
+        self.assertGreater(np.count_nonzero(expected), 50)
+        self.assertTrue(np.all(np.abs(glores_storage - expected) <= bound))
+        np.testing.assert_array_equal(glores_storage == 0, expected == 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test parameters module."""
+
+import unittest
+import numpy as np
+from model import parameters as pm
+
+
+class TestParameters(unittest.TestCase):
+    """Test parameter store."""
+
+    # creating fixtures
+    def setUp(self):
+        self.parameters = pm.Parameters(False, None)
+
+    def test_fields(self):
+        """Fields are read-only float64 copies of the parameter file."""
+        for name, param in self.parameters.global_params.data_vars.items():
+            field = self.parameters.fields[name]
+            self.assertEqual(field.dtype, np.float64)
+            self.assertTrue(field.flags.c_contiguous)
+            self.assertFalse(field.flags.writeable)
+            np.testing.assert_array_equal(field, param.values)
+
+    def test_kernel_field_transform(self):
+        """Coefficients are derived once from the parameter values."""
+        for name, field in self.parameters.fields.items():
+            self.assertIs(self.parameters.get_kernel_field(name), field)
+
+            coefficient = self.parameters.get_kernel_field(name, np.exp)
+            self.assertEqual(coefficient.dtype, np.float64)
+            self.assertTrue(coefficient.flags.c_contiguous)
+            self.assertFalse(coefficient.flags.writeable)
+            np.testing.assert_array_equal(coefficient, np.exp(field))
+
+
+if __name__ == '__main__':
+    unittest.main()
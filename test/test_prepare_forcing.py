@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test prepare forcing module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import xarray as xr
+from controller import prepare_forcing as pf
+import watergap_logger as log
+
+
+class TestForcingStore(unittest.TestCase):
+    """Test land-only climate forcing store."""
+
+    # creating fixtures
+    def setUp(self):
+        self.forcing_path = tempfile.mkdtemp()
+
+        # Small grid with ocean (NaN) in first column and last row
+        self.land_mask = np.ones((4, 6), dtype=bool)
+        self.land_mask[:, 0] = False
+        self.land_mask[3, :] = False
+
+        self.time = pd.date_range('1989-12-30', '1991-01-02')
+        random_generator = np.random.default_rng(1)
+        self.forcing = {}
+        for folder, var_name in pf.FORCING_VARIABLES.items():
+            values = random_generator.uniform(
+                0, 1, (len(self.time),) + self.land_mask.shape)
+            values[:, ~self.land_mask] = np.nan
+            self.forcing[var_name] = values.astype(np.float32)
+            self.write_forcing(folder, var_name, self.forcing[var_name])
+
+    def tearDown(self):
+        shutil.rmtree(self.forcing_path)
+
+    def write_forcing(self, folder, var_name, values):
+        """Write forcing of one variable to one file per year."""
+        os.makedirs(os.path.join(self.forcing_path, folder), exist_ok=True)
+        forcing = xr.DataArray(values, dims=('time', 'lat', 'lon'),
+                               coords={'time': self.time,
+                                       'lat': np.arange(4),
+                                       'lon': np.arange(6)},
+                               name=var_name, attrs={'units': 'unit'})
+        for year, forcing_year in forcing.groupby('time.year'):
+            forcing_year.to_netcdf(os.path.join(self.forcing_path, folder,
+                                                f'{var_name}_{year}.nc'))
+
+    def test_store_equals_forcing(self):
+        """Forcing read from store equals forcing of NetCDF files."""
+        self.assertIsNone(pf.open_forcing_store(self.forcing_path))
+        pf.prepare_forcing(self.forcing_path)
+        store = pf.open_forcing_store(self.forcing_path)
+
+        self.assertEqual(store.manifest['land_cells'], self.land_mask.sum())
+        land_cells = np.where(self.land_mask)
+        for var_name, values in self.forcing.items():
+            cells, forcing = store.get_land_year(var_name, 1990)
+            np.testing.assert_array_equal(cells, land_cells)
+            self.assertEqual(forcing.dtype, np.float32)
+            self.assertEqual(forcing.units, 'unit')
+            np.testing.assert_array_equal(forcing.values,
+                                          values[2:367][:, land_cells[0],
+                                                        land_cells[1]])
+            np.testing.assert_array_equal(
+                forcing.time.values.astype('datetime64[D]'),
+                self.time[2:367].values.astype('datetime64[D]'))
+
+            # First year contains only two days
+            self.assertEqual(store.get_land_year(var_name, 1989)[1].shape,
+                             (2, self.land_mask.sum()))
+
+    def test_land_cells_of_window(self):
+        """Land cells of a window are read without the grid."""
+        pf.prepare_forcing(self.forcing_path)
+        store = pf.open_forcing_store(self.forcing_path)
+
+        cells, forcing = store.get_land_year('tas', 1991, (1, 4, 0, 3))
+        self.assertEqual(forcing.dims, ('time', 'cell'))
+        # Land cells in rows 1-2 and columns 1-2
+        np.testing.assert_array_equal(cells[0], [1, 1, 2, 2])
+        np.testing.assert_array_equal(cells[1], [1, 2, 1, 2])
+        np.testing.assert_array_equal(
+            forcing.values, self.forcing['tas'][-2:, cells[0], cells[1]])
+
+    def test_store_key_of_changed_files(self):
+        """Store has to be prepared again if forcing files change."""
+        pf.prepare_forcing(self.forcing_path)
+        forcing_files = pf.get_forcing_files(self.forcing_path)
+        store_key = pf.get_store_key(forcing_files)
+
+        os.remove(forcing_files['temperature'][-1])
+        self.assertNotEqual(
+            pf.get_store_key(pf.get_forcing_files(self.forcing_path)),
+            store_key)
+        self.assertIsNone(pf.open_forcing_store(self.forcing_path))
+
+    def test_values_outside_land_cells(self):
+        """Ocean cells with values on a later day are rejected."""
+        self.forcing['pr'][10, 3, 3] = 1
+        self.write_forcing('precipitation', 'pr', self.forcing['pr'])
+        with mock.patch.object(log, 'config_logger'), \
+                self.assertRaises(SystemExit):
+            pf.prepare_forcing(self.forcing_path)
+        self.assertIsNone(pf.open_forcing_store(self.forcing_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
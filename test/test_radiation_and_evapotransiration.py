@@ -65,3 +65,23 @@ class TestRadiationEvapotranspiration(unittest.TestCase):
                 self.pet[x, y] = test_result[0]
         self.assertTrue((np.nanmin(self.pet) >= self.pet_min) &
                         (np.nanmax(self.pet) <= self.pet_max))
+
+    def test_temperature_terms_of_land_cells(self):
+        """
+        check temperature terms are only computed for land cells.
+
+        Returns
+        -------
+        None.
+
+        """
+        rout_order = np.array([[10, 20], [100, 300], [359, 719]])
+        terms = tuple(np.full(self.pet.shape, np.nan) for _ in range(4))
+        re.compute_temperature_terms(rout_order, self.temperature, *terms)
+
+        for x, y in rout_order:
+            expected = re.get_temperature_terms(self.temperature[x, y])
+            for term, expected_term in zip(terms, expected):
+                self.assertEqual(term[x, y], expected_term)
+        for term in terms:
+            self.assertEqual(np.count_nonzero(~np.isnan(term)), 3)
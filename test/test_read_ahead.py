@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test read ahead module."""
+
+import threading
+import unittest
+from unittest import mock
+import numpy as np
+from controller import read_ahead as ra
+import watergap_logger as log
+
+
+class TestReadAhead(unittest.TestCase):
+    """Test read ahead of yearly input blocks."""
+
+    # creating fixtures
+    def setUp(self):
+        self.loaded_years = []
+        # Background read of the next year waits until released by the test
+        self.release = threading.Event()
+        self.release.set()
+
+    def load_block(self, year):
+        """Load dummy block of 1000 float64 values (8 kB)."""
+        self.release.wait()
+        self.loaded_years.append(year)
+        return {'year': np.full(1000, year, dtype=np.float64)}
+
+    def test_block_size(self):
+        """Only arrays are counted in the size of a block."""
+        block = {'a': np.zeros(10), 'b': np.zeros((2, 5), dtype=np.int32),
+                 'cells': {'a': np.arange(10)}}
+        self.assertEqual(ra.get_block_size(block), 80 + 40)
+
+    def test_read_ahead_handoff(self):
+        """Block read ahead is handed over without reading it again."""
+        read_ahead = ra.ReadAhead(self.load_block, 1990, True, 1)
+
+        block = read_ahead.get_block(1989)
+        self.release.clear()
+        read_ahead.read_ahead(1990, block)
+        self.assertEqual(read_ahead.pending_year, 1990)
+
+        # Handoff blocks until the background read is done
+        self.release.set()
+        block = read_ahead.get_block(1990)
+        np.testing.assert_array_equal(block['year'], 1990)
+        self.assertEqual(self.loaded_years, [1989, 1990])
+        self.assertIsNone(read_ahead.pending_block)
+
+    def test_no_read_ahead_beyond_last_year(self):
+        """No block is read ahead after the last simulation year."""
+        read_ahead = ra.ReadAhead(self.load_block, 1990, True, 1)
+        read_ahead.read_ahead(1991, read_ahead.get_block(1990))
+        self.assertIsNone(read_ahead.pending_year)
+        self.assertEqual(self.loaded_years, [1990])
+
+    def test_disabled_read_ahead(self):
+        """Blocks are read synchronously if read ahead is disabled."""
+        read_ahead = ra.ReadAhead(self.load_block, 1990, False, 1)
+        read_ahead.read_ahead(1990, read_ahead.get_block(1989))
+        self.assertIsNone(read_ahead.pending_year)
+        read_ahead.get_block(1990)
+        self.assertEqual(self.loaded_years, [1989, 1990])
+
+    def test_memory_limit(self):
+        """No block is read ahead if two blocks exceed the memory budget."""
+        # Budget of 12 kB for blocks of 8 kB
+        read_ahead = ra.ReadAhead(self.load_block, 1990, True, 12e-6)
+        with mock.patch.object(log, 'config_logger') as config_logger:
+            ra.ReadAhead(self.load_block, 1990, True, 4e-6).get_block(1989)
+        self.assertIn('exceeds read_ahead_memory_limit_gb',
+                      config_logger.call_args.args[2])
+
+        read_ahead.read_ahead(1990, read_ahead.get_block(1989))
+        self.assertIsNone(read_ahead.pending_year)
+
+    def test_read_ahead_of_other_year(self):
+        """Block read ahead for another year is discarded and not used."""
+        read_ahead = ra.ReadAhead(self.load_block, 1995, True, 1)
+        read_ahead.read_ahead(1990, read_ahead.get_block(1989))
+
+        block = read_ahead.get_block(1993)
+        np.testing.assert_array_equal(block['year'], 1993)
+        self.assertIsNone(read_ahead.pending_year)
+
+        read_ahead.read_ahead(1994, block)
+        read_ahead.discard()
+        self.assertIsNone(read_ahead.pending_block)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,7 @@ import xarray as xr
 import numpy as np
 import pandas as pd
 from model.lateralwaterbalance import reservoir_regulated_lakes as res_reg
+from model.lateralwaterbalance import reservoir_release_hanasaki as hanasaki
 from controller import configuration_module as cm
 
 class TestResevoirRegulatedLake(unittest.TestCase):
@@ -207,6 +208,23 @@ class TestResevoirRegulatedLake(unittest.TestCase):
         # becomes global lake due to mean_annual_inflow_res = 0.
         self.glolake_storage = max_glolake_storage
 
+        # Monthly and mean annual demand of reservoirs and their downstream
+        # cells
+        reservoir_cells, downstream_cells = hanasaki.\
+            get_downstream_cells(self.reservoir_data["rout_order"],
+                                 self.reservoir_data["outflow_cell"],
+                                 self.reservoir_data['all_reservoir_and_regulated_lake_area'])
+        monthly_downstream_demand = np.zeros(self.constants['size'])
+        mean_annual_downstream_demand = np.zeros(self.constants['size'])
+        hanasaki.get_downstream_demand(
+            self.reservoir_data["rout_order"], reservoir_cells,
+            downstream_cells, glores_area,
+            self.reservoir_data["allocation_coeff"],
+            self.reservoir_data["monthly_potential_net_abstraction_sw"],
+            self.reservoir_data["mean_annual_demand_res"],
+            self.reservoir_data['all_reservoir_and_regulated_lake_area'],
+            monthly_downstream_demand, mean_annual_downstream_demand)
+
         for routflow_looper in enumerate(self.reservoir_data["rout_order"]):
             routflow_looper = routflow_looper[0]  #  take index only
             # Get invidividual cells based on routing order
@@ -216,7 +234,6 @@ class TestResevoirRegulatedLake(unittest.TestCase):
                 test_result = res_reg.\
                     reservoir_regulated_lake_water_balance(
                      self.reservoir_data["rout_order"], routflow_looper,
-                     self.reservoir_data["outflow_cell"],
                      glores_storage[x, y],
                      glores_capacity[x, y],
                      self.climate_and_static_data["precipitation"][x, y],
@@ -232,15 +249,13 @@ class TestResevoirRegulatedLake(unittest.TestCase):
                      self.reservoir_data["current_mon_day"],
                      self.reservoir_data["k_release"][x, y],
                      self.reservoir_data["glores_type"][x, y],
-                     self.reservoir_data["allocation_coeff"],
-                     self.reservoir_data["monthly_potential_net_abstraction_sw"],
-                     self.reservoir_data["mean_annual_demand_res"],
+                     monthly_downstream_demand[x, y],
+                     mean_annual_downstream_demand[x, y],
                      self.reservoir_data["mean_annual_inflow_res"][x, y],
                      glolake_area[x, y],
                      self.reservoir_data["accumulated_unsatisfied_potential_netabs_sw"][x, y],
                      self.reservoir_data["accu_unsatisfied_pot_netabstr_glolake"][x, y],
                      self.constants["num_days_in_month"],
-                     self.reservoir_data["all_reservoir_and_regulated_lake_area"],
                      reg_lake_redfactor_firstday[x, y],
                      self.constants["minstorage_volume"])
 
@@ -257,3 +272,57 @@ class TestResevoirRegulatedLake(unittest.TestCase):
 
         grt_zero = np.any(values_at_indices > 0)
         self.assertTrue(grt_zero == 1)
+
+    def test_downstream_demand(self):  # pylint: disable=too-many-locals
+        """Precomputed downstream demand equals search in routing order."""
+        rout_order = self.reservoir_data["rout_order"]
+        outflow_cell = self.reservoir_data["outflow_cell"]
+        allocation_coeff = self.reservoir_data["allocation_coeff"]
+        all_reservoir_area = \
+            self.reservoir_data['all_reservoir_and_regulated_lake_area']
+        mean_annual_demand = \
+            np.nan_to_num(self.reservoir_data["mean_annual_demand_res"])
+        monthly_demand = \
+            self.reservoir_data["monthly_potential_net_abstraction_sw"]
+        # About half of all reservoirs and regulated lakes are active
+        reservoir_area = np.where(
+            np.random.uniform(size=all_reservoir_area.shape) > 0.5,
+            all_reservoir_area, 0)
+
+        reservoir_cells, downstream_cells = hanasaki.\
+            get_downstream_cells(rout_order, outflow_cell, all_reservoir_area)
+        monthly_downstream_demand = np.zeros(self.constants['size'])
+        mean_annual_downstream_demand = np.zeros(self.constants['size'])
+        hanasaki.get_downstream_demand(
+            rout_order, reservoir_cells, downstream_cells, reservoir_area,
+            allocation_coeff, monthly_demand, mean_annual_demand,
+            all_reservoir_area, monthly_downstream_demand,
+            mean_annual_downstream_demand)
+
+        self.assertGreater(len(reservoir_cells), 0)
+        for routflow_looper in reservoir_cells:
+            x, y = rout_order[routflow_looper]
+            # Downstream cells are searched in routing order (up to 5 cells
+            # until the next active reservoir, the ocean or an inland sink)
+            monthly_demand_sum = monthly_demand[x, y]
+            mean_annual_demand_sum = mean_annual_demand[x, y]
+            stop_mean_annual_calculation = False
+            m, n = outflow_cell[routflow_looper]
+            dsc = 0
+            while dsc < 5 and reservoir_area[m, n] <= 0 < min(m, n):
+                monthly_demand_sum += monthly_demand[m, n] * \
+                    allocation_coeff[routflow_looper][dsc]
+                if not stop_mean_annual_calculation:
+                    if all_reservoir_area[m, n] <= 0:
+                        mean_annual_demand_sum += mean_annual_demand[m, n] * \
+                            allocation_coeff[routflow_looper][dsc]
+                    else:
+                        stop_mean_annual_calculation = True
+                next_cell = np.where((rout_order == (m, n)).all(axis=1))[0]
+                m, n = outflow_cell[next_cell[0]]
+                dsc += 1
+
+            self.assertEqual(monthly_downstream_demand[x, y],
+                             monthly_demand_sum)
+            self.assertEqual(mean_annual_downstream_demand[x, y],
+                             mean_annual_demand_sum)
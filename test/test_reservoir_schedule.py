@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test reservoir schedule module."""
+
+
+import unittest
+import numpy as np
+from model.lateralwaterbalance import reservoir_schedule as rs
+
+
+def activate_with_where(static, state, resyear):
+    """Activate reservoirs of all cells with start year before or in year."""
+    glores_area, glores_capacity, glolake_area, all_area = state
+
+    glores_area = np.where(static['regulated_lake_status'] == 1, all_area,
+                           glores_area)
+    glores_capacity = np.where(static['regulated_lake_status'] == 1,
+                               static['capacity'], glores_capacity)
+    glores_area = np.where(resyear >= static['startyear'], all_area,
+                           glores_area)
+    glores_capacity = np.where(resyear >= static['startyear'],
+                               static['capacity'], glores_capacity)
+
+    mask_mean_annual_inflow = ((glores_area > 0)
+                               & (resyear >= static['startyear'])
+                               & (static['mean_annual_inflow'] == 0))
+    glolake_area = np.where(mask_mean_annual_inflow,
+                            glores_area + glolake_area, glolake_area)
+    glores_area[mask_mean_annual_inflow] = 0
+    all_area[mask_mean_annual_inflow] = 0
+
+    return glores_area, glores_capacity, glolake_area, all_area
+
+
+def activate_with_schedule(schedule, static, state, resyear):
+    """Activate reservoirs which become active in year (see schedule)."""
+    glores_area, glores_capacity, glolake_area, all_area = state
+
+    first_activation = schedule.activated_year is None
+    event_index, event_no_inflow = schedule.get_events(resyear)
+
+    if first_activation:
+        lake_index = schedule.regulated_lake_index
+        glores_area[lake_index] = all_area[lake_index]
+        glores_capacity[lake_index] = static['capacity'][lake_index]
+
+    glores_area[event_index] = all_area[event_index]
+    glores_capacity[event_index] = static['capacity'][event_index]
+
+    mask_mean_annual_inflow = (glores_area[event_index] > 0) & event_no_inflow
+    lake_index = (event_index[0][mask_mean_annual_inflow],
+                  event_index[1][mask_mean_annual_inflow])
+    glolake_area[lake_index] = glores_area[lake_index] + \
+        glolake_area[lake_index]
+    glores_area[lake_index] = 0
+    all_area[lake_index] = 0
+
+    return glores_area, glores_capacity, glolake_area, all_area
+
+
+class TestReservoirSchedule(unittest.TestCase):
+    """Test reservoir schedule module."""
+
+    # creating fixtures
+    def setUp(self):
+        # Start year 0: no reservoir, nan: start year unknown
+        startyear = np.array([[0, 1985, 1990],
+                              [1991, 1991, 1993],
+                              [1995, np.nan, 0],
+                              [2001, 1990, 1985]])
+        regulated_lake_status = np.zeros(startyear.shape)
+        regulated_lake_status[2, 0] = 1
+        mean_annual_inflow = np.ones(startyear.shape)  # m3/s
+        mean_annual_inflow[1, 0] = 0
+        mean_annual_inflow[3, 2] = 0
+
+        reservoir = (startyear > 0) | np.isnan(startyear)
+        all_area = np.where(reservoir, np.arange(1., 13.).reshape(4, 3), 0)
+        self.static = {
+            'startyear': startyear,
+            'regulated_lake_status': regulated_lake_status,
+            'mean_annual_inflow': mean_annual_inflow,
+            'capacity': all_area * 0.01}  # km3
+
+        # glores_area, glores_capacity, glolake_area, all_area
+        self.state = (np.zeros(startyear.shape), np.zeros(startyear.shape),
+                      np.full(startyear.shape, 0.5), all_area)
+
+    def new_schedule(self):
+        """Create schedule from static data."""
+        return rs.ReservoirSchedule(self.static['startyear'],
+                                    self.static['regulated_lake_status'],
+                                    self.static['mean_annual_inflow'])
+
+    def assert_activation(self, years, restart_year=None):
+        """Compare schedule and np.where activation for years."""
+        where_state = tuple(value.copy() for value in self.state)
+        schedule_state = tuple(value.copy() for value in self.state)
+        schedule = self.new_schedule()
+
+        for year in years:
+            if year == restart_year:
+                # Restart: schedule is built again, states are kept
+                schedule = self.new_schedule()
+            where_state = activate_with_where(self.static, where_state, year)
+            schedule_state = activate_with_schedule(schedule, self.static,
+                                                    schedule_state, year)
+            for expected, result in zip(where_state, schedule_state):
+                np.testing.assert_array_equal(expected, result,
+                                              err_msg=f'year {year}')
+
+    def test_get_events(self):
+        """
+        Test events returned for first, repeated and following years.
+
+        Returns
+        -------
+        None.
+        """
+        schedule = self.new_schedule()
+
+        # First activation: all cells with start year before or in year
+        event_index, event_no_inflow = schedule.get_events(1990)
+        self.assertEqual(sorted(zip(*event_index)),
+                         [(0, 0), (0, 1), (0, 2), (2, 2), (3, 1), (3, 2)])
+        self.assertEqual(np.sum(event_no_inflow), 1)
+        self.assertEqual(schedule.activated_year, 1990)
+
+        # Repeated and earlier years activate nothing
+        for year in (1990, 1989):
+            event_index, event_no_inflow = schedule.get_events(year)
+            self.assertEqual(len(event_index[0]), 0)
+            self.assertEqual(len(event_no_inflow), 0)
+        self.assertEqual(schedule.activated_year, 1990)
+
+        # Next years only activate cells with start year in between
+        event_index, event_no_inflow = schedule.get_events(1993)
+        self.assertEqual(sorted(zip(*event_index)),
+                         [(1, 0), (1, 1), (1, 2)])
+        np.testing.assert_array_equal(event_no_inflow[np.argsort(
+            event_index[1])], [True, False, False])
+
+        # Cells with unknown start year are never active
+        event_index, _ = schedule.get_events(3000)
+        self.assertEqual(sorted(zip(*event_index)), [(2, 0), (3, 0)])
+
+        # Regulated lakes are given separately
+        self.assertEqual(list(zip(*schedule.regulated_lake_index)), [(2, 0)])
+
+    def test_spin_up(self):
+        """
+        Test activation if the first year is repeated (spin up).
+
+        Returns
+        -------
+        None.
+        """
+        self.assert_activation([1990, 1990, 1990, 1991, 1992, 1993, 1994,
+                                1995, 1996])
+
+    def test_skipped_years(self):
+        """
+        Test activation if years without reservoir events are skipped.
+
+        Returns
+        -------
+        None.
+        """
+        self.assert_activation([1980, 1990, 1994, 1996, 2005])
+
+    def test_restart(self):
+        """
+        Test activation if the run is restarted in the middle of schedule.
+
+        Returns
+        -------
+        None.
+        """
+        self.assert_activation([1989, 1990, 1991, 1992, 1993, 1994, 1995],
+                               restart_year=1992)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test riparian cells module."""
+
+import unittest
+import numpy as np
+from model.utility import riparian_cells
+
+
+class TestRiparianCells(unittest.TestCase):
+    """Test index of cells of global lake and reservoir units."""
+
+    # creating fixtures
+    def setUp(self):
+        random_generator = np.random.default_rng(3)
+        self.shape = (30, 40)
+        # Units 1 to 50 with cells without unit (0) and outside land (NaN)
+        self.units = random_generator.integers(0, 51, size=self.shape).\
+            astype(np.float64)
+        self.units[0, :] = np.nan
+        land_cells = np.argwhere(np.isfinite(self.units))
+        self.rout_order = random_generator.permutation(land_cells)
+
+    def test_unit_index(self):
+        """Cells of each unit equal a search in the whole grid."""
+        unit_start, unit_cells, cell_unit = \
+            riparian_cells.get_unit_index(self.units)
+
+        unique_units = np.unique(self.units[np.isfinite(self.units)])[1:]
+        self.assertEqual(len(unit_start), len(unique_units) + 1)
+        self.assertEqual(unit_start[-1], len(unit_cells))
+        for unit, unit_value in enumerate(unique_units):
+            np.testing.assert_array_equal(
+                unit_cells[unit_start[unit]:unit_start[unit + 1]],
+                np.argwhere(self.units == unit_value))
+
+        for x in range(self.shape[0]):
+            for y in range(self.shape[1]):
+                expected = np.flatnonzero(unique_units == self.units[x, y])
+                self.assertEqual(cell_unit[x, y],
+                                 expected[0] if len(expected) else -1)
+
+    def test_rout_position(self):
+        """Position of cells of units equals a search in routing order."""
+        _, unit_cells, _ = riparian_cells.get_unit_index(self.units)
+        # Some cells of units are not routed
+        rout_order = self.rout_order[10:]
+        unit_rout_position = \
+            riparian_cells.get_rout_position(unit_cells, rout_order,
+                                             self.shape)
+
+        for (x, y), position in zip(unit_cells, unit_rout_position):
+            expected = np.flatnonzero((rout_order == (x, y)).all(axis=1))
+            self.assertEqual(position, expected[0] if len(expected) else -1)
+        self.assertTrue((unit_rout_position == -1).any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test routing basins module."""
+
+import itertools
+import unittest
+import numpy as np
+from model.lateralwaterbalance import groundwater as gw
+from model.lateralwaterbalance import river
+from model.lateralwaterbalance import routing as rt
+from model.lateralwaterbalance import routing_basins
+from model.utility import riparian_cells
+
+
+def get_river_network(random_generator, shape):
+    """
+    Get random river network of land cells inside the grid border.
+
+    Every cell flows to its lowest neighbour (random elevation) if that is
+    lower, else it flows to the ocean or is an inland sink. Cells are in
+    routing order from highest to lowest.
+
+    """
+    elevation = np.full(shape, np.nan)
+    elevation[1:-1, 1:-1] = random_generator.uniform(size=(shape[0] - 2,
+                                                           shape[1] - 2))
+    rout_order = np.argwhere(np.isfinite(elevation))
+    rout_order = rout_order[np.argsort(-elevation[rout_order[:, 0],
+                                                  rout_order[:, 1]])]
+
+    outflow_cell = np.zeros_like(rout_order)
+    drainage_direction = np.full(shape, np.nan)
+    for cell, (x, y) in enumerate(rout_order):
+        window = elevation[x - 1:x + 2, y - 1:y + 2]
+        lowest = np.unravel_index(np.nanargmin(window), window.shape)
+        if window[lowest] < elevation[x, y]:
+            outflow_cell[cell] = (x - 1 + lowest[0], y - 1 + lowest[1])
+            drainage_direction[x, y] = 1
+        else:
+            # Ocean outlet or inland sink
+            drainage_direction[x, y] = random_generator.choice([0, -1])
+    return rout_order, outflow_cell, drainage_direction
+
+
+class TestRoutingBasins(unittest.TestCase):
+    """Test partition of cells into basins."""
+
+    # creating fixtures
+    def setUp(self):
+        random_generator = np.random.default_rng(3)
+        self.shape = (9, 12)
+        self.rout_order, self.outflow_cell, _ = \
+            get_river_network(random_generator, self.shape)
+        num_cells = len(self.rout_order)
+
+        # Three global lakes or reservoirs (units 1 to 3) of 2 to 4 cells
+        # and a unit without global lake or reservoir (unit 4)
+        self.glwdunits = np.zeros(self.shape)
+        self.swb_area = np.zeros(self.shape)
+        unit_cells = random_generator.permutation(num_cells)[:12]
+        for unit, cells in enumerate(np.split(unit_cells, [2, 5, 9]), 1):
+            x, y = self.rout_order[cells].T
+            self.glwdunits[x, y] = unit
+            if unit < 4:
+                self.swb_area[x[0], y[0]] = 10
+
+        # Up to two neighbouring cells (latitude and longitude index
+        # alternate) for some cells
+        self.neighbourcells = np.zeros((num_cells, 4), dtype=np.int64)
+        for cell in random_generator.permutation(num_cells)[:6]:
+            for neighbour in range(random_generator.integers(1, 3)):
+                self.neighbourcells[cell, 2 * neighbour:2 * neighbour + 2] = \
+                    self.rout_order[random_generator.integers(num_cells)]
+
+    def get_network(self, subtract_use_option, neighbouringcell_option):
+        """Get arguments of get_routing_basins and get_routing_levels."""
+        return (self.rout_order, self.outflow_cell, self.glwdunits,
+                self.swb_area, self.neighbourcells, subtract_use_option,
+                neighbouringcell_option)
+
+    def get_coupled_cells(self, subtract_use_option, neighbouringcell_option):
+        """
+        Get groups of cells which have to be routed in routing order.
+
+        Groups are taken from the grid (brute force search): an outflow cell
+        and its upstream cells, riparian cells of a global lake or reservoir
+        and a cell with its neighbouring cells and the cells it is a
+        neighbouring cell of.
+
+        """
+        cells = {(x, y): cell for cell, (x, y) in enumerate(self.rout_order)}
+        groups = []
+        for x, y in cells:
+            groups.append({cells[(x, y)]} |
+                          {cell for cell, (m, n) in enumerate(self.outflow_cell)
+                           if (m, n) == (x, y)})
+        if subtract_use_option:
+            for unit in np.unique(self.glwdunits[self.swb_area > 0]):
+                groups.append({cells[(x, y)] for x, y in
+                               np.argwhere(self.glwdunits == unit)})
+            if neighbouringcell_option:
+                neighbours = [
+                    {cells[(lat, lon)] for lat, lon in
+                     self.neighbourcells[cell].reshape(-1, 2)
+                     if lat > 0 or lon > 0}
+                    for cell in range(len(self.rout_order))]
+                for cell, cell_neighbours in enumerate(neighbours):
+                    groups.append({cell} | cell_neighbours |
+                                  {demand_cell for demand_cell, demand_neighbours
+                                   in enumerate(neighbours)
+                                   if cell in demand_neighbours})
+        return groups
+
+    def test_basins_are_connected_cells(self):
+        """Cells of a group are in one basin, basins are not connected."""
+        for options in itertools.product((False, True), repeat=2):
+            basin_cells, basin_start = routing_basins.\
+                get_routing_basins(*self.get_network(*options))
+
+            # Every cell in exactly one basin, in routing order
+            np.testing.assert_array_equal(np.sort(basin_cells),
+                                          np.arange(len(self.rout_order)))
+            basin_of_cell = np.empty(len(basin_cells), dtype=np.int64)
+            for basin in range(len(basin_start) - 1):
+                cells = basin_cells[basin_start[basin]:basin_start[basin + 1]]
+                self.assertTrue(np.all(np.diff(cells) > 0))
+                basin_of_cell[cells] = basin
+            # Largest basin first
+            self.assertTrue(np.all(np.diff(np.diff(basin_start)) <= 0))
+
+            # Connected components of groups (brute force)
+            components = [{cell} for cell in range(len(self.rout_order))]
+            for group in self.get_coupled_cells(*options):
+                connected = [component for component in components
+                             if component & group]
+                components = [component for component in components
+                              if not component & group]
+                components.append(set().union(*connected))
+            self.assertEqual(len(components), len(basin_start) - 1)
+            for component in components:
+                self.assertEqual(len(set(basin_of_cell[list(component)])), 1)
+
+    def test_thread_cells(self):
+        """Basins are distributed over threads as a whole."""
+        basin_cells, basin_start = routing_basins.\
+            get_routing_basins(*self.get_network(True, True))
+        thread_cells, thread_start = \
+            routing_basins.get_thread_cells(basin_cells, basin_start, 3)
+
+        np.testing.assert_array_equal(np.sort(thread_cells),
+                                      np.arange(len(self.rout_order)))
+        thread_of_cell = np.empty(len(thread_cells), dtype=np.int64)
+        for thread in range(3):
+            cells = thread_cells[thread_start[thread]:thread_start[thread + 1]]
+            self.assertTrue(np.all(np.diff(cells) > 0))
+            thread_of_cell[cells] = thread
+        for basin in range(len(basin_start) - 1):
+            cells = basin_cells[basin_start[basin]:basin_start[basin + 1]]
+            self.assertEqual(len(set(thread_of_cell[cells])), 1)
+
+    def test_levels(self):
+        """Coupled cells are in increasing levels in routing order."""
+        for options in itertools.product((False, True), repeat=2):
+            level_cells, level_start = routing_basins.\
+                get_routing_levels(*self.get_network(*options))
+
+            np.testing.assert_array_equal(np.sort(level_cells),
+                                          np.arange(len(self.rout_order)))
+            level = np.empty(len(level_cells), dtype=np.int64)
+            for cell_level in range(len(level_start) - 1):
+                cells = level_cells[level_start[cell_level]:
+                                    level_start[cell_level + 1]]
+                self.assertGreater(len(cells), 0)
+                self.assertTrue(np.all(np.diff(cells) > 0))
+                level[cells] = cell_level
+
+            previous_cells = [set() for _ in range(len(self.rout_order))]
+            for group in self.get_coupled_cells(*options):
+                for first, second in itertools.combinations(sorted(group), 2):
+                    self.assertLess(level[first], level[second])
+                    previous_cells[second].add(first)
+            # Level is the longest chain of coupled cells
+            for cell, cells in enumerate(previous_cells):
+                self.assertEqual(level[cell],
+                                 max((level[previous] + 1
+                                      for previous in cells), default=0))
+
+    def test_level_chunks(self):
+        """Levels are split into at most one chunk per thread."""
+        _, level_start = routing_basins.\
+            get_routing_levels(*self.get_network(True, True))
+        chunk_start, level_chunks = \
+            routing_basins.get_level_chunks(level_start, 3)
+
+        self.assertEqual(chunk_start[-1], level_start[-1])
+        self.assertTrue(np.all(np.diff(chunk_start) > 0))
+        for cell_level in range(len(level_start) - 1):
+            chunks = chunk_start[level_chunks[cell_level]:
+                                 level_chunks[cell_level + 1] + 1]
+            self.assertLessEqual(len(chunks) - 1, 3)
+            self.assertEqual(chunks[0], level_start[cell_level])
+            self.assertEqual(chunks[-1], level_start[cell_level + 1])
+
+
+class TestRoutingSchedules(unittest.TestCase):
+    """Test parallel routing against serial routing."""
+
+    # creating fixtures
+    def setUp(self):
+        self.shape = (10, 14)
+        self.rout_order, self.outflow_cell, self.drainage_direction = \
+            get_river_network(np.random.default_rng(7), self.shape)
+        self.basin = np.where(np.isfinite(self.drainage_direction), 0.0,
+                              np.nan)
+
+    def get_routing_inputs(self, wateruse=False):
+        """
+        Get arguments of river_routing of a naturalised run.
+
+        Cells have local lakes and wetlands, global lakes and global wetlands
+        (no reservoirs) at random, such that all water bodies are routed.
+        Arrays of reservoirs and water use are None, unless wateruse is True.
+        Then reservoirs are operated and water use is subtracted with delayed
+        use, but there is no reservoir area and no water use.
+
+        """
+        random_generator = np.random.default_rng(11)
+        shape = self.shape
+
+        def uniform(low, high, fraction_of_cells=1.0):
+            values = random_generator.uniform(low, high, size=shape)
+            return np.where(random_generator.uniform(size=shape) <
+                            fraction_of_cells, values, 0)
+
+        loclake_frac = uniform(0.01, 0.2, 0.5)
+        locwet_frac = uniform(0.01, 0.2, 0.5)
+        glowet_frac = uniform(0.01, 0.2, 0.3)
+        glolake_area = uniform(5, 50, 0.3)
+        glores_area = np.zeros(shape)
+        gw_dis_coeff = np.full(shape, 0.01)
+        river_velocity_invariants = \
+            river.get_velocity_invariants(uniform(0.01, 0.1), np.full(shape,
+                                                                      0.03),
+                                          np.ones(shape), uniform(1e-4, 1e-3))
+
+        if wateruse:
+            glores_capacity = np.zeros(shape)
+            glores_startmonth = np.ones(shape, dtype=np.int32)
+            reservoir_demand = np.zeros(shape)
+            unit_start, unit_cells, cell_unit = \
+                riparian_cells.get_unit_index(np.zeros(shape))
+            wateruse_inputs = \
+                (cell_unit, unit_start, unit_cells,
+                 riparian_cells.get_rout_position(unit_cells, self.rout_order,
+                                                  shape)) + \
+                tuple(np.zeros(shape) for _ in range(9))
+        else:
+            glores_capacity = glores_startmonth = reservoir_demand = None
+            wateruse_inputs = (None,) * 13
+
+        return (self.rout_order, self.outflow_cell, self.drainage_direction,
+                random_generator.integers(0, 2, size=shape).astype(np.float64),
+                uniform(0, 1e-5), uniform(0, 5e-6), uniform(0, 0.01),
+                uniform(0, 0.01), uniform(0, 1), uniform(0, 0.1),
+                uniform(0, 0.1), uniform(0, 0.5), glores_area.copy(),
+                uniform(0, 0.1), uniform(0, 0.5), loclake_frac * 2,
+                locwet_frac * 2, glolake_area * 0.01, glowet_frac * 2,
+                glores_capacity, loclake_frac * 1000, locwet_frac * 1000,
+                glolake_area, glores_area, glowet_frac * 1000, loclake_frac,
+                locwet_frac, glowet_frac, uniform(0, 0.5, 0.3),
+                np.zeros(shape), np.zeros(shape), gw_dis_coeff,
+                gw.get_exp_gw_dis_coeff(gw_dis_coeff), np.full(shape, 20.),
+                np.full(shape, 0.01), np.full(shape, 0.01),
+                np.full(shape, 3.32), np.full(shape, 2.81),
+                np.full(shape, 1.5), np.full(shape, 2.5), np.ones(shape),
+                np.ones(shape), uniform(20, 60)) + \
+            river_velocity_invariants + \
+            (glores_startmonth, np.array([1, 1]), np.full(shape, 0.1),
+             glores_startmonth, reservoir_demand, reservoir_demand,
+             reservoir_demand, np.zeros(shape), 31, reservoir_demand,
+             self.basin, uniform(0.5, 1), uniform(1000, 3000),
+             uniform(0, 1e-3), uniform(0, 0.5), wateruse) + \
+            wateruse_inputs + (None,) * 10
+
+    def route(self, routing, *schedule, wateruse=False):
+        """Route one day with new inputs and outputs."""
+        outputs = tuple(self.basin.copy() for _ in range(42))
+        return routing(*schedule, *self.get_routing_inputs(wateruse), outputs)
+
+    def assert_identical(self, results, reference):
+        """Outputs are identical to the serial routing."""
+        self.assertEqual(len(results), len(reference))
+        for result, expected in zip(results, reference):
+            if expected is None:
+                self.assertIsNone(result)
+            else:
+                np.testing.assert_array_equal(result, expected)
+
+    def test_basins_schedule(self):
+        """Routing of basins in parallel equals serial routing."""
+        reference = self.route(rt.river_routing)
+        self.assertGreater(np.nansum(reference[13]), 0)
+
+        basin_cells, basin_start = routing_basins.\
+            get_routing_basins(self.rout_order, self.outflow_cell,
+                               np.zeros(self.shape), np.zeros(self.shape),
+                               None, False, False)
+        self.assertGreater(len(basin_start) - 1, 3)
+        for num_threads in (1, 3):
+            self.assert_identical(
+                self.route(rt.river_routing_parallel,
+                           *routing_basins.get_thread_cells(
+                               basin_cells, basin_start, num_threads)),
+                reference)
+
+
+    def test_levels_schedule(self):
+        """Routing of levels in parallel equals serial routing."""
+        reference = self.route(rt.river_routing)
+
+        level_cells, level_start = routing_basins.\
+            get_routing_levels(self.rout_order, self.outflow_cell,
+                               np.zeros(self.shape), np.zeros(self.shape),
+                               None, False, False)
+        self.assertGreater(len(level_cells), len(level_start) - 1)
+        for num_threads in (1, 3):
+            self.assert_identical(
+                self.route(rt.river_routing_levels, level_cells,
+                           *routing_basins.get_level_chunks(level_start,
+                                                            num_threads)),
+                reference)
+
+    def test_wateruse_variant(self):
+        """Routing without reservoir area and water use is naturalised."""
+        reference = self.route(rt.river_routing)
+        results = self.route(rt.river_routing, wateruse=True)
+
+        self.assertEqual(len(results), len(reference))
+        for result, expected in zip(results, reference):
+            if expected is not None:
+                np.testing.assert_array_equal(result, expected)
+        # Water use outputs are only given with water use
+        self.assertGreater(sum(output is None for output in reference),
+                           sum(output is None for output in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
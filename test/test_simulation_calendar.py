@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test simulation calendar module."""
+
+import unittest
+import numpy as np
+import pandas as pd
+from controller import simulation_calendar as sc
+
+
+class TestSimulationCalendar(unittest.TestCase):
+    """Test calendar of simulation days."""
+
+    # creating fixtures
+    def setUp(self):
+        # Simulation over leap year 2000 (time coordinate in nanoseconds)
+        self.time = pd.date_range('1999-01-01', '2001-12-31').values
+        self.calendar = sc.SimulationCalendar(self.time, 0)
+
+    def test_dates(self):
+        """Year, month and day are those of the dates."""
+        dates = pd.Series(self.time).dt
+        np.testing.assert_array_equal(self.calendar.year, dates.year)
+        np.testing.assert_array_equal(self.calendar.month, dates.month)
+        np.testing.assert_array_equal(self.calendar.day, dates.day)
+        np.testing.assert_array_equal(self.calendar.day_of_year,
+                                      dates.dayofyear)
+
+        leap_day = self.calendar.get_day_index('2000-02-29')
+        self.assertEqual(self.calendar.dates[leap_day],
+                         np.datetime64('2000-02-29'))
+        self.assertEqual(self.calendar.day_of_year[leap_day + 306], 366)
+        # February has 28 days also in leap years
+        self.assertEqual(self.calendar.days_in_month[leap_day], 28)
+
+    def test_first_of_month_and_year_end(self):
+        """Flags are set on first days of months and on 31 December."""
+        first_days = np.flatnonzero(self.calendar.is_first_of_month)
+        self.assertEqual(len(first_days), 36)
+        np.testing.assert_array_equal(self.calendar.day[first_days], 1)
+
+        year_ends = np.flatnonzero(self.calendar.is_year_end)
+        np.testing.assert_array_equal(self.calendar.dates[year_ends],
+                                      np.array(['1999-12-31', '2000-12-31',
+                                                '2001-12-31'],
+                                               dtype='datetime64[D]'))
+        # Leap year has 366 days
+        np.testing.assert_array_equal(np.diff(year_ends), [366, 365])
+
+    def test_spin_up(self):
+        """Replayed first year has the flags of the first year."""
+        # Spin-up replays day indices of first simulation year
+        spin_end = 1 + self.calendar.get_day_index('1999-12-31')
+        spin_up_days = range(0, spin_end)
+        self.assertEqual(
+            self.calendar.is_first_of_month[spin_up_days].sum(), 12)
+        self.assertTrue(self.calendar.is_year_end[spin_end - 1])
+        self.assertEqual(self.calendar.is_year_end[spin_up_days].sum(), 1)
+
+    def test_restart_in_month(self):
+        """First simulated day of a restart run is first of its month."""
+        calendar = sc.SimulationCalendar(
+            pd.date_range('2000-02-15', '2000-03-02').values, 0)
+        np.testing.assert_array_equal(
+            np.flatnonzero(calendar.is_first_of_month), [0, 15])
+        self.assertFalse(calendar.is_year_end.any())
+
+    def test_reservoir_years(self):
+        """Reservoir years are flagged on their first day."""
+        calendar = sc.SimulationCalendar(
+            self.time, np.array(['2000-01-01', '2005-01-01'],
+                                dtype='datetime64[ns]'))
+        np.testing.assert_array_equal(
+            np.flatnonzero(calendar.is_reservoir_year),
+            [calendar.get_day_index('2000-01-01')])
+        self.assertFalse(self.calendar.is_reservoir_year.any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -111,3 +111,47 @@ class TestSnow(unittest.TestCase):
             (np.nanmin(self.snow_data["snow_water_storage"]) >= self.snow_water_storage_min) &
             (np.nanmax(self.snow_data["snow_water_storage"]) <= self.snow_water_storage_max)
         )
+
+
+class TestSnowFreeCell(unittest.TestCase):
+    """Test snow water balance of snow free cells (subgrids skipped)."""
+
+    def setUp(self):
+        # Mean elevation and 100 subgrid elevations, Units: m
+        self.elevation = np.concatenate(([500.0],
+                                         np.linspace(100, 1500, 100)))
+        self.adiabatic_lapse_rate = 0.006  # K/m
+        self.snow_freeze_temp = 273.15  # K
+        self.snow_melt_temp = 273.15  # K
+
+    def snow_water_balance(self, snow_water_storage_subgrid, temperature):
+        """Compute snow water balance of one cell."""
+        return swe.snow_water_balance(
+            np.mean(snow_water_storage_subgrid), snow_water_storage_subgrid,
+            temperature, 5.0, 4.2, 2.0, 0.1, 1.5, 0.9, 1.0, self.elevation,
+            0.0, self.adiabatic_lapse_rate, self.snow_freeze_temp,
+            self.snow_melt_temp, 1e-15, 0, 0)
+
+    def test_snow_free_cell(self):
+        """Throughfall of snow free cells becomes effective precipitation."""
+        result = self.snow_water_balance(np.zeros(100), 290.0)
+
+        self.assertTrue(result[10])
+        self.assertEqual(result[0], 0)
+        self.assertTrue(np.all(result[1] == 0))
+        self.assertEqual(result[2], 0)
+        self.assertEqual(result[3], 0)
+        self.assertEqual(result[4], 0)
+        self.assertAlmostEqual(result[5], 4.2)
+        self.assertAlmostEqual(result[6], 290.0 + 400 * 0.006)
+        self.assertEqual(result[9], 0)
+
+    def test_cold_or_snow_covered_cell(self):
+        """Cells with snow or a cold subgrid compute all subgrids."""
+        # Highest subgrid is below snow freeze temperature.
+        self.assertFalse(self.snow_water_balance(np.zeros(100), 276.0)[10])
+
+        snow_water_storage_subgrid = np.zeros(100)
+        snow_water_storage_subgrid[-1] = 10.0
+        self.assertFalse(
+            self.snow_water_balance(snow_water_storage_subgrid, 290.0)[10])
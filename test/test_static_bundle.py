@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test static bundle module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import xarray as xr
+from controller import configuration_module as cm
+from controller import static_bundle as sb
+
+
+class TestStaticBundle(unittest.TestCase):
+    """Test memory-mapped static data bundle."""
+
+    # creating fixtures
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        # Bundle is written to the static data folder
+        patcher = mock.patch.object(cm, 'static_land_data_path',
+                                    self.tempdir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Static files (only fingerprint is used)
+        self.static_file_paths = {}
+        for name in ('land_cover', 'rout_order', 'soil', 'resyear_frac'):
+            file_path = os.path.join(self.tempdir, name + '.nc')
+            with open(file_path, 'w', encoding="utf-8") as file:
+                file.write(name)
+            self.static_file_paths[name] = file_path
+
+        # Grid (3, 4) with three land cells
+        lat, lon = np.arange(3), np.arange(4)
+        land_cover = np.full((3, 4), np.nan, dtype=np.float32)
+        land_cover[[0, 1, 2], [1, 2, 3]] = [1, 2, 3]
+
+        # Soil with same value outside land (compressed) and capacity with
+        # different values outside land (stored on grid)
+        soil = xr.Dataset({'soil': (('time', 'lat', 'lon'),
+                                    land_cover[np.newaxis] * 2,
+                                    {'units': 'mm'}),
+                           'capacity': (('lat', 'lon'),
+                                        np.arange(12.).reshape(3, 4))},
+                          coords={'lat': lat, 'lon': lon},
+                          attrs={'title': 'soil', 'version': np.int32(2)})
+        resyear_frac = xr.Dataset(
+            {'resyear_frac': (('time', 'lat', 'lon'),
+                              np.random.default_rng(0).uniform(
+                                  0, 1, (5, 3, 4)))},
+            coords={'lat': lat, 'lon': lon})
+
+        self.static_data = {
+            'land_cover': land_cover,
+            'rout_order': pd.DataFrame({'Lat_index_routorder': [2, 0, 1],
+                                        'Lon_index_routorder': [3, 1, 2],
+                                        'name': ['a', 'b', 'c']}),
+            'soil': soil,
+            'resyear_frac': resyear_frac}
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_bundle_equals_static_data(self):
+        """Static data read from bundle equals static data written."""
+        self.assertIsNone(sb.open_static_bundle(self.static_file_paths))
+        sb.write_static_bundle(self.static_data, self.static_file_paths)
+        static_bundle = sb.open_static_bundle(self.static_file_paths)
+
+        soil_entry = static_bundle.manifest['static_data']['soil']
+        self.assertIsNotNone(
+            soil_entry['variables']['soil']['array']['fill_bits'])
+        self.assertIsNone(
+            soil_entry['variables']['capacity']['array']['fill_bits'])
+
+        static_data = static_bundle.get_static_data()
+        np.testing.assert_array_equal(static_data['land_cover'],
+                                      self.static_data['land_cover'])
+        self.assertEqual(static_data['land_cover'].dtype, np.float32)
+        pd.testing.assert_frame_equal(static_data['rout_order'],
+                                      self.static_data['rout_order'])
+        xr.testing.assert_identical(static_data['soil'],
+                                    self.static_data['soil'])
+        xr.testing.assert_equal(static_data['resyear_frac'],
+                                self.static_data['resyear_frac'])
+        self.assertEqual(static_bundle.verify(), [])
+
+    def test_corrupted_bundle(self):
+        """Arrays which do not match their hash are reported."""
+        bundle_path = sb.write_static_bundle(self.static_data,
+                                             self.static_file_paths)
+        capacity_entry = sb.open_static_bundle(self.static_file_paths).\
+            manifest['static_data']['soil']['variables']['capacity']['array']
+
+        with open(bundle_path / 'static_bundle.bin', 'r+b') as bundle_file:
+            bundle_file.seek(capacity_entry['offset'])
+            bundle_file.write(b'\1')
+        self.assertEqual(
+            sb.open_static_bundle(self.static_file_paths).verify(), ['soil'])
+
+    def test_bundle_key_of_changed_files(self):
+        """Bundle has to be built again if static files change."""
+        sb.write_static_bundle(self.static_data, self.static_file_paths)
+        with open(self.static_file_paths['soil'], 'a',
+                  encoding="utf-8") as file:
+            file.write('changed')
+        self.assertIsNone(sb.open_static_bundle(self.static_file_paths))
+
+    def test_fill_bits(self):
+        """Common value of cells outside land includes NaN."""
+        self.assertEqual(sb.get_fill_bits(np.full(3, np.nan)),
+                         np.array(np.nan).view(np.uint64))
+        self.assertEqual(sb.get_fill_bits(np.zeros(2, dtype=np.int32)), 0)
+        self.assertIsNone(sb.get_fill_bits(np.array([0., 1.])))
+        self.assertIsNone(sb.get_fill_bits(np.array(['a', 'a'])))
+
+
+if __name__ == '__main__':
+    unittest.main()
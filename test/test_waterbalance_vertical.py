@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test vertical water balance kernels."""
+
+
+import unittest
+import numpy as np
+from model.verticalwaterbalance import waterbalance_vertical as vb_numba
+from model.verticalwaterbalance import radiation_evapotranspiration as rad_pet
+
+
+class TestVerticalWaterBalance(unittest.TestCase):
+    """Test serial and parallel vertical water balance."""
+
+    # creating fixtures
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        size = (6, 8)
+        num_subgrid = 100
+
+        def uniform(low, high):
+            return rng.uniform(low, high, size=size)
+
+        # All cells of the grid in routing order, one cell outside of basin
+        self.rout_order = np.argwhere(np.ones(size, dtype=bool))
+        rng.shuffle(self.rout_order)
+        self.basin = np.zeros(size)
+        self.basin[0, 0] = np.nan
+        num_cells = len(self.rout_order)
+
+        # Cold and warm cells, half of the cells with snow storage
+        temperature = uniform(255, 295)  # K
+        snow_water_storage_subgrid = \
+            rng.uniform(0, 50, size=(num_cells, num_subgrid))  # mm
+        snow_water_storage_subgrid[::2] = 0
+        snow_water_storage = np.zeros(size)
+        for cell, (x, y) in enumerate(self.rout_order):
+            snow_water_storage[x, y] = snow_water_storage_subgrid[cell].mean()
+
+        mean_elevation = rng.uniform(0, 2000, size=num_cells)  # m
+        elevation = np.empty((num_cells, num_subgrid + 1))
+        elevation[:, 0] = mean_elevation
+        elevation[:, 1:] = mean_elevation[:, None] + \
+            np.linspace(-500, 500, num_subgrid)[None, :]
+
+        current_landarea_frac = uniform(0.2, 1)  # -
+        current_landarea_frac[1, 1] = 0
+        self.current_landarea_frac = current_landarea_frac
+        self.snow_water_storage = snow_water_storage
+
+        terms = rad_pet.compute_temperature_terms(
+            self.rout_order, temperature,
+            *[np.zeros(size) for _ in range(4)])
+
+        self.inputs = (
+            temperature, uniform(0, 300), uniform(150, 400), *terms,
+            snow_water_storage,
+            np.full(size, 3.0),  # snow_albedo_thresh (mm)
+            np.full(size, 0.08),  # openwater_albedo (-)
+            np.full(size, 0.6),  # snow_albedo (-)
+            uniform(0.1, 0.25),  # albedo (-)
+            np.full(size, 0.95),  # emissivity (-)
+            np.floor(uniform(1, 3)),  # humid_arid (-)
+            np.full(size, 1.26),  # pt_coeff_humid_arid (-)
+            np.floor(uniform(0, 2)),  # growth_status (-)
+            np.floor(uniform(0, 60)),  # lai_days (days)
+            np.full(size, 10.0),  # initial_days (days)
+            uniform(0, 20),  # cum_precipitation (mm)
+            uniform(0, 20),  # precipitation (mm/day)
+            np.full(size, 0.5),  # min_leaf_area_index (-)
+            np.full(size, 4.0),  # max_leaf_area_index (-)
+            np.floor(uniform(1, 11)),  # land_cover (-)
+            uniform(0, 1),  # canopy_storage (mm)
+            current_landarea_frac,
+            np.ones(size),  # landareafrac_ratio (-)
+            np.full(size, 0.3),  # max_storage_coefficient (mm)
+            1e-15,  # minstorage_volume (mm)
+            np.zeros(size),  # daily_storage_transfer (mm/day)
+            snow_water_storage_subgrid,
+            uniform(1.5, 6),  # degreeday (mm/day/°C)
+            elevation,
+            np.full(size, 0.006),  # adiabatic_lapse_rate (K/m)
+            np.full(size, 273.15),  # snow_freeze_temp (K)
+            np.full(size, 273.15),  # snow_melt_temp (K)
+            np.full(size, 0.5),  # runoff_frac_builtup (-)
+            uniform(0, 0.1),  # builtup_area_frac (-)
+            uniform(0, 100),  # soil_water_content (mm)
+            np.full(size, 2.0),  # gamma (-)
+            np.full(size, 15.0),  # max_daily_pet (mm/day)
+            np.floor(uniform(10, 30)),  # soil_texture (-)
+            np.floor(uniform(0, 100)),  # drainage_direction (-)
+            uniform(1, 7),  # max_groundwater_recharge (mm/day)
+            uniform(0.1, 1),  # groundwater_recharge_factor (-)
+            np.full(size, 12.5),  # critcal_gw_precipitation (mm/day)
+            uniform(100, 300),  # max_soil_water_content (mm)
+            np.ones(size),  # areal_corr_factor (-)
+            self.basin)
+
+    def copy_inputs(self):
+        """Copy inputs, since states are updated in place."""
+        return tuple(value.copy() if isinstance(value, np.ndarray) else value
+                     for value in self.inputs)
+
+    def test_parallel_equals_serial(self):
+        """
+        Test if the parallel kernel gives the results of the serial kernel.
+
+        Returns
+        -------
+        None.
+        """
+        serial = vb_numba.vert_water_balance(self.rout_order,
+                                             *self.copy_inputs())
+
+        for num_chunks in (1, 3, 7):
+            inputs = self.copy_inputs()
+            outputs = vb_numba.create_outputs(inputs[23], inputs[7],
+                                              inputs[29], inputs[37],
+                                              self.basin)
+            cell_chunks = vb_numba.\
+                get_cell_chunks(self.rout_order, self.current_landarea_frac,
+                                self.snow_water_storage, 100, num_chunks)
+            parallel = vb_numba.\
+                vert_water_balance_parallel(self.rout_order, cell_chunks,
+                                            *inputs, outputs)
+
+            self.assertEqual(len(serial), len(parallel))
+            for index, (expected, result) in enumerate(zip(serial,
+                                                           parallel)):
+                with self.subTest(num_chunks=num_chunks, output=index):
+                    self.assertTrue(np.array_equal(expected, result,
+                                                   equal_nan=True))
+
+        # Snow free cells are counted (last output)
+        self.assertGreater(serial[-1], 0)
+        self.assertLess(serial[-1], len(self.rout_order) - 1)
+
+    def test_cell_chunks(self):
+        """
+        Test chunk boundaries of cells weighted by snow storage.
+
+        Returns
+        -------
+        None.
+        """
+        rout_order = np.argwhere(np.ones((1, 6), dtype=bool))
+        landarea_frac = np.ones((1, 6))
+        snow_water_storage = np.array([[1., 1., 0., 0., 0., 0.]])
+
+        # Cost of cells is 4, 4, 1, 1, 1, 1
+        cell_chunks = vb_numba.get_cell_chunks(rout_order, landarea_frac,
+                                               snow_water_storage, 3, 3)
+        np.testing.assert_array_equal(cell_chunks, [0, 1, 2, 6])
+
+        # Cells without land area are not weighted
+        landarea_frac[0, 1] = 0
+        cell_chunks = vb_numba.get_cell_chunks(rout_order, landarea_frac,
+                                               snow_water_storage, 3, 3)
+        np.testing.assert_array_equal(cell_chunks, [0, 1, 3, 6])
+
+        # Chunks cover routing order if there are more chunks than cells
+        cell_chunks = vb_numba.get_cell_chunks(rout_order, landarea_frac,
+                                               snow_water_storage, 3, 8)
+        self.assertEqual(cell_chunks[0], 0)
+        self.assertEqual(cell_chunks[-1], len(rout_order))
+        self.assertTrue(np.all(np.diff(cell_chunks) >= 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
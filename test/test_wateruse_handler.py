@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test water use handler module."""
+
+import unittest
+from unittest import mock
+import numpy as np
+import xarray as xr
+from controller import input_provider as ip
+from controller import wateruse_handler as wu
+from model.utility import riparian_cells
+
+
+class TestDailyWateruse(unittest.TestCase):
+    """Test cache of daily water use per month."""
+
+    # creating fixtures
+    def setUp(self):
+        # Two years of monthly water use on a grid (3, 4)
+        time = np.arange(np.datetime64('1990-01'), np.datetime64('1992-01'))
+        random_generator = np.random.default_rng(5)
+        wateruse = [random_generator.uniform(-1e6, 1e6, (len(time), 3, 4))
+                    for _ in range(4)]
+        # Net abstraction from surface water of cells of the unit (see
+        # below) in January 1990, Unit: [m3/month]
+        wateruse[1][0, 0, 1:] = [1e6, 2e6, 3e6]
+        self.provider = ip.ArrayWateruseProvider(*wateruse, time)
+
+        grid_coords = {'lat': xr.DataArray(np.arange(3)),
+                       'lon': xr.DataArray(np.arange(4))}
+        self.wateruse = wu.Wateruse(False, grid_coords, False, self.provider)
+
+        # One global lake or reservoir unit of three cells (0 and fill value
+        # are not units)
+        glwdunits = np.zeros((3, 4))
+        glwdunits[0, 1:] = 7
+        glwdunits[2, 3] = 1e20
+        self.wateruse.unit_start, self.wateruse.unit_cells, \
+            self.wateruse.cell_unit = riparian_cells.get_unit_index(glwdunits)
+
+        self.lake_area = np.zeros((3, 4))
+        self.lake_area[0, 1] = 10  # km2
+        self.res_area = np.zeros((3, 4))
+        self.res_area[1, 1] = np.nan
+
+    def get_daily_wateruse(self, year, month, lake_area, res_area):
+        """Get daily water use and number of months read from provider."""
+        with mock.patch.object(self.provider, 'get_month',
+                               wraps=self.provider.get_month) as get_month:
+            daily_wateruse = self.wateruse.\
+                get_daily_wateruse(year, month, 31, lake_area, res_area)
+        return daily_wateruse, get_month.call_count
+
+    def test_repeated_month(self):
+        """A repeated month returns the cached arrays."""
+        daily_wateruse, num_reads = \
+            self.get_daily_wateruse(1990, 1, self.lake_area, self.res_area)
+        self.assertEqual(num_reads, 1)
+
+        # Equal areas (also new arrays with NaN) reuse the cached month
+        repeated, num_reads = \
+            self.get_daily_wateruse(1990, 1, self.lake_area.copy(),
+                                    self.res_area.copy())
+        self.assertEqual(num_reads, 0)
+        self.assertIs(repeated, daily_wateruse)
+        for name in ('net_abstraction_gw', 'net_abstraction_sw'):
+            self.assertIs(repeated[name], daily_wateruse[name])
+
+        # Other months and years are read
+        _, num_reads = \
+            self.get_daily_wateruse(1990, 2, self.lake_area, self.res_area)
+        self.assertEqual(num_reads, 1)
+        _, num_reads = \
+            self.get_daily_wateruse(1991, 1, self.lake_area, self.res_area)
+        self.assertEqual(num_reads, 1)
+
+    def test_changed_area(self):
+        """A changed lake or reservoir area aggregates the month again."""
+        daily_wateruse, _ = \
+            self.get_daily_wateruse(1990, 1, self.lake_area, self.res_area)
+
+        # Cached areas are copies, changes in place are detected
+        self.res_area[0, 3] = 5  # km2
+        changed, num_reads = \
+            self.get_daily_wateruse(1990, 1, self.lake_area, self.res_area)
+        self.assertEqual(num_reads, 1)
+        self.assertIsNot(changed, daily_wateruse)
+
+        # Net abstraction of the unit is aggregated to the last outflow cell
+        daily_unit_sum = 6e6 / (31 * 1e9)  # km3/day
+        np.testing.assert_allclose(daily_wateruse['net_abstraction_sw'][0, 1:],
+                                   [daily_unit_sum, 0, 0])
+        np.testing.assert_allclose(changed['net_abstraction_sw'][0, 1:],
+                                   [0, 0, daily_unit_sum])
+
+        new_lake_area = self.lake_area.copy()
+        new_lake_area[0, 1] = 0
+        new_lake_area[0, 2] = 10  # km2
+        _, num_reads = \
+            self.get_daily_wateruse(1990, 1, new_lake_area, self.res_area)
+        self.assertEqual(num_reads, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# This file is part of WaterGAP.
+
+# WaterGAP is an opensource software which computes water flows and storages as
+# well as water withdrawals and consumptive uses on all continents.
+
+# You should have received a copy of the LGPLv3 License along with WaterGAP.
+# if not see <https://www.gnu.org/licenses/lgpl-3.0>
+# =============================================================================
+"""Test workspace module."""
+
+import unittest
+import numpy as np
+from model.utility import workspace as ws
+
+
+class TestWorkspace(unittest.TestCase):
+    """Test preallocated arrays of the water balance."""
+
+    # creating fixtures
+    def setUp(self):
+        self.workspace = ws.Workspace()
+        self.basin = np.zeros((2, 3), dtype=np.float32)
+        self.basin[0, 0] = np.nan
+
+    def test_buffer_reuse(self):
+        """Buffers are created once per name as copy of like."""
+        buffer = self.workspace.get('flux', self.basin, np.float64)
+        self.assertEqual(buffer.dtype, np.float64)
+        self.assertTrue(np.isnan(buffer[0, 0]))
+
+        buffer[:] = 1
+        self.assertIs(self.workspace.get('flux', self.basin), buffer)
+        self.assertIsNot(self.workspace.get('other', self.basin), buffer)
+        # Data type of like by default
+        self.assertEqual(self.workspace.get('other', self.basin).dtype,
+                         np.float32)
+        self.assertEqual(self.workspace.nbytes(), 6 * 8 + 6 * 4)
+
+    def test_state_double_buffering(self):
+        """Next state is never written to the buffer of the current state."""
+        initial_state = np.arange(6.).reshape(2, 3)
+        next_state = self.workspace.get_state('storage', initial_state)
+        self.assertIsNot(next_state, initial_state)
+        np.testing.assert_array_equal(next_state, initial_state)
+
+        next_state += 1
+        other_state = self.workspace.get_state('storage', next_state)
+        self.assertIsNot(other_state, next_state)
+        self.assertIs(self.workspace.get_state('storage', other_state),
+                      next_state)
+
+    def test_state_reset(self):
+        """Buffers are reset to states set outside the water balance."""
+        state = np.ones((2, 3))
+        self.workspace.get_state('storage', state)
+
+        # e.g. restart state
+        restart_state = np.full((2, 3), 5.)
+        next_state = self.workspace.get_state('storage', restart_state,
+                                              self.basin)
+        self.assertTrue(np.isnan(next_state[0, 0]))
+        self.assertEqual(next_state[1, 2], 5)
+        for buffer in self.workspace.states['storage']:
+            np.testing.assert_array_equal(buffer, next_state)
+
+    def test_where(self):
+        """Preallocated where equals np.where."""
+        condition = np.array([True, False, True])
+        x = np.array([1., 2., 3.])
+        out = np.array([7., 8., 9.])
+        expected = np.where(condition, x, out)
+        self.assertIs(ws.where(condition, x, out, out), out)
+        np.testing.assert_array_equal(out, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()